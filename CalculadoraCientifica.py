@@ -122,6 +122,7 @@ class Calculator:
             cnt = 0
             
                             
-root = tk.Tk()
-Calculator(root)
-root.mainloop()
+if __name__ == "__main__":
+    root = tk.Tk()
+    Calculator(root)
+    root.mainloop()
@@ -5,9 +5,22 @@
   - Envia caracteres/atalhos compatíveis com seu app Tkinter
   - ÷ -> '/', × -> '*', − -> '-'
   - '=' -> Enter, 'BS' -> Backspace, 'C' -> Esc
+
+  Protocolo serial (USE_SERIAL_PROTOCOL 1, padrão):
+  - cada tecla vira UM quadro de 4 bytes na serial USB (CDC):
+      [0xA5] [seq] [id] [seq ^ id ^ 0x5A]
+  - id = linha * 7 + coluna + 1 (1..35); o app (keypad.py) traduz o id
+    no token ("sin(", "7", "=" ...), então "sin(" chega como uma tecla só
+  - id 0 = HELLO, enviado ao ligar (o host zera a contagem de seq)
+  - seq conta de 0 a 255 e dá a volta; buraco na seq = quadro perdido
+  Com USE_SERIAL_PROTOCOL 0 volta o modo teclado HID (caractere a caractere).
 */
 
+#define USE_SERIAL_PROTOCOL 1
+
+#if !USE_SERIAL_PROTOCOL
 #include <Keyboard.h>
+#endif
 
 // ===== PINAGEM =====
 const uint8_t ROWS = 5;
@@ -31,6 +44,23 @@ struct KeyState {
 KeyState keys[ROWS][COLS];
 uint32_t lastScan = 0;
 
+// ===== Protocolo serial =====
+const uint8_t FRAME_SYNC = 0xA5;
+const uint8_t FRAME_XOR = 0x5A;
+const uint8_t TOKEN_HELLO = 0;
+uint8_t frameSeq = 0;
+
+void sendToken(uint8_t id) {
+  uint8_t frame[4] = {FRAME_SYNC, frameSeq, id, (uint8_t)(frameSeq ^ id ^ FRAME_XOR)};
+  // Sem espaço no buffer CDC (host parado), descarta em vez de travar a varredura;
+  // a seq avança mesmo assim e o host percebe a perda
+  if (Serial.availableForWrite() >= 4) {
+    Serial.write(frame, 4);
+  }
+  frameSeq++;
+}
+
+#if !USE_SERIAL_PROTOCOL
 // ===== Helpers HID =====
 void sendString(const char* s) {
   if (!s) return;
@@ -45,7 +75,7 @@ void sendBackspace()  { Keyboard.write(KEY_BACKSPACE); }
 void sendEsc()        { Keyboard.write(KEY_ESC); }
 
 // ===== Mapear tecla pressionada (r,c) =====
-void onKeyPress(uint8_t r, uint8_t c) {
+void onKeyPressHID(uint8_t r, uint8_t c) {
   // ---- LINHA 0 ----
   if (r == 0 && c == 0) { sendString("7"); return; }
   if (r == 0 && c == 1) { sendString("8"); return; }
@@ -91,6 +121,15 @@ void onKeyPress(uint8_t r, uint8_t c) {
   if (r == 4 && c == 5) { sendString("nPr("); return; }
   if (r == 4 && c == 6) { sendString("fact("); return; }
 }
+#endif
+
+void onKeyPress(uint8_t r, uint8_t c) {
+#if USE_SERIAL_PROTOCOL
+  sendToken(r * COLS + c + 1);   // tabela de tokens fica no host (keypad.py)
+#else
+  onKeyPressHID(r, c);
+#endif
+}
 
 // ===== Setup =====
 void setup() {
@@ -103,7 +142,12 @@ void setup() {
     pinMode(rowPins[r], INPUT);
   }
 
+#if USE_SERIAL_PROTOCOL
+  Serial.begin(115200);   // CDC ignora o baud, mas o begin é obrigatório
+  sendToken(TOKEN_HELLO);
+#else
   Keyboard.begin();
+#endif
 }
 
 // ===== Loop =====
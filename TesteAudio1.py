@@ -1,20 +1,34 @@
-import pygame
-import pyttsx3
+import os
 import time
 
+import pygame
+
+import tts_backends
+
 # === Configuração de sons ===
+# 22050 Hz mono: o formato do PCM do espeak-ng (motor "espeak")
+pygame.mixer.pre_init(frequency=22050, size=-16, channels=1, buffer=256)
 pygame.mixer.init()
 som_tecla = pygame.mixer.Sound("Pyth/beep.wav")  # coloque um arquivo de beep na pasta
 
 # === Configuração da voz ===
-engine = pyttsx3.init()
-engine.setProperty("rate", 180)   # velocidade da fala
-engine.setProperty("volume", 1.0) # volume máximo
+# CALC_TTS=pyttsx3|espeak|null escolhe o motor (tts_backends.py); auto usa o desta máquina
+engine = tts_backends.create(os.environ.get("CALC_TTS", "auto"), rate=180, volume=1.0)
+engine.startLoop(False)           # loop externo: o áudio anda a cada engine.iterate()
+pendentes = [0]                   # falas pedidas que ainda não terminaram
+engine.connect("finished-utterance", lambda nome, completou: pendentes.__setitem__(0, pendentes[0] - 1))
 
-# Função para falar
+# Função para falar: pede a fala e volta na hora (sem runAndWait)
 def falar(texto):
+    pendentes[0] += 1
     engine.say(texto)
-    engine.runAndWait()
+
+# Espera sem travar a fala: o motor anda em passos de 10 ms
+def esperar(segundos):
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        engine.iterate()
+        time.sleep(0.01)
 
 # Simulação de calculadora
 def main():
@@ -24,25 +38,28 @@ def main():
     som_tecla.play()
     print("Tecla: 1")
     falar("what your name?")
-    time.sleep(0.5)
+    esperar(0.5)
 
     # Pressionando "+"
     som_tecla.play()
     print("Tecla: +")
     falar("mais")
-    time.sleep(0.5)
+    esperar(0.5)
 
     # Pressionando "2"
     som_tecla.play()
     print("Tecla: 2")
     falar("dois")
-    time.sleep(0.5)
+    esperar(0.5)
 
     # Pressionando "="
     som_tecla.play()
     print("Resultado da expressão:", expressao)
     resultado = eval(expressao)  # calcula expressão matemática
     falar(f"resultado: {resultado}")
+    while pendentes[0] > 0:
+        esperar(0.05)
+    engine.endLoop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,175 @@
+"""
+Benchmark de integrate, solve e deriv (calculus.py) contra o laço ingênuo.
+
+O laço ingênuo é o que se faria sem eles: uma chamada de
+CalcEngine.evaluate por ponto, com o valor de x colado no texto da
+expressão (Simpson com N intervalos, bissecção, diferença central). O
+caminho novo compila a expressão uma vez e avalia lotes de pontos de uma
+vez (NumPy), com Gauss-Kronrod adaptativo, multisseção e Ridders.
+
+Para cada caso mostra tempo, pontos avaliados e erro contra o valor exato.
+Os tempos são o melhor de REPEAT rodadas, cada uma com o cache de código
+limpo (como uma conta recém-digitada: o laço ingênuo compila cada ponto,
+o caminho novo compila a expressão uma vez).
+
+O que esperar: integrate ganha de longe (dezenas de vezes, com menos
+pontos e erro menor); solve ganha poucas vezes, porque a bissecção pede
+só ~35 pontos e a varredura inicial de solve (129 pontos, para achar a
+primeira troca de sinal) pesa; deriv é mais lento que a diferença central
+simples (20-40 pontos contra 2) - o que ele compra é o erro, que cai de
+1e-5..1e-11 para ~1e-15, sem escolher h à mão.
+
+Uso: python bench/bench_calculus.py [intervalos do Simpson]
+"""
+import math
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from calc_core import CalcEngine  # noqa: E402
+
+_X = re.compile(r"\bx\b")
+
+# (expressão em x, a, b, integral exata)
+INTEGRALS = [
+    ("x^2", 0, 1, 1 / 3),
+    ("sin(x)^2 * exp(-x/5)", 0, 10, None),
+    ("exp(-x^2)", -10, 10, math.sqrt(math.pi)),
+    ("sqrt(x)", 0, 1, 2 / 3),
+    ("1/(1 + 25*x^2)", -1, 1, 0.4 * math.atan(5)),
+]
+# (expressão, a, b, raiz exata)
+ROOTS = [
+    ("x^2 - 2", 0, 2, math.sqrt(2)),
+    ("cos(x) - x", 0, 1, 0.7390851332151607),
+    ("exp(x) - 10", 0, 5, math.log(10)),
+]
+# (expressão, x0, derivada exata)
+DERIVS = [
+    ("sin(x)", 1, math.cos(1)),
+    ("ln(x)", 0.001, 1000.0),
+    ("x^3", 2, 12.0),
+]
+
+
+class Naive:
+    """Uma chamada de evaluate por ponto, com x substituído no texto."""
+
+    def __init__(self, engine, expr):
+        self.engine = engine
+        self.expr = expr
+        self.calls = 0
+
+    def __call__(self, x):
+        self.calls += 1     # soma as REPEAT rodadas; main divide
+        return self.engine.evaluate(_X.sub(f"({x!r})", self.expr))
+
+
+def naive_simpson(f, a, b, n):
+    h = (b - a) / n
+    total = f(a) + f(b)
+    for i in range(1, n):
+        total += (4 if i % 2 else 2) * f(a + i * h)
+    return total * h / 3
+
+
+def naive_bisect(f, a, b, tol=1e-10):
+    fa = f(a)
+    while b - a > tol:
+        m = (a + b) / 2
+        fm = f(m)
+        if (fm > 0) == (fa > 0):
+            a, fa = m, fm
+        else:
+            b = m
+    return (a + b) / 2
+
+
+def naive_deriv(f, x0, h=1e-5):
+    return (f(x0 + h) - f(x0 - h)) / (2 * h)
+
+
+REPEAT = 5
+
+
+def _timed(engine, fn):
+    """(resultado, melhor tempo em REPEAT rodadas), cada uma com o cache de código limpo."""
+    best = math.inf
+    for _ in range(REPEAT):
+        engine.cache_clear()
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def _error(got, want):
+    return "" if want is None else f"{abs(got - want) / max(1.0, abs(want)):.1e}"
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    engine = CalcEngine()
+    engine.mode = "RAD"
+    engine.evaluate("integrate(x, x, 0, 1)")      # importa o NumPy antes de medir
+
+    counted = {"n": 0}
+    body_function = engine._body_function
+
+    def counting(body):
+        f = body_function(body)
+
+        def g(xs):
+            counted["n"] += len(xs)
+            return f(xs)
+        return g
+    engine._body_function = counting
+
+    def new(expr):
+        counted["n"] = 0
+        value, dt = _timed(engine, lambda: engine.evaluate(expr))
+        return value, dt, counted["n"] // REPEAT
+
+    header = f"  {'':<26}{'tempo':>10}{'pontos':>9}{'erro':>10}"
+    print(f"integral (Simpson ingênuo com {n} intervalos):")
+    print(header)
+    for expr, a, b, want in INTEGRALS:
+        f = Naive(engine, expr)
+        slow, dt_slow = _timed(engine, lambda: naive_simpson(f, a, b, n))
+        fast, dt_fast, pts = new(f"integrate({expr}, x, {a}, {b})")
+        if want is None:
+            want = fast
+        print(f"  {expr:<26}")
+        print(f"    {'laço ingênuo':<22}{dt_slow * 1e3:>8.1f}ms{f.calls // REPEAT:>9}{_error(slow, want):>10}")
+        print(f"    {'integrate':<22}{dt_fast * 1e3:>8.2f}ms{pts:>9}{_error(fast, want):>10}"
+              f"   {dt_slow / dt_fast:.0f}×")
+
+    print("\nraiz (bissecção ingênua até 1e-10):")
+    print(header)
+    for expr, a, b, want in ROOTS:
+        f = Naive(engine, expr)
+        slow, dt_slow = _timed(engine, lambda: naive_bisect(f, a, b))
+        fast, dt_fast, pts = new(f"solve({expr}, x, {a}, {b})")
+        print(f"  {expr:<26}")
+        print(f"    {'laço ingênuo':<22}{dt_slow * 1e3:>8.1f}ms{f.calls // REPEAT:>9}{_error(slow, want):>10}")
+        print(f"    {'solve':<22}{dt_fast * 1e3:>8.2f}ms{pts:>9}{_error(fast, want):>10}"
+              f"   {dt_slow / dt_fast:.0f}×")
+
+    print("\nderivada (diferença central ingênua, h = 1e-5; deriv troca tempo por precisão):")
+    print(header)
+    for expr, x0, want in DERIVS:
+        f = Naive(engine, expr)
+        slow, dt_slow = _timed(engine, lambda: naive_deriv(f, x0))
+        fast, dt_fast, pts = new(f"deriv({expr}, x, {x0})")
+        print(f"  {expr:<26}")
+        print(f"    {'laço ingênuo':<22}{dt_slow * 1e3:>8.2f}ms{f.calls // REPEAT:>9}{_error(slow, want):>10}")
+        print(f"    {'deriv':<22}{dt_fast * 1e3:>8.2f}ms{pts:>9}{_error(fast, want):>10}"
+              f"   {dt_slow / dt_fast:.1f}×")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark das funções combinatórias: combinatorics.py x implementação antiga.
+
+A antiga (cópia de CalcEngine._ns antes do módulo) tinha dois caminhos:
+  - antiga_math:     math.factorial/comb/perm, sem memoização
+  - antiga_fallback: o que rodava sem math.comb, com divisão em float dos
+                     fatoriais inteiros (perde precisão e estoura cedo)
+
+Mede tempo por chamada em argumentos grandes, o ganho da memoização em
+chamadas repetidas (o caso da prévia: a mesma conta a cada tecla) e
+confere exatidão contra a nova.
+
+Uso: python bench/bench_combinatorics.py
+"""
+import math
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import combinatorics  # noqa: E402
+
+
+# ======= Implementação antiga =======
+def _old_fact(n):
+    return math.factorial(int(n))
+
+
+def old_comb_math(n, r):
+    n = int(n); r = int(r)
+    return math.comb(n, r)
+
+
+def old_comb_fallback(n, r):
+    n = int(n); r = int(r)
+    return int(_old_fact(n) / (_old_fact(r) * _old_fact(n - r)))
+
+
+def old_perm_math(n, r):
+    n = int(n); r = int(r)
+    return math.perm(n, r)
+
+
+def old_perm_fallback(n, r):
+    n = int(n); r = int(r)
+    return int(_old_fact(n) // _old_fact(n - r))
+
+
+def _time(fn, args, repeat):
+    best = math.inf
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn(*args)
+        best = min(best, (time.perf_counter() - t0) / repeat)
+    return best
+
+
+def _fmt(t):
+    if t is None:
+        return "erro"
+    return f"{t * 1e3:9.3f} ms" if t >= 1e-3 else f"{t * 1e6:9.2f} µs"
+
+
+def main():
+    cases = [
+        ("fact(20000)", {"nova": (combinatorics.factorial, (20000,)),
+                         "antiga": (_old_fact, (20000,))}, 20),
+        ("fact(200000)", {"nova": (combinatorics.factorial, (200000,)),
+                          "antiga": (_old_fact, (200000,))}, 3),
+        ("nCr(20000, 10000)", {"nova": (combinatorics.comb, (20000, 10000)),
+                               "antiga_math": (old_comb_math, (20000, 10000)),
+                               "antiga_fallback": (old_comb_fallback, (20000, 10000))}, 20),
+        ("nCr(10^6, 1000)", {"nova": (combinatorics.comb, (10 ** 6, 1000)),
+                             "antiga_math": (old_comb_math, (10 ** 6, 1000)),
+                             "antiga_fallback": (old_comb_fallback, (10 ** 6, 1000))}, 5),
+        ("nPr(10^5, 5000)", {"nova": (combinatorics.perm, (10 ** 5, 5000)),
+                             "antiga_math": (old_perm_math, (10 ** 5, 5000)),
+                             "antiga_fallback": (old_perm_fallback, (10 ** 5, 5000))}, 5),
+        ("nCr(52, 5) repetido", {"nova": (combinatorics.comb, (52, 5)),
+                                 "antiga_math": (old_comb_math, (52, 5)),
+                                 "antiga_fallback": (old_comb_fallback, (52, 5))}, 100_000),
+        ("dfact(20001)", {"nova": (combinatorics.double_factorial, (20001,)),
+                          "produto_ingênuo": (lambda n: math.prod(range(n, 0, -2)), (20001,))}, 20),
+    ]
+
+    print(f"{'caso':<22}{'versão':<18}{'tempo':>13}")
+    for name, impls, repeat in cases:
+        for label, (fn, args) in impls.items():
+            try:
+                t = _time(fn, args, repeat)
+            except (OverflowError, ValueError):
+                t = None
+            print(f"{name:<22}{label:<18}{_fmt(t):>13}")
+
+    print("\nExatidão do caminho antigo sem math.comb (divisão em float):")
+    for n, r in [(30, 15), (60, 30), (100, 50), (200, 100), (1000, 500)]:
+        exact = combinatorics.comb(n, r)
+        try:
+            old = old_comb_fallback(n, r)
+            status = "ok" if old == exact else f"errado em {abs(old - exact):.3g}"
+        except OverflowError:
+            status = "OverflowError"
+        print(f"  nCr({n}, {r}): {status}")
+    print(f"\ncache: {combinatorics.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
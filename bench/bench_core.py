@@ -0,0 +1,76 @@
+"""
+Benchmark do núcleo sem interface (calc_core).
+
+Mede:
+  - tempo de import de calc_core (processo novo, descontado o "python -c pass")
+  - vazão de CalcEngine.evaluate dentro do processo (expressões/s)
+  - vazão da linha de comando (python calc_core.py < arquivo), ponta a ponta
+
+Uso: python bench/bench_core.py [linhas]
+"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from calc_core import CalcEngine  # noqa: E402
+
+TEMPLATES = [
+    "{a}+{b}", "{a}*{b}-{c}", "sin({a})+cos({b})", "sqrt({a})*{b}",
+    "({a}+{b})/({c}+1)", "ln({a}+1)/ln(2)", "{a}^2+{b}^2", "nCr({c}, 3)",
+    "ANS*0.5+{a}", "atan({a}/{b})",
+]
+
+
+def _spawn_time(code, runs=7):
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _make_lines(n, seed=1):
+    rnd = random.Random(seed)
+    return [rnd.choice(TEMPLATES).format(a=rnd.randint(1, 90), b=rnd.randint(1, 90), c=rnd.randint(3, 20))
+            for _ in range(n)]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    base = _spawn_time("pass")
+    core = _spawn_time("import calc_core")
+    print(f"import calc_core: {(core - base) * 1000:.1f} ms (processo vazio: {base * 1000:.1f} ms)")
+
+    lines = _make_lines(n)
+    engine = CalcEngine()
+    t0 = time.perf_counter()
+    for x in lines:
+        engine.evaluate(x)
+    dt = time.perf_counter() - t0
+    info = engine.cache_info()
+    print(f"evaluate (em processo): {n / dt:,.0f} expr/s  (cache: {info['hit_rate']:.0%} acertos)")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+        path = f.name
+    try:
+        t0 = time.perf_counter()
+        with open(path, encoding="utf-8") as inp:
+            subprocess.run([sys.executable, os.path.join(ROOT, "calc_core.py")], stdin=inp,
+                           stdout=subprocess.DEVNULL, check=False)
+        dt = time.perf_counter() - t0
+        print(f"CLI calc_core.py:       {n / dt:,.0f} expr/s  ({dt:.2f} s para {n} linhas)")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
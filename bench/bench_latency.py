@@ -0,0 +1,253 @@
+"""
+Benchmark de latência tecla -> fala, sem janela e sem placa de som.
+
+Roda o CalculatorApp de verdade (build_ui=False, raiz tk.Tcl()) com um
+motor TTS falso que imita o pyttsx3: demora `--synth-ms` para começar a
+falar e fala por um tempo proporcional ao texto e ao rate. As teclas
+entram por _key_insert/_press em instantes pré-gerados (sementes fixas),
+e o LatencyRecorder do TTSTk mede cada etapa.
+
+Cenários (ms entre teclas, com variação):
+  digitos     números longos digitados rápido           (~120 ms)
+  expressoes  contas típicas terminando em "="           (~250 ms)
+  rajada      teclas seguradas / digitação muito rápida  (~50 ms)
+
+--init-ms simula um motor lento para criar (pyttsx3.init + busca da voz):
+no thread principal o app só fica pronto depois dele; com --threaded o app
+sobe na hora e as primeiras teclas esperam o motor na fila.
+
+Reprodutível: --save-script grava a sequência ("atraso_ms tecla" por
+linha) e --script a reproduz no lugar dos cenários.
+
+Uso:
+    python bench/bench_latency.py [--keys 200] [--threaded] [--init-ms 2000] [--json saida.json]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import tkinter as tk  # noqa: E402
+
+from history import HistoryStore  # noqa: E402
+from latency import LatencyRecorder  # noqa: E402
+from teste import CalculatorApp, TTSTk  # noqa: E402
+
+INSERT_KEYS = set("0123456789.+-*/()^")    # chegam por _key_insert (teclado)
+
+
+class FakeTTSEngine:
+    """Imita a API do pyttsx3 usada pelo TTSTk (loop externo com iterate())."""
+
+    def __init__(self, rate=180, volume=1.0, voice_hint_ptbr=True, synth_ms=25.0, init_ms=0.0):
+        time.sleep(init_ms / 1000.0)     # pyttsx3.init + busca da voz
+        self.props = {"rate": int(rate), "volume": float(volume), "voice": "fake-pt-br", "voices": []}
+        self.synth_s = synth_ms / 1000.0
+        self._callbacks = {"started-utterance": [], "finished-utterance": []}
+        self._pending = []          # [(texto, rate)] aguardando o atual terminar
+        self._current = None        # [texto, instante_início, instante_fim, começou?]
+
+    @classmethod
+    def factory(cls, synth_ms, init_ms=0.0):
+        return lambda rate, volume, voice_hint_ptbr=True: cls(rate, volume, voice_hint_ptbr, synth_ms, init_ms)
+
+    def connect(self, topic, cb):
+        self._callbacks[topic].append(cb)
+
+    def setProperty(self, name, value):
+        self.props[name] = value
+
+    def getProperty(self, name):
+        return self.props[name]
+
+    def startLoop(self, use_driver_loop=True):
+        pass
+
+    def endLoop(self):
+        pass
+
+    def say(self, text):
+        self._pending.append((text, self.props["rate"]))
+        if self._current is None:
+            self._next(time.perf_counter())
+
+    def _next(self, now):
+        text, rate = self._pending.pop(0)
+        words = max(1.0, len(text) / 5.0)
+        start = now + self.synth_s
+        self._current = [text, start, start + words * 60.0 / max(1, int(rate)), False]
+
+    def iterate(self):
+        now = time.perf_counter()
+        cur = self._current
+        if cur is None:
+            return
+        if not cur[3] and now >= cur[1]:
+            cur[3] = True
+            for cb in self._callbacks["started-utterance"]:
+                cb(cur[0])
+        if now >= cur[2]:
+            self._finish(True)
+            if self._pending:
+                self._next(now)
+
+    def stop(self):
+        self._pending.clear()
+        if self._current is not None:
+            self._finish(False)
+
+    def _finish(self, completed):
+        text = self._current[0]
+        self._current = None
+        for cb in self._callbacks["finished-utterance"]:
+            cb(text, completed)
+
+
+# ======= Sequências de teclas =======
+def _gap(rnd, mean_ms):
+    return max(10.0, rnd.gauss(mean_ms, mean_ms * 0.3))
+
+
+def scenario_digitos(rnd, n):
+    keys = []
+    while len(keys) < n:
+        keys += [(_gap(rnd, 120), rnd.choice("0123456789")) for _ in range(rnd.randint(4, 10))]
+        keys.append((_gap(rnd, 300), "C"))
+    return keys[:n]
+
+
+def scenario_expressoes(rnd, n):
+    exprs = ["12+34*5", "sqrt(81)-7", "(3+4)*2^3", "sin(30)+cos(60)", "100/8", "nCr(10,3)", "2.5*4-1"]
+    keys = []
+    while len(keys) < n:
+        expr = rnd.choice(exprs)
+        i = 0
+        while i < len(expr):
+            # funções entram como um botão só ("sqrt(", "sin(")
+            j = expr.find("(", i) + 1 if expr[i].isalpha() else i + 1
+            keys.append((_gap(rnd, 250), expr[i:j]))
+            i = j
+        keys.append((_gap(rnd, 400), "="))
+        keys.append((_gap(rnd, 1500), "C"))
+    return keys[:n]
+
+
+def scenario_rajada(rnd, n):
+    return [(_gap(rnd, 50), rnd.choice("0123456789+-*/")) for _ in range(n)]
+
+
+SCENARIOS = {"digitos": scenario_digitos, "expressoes": scenario_expressoes, "rajada": scenario_rajada}
+
+
+def load_script(path):
+    keys = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.strip() and not line.startswith("#"):
+                gap, key = line.split(" ", 1)
+                keys.append((float(gap), key))
+    return keys
+
+
+def save_script(path, keys):
+    with open(path, "w", encoding="utf-8") as f:
+        for gap, key in keys:
+            f.write(f"{gap:.1f} {key}\n")
+
+
+# ======= Execução =======
+def run_keys(keys, synth_ms=25.0, threaded=False, rate=180, init_ms=0.0):
+    """Toca a sequência no app sem janela. Devolve (LatencyRecorder, tts.metrics())."""
+    root = tk.Tcl()
+    recorder = LatencyRecorder()
+    t0 = time.perf_counter()
+    tts = TTSTk(root, rate=rate, threaded=threaded, latency=recorder,
+                engine_factory=FakeTTSEngine.factory(synth_ms, init_ms))
+    app = CalculatorApp(root, tts=tts, build_ui=False, history=HistoryStore(":memory:"))
+    app_ms = (time.perf_counter() - t0) * 1000
+    state = {"done": False}
+
+    def feed(key):
+        if key in INSERT_KEYS:
+            app._key_insert(SimpleNamespace(char=key))
+        else:
+            app._press(key)
+
+    at = 0.0
+    for gap, key in keys:
+        at += gap
+        root.after(int(at), feed, key)
+
+    def drain():
+        # terminou quando não há fala, fila nem cálculo pendentes
+        if tts._speaking or tts.queue_len() or app.worker.busy or tts.init_s is None:
+            root.after(50, drain)
+        else:
+            state["done"] = True
+
+    root.after(int(at) + 50, drain)
+    try:
+        while not state["done"]:
+            root.tk.dooneevent(0)
+    finally:
+        app.worker.shutdown()
+        app.clips.shutdown()
+        tts.shutdown()
+    return recorder, {**tts.metrics(), "app_ms": app_ms}
+
+
+def print_report(name, recorder, metrics):
+    print(f"\n== {name} ==")
+    print(recorder.report())
+    print(f"fila: máx {metrics['max_queue_len']}  agrupadas {metrics['merged']}  "
+          f"descartadas {metrics['dropped']}  interrompidas {metrics['preempted']}  faladas {metrics['spoken']}")
+    print(f"início: app pronto em {metrics['app_ms']:.0f} ms, motor em {metrics['init_ms']:.0f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latência tecla -> fala com motor TTS falso.")
+    parser.add_argument("--keys", type=int, default=200, help="teclas por cenário")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="cenário (repetível; padrão: todos)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--synth-ms", type=float, default=25.0, help="atraso de síntese do motor falso")
+    parser.add_argument("--threaded", action="store_true", help="TTSTk com thread de áudio")
+    parser.add_argument("--init-ms", type=float, default=0.0,
+                        help="tempo de criação do motor falso (pyttsx3.init + busca da voz)")
+    parser.add_argument("--script", help="reproduz uma sequência gravada em vez dos cenários")
+    parser.add_argument("--save-script", help="grava a sequência gerada (um arquivo por cenário: PREFIXO_cenário.txt)")
+    parser.add_argument("--json", help="grava resumo e histogramas em JSON")
+    args = parser.parse_args(argv)
+
+    if args.script:
+        runs = [(os.path.basename(args.script), load_script(args.script))]
+    else:
+        runs = []
+        for name in args.scenario or sorted(SCENARIOS):
+            keys = SCENARIOS[name](random.Random(args.seed), args.keys)
+            if args.save_script:
+                save_script(f"{args.save_script}_{name}.txt", keys)
+            runs.append((name, keys))
+
+    mode = "threaded" if args.threaded else "thread principal"
+    print(f"motor falso: síntese {args.synth_ms:.0f} ms, TTS no {mode}; tempos em ms (backlog em falas)")
+    export = {}
+    for name, keys in runs:
+        recorder, metrics = run_keys(keys, synth_ms=args.synth_ms, threaded=args.threaded, init_ms=args.init_ms)
+        print_report(name, recorder, metrics)
+        export[name] = {"summary": recorder.summary(), "histogram": recorder.histogram(), "tts": metrics}
+
+    if args.json:
+        import json
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(export, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark das matrizes (linalg.py) pela calculadora.
+
+Gera uma matriz aleatória N×N bem condicionada (identidade + ruído) e um
+vetor b, carrega como A e b no CalcEngine e mede, pelo evaluate:
+  - solve(A, b), det(A), inv(A), A*A e eig(A)
+  - a eliminação de Gauss em Python puro (listas), para comparação
+  - o resíduo |A·x - b| das duas soluções
+  - speak_number da matriz resultado: só o resumo, sem ler N² valores
+
+Uso: python bench/bench_linalg.py [N]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import linalg  # noqa: E402
+from calc_core import CalcEngine  # noqa: E402
+from verbalizer import speak_number  # noqa: E402
+
+EXPRS = ["solve(A, b)", "det(A)", "inv(A)", "A*A", "eig(A)", "A*b"]
+
+
+def _naive_solve(a, b):
+    """Eliminação de Gauss com pivô parcial em listas (o que se faria sem NumPy)."""
+    n = len(a)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for k in range(n):
+        p = max(range(k, n), key=lambda i: abs(m[i][k]))
+        m[k], m[p] = m[p], m[k]
+        pivot = m[k]
+        for i in range(k + 1, n):
+            f = m[i][k] / pivot[k]
+            if f:
+                row = m[i]
+                for j in range(k, n + 1):
+                    row[j] -= f * pivot[j]
+    x = [0.0] * n
+    for i in range(n - 1, -1, -1):
+        s = m[i][n] - sum(m[i][j] * x[j] for j in range(i + 1, n))
+        x[i] = s / m[i][i]
+    return x
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    np = linalg._numpy()
+    rng = np.random.default_rng(7)
+    a = np.eye(n) + rng.normal(size=(n, n)) / (2 * n ** 0.5)
+    b = rng.normal(size=n)
+
+    engine = CalcEngine()
+    engine.add_matrix("A", a)
+    engine.add_matrix("b", b)
+
+    print(f"matriz {n}×{n}")
+    print(f"  {'expressão':<14}{'tempo':>12}")
+    for expr in EXPRS:
+        dt, out = _best(lambda: engine.evaluate(expr), 5)
+        print(f"  {expr:<14}{dt * 1e3:>10.2f} ms")
+
+    x = np.asarray(engine.evaluate("solve(A, b)"))
+    rows, vec = a.tolist(), b.tolist()
+    dt_naive, x_naive = _best(lambda: _naive_solve(rows, vec), 1)
+    dt_np, _ = _best(lambda: engine.evaluate("solve(A, b)"), 5)
+    print(f"\nGauss em Python puro: {dt_naive * 1e3:.0f} ms ({dt_naive / dt_np:.0f}× mais lento)")
+    print(f"resíduo |A·x - b|: solve {np.linalg.norm(a @ x - b):.1e}, "
+          f"Python puro {np.linalg.norm(a @ np.array(x_naive) - b):.1e}")
+
+    result = engine.evaluate("inv(A)")
+    dt, text = _best(lambda: speak_number(result), 5)
+    print(f"\nfala do resultado inv(A): {dt * 1e3:.2f} ms, {len(text)} caracteres")
+    print(f"  {text[:100]}…")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark dos backends numéricos (numeric.py): float, decimal e fraction.
+
+Mede, para cada backend:
+  - evaluate com o programa já no cache (o caso comum: a mesma conta de novo)
+  - compilação + avaliação (cache limpo a cada rodada)
+  - pi e e por precisão: primeira chamada x já em cache (lru_cache)
+e mostra lado a lado o resultado de contas em que o float perde exatidão.
+
+O float precisa ficar tão rápido quanto antes dos backends: compare a
+linha "float" com o mesmo benchmark rodado no commit anterior.
+
+Uso: python bench/bench_numeric.py [precisão decimal]
+"""
+import math
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from calc_core import CalcEngine, format_number  # noqa: E402
+
+EXPRS = [
+    "1+2*3", "0.1+0.2", "(1/3+1/7)*21", "2^64-1", "sqrt(2)*sqrt(8)",
+    "sin(30)+cos(60)", "ln(10)/ln(2)", "nCr(52,5)/2", "ANS*0.5+1", "atan(1)*4",
+]
+EXACTNESS = ["0.1+0.2", "0.1+0.2-0.3", "1/3*3", "2^70+1-2^70", "1/3+1/6", "sin(30)", "sqrt(2)^2", "pi"]
+
+
+def _time(fn, repeat):
+    best = math.inf
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / repeat)
+    return best
+
+
+def _fmt(t):
+    return f"{t * 1e3:9.3f} ms" if t >= 1e-3 else f"{t * 1e6:9.2f} µs"
+
+
+def _engine(name, precision):
+    engine = CalcEngine()
+    if name != "float":
+        engine.set_backend(name, precision if name == "decimal" else None)
+    return engine
+
+
+def main():
+    precision = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    backends = ["float", "decimal", "fraction"]
+
+    print(f"{'backend':<10}{'com cache':>14}{'compilando':>14}{'x float':>10}")
+    base = None
+    for name in backends:
+        engine = _engine(name, precision)
+
+        def cached():
+            for expr in EXPRS:
+                engine.evaluate(expr)
+
+        def cold():
+            engine.cache_clear()
+            for expr in EXPRS:
+                engine.evaluate(expr)
+
+        cached()
+        t_cached = _time(cached, 2000) / len(EXPRS)
+        t_cold = _time(cold, 200) / len(EXPRS)
+        base = base or t_cached
+        label = name if name != "decimal" else f"decimal{precision}"
+        print(f"{label:<10}{_fmt(t_cached):>14}{_fmt(t_cold):>14}{t_cached / base:>9.1f}x")
+
+    import numeric
+    print("\npi e e no backend decimal (por precisão):")
+    print(f"{'dígitos':<10}{'pi 1ª vez':>14}{'pi cache':>14}{'e 1ª vez':>14}")
+    for prec in (50, 500, 5000):
+        numeric.decimal_pi.cache_clear()
+        numeric.decimal_e.cache_clear()
+        t0 = time.perf_counter()
+        numeric.decimal_pi(prec)
+        t_pi = time.perf_counter() - t0
+        t_hit = _time(lambda: numeric.decimal_pi(prec), 10_000)
+        t0 = time.perf_counter()
+        numeric.decimal_e(prec)
+        t_e = time.perf_counter() - t0
+        print(f"{prec:<10}{_fmt(t_pi):>14}{_fmt(t_hit):>14}{_fmt(t_e):>14}")
+
+    print("\nResultados:")
+    engines = {name: _engine(name, precision) for name in backends}
+    width = max(len(e) for e in EXACTNESS) + 2
+    for expr in EXACTNESS:
+        row = []
+        for name, engine in engines.items():
+            text = format_number(engine.evaluate(expr))
+            row.append(text if len(text) <= 24 else text[:21] + "...")
+        print(f"  {expr:<{width}}" + "".join(f"{r:<26}" for r in row))
+
+
+if __name__ == "__main__":
+    main()
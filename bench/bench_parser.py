@@ -0,0 +1,93 @@
+"""
+Benchmark: parser pós-fixo próprio x eval() do Python.
+
+Compara, para expressões típicas de calculadora:
+  - eval_texto:   caminho antigo (pré-processa + eval da string a cada vez)
+  - eval_codigo:  eval de code object já compilado
+  - parser_frio:  tokeniza + analisa + executa a cada vez (sem cache)
+  - parser_run:   run() de programa já compilado (o par de eval_codigo)
+  - parser_cache: CalcEngine.evaluate com cache de programas
+
+Os ganhos comparam frio com frio e cache com cache. Com tudo compilado,
+o eval do Python é mais rápido que run() (bytecode em C contra um laço em
+Python); evaluate() ainda paga a busca no cache, o veredito de custo, o
+namespace e o ANS. O parser existe pela segurança (sem eval), não pela
+velocidade: a comparação honesta com o eval sem cache é eval_texto.
+
+Uso: python bench/bench_parser.py [repetições]
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from calc_parser import compile_expr, run  # noqa: E402
+from calc_core import CalcEngine  # noqa: E402
+
+EXPRESSIONS = [
+    "1+2",
+    "3×4÷2",
+    "2^10 - 1",
+    "sin(30)+cos(60)",
+    "sqrt(2)*sqrt(8)",
+    "(1+2)*(3+4)/5",
+    "ln(10)/ln(2)",
+    "nCr(10, 3) + nPr(5, 2)",
+    "-2^2 + 4*atan(1)",
+    "ANS*1.5 + log(1000)",
+]
+
+
+def _old_preprocess(expr):
+    expr = expr.replace("×", "*").replace("÷", "/").replace("^", "**").replace("π", "pi")
+    expr = expr.replace("√", "sqrt")
+    return re.sub(r"log10\s*\(", "log(", expr)
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    engine = CalcEngine()
+    ns = engine._namespace()
+    codes = {x: compile(_old_preprocess(x), "<calc>", "eval") for x in EXPRESSIONS}
+
+    def eval_texto():
+        for x in EXPRESSIONS:
+            eval(_old_preprocess(x), {"__builtins__": {}}, engine._ns())
+
+    def eval_codigo():
+        for x in EXPRESSIONS:
+            eval(codes[x], {"__builtins__": {}}, ns)
+
+    def parser_frio():
+        for x in EXPRESSIONS:
+            run(compile_expr(x, engine.FUNCTIONS, engine.CONSTANTS), ns)
+
+    programs = {x: compile_expr(x, engine.FUNCTIONS, engine.CONSTANTS) for x in EXPRESSIONS}
+
+    def parser_run():
+        for x in EXPRESSIONS:
+            run(programs[x], ns)
+
+    def parser_cache():
+        for x in EXPRESSIONS:
+            engine.evaluate(x)
+
+    print(f"{len(EXPRESSIONS)} expressões x {number} repetições")
+    results = {}
+    for name, fn in [("eval_texto", eval_texto), ("eval_codigo", eval_codigo),
+                     ("parser_frio", parser_frio), ("parser_run", parser_run),
+                     ("parser_cache", parser_cache)]:
+        best = min(timeit.repeat(fn, number=number // 10, repeat=5)) * 10
+        per_expr = best / (number * len(EXPRESSIONS)) * 1e6
+        results[name] = per_expr
+        print(f"  {name:<13} {per_expr:8.2f} µs/expressão")
+    print(f"  sem cache, parser_frio x eval_texto: {results['eval_texto'] / results['parser_frio']:.2f}x")
+    print(f"  com cache, parser_run x eval_codigo: {results['eval_codigo'] / results['parser_run']:.2f}x")
+    print(f"  com cache, parser_cache x eval_codigo: {results['eval_codigo'] / results['parser_cache']:.2f}x "
+          f"(evaluate completo)")
+
+
+if __name__ == "__main__":
+    main()
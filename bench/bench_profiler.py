@@ -0,0 +1,59 @@
+"""
+Custo do perfil do CalcEngine (profiler.py).
+
+Avalia a mesma mistura de contas (já no cache, como no uso normal) com o
+perfil desligado e ligado, e mostra o custo por conta de cada modo. No
+fim imprime o relatório do perfil ligado: fases, funções e contas lentas.
+
+Uso: python bench/bench_profiler.py [repetições]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from calc_core import CalcEngine  # noqa: E402
+from profiler import EngineProfiler  # noqa: E402
+
+EXPRESSIONS = [
+    "1 + 2 * 3",
+    "sin(30) + cos(60) * 2",
+    "sqrt(2)^2 - ln(10)",
+    "nCr(40, 12) / fact(10)",
+    "mean([1, 2, 3, 4]) + stdev([1, 2, 3, 4])",
+    "f(3) + f(4)",
+]
+
+
+def _per_eval(engine, n):
+    best = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            for expr in EXPRESSIONS:
+                engine.evaluate(expr)
+        best = min(best, time.perf_counter() - t0)
+    return best / (n * len(EXPRESSIONS))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    engine = CalcEngine()
+    engine.set_function("f", ("x",), "x^2 + sin(x)")
+    baseline = _per_eval(engine, n)
+    print(f"perfil desligado: {baseline * 1e6:7.2f} µs por conta")
+
+    profiler = EngineProfiler(slow_ms=20.0)
+    engine.set_profiler(profiler)
+    on = _per_eval(engine, n)
+    print(f"perfil ligado:    {on * 1e6:7.2f} µs por conta  (+{(on - baseline) * 1e6:.2f} µs)")
+
+    engine.evaluate("integrate(exp(-x^2) * sin(x)^2, x, -5, 5)")   # uma conta lenta para o anel
+    print()
+    print(profiler.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Gerador de carga do calc_server: muitas estações ao mesmo tempo.
+
+Cada sessão simula uma pessoa digitando: uma prévia por tecla, depois o
+eval; de vez em quando uma conta pesada (vai para o pool de processos) e,
+com --clips, o pedido do clipe do resultado. Mede a latência vista pelo
+cliente por operação (p50/p95/p99) e a vazão total.
+
+Por padrão sobe o servidor num processo separado (socket Unix num
+diretório temporário, sem clipes); --socket/--port usam um já rodando.
+
+Uso: python bench/bench_server.py [--sessions 64] [--rounds 20] [--think-ms 0]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from latency import LatencyRecorder  # noqa: E402
+
+EXPRS = [
+    "sin(30)+cos(60)", "2^10*3", "(1+2)*(3+4)/7", "sqrt(2)*sqrt(8)", "ln(10)/ln(2)",
+    "nCr(52,5)", "ANS*0.5+1", "atan(1)*4", "1/3+1/6", "fact(20)/fact(18)",
+]
+HEAVY = ["fact(20000)", "nCr(40000, 20000)", "2^200000"]
+
+
+class _Conn:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+
+    async def request(self, op, **fields):
+        self.next_id += 1
+        msg = dict(fields, op=op, id=self.next_id)
+        self.writer.write(json.dumps(msg).encode("utf-8") + b"\n")
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("servidor fechou a conexão")
+        return json.loads(line)
+
+
+async def _open(socket_path, port):
+    if socket_path:
+        reader, writer = await asyncio.open_unix_connection(socket_path, limit=1 << 24)
+    else:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=1 << 24)
+    return _Conn(reader, writer)
+
+
+async def _session(idx, args, rec, errors):
+    rnd = random.Random(idx)
+    conn = await _open(args.socket, args.port)
+    await conn.request("hello")
+    for r in range(args.rounds):
+        heavy = args.heavy_every and (r + idx) % args.heavy_every == 0
+        expr = rnd.choice(HEAVY) if heavy else rnd.choice(EXPRS)
+        for k in range(1, len(expr) + 1):          # uma prévia por tecla
+            t0 = time.perf_counter()
+            await conn.request("preview", expr=expr[:k])
+            rec.add("preview", time.perf_counter() - t0)
+            if args.think_ms:
+                await asyncio.sleep(args.think_ms / 1000 * rnd.uniform(0.5, 1.5))
+        t0 = time.perf_counter()
+        reply = await conn.request("eval", expr=expr)
+        rec.add("eval_pool" if heavy else "eval", time.perf_counter() - t0)
+        if not reply.get("ok"):
+            errors.append(reply.get("error"))
+            continue
+        if args.clips:
+            t0 = time.perf_counter()
+            await conn.request("clip", text=reply["speech"])
+            rec.add("clip", time.perf_counter() - t0)
+    await conn.request("bye")
+    conn.writer.close()
+
+
+async def _run(args):
+    rec = LatencyRecorder()
+    errors = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_session(i, args, rec, errors) for i in range(args.sessions)))
+    dt = time.perf_counter() - t0
+    conn = await _open(args.socket, args.port)
+    stats = await conn.request("stats")
+    conn.writer.close()
+    return rec, errors, dt, stats
+
+
+def _start_server(args, folder):
+    args.socket = os.path.join(folder, "calc.sock")
+    cmd = [sys.executable, os.path.join(ROOT, "calc_server.py"), "--socket", args.socket]
+    if not args.clips:
+        cmd.append("--no-clips")
+    proc = subprocess.Popen(cmd, cwd=ROOT, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while not os.path.exists(args.socket):
+        if proc.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("o servidor não subiu")
+        time.sleep(0.05)
+    return proc
+
+
+def _stat(pid):
+    """(estado, pid do pai) de /proc/<pid>/stat, ou None se o processo não existe (ou não há /proc)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return fields[0], int(fields[1])
+
+
+def _alive(pid):
+    st = _stat(pid)
+    return st is not None and st[0] != "Z"
+
+
+def _children(pid):
+    """pids dos filhos vivos de `pid` (via /proc; fora do Linux, lista vazia)."""
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return []
+    found = []
+    for name in names:
+        st = _stat(name) if name.isdigit() else None
+        if st is not None and st[0] != "Z" and st[1] == pid:
+            found.append(int(name))
+    return found
+
+
+def _stop_server(proc):
+    """SIGTERM, espera o servidor sair e confere que nenhum worker do pool ficou para trás."""
+    children = _children(proc.pid)
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        print("o servidor não saiu com SIGTERM: morto com SIGKILL", file=sys.stderr)
+    deadline = time.monotonic() + 5
+    alive = children
+    while alive and time.monotonic() < deadline:
+        time.sleep(0.05)
+        alive = [pid for pid in alive if _alive(pid)]
+    if alive:
+        print(f"processos do servidor ainda vivos depois de fechar: {alive}", file=sys.stderr)
+        for pid in alive:
+            try:
+                os.kill(pid, 9)
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga de várias sessões simultâneas no calc_server.")
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=20, help="contas por sessão")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pausa média entre teclas (0 = sem pausa)")
+    parser.add_argument("--heavy-every", type=int, default=10, help="1 conta pesada a cada N (0 = nenhuma)")
+    parser.add_argument("--clips", action="store_true", help="pede o clipe de cada resultado (precisa de voz)")
+    parser.add_argument("--socket", help="servidor já rodando (socket Unix)")
+    parser.add_argument("--port", type=int, default=None, help="servidor já rodando (TCP em 127.0.0.1)")
+    args = parser.parse_args()
+
+    proc = None
+    with tempfile.TemporaryDirectory() as folder:
+        if not args.socket and args.port is None:
+            if not hasattr(asyncio, "open_unix_connection"):
+                parser.error("sem socket Unix aqui: suba o calc_server e use --port")
+            proc = _start_server(args, folder)
+        try:
+            rec, errors, dt, stats = asyncio.run(_run(args))
+        finally:
+            if proc is not None:
+                _stop_server(proc)
+
+    total = sum(s["count"] for s in rec.summary().values())
+    print(f"{args.sessions} sessões, {args.rounds} contas cada: {total} pedidos em {dt:.2f} s "
+          f"({total / dt:,.0f} pedidos/s), {len(errors)} erros")
+    print(rec.report())
+    counts = stats["counts"]
+    cache = stats["code_cache"]
+    print(f"\nservidor: {counts['inline']} contas no loop, {counts['pool']} no pool; "
+          f"cache de código {cache['hit_rate']:.0%} acertos ({cache['size']} expressões)")
+    print("tempo de serviço no servidor (ms, sem rede nem fila):")
+    for op, st in stats["latency_ms"].items():
+        print(f"  {op:<10} p50 {st['p50']:8.3f}   p99 {st['p99']:8.3f}   n {st['count']}")
+    if errors:
+        print("erros:", sorted(set(errors))[:5])
+
+
+if __name__ == "__main__":
+    main()
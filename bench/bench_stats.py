@@ -0,0 +1,118 @@
+"""
+Benchmark da leitura de CSV e das funções estatísticas (stats.py).
+
+Gera um CSV de N linhas (x normal, y = 2x + ruído) num diretório
+temporário e mede:
+  - load_csv com NumPy (blocos convertidos de uma vez) e sem NumPy
+    (laço por linha em array('d')): tempo e MB/s
+  - pico de memória (tracemalloc) lendo metade do arquivo e o arquivo todo:
+    tem que ficar igual, a memória não cresce com o tamanho
+  - erro dos percentis do t-digest contra o valor exato (numpy.percentile)
+  - evaluate de funções sobre listas literais, com o programa em cache
+
+Uso: python bench/bench_stats.py [linhas]
+"""
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import stats  # noqa: E402
+from calc_core import CalcEngine  # noqa: E402
+
+LIST_EXPRS = ["mean([3, 1, 4, 1, 5, 9, 2, 6])", "stdev([2, 4, 4, 4, 5, 5, 7, 9])",
+              "median([5, 3, 8, 1, 9, 2])", "pctl([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 90)",
+              "slope([1, 2, 3, 4], [2.1, 3.9, 6.2, 7.8])", "[1, 2, 3] * 2 + 1"]
+QUANTILES = (0.001, 0.01, 0.25, 0.5, 0.75, 0.99, 0.999)
+
+
+def _write_csv(path, rows, np):
+    rng = np.random.default_rng(7)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("x,y\n")
+        for start in range(0, rows, 100_000):
+            n = min(100_000, rows - start)
+            x = rng.normal(10, 3, n)
+            y = 2 * x + rng.normal(0, 1, n)
+            f.write("\n".join(f"{a:.6f},{b:.6f}" for a, b in zip(x, y)) + "\n")
+
+
+def _load(path, with_numpy):
+    saved = stats.np, stats._np_checked
+    if not with_numpy:
+        stats.np, stats._np_checked = None, True
+    try:
+        t0 = time.perf_counter()
+        summary = stats.load_csv(path)
+        return summary, time.perf_counter() - t0
+    finally:
+        stats.np, stats._np_checked = saved
+
+
+def _peak(path):
+    # tracemalloc deixa o laço em Python muito mais lento: só no caminho com NumPy
+    tracemalloc.start()
+    stats.load_csv(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    np = stats._numpy()
+    if np is None:
+        sys.exit("este benchmark precisa do numpy (para gerar os dados e o valor exato)")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "dados.csv")
+        small = os.path.join(folder, "pequeno.csv")
+        _write_csv(path, rows, np)
+        _write_csv(small, rows // 2, np)
+        mb = os.path.getsize(path) / 1e6
+        print(f"{rows:,} linhas, {mb:.1f} MB")
+        print(f"{'leitura':<12}{'tempo':>10}{'MB/s':>10}")
+        for label, with_numpy in (("numpy", True), ("por linha", False)):
+            summary, dt = _load(path, with_numpy)
+            print(f"{label:<12}{dt:>9.2f}s{mb / dt:>10.1f}")
+        print(f"pico de memória: {_peak(small) / 1e6:.1f} MB com {rows // 2:,} linhas, "
+              f"{_peak(path) / 1e6:.1f} MB com {rows:,}")
+
+        data = np.loadtxt(path, delimiter=",", skiprows=1)
+    x, y = data[:, 0], data[:, 1]
+    cx, cy = summary.columns
+
+    print("\nmédia, desvio e regressão (passada única x exato):")
+    pairs = [("média", cx.stats.mean, x.mean()),
+             ("desvio", math.sqrt(cx.stats.m2 / (cx.stats.n - 1)), x.std(ddof=1)),
+             ("inclinação", stats.slope(cx, cy), np.polyfit(x, y, 1)[0]),
+             ("correlação", stats.corr(cx, cy), np.corrcoef(x, y)[0, 1])]
+    for name, got, want in pairs:
+        print(f"  {name:<12}{got:>16.10f}{want:>16.10f}   erro relativo {abs(got - want) / abs(want):.1e}")
+
+    print(f"\npercentis do t-digest ({len(cx.digest.means)} centroides):")
+    print(f"  {'q':<8}{'t-digest':>12}{'exato':>12}{'erro em q':>12}")
+    for q in QUANTILES:
+        got = cx.digest.quantile(q)
+        rank = (x < got).mean()
+        print(f"  {q:<8}{got:>12.5f}{np.percentile(x, q * 100):>12.5f}{abs(rank - q):>12.2e}")
+
+    engine = CalcEngine()
+    print("\nlistas literais (programa em cache):")
+    for expr in LIST_EXPRS:
+        engine.evaluate(expr)
+        n = 5000
+        t0 = time.perf_counter()
+        for _ in range(n):
+            engine.evaluate(expr)
+        dt = (time.perf_counter() - t0) / n
+        print(f"  {expr:<44}{dt * 1e6:>8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark dos motores de voz (tts_backends.py) nesta máquina.
+
+Para cada motor disponível mede:
+  - partida: criar o motor (import, abertura do sintetizador, busca da voz)
+  - tempo até o primeiro áudio de cada fala: do say() ao started-utterance
+  - fala inteira: do say() ao finished-utterance
+  - bloqueio: a chamada de say()/iterate() mais demorada, que é o quanto
+    o thread do Tk ficaria parado
+
+Toca as frases de verdade (com som). --save grava o motor com menor tempo
+até o primeiro áudio (mediana) como o "auto" desta máquina; o app passa a
+usá-lo sem CALC_TTS.
+
+Uso: python bench/bench_tts.py [--backends espeak,pyttsx3] [--repeat 3] [--save] [--json saida.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import tts_backends  # noqa: E402
+
+PHRASES = [
+    "sete",
+    "mais",
+    "resultado: quarenta e dois",
+    "seno de trinta graus, dividido por dois",
+    "matriz de três por três, primeira linha começando por: um, zero, zero",
+]
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+def measure(name, repeat, rate=180):
+    t0 = time.perf_counter()
+    engine = tts_backends.create(name, rate=rate)
+    startup = time.perf_counter() - t0
+    try:
+        engine.startLoop(False)
+    except Exception:
+        pass
+    events = []
+    engine.connect("started-utterance", lambda n: events.append(("start", time.perf_counter())))
+    engine.connect("finished-utterance", lambda n, c: events.append(("end", time.perf_counter())))
+
+    first, total, blocked = [], [], 0.0
+    for _ in range(repeat):
+        for text in PHRASES:
+            events.clear()
+            t_say = time.perf_counter()
+            engine.say(text)
+            blocked = max(blocked, time.perf_counter() - t_say)
+            while not events or events[-1][0] != "end":
+                t = time.perf_counter()
+                engine.iterate()
+                blocked = max(blocked, time.perf_counter() - t)
+                time.sleep(0.002)
+            starts = [t for kind, t in events if kind == "start"]
+            if starts:
+                first.append(starts[0] - t_say)
+            total.append(events[-1][1] - t_say)
+    try:
+        engine.endLoop()
+    except Exception:
+        pass
+    return {
+        "startup_ms": startup * 1e3,
+        "first_audio_p50_ms": _percentile(first, 0.5) * 1e3,
+        "first_audio_p95_ms": _percentile(first, 0.95) * 1e3,
+        "utterance_p50_ms": _percentile(total, 0.5) * 1e3,
+        "blocked_max_ms": blocked * 1e3,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--backends", default=",".join(tts_backends.BACKENDS),
+                    help="motores a medir, separados por vírgula")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--rate", type=int, default=180)
+    ap.add_argument("--save", action="store_true", help="grava o mais rápido como o auto desta máquina")
+    ap.add_argument("--json", help="grava os resultados neste arquivo")
+    args = ap.parse_args()
+
+    results = {}
+    print(f"  {'motor':<10}{'partida':>10}{'1º áudio p50':>14}{'p95':>9}{'fala p50':>10}{'bloqueio':>10}")
+    for name in args.backends.split(","):
+        name = name.strip()
+        if not tts_backends.available(name):
+            print(f"  {name:<10}indisponível nesta máquina")
+            continue
+        try:
+            r = measure(name, args.repeat, args.rate)
+        except Exception as e:
+            print(f"  {name:<10}falhou: {type(e).__name__}: {e}")
+            continue
+        results[name] = r
+        print(f"  {name:<10}{r['startup_ms']:>8.0f}ms{r['first_audio_p50_ms']:>12.1f}ms"
+              f"{r['first_audio_p95_ms']:>7.1f}ms{r['utterance_p50_ms']:>8.0f}ms{r['blocked_max_ms']:>8.2f}ms")
+
+    real = {name: r for name, r in results.items() if name != "null"}    # o nulo não fala
+    if real:
+        best = min(real, key=lambda name: real[name]["first_audio_p50_ms"])
+        print(f"\nmais rápido até o primeiro áudio: {best}")
+        if args.save:
+            tts_backends.save_preferred(best, real[best])
+            print(f"gravado como o motor auto desta máquina ({tts_backends.load_preferred()})")
+    elif args.save:
+        print("\nnenhum motor com som disponível: nada gravado")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
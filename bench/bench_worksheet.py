@@ -0,0 +1,77 @@
+"""
+Benchmark da planilha de variáveis (worksheet.py).
+
+Monta uma planilha com N entradas independentes, cada uma com uma cadeia
+de K variáveis que dependem dela (e de uma função do usuário), e mede:
+  - mudar uma entrada: recalcula só a cadeia dela (K definições)
+  - o jeito ingênuo: reavaliar o texto de todas as N×K definições
+  - mudar a entrada de que todo mundo depende (pior caso)
+  - abrir a planilha do disco (valores float guardados: sem recalcular)
+
+Uso: python bench/bench_worksheet.py [N] [K]
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from calc_core import CalcEngine  # noqa: E402
+from worksheet import Worksheet  # noqa: E402
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def build(sheet, n, k):
+    sheet.execute("escala = 2")
+    sheet.execute("f(t) = escala * sin(t) + t / 2")
+    for i in range(n):
+        sheet.execute(f"x{i} = {i}")
+        prev = f"x{i}"
+        for j in range(k):
+            sheet.execute(f"y{i}_{j} = f({prev}) / (1 + {j}) + sqrt(1 + abs({prev}))")
+            prev = f"y{i}_{j}"
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    path = os.path.join(tempfile.mkdtemp(), "planilha.sqlite3")
+
+    engine = CalcEngine()
+    sheet = Worksheet(engine, path)
+    t0 = time.perf_counter()
+    build(sheet, n, k)
+    print(f"planilha: {len(sheet)} definições ({n} entradas × {k} dependentes), "
+          f"montada em {time.perf_counter() - t0:.2f} s")
+
+    value = iter(range(10 ** 9))
+    dt, update = _best(lambda: sheet.execute(f"x{n // 2} = {next(value)}"), 20)
+    print(f"\nmudar uma entrada:      {dt * 1e3:8.2f} ms  ({len(update.recomputed)} recalculadas)")
+
+    texts = [d.text for d in sheet if d.params is None]
+    naive, _ = _best(lambda: [engine.evaluate(t) for t in texts], 3)
+    print(f"reavaliar tudo (texto): {naive * 1e3:8.2f} ms  ({len(texts)} expressões, "
+          f"{naive / dt:.0f}× mais lento)")
+
+    dt_all, update = _best(lambda: sheet.execute(f"escala = {2 + next(value) % 5}"), 3)
+    print(f"mudar escala (todos):   {dt_all * 1e3:8.2f} ms  ({len(update.recomputed)} recalculadas)")
+    sheet.close()
+
+    dt_open, reopened = _best(lambda: Worksheet(CalcEngine(), path), 3)
+    print(f"\nabrir do disco:         {dt_open * 1e3:8.2f} ms  ({len(reopened)} definições, "
+          f"{len(reopened.skipped)} puladas)")
+    reopened.close()
+
+
+if __name__ == "__main__":
+    main()
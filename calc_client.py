@@ -0,0 +1,285 @@
+"""
+Cliente fino da calculadora: janela Tk que conversa com o calc_server.
+
+Não carrega o núcleo de cálculo nem motor de voz: manda a expressão ao
+serviço e toca o clipe WAV que ele devolve (winsound no Windows, pygame se
+instalado; sem nenhum dos dois, só mostra o texto). Os pedidos saem por
+uma thread; as respostas voltam ao mainloop por root.after, sem travar a
+janela. Se a conexão cair, reconecta e retoma a mesma sessão (ANS, modo).
+
+    python calc_client.py --socket /tmp/calc.sock
+    python calc_client.py --port 8765
+"""
+import argparse
+import base64
+import io
+import json
+import queue
+import socket
+import sys
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+try:
+    import pygame
+except ImportError:
+    pygame = None
+
+DEFAULT_PORT = 8765     # o mesmo de calc_server.DEFAULT_PORT (sem importar o servidor)
+
+
+class ServiceClient:
+    """Conexão bloqueante com o serviço: request(op, ...) manda uma linha JSON e lê a resposta."""
+
+    def __init__(self, socket_path=None, port=DEFAULT_PORT, timeout=15.0):
+        self.socket_path = socket_path
+        self.port = int(port)
+        self.timeout = float(timeout)
+        self.session = None
+        self._sock = None
+        self._file = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.socket_path:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+        else:
+            sock = socket.create_connection(("127.0.0.1", self.port), timeout=self.timeout)
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+        hello = self._roundtrip({"op": "hello", "session": self.session})
+        self.session = hello.get("session")
+
+    def _roundtrip(self, msg):
+        self._next_id += 1
+        msg["id"] = self._next_id
+        self._file.write(json.dumps(msg, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("o serviço fechou a conexão")
+        return json.loads(line)
+
+    def request(self, op, **fields):
+        """Resposta (dict) do serviço; tenta reconectar uma vez se a conexão tiver caído."""
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._roundtrip(dict(fields, op=op))
+                except (OSError, ValueError):
+                    self._drop()
+                    if attempt:
+                        raise ConnectionError("serviço indisponível")
+
+    def _drop(self):
+        for obj in (self._file, self._sock):
+            try:
+                if obj is not None:
+                    obj.close()
+            except OSError:
+                pass
+        self._sock = self._file = None
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                try:
+                    self._roundtrip({"op": "bye"})
+                except (OSError, ValueError):
+                    pass
+            self._drop()
+
+
+class ClipPlayer:
+    """Toca WAV em memória: winsound (Windows) ou pygame; sem nenhum, enabled = False."""
+
+    def __init__(self):
+        self.enabled = False
+        if winsound is not None:
+            self.enabled = True
+        elif pygame is not None:
+            try:
+                if not pygame.mixer.get_init():
+                    pygame.mixer.init()
+                self.enabled = True
+            except Exception:
+                pass
+
+    def play(self, data):
+        if not self.enabled:
+            return
+        if winsound is not None:
+            # SND_MEMORY não aceita SND_ASYNC: toca numa thread para não travar a janela
+            threading.Thread(target=winsound.PlaySound, args=(data, winsound.SND_MEMORY), daemon=True).start()
+        else:
+            pygame.mixer.stop()
+            pygame.mixer.Sound(file=io.BytesIO(data)).play()
+
+
+class ClientApp:
+    """Janela mínima: expressão, prévia e resultado; Enter avalia, F9 graus/radianos, F6 números."""
+    POLL_MS = 15
+    PREVIEW_DEBOUNCE_MS = 150
+    NUMBERS = ("float", "decimal", "fraction")
+
+    def __init__(self, root, client):
+        self.root = root
+        self.client = client
+        self.player = ClipPlayer()
+        self.mode = "DEG"
+        self.numbers = "float"
+        self._requests = queue.Queue()
+        self._replies = queue.Queue()
+        self._preview_job = None
+        self._preview_seq = 0
+        threading.Thread(target=self._worker, name="calc-client", daemon=True).start()
+
+        root.title("Calculadora (serviço)")
+        main = ttk.Frame(root, padding=10)
+        main.pack(fill="both", expand=True)
+        self.expr_var = tk.StringVar(root)
+        self.preview_var = tk.StringVar(root)
+        self.res_var = tk.StringVar(root, value="Resultado: ")
+        entry = ttk.Entry(main, textvariable=self.expr_var, font=("Segoe UI", 16))
+        entry.pack(fill="x")
+        entry.focus_set()
+        ttk.Label(main, textvariable=self.preview_var, foreground="#555").pack(fill="x", pady=(4, 0))
+        ttk.Label(main, textvariable=self.res_var, font=("Segoe UI", 14)).pack(fill="x", pady=8)
+        bar = ttk.Frame(main)
+        bar.pack(fill="x")
+        self.mode_btn = ttk.Button(bar, text="Modo: Graus", command=self.toggle_mode)
+        self.mode_btn.pack(side="left")
+        self.numbers_btn = ttk.Button(bar, text="Números: float", command=self.cycle_numbers)
+        self.numbers_btn.pack(side="left", padx=6)
+        ttk.Label(main, text="Enter=Igual | Esc=Limpar | F9=Graus/Radianos | F6=Números",
+                  foreground="#555").pack(fill="x", pady=(8, 0))
+
+        root.bind("<Return>", lambda e: self.evaluate())
+        root.bind("<KP_Enter>", lambda e: self.evaluate())
+        root.bind("<Escape>", lambda e: self.expr_var.set(""))
+        root.bind("<F9>", lambda e: self.toggle_mode())
+        root.bind("<F6>", lambda e: self.cycle_numbers())
+        self.expr_var.trace_add("write", self._schedule_preview)
+        root.protocol("WM_DELETE_WINDOW", self._on_close)
+        root.after(self.POLL_MS, self._poll)
+
+    # ---------- pedidos em segundo plano ----------
+    def _worker(self):
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+            op, fields, callback = item
+            try:
+                reply = self.client.request(op, **fields)
+            except ConnectionError as e:
+                reply = {"ok": False, "error": str(e)}
+            self._replies.put((callback, reply))
+
+    def _send(self, op, callback=None, **fields):
+        self._requests.put((op, fields, callback))
+
+    def _poll(self):
+        while True:
+            try:
+                callback, reply = self._replies.get_nowait()
+            except queue.Empty:
+                break
+            if callback is not None:
+                callback(reply)
+        self.root.after(self.POLL_MS, self._poll)
+
+    # ---------- fala ----------
+    def say(self, text):
+        """Pede o clipe do texto ao serviço e toca quando chegar."""
+        if self.player.enabled:
+            self._send("clip", self._play_reply, text=text)
+
+    def _play_reply(self, reply):
+        if reply.get("ok"):
+            self.player.play(base64.b64decode(reply["wav"]))
+
+    # ---------- ações ----------
+    def evaluate(self):
+        expr = self.expr_var.get().strip()
+        if not expr:
+            self.say("expressão vazia")
+            return
+        self.res_var.set("Calculando…")
+        self._send("eval", self._on_result, expr=expr)
+
+    def _on_result(self, reply):
+        if reply.get("ok"):
+            self.res_var.set(f"Resultado: {reply['result']}")
+            self.say(reply["speech"])
+        else:
+            self.res_var.set(f"Erro: {reply.get('error', '')}")
+            self.say("erro de cálculo")
+
+    def _schedule_preview(self, *_):
+        if self._preview_job is not None:
+            self.root.after_cancel(self._preview_job)
+        self._preview_job = self.root.after(self.PREVIEW_DEBOUNCE_MS, self._update_preview)
+
+    def _update_preview(self):
+        self._preview_job = None
+        self._preview_seq += 1
+        seq = self._preview_seq
+        expr = self.expr_var.get()
+        if not expr.strip():
+            self.preview_var.set("")
+            return
+
+        def done(reply):
+            # resposta de uma prévia antiga (o texto já mudou): descarta
+            if seq == self._preview_seq and reply.get("ok") and reply.get("result") is not None:
+                self.preview_var.set(f"≈ {reply['result']}")
+        self._send("preview", done, expr=expr)
+
+    def toggle_mode(self):
+        self.mode = "RAD" if self.mode == "DEG" else "DEG"
+        self.mode_btn.config(text="Modo: Radianos" if self.mode == "RAD" else "Modo: Graus")
+        self._send("mode", mode=self.mode)
+        self.say("modo radianos" if self.mode == "RAD" else "modo graus")
+        self._schedule_preview()
+
+    def cycle_numbers(self):
+        self.numbers = self.NUMBERS[(self.NUMBERS.index(self.numbers) + 1) % len(self.NUMBERS)]
+        self.numbers_btn.config(text=f"Números: {self.numbers}")
+        self._send("numbers", name=self.numbers)
+        self.say({"float": "números em ponto flutuante", "decimal": "números decimais",
+                  "fraction": "frações exatas"}[self.numbers])
+        self._schedule_preview()
+
+    def _on_close(self):
+        self._requests.put(None)
+        self.client.close()
+        self.root.destroy()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cliente Tk do serviço da calculadora.")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--socket", help="caminho do socket Unix do calc_server")
+    where.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"porta TCP em 127.0.0.1 (padrão {DEFAULT_PORT})")
+    args = parser.parse_args(argv)
+
+    root = tk.Tk()
+    ClientApp(root, ServiceClient(args.socket, args.port))
+    root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
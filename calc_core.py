@@ -0,0 +1,1458 @@
+"""
+Núcleo da calculadora, sem interface gráfica nem áudio.
+
+Reúne o motor de cálculo (CalcEngine), a checagem de custo, o worker em
+processo separado e a formatação de números. Na carga importa a
+biblioteca padrão e os módulos do projeto que formam a tabela de funções
+(calc_parser, calculus, combinatorics, linalg, stats e o Timed de
+profiler), todos sem dependências externas; numpy é importado só no
+primeiro uso (e só se estiver instalado), e numeric, worksheet e
+multiprocessing também só quando usados. Nada de Tkinter nem áudio, então
+serve para scripts, correção em lote e testes.
+
+Uso como linha de comando (uma expressão por linha, resultado na mesma linha):
+    python calc_core.py [arquivo ...] [--rad] [--echo] [--numbers decimal --precision 80] < entrada.txt
+    python calc_core.py --data notas=notas.csv    # depois: mean(notas1), pctl(notas2, 90)
+    python calc_core.py --matrix A=a.csv          # depois: det(A), solve(A, [1, 2, 3])
+    python calc_core.py --tol 1e-12 --max-evals 1000000   # integrate, solve e deriv
+    python calc_core.py --sheet conta.sqlite3     # linhas "a = 3" e "f(x) = x^2 + a" (worksheet.py)
+    python calc_core.py --profile perfil.prof     # fases e funções (profiler.py); .json ou formato do cProfile
+"""
+import contextlib
+import functools
+import itertools
+import math
+import operator
+import os
+import sys
+import time
+from collections import ChainMap, OrderedDict
+
+import calculus
+import combinatorics
+import linalg
+import stats
+from calc_parser import (Body, IncrementalParser, bind_names, compile_expr, program_names, run,
+                         CONST, NAME, BIN, UN)
+from profiler import Timed
+
+try:
+    import resource  # limite de memória do worker (só Unix)
+except ImportError:
+    resource = None
+
+
+# ======= NumPy opcional (avaliação em lote) =======
+# Importado só no primeiro uso, para o núcleo carregar rápido.
+np = None
+_np_checked = False
+
+
+def _numpy():
+    """Módulo numpy, ou None se não estiver instalado (evaluate_batch cai num laço ponto a ponto)."""
+    global np, _np_checked
+    if not _np_checked:
+        _np_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+
+# ======= Motor de cálculo (parser próprio, sem eval) =======
+# Versões do estado de nomes (names_state): únicas entre motores, para o EvalWorker
+_STATE_VERSIONS = itertools.count(1)
+
+# Começo da mensagem de CostError: o worker devolve só o texto do erro
+COST_MESSAGE = "cálculo pesado demais"
+
+# Funções sem estimativa de custo confiável (inv de 1500x1500, integrate...): quem avalia
+# fora do EvalWorker (calc_server, calc_stream) manda as contas que as citam para um worker
+WORKER_FUNCTIONS = frozenset(linalg.ARITY) | frozenset(calculus.ARITY) | frozenset(stats.ARITY) | {"solve"}
+
+
+class CostError(ValueError):
+    """Expressão rejeitada pela checagem de custo (resultado grande demais)."""
+
+
+class UserFunction:
+    """f(x) = x^2 + a do usuário: roda `code` com os parâmetros ligados aos argumentos, sobre o namespace `ns`."""
+    __slots__ = ("name", "params", "code", "ns", "closes")
+
+    def __init__(self, name, params, code, ns):
+        self.name = name
+        self.params = params
+        self.code = code
+        self.ns = ns
+        # g(q) = integrate(q*t, t, 0, 1): o Body roda no namespace do motor, então q entra como constante
+        self.closes = any(arg.__class__ is Body and not set(params).isdisjoint(program_names(arg.code))
+                          for op, arg in code if op == CONST)
+
+    def __call__(self, *args):
+        scope = dict(zip(self.params, args))
+        return run(bind_names(self.code, scope) if self.closes else self.code, ChainMap(scope, self.ns))
+
+    def __repr__(self):
+        return f"{self.name}({', '.join(self.params)})"
+
+
+class CalcEngine:
+    # Funções aceitas pelo parser: nome -> (mín, máx) de argumentos
+    FUNCTIONS = {
+        "abs": (1, 1), "floor": (1, 1), "ceil": (1, 1), "round": (1, 2),
+        "sin": (1, 1), "cos": (1, 1), "tan": (1, 1),
+        "asin": (1, 1), "acos": (1, 1), "atan": (1, 1),
+        "sqrt": (1, 1), "exp": (1, 1),
+        "ln": (1, 2), "log": (1, 2),
+        "pow": (2, 3),
+        "fact": (1, 1), "factorial": (1, 1),
+        "nCr": (2, 2), "comb": (2, 2),
+        "nPr": (2, 2), "perm": (2, 2),
+        "dfact": (1, 1), "multinomial": (1, 16), "gamma": (1, 1),
+        "rad": (1, 1), "deg": (1, 1),
+        # Listas [a, b, ...] e estatística (stats.py)
+        **stats.ARITY,
+        # Matrizes, vetores e complexos (linalg.py)
+        **linalg.ARITY,
+        # Integral, raiz e derivada de uma expressão (calculus.py)
+        **calculus.ARITY,
+        "solve": (2, 4),      # solve(A, b) resolve o sistema; solve(expr, x, a, b) acha a raiz
+    }
+    CONSTANTS = {"pi", "e", "ANS", "i"}
+
+    # Maior resultado inteiro aceito (em dígitos decimais) pela checagem de custo
+    MAX_DIGITS = 100_000
+    # A prévia roda no mainloop a cada pausa na digitação: só contas instantâneas
+    PREVIEW_MAX_DIGITS = 2_000
+    PREVIEW_MAX_EVALS = 2_000
+    # Operações estimadas com vetores e matrizes (n³ em inv, det, produto, potência)
+    MAX_WORK = 2e10
+    PREVIEW_MAX_WORK = 1e7
+
+    # on_progress(nome, fração) de integrate/solve/deriv: só em contas que passam de
+    # PROGRESS_DELAY segundos, e no máximo uma vez a cada PROGRESS_INTERVAL
+    PROGRESS_DELAY = 1.0
+    PROGRESS_INTERVAL = 1.0
+
+    def __init__(self, cache_size=256, cache=None):
+        self.mode = "DEG"   # DEG ou RAD
+        self.last = 0       # ANS
+
+        # Cache LRU: expressão bruta -> programa pós-fixo já validado.
+        # `cache` (OrderedDict) deixa vários motores dividirem o mesmo (calc_server.py)
+        self._cache = OrderedDict() if cache is None else cache
+        self.cache_size = int(cache_size)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Vereditos da checagem de custo já aprovados: (chave do programa, modo, limite).
+        # Só entram programas cujo custo não depende de ANS nem de nomes do usuário
+        self._verdicts = OrderedDict()
+
+        # Namespace pré-montado; só é refeito quando mode ou ANS mudam
+        self._ns_cache = None
+        self._ns_mode = None
+        self._ns_last = None
+        self._vec_ns_cache = None
+        self._vec_ns_mode = None
+
+        # Parser incremental da prévia (criado no primeiro uso)
+        self._incremental = None
+
+        # Backend numérico (numeric.py); None = float, o caminho rápido de sempre
+        self._backend = None
+
+        # Colunas de CSV carregadas (load_csv): nome na expressão -> stats.ColumnSummary
+        self.datasets = {}
+
+        # integrate, solve e deriv: tolerância relativa, orçamento de pontos e aviso de progresso
+        self.tolerance = calculus.TOL
+        self.max_evals = calculus.MAX_EVALS
+        self.on_progress = None
+
+        # Variáveis e funções do usuário (worksheet.py): nome -> valor; nome -> (parâmetros, texto)
+        self.variables = {}
+        self.user_functions = {}
+        # Muda quando um nome some ou uma função muda de aridade: entra na chave do cache
+        self._names_version = 0
+        # Muda a cada variável, função ou dado novo: o EvalWorker só reenvia os nomes quando muda
+        self._state_version = next(_STATE_VERSIONS)
+
+        # Perfil (profiler.EngineProfiler, via set_profiler); None = desligado, sem custo
+        self.profiler = None
+
+    @property
+    def backend(self):
+        """Nome do backend numérico: "float", "decimal" ou "fraction"."""
+        return "float" if self._backend is None else self._backend.name
+
+    @backend.setter
+    def backend(self, name):
+        self.set_backend(name, self.precision)
+
+    @property
+    def precision(self):
+        """Dígitos do backend decimal (None nos demais)."""
+        return self._backend.precision if self._backend is not None else None
+
+    def set_backend(self, name="float", precision=None):
+        """Troca a aritmética: "float", "decimal" (com `precision` dígitos) ou "fraction".
+
+        As expressões compiladas continuam no cache (a chave inclui o backend);
+        o namespace e o parser da prévia são refeitos; ANS e as variáveis do
+        usuário são convertidos.
+        """
+        import numeric
+        backend = numeric.make_backend(name, precision)
+        self._backend = backend
+        convert = numeric.to_float if backend is None else backend.value
+        self.last = convert(self.last)
+        self.variables = {key: convert(value) for key, value in self.variables.items()}
+        self._state_version = next(_STATE_VERSIONS)
+        self._ns_cache = None
+        self._vec_ns_cache = None
+        self._incremental = None
+
+    def set_profiler(self, profiler):
+        """
+        Liga o perfil (um profiler.EngineProfiler, que pode ser dividido entre
+        motores) ou desliga (None). Os namespaces são refeitos: ligado, as
+        funções da tabela entram cronometradas; desligado, voltam as originais.
+        """
+        self.profiler = profiler
+        self._ns_cache = None
+        self._vec_ns_cache = None
+
+    @property
+    def limits(self):
+        """(tolerância, max_evals) de integrate/solve/deriv, como o EvalWorker recebe."""
+        return self.tolerance, self.max_evals
+
+    @property
+    def backend_spec(self):
+        """(nome, precisão): o bastante para recriar o backend em outro processo."""
+        return (self.backend, self.precision)
+
+    def load_csv(self, path, name="dados", columns=None, delimiter=None):
+        """Resume colunas de um CSV (stats.load_csv) e as expõe como nomes nas expressões.
+
+        Uma coluna vira `name`; várias viram name1, name2, ... na ordem
+        lida. Depois: mean(dados), pctl(dados, 90), slope(dados1, dados2).
+        Devolve {nome: ColumnSummary}.
+        """
+        self._check_dataset_name(name)
+        return self.add_datasets(stats.load_csv(path, columns, delimiter), name)
+
+    def _check_dataset_name(self, name):
+        if not name.isidentifier() or name in self.FUNCTIONS or name in CalcEngine.CONSTANTS:
+            raise ValueError(f"nome inválido para os dados: {name}")
+
+    def add_datasets(self, summary, name="dados"):
+        """Expõe as colunas de um stats.CsvSummary já lido (ex.: numa thread) como em load_csv()."""
+        self._check_dataset_name(name)
+        cols = summary.columns
+        names = [name] if len(cols) == 1 else [f"{name}{i}" for i in range(1, len(cols) + 1)]
+        loaded = dict(zip(names, cols))
+        for key, col in loaded.items():
+            col.name = key
+        self.datasets.update(loaded)
+        self._names_changed()
+        return loaded
+
+    def add_matrix(self, name, rows):
+        """Guarda uma matriz (linhas de números ou ndarray 2D) ou um vetor com o nome `name` para as expressões."""
+        self._check_dataset_name(name)
+        np_ = linalg._numpy()
+        values = np_.array(rows, dtype=complex if np_.iscomplexobj(rows) else float)
+        if values.ndim not in (1, 2) or not values.size:
+            raise ValueError("esperava um vetor ou uma matriz de números")
+        self.datasets[name] = linalg.wrap(values)
+        self._names_changed()
+        return self.datasets[name]
+
+    def load_matrix(self, path, name="M", delimiter=None):
+        """Lê um CSV inteiro como matriz (linalg.load_matrix) com o nome `name`; ex.: det(M), solve(M, b)."""
+        self._check_dataset_name(name)
+        return self.add_matrix(name, linalg.load_matrix(path, delimiter).a)
+
+    def names_state(self):
+        """
+        (versão, variáveis, funções, dados) do usuário: o que o EvalWorker manda
+        ao processo dele (só quando a versão muda) para as contas citarem esses nomes.
+        """
+        return (self._state_version, dict(self.variables), dict(self.user_functions), dict(self.datasets))
+
+    def load_names(self, state):
+        """Troca variáveis, funções e dados pelos de names_state() (de outro motor)."""
+        version, self.variables, self.user_functions, self.datasets = state
+        self._names_changed(removed=True)
+        self._state_version = version
+
+    # ---------- Variáveis e funções do usuário (worksheet.py) ----------
+    def set_variable(self, name, value):
+        """Cria a variável `name` ou troca o valor dela; os namespaces são atualizados no lugar."""
+        if name not in self.variables:
+            if "CONSTANTS" not in vars(self):
+                self.variables[name] = value
+                self._names_changed()
+                return
+            # CONSTANTS já é uma cópia desta instância (_names_changed): basta somar o nome
+            self.CONSTANTS.add(name)
+            self._incremental = None
+        self.variables[name] = value
+        self._state_version = next(_STATE_VERSIONS)
+        if self._ns_cache is not None:
+            self._ns_cache[name] = value
+        if self._vec_ns_cache is not None:
+            self._vec_ns_cache[name] = self._float_value(value)
+
+    def set_function(self, name, params, text):
+        """Cria ou redefine a função `name`(params) = text; o corpo é compilado (com cache) ao montar o namespace."""
+        old = self.user_functions.get(name)
+        self.user_functions[name] = (tuple(params), text)
+        self._names_changed(removed=old is not None and len(old[0]) != len(params))
+
+    def remove_name(self, name):
+        """Apaga a variável ou função `name` do usuário."""
+        if self.variables.pop(name, None) is None and self.user_functions.pop(name, None) is None:
+            return
+        self._names_changed(removed=True)
+
+    def _names_changed(self, removed=False):
+        """Nomes novos ou apagados: o parser da prévia e os namespaces são refeitos."""
+        self.CONSTANTS = CalcEngine.CONSTANTS | set(self.datasets) | set(self.variables)
+        self.FUNCTIONS = dict(CalcEngine.FUNCTIONS,
+                              **{name: (len(params), len(params)) for name, (params, _) in self.user_functions.items()})
+        self._ns_cache = None
+        self._vec_ns_cache = None
+        self._incremental = None
+        self._state_version = next(_STATE_VERSIONS)
+        if removed:
+            # um programa no cache pode citar o nome apagado (ou chamar a função com a aridade antiga)
+            self._names_version += 1
+
+    def _user_ns(self, ns, backend=None):
+        """
+        Variáveis e funções do usuário para somar ao namespace `ns` (as funções
+        rodam sobre ele). Sem `backend`, tudo em float: valores convertidos e
+        corpos compilados com literais float (lote, integrate...).
+        """
+        user = {name: self._float_value(value) if backend is None else value
+                for name, value in self.variables.items()}
+        for name, (params, text) in self.user_functions.items():
+            user[name] = UserFunction(name, params, self._get_code(text, params, backend), ns)
+        return user
+
+    def _float_value(self, value):
+        if self._backend is None:
+            return value
+        import numeric
+        return numeric.to_float(value)
+
+    def compile(self, expr, free=()):
+        """Programa compilado de `expr` (via cache), com os nomes de `free` como variáveis livres."""
+        return self._get_code(expr.strip(), tuple(free), self._backend)
+
+    def run_code(self, code):
+        """Roda um programa de compile() com a checagem de custo, sem mexer no ANS."""
+        backend = self._backend
+        try:
+            if backend is None:
+                self.check_cost(code)
+                return run(code, self._namespace())
+            with backend.context():
+                self.check_cost(code)
+                return run(code, self._namespace())
+        except ValueError:
+            raise
+        except Exception as e:
+            if backend is None:
+                raise ValueError(str(e))
+            import numeric
+            raise ValueError(numeric.error_text(e))
+
+    def _ns(self):
+        import math
+        # Trigonometria: math para reais; complexos, listas e matrizes vão para linalg.apply
+        def _trig(name, fn):
+            def f(x):
+                try:
+                    return fn(math.radians(x)) if self.mode == "DEG" else fn(x)
+                except TypeError:
+                    return linalg.apply(name, x, self.mode == "DEG")
+            return f
+
+        def _inverse_trig(name, fn):
+            def f(x):
+                try:
+                    return math.degrees(fn(x)) if self.mode == "DEG" else fn(x)
+                except TypeError:
+                    return linalg.apply(name, x, self.mode == "DEG")
+            return f
+
+        def _ln(x, b=None):
+            try:
+                return math.log(x) if b is None else math.log(x, b)
+            except TypeError:
+                return linalg.apply("ln", x, base=b)
+
+        def _log(x, b=10):
+            try:
+                return math.log(x, b)
+            except TypeError:
+                return linalg.apply("log", x, base=None if b == 10 else b)
+
+        # Fatorial, nCr, nPr...: módulo combinatorics (exatos, com memoização)
+        return {
+            "pi": math.pi, "e": math.e, "ANS": self.last,
+            "abs": abs, "floor": linalg.lifted(math.floor, "floor"), "ceil": linalg.lifted(math.ceil, "ceil"),
+            "round": round,
+            "sin": _trig("sin", math.sin), "cos": _trig("cos", math.cos), "tan": _trig("tan", math.tan),
+            "asin": _inverse_trig("asin", math.asin), "acos": _inverse_trig("acos", math.acos),
+            "atan": _inverse_trig("atan", math.atan),
+            "sqrt": linalg.lifted(math.sqrt, "sqrt"), "exp": linalg.lifted(math.exp, "exp"),
+            "ln": _ln,                             # ln(x)
+            "log": _log,                           # log base 10 padrão
+            "pow": pow,
+            "fact": combinatorics.factorial, "factorial": combinatorics.factorial,
+            "nCr": combinatorics.comb, "comb": combinatorics.comb,
+            "nPr": combinatorics.perm, "perm": combinatorics.perm,
+            "dfact": combinatorics.double_factorial, "multinomial": combinatorics.multinomial,
+            "gamma": combinatorics.gamma,
+            "rad": math.radians, "deg": math.degrees,
+            **stats.NAMESPACE,
+            **linalg.namespace(self.mode),
+            **self._calculus_ns(),
+        }
+
+    def _ns_vec(self):
+        """Tabela de funções equivalente a _ns(), mas operando sobre arrays NumPy."""
+        deg = self.mode == "DEG"
+        def _sin(x):   return np.sin(np.radians(x)) if deg else np.sin(x)
+        def _cos(x):   return np.cos(np.radians(x)) if deg else np.cos(x)
+        def _tan(x):   return np.tan(np.radians(x)) if deg else np.tan(x)
+        def _asin(x):  return np.degrees(np.arcsin(x)) if deg else np.arcsin(x)
+        def _acos(x):  return np.degrees(np.arccos(x)) if deg else np.arccos(x)
+        def _atan(x):  return np.degrees(np.arctan(x)) if deg else np.arctan(x)
+
+        # Funções inteiras não têm ufunc: aplica a versão escalar elemento a elemento
+        _fact = np.frompyfunc(combinatorics.factorial, 1, 1)
+        _comb = np.frompyfunc(combinatorics.comb, 2, 1)
+        _perm = np.frompyfunc(combinatorics.perm, 2, 1)
+        _dfact = np.frompyfunc(combinatorics.double_factorial, 1, 1)
+        _gamma = np.frompyfunc(combinatorics.gamma, 1, 1)
+        def _multinomial(*ks):
+            return np.frompyfunc(combinatorics.multinomial, len(ks), 1)(*ks)
+
+        # integrate(t^2, t, 0, x) no gráfico: uma conta inteira por ponto
+        _integrate = np.frompyfunc(self._integrate, 3, 1)
+        _solve = np.frompyfunc(self._solve, 3, 1)
+        _deriv = np.frompyfunc(self._deriv, 2, 1)
+
+        return {
+            "pi": np.pi, "e": np.e,
+            "abs": np.abs, "floor": np.floor, "ceil": np.ceil,
+            "round": lambda x, n=0: np.round(x, n),
+            "sin": _sin, "cos": _cos, "tan": _tan,
+            "asin": _asin, "acos": _acos, "atan": _atan,
+            "sqrt": np.sqrt, "exp": np.exp,
+            "ln": np.log,
+            "log": lambda x, b=10: np.log10(x) if b == 10 else np.log(x) / np.log(b),
+            "pow": np.power,
+            "fact": _fact, "factorial": _fact,
+            "nCr": _comb, "comb": _comb,
+            "nPr": _perm, "perm": _perm,
+            "dfact": _dfact, "multinomial": _multinomial, "gamma": _gamma,
+            "rad": np.radians, "deg": np.degrees,
+            "integrate": _integrate, "solve": _solve, "deriv": _deriv,
+        }
+
+    def _namespace(self):
+        """Namespace reaproveitado entre avaliações (refeito se mode mudou, ANS atualizado no lugar)."""
+        ns = self._ns_cache
+        if ns is None or self._ns_mode != self.mode:
+            if self._backend is None:
+                ns = self._ns_cache = self._ns()
+            else:
+                ns = self._ns_cache = self._backend.namespace(self.mode)
+                ns.update(stats.NAMESPACE)     # estatística e matrizes sempre em float
+                ns.update(linalg.namespace(self.mode))
+                ns.update(self._calculus_ns())
+                ns["ANS"] = self._backend.value(self.last)
+            ns.update(self.datasets)
+            if self.variables or self.user_functions:
+                ns.update(self._user_ns(ns, self._backend))
+            if self.profiler is not None:
+                self.profiler.wrap_namespace(ns, self.FUNCTIONS)
+            self._ns_mode = self.mode
+            self._ns_last = self.last
+        elif self._ns_last is not self.last:
+            self._ns_last = self.last
+            ns["ANS"] = self.last if self._backend is None else self._backend.value(self.last)
+        return ns
+
+    def _vec_namespace(self):
+        """_ns_vec() em cache (refeito quando mode muda)."""
+        if self._vec_ns_cache is None or self._vec_ns_mode != self.mode:
+            ns = self._vec_ns_cache = self._ns_vec()
+            if self.variables or self.user_functions:
+                ns.update(self._user_ns(ns))
+            if self.profiler is not None:
+                self.profiler.wrap_namespace(ns, self.FUNCTIONS)
+            self._vec_ns_mode = self.mode
+        return self._vec_ns_cache
+
+    # ---------- integrate, solve e deriv (calculus.py) ----------
+    def _calculus_ns(self):
+        return {"integrate": self._integrate, "solve": self._solve, "deriv": self._deriv}
+
+    def _integrate(self, body, a, b):
+        return self._calculus("integrate", calculus.integrate, body, a, b)
+
+    def _solve(self, first, *args):
+        if isinstance(first, Body):
+            return self._calculus("solve", calculus.solve, first, *args)
+        if len(args) != 1:
+            raise ValueError("solve espera (matriz, vetor) ou (expressão, variável, de, até)")
+        return linalg.solve(first, args[0])
+
+    def _deriv(self, body, x0):
+        return self._calculus("deriv", calculus.deriv, body, x0)
+
+    def _calculus(self, name, method, body, *args):
+        return method(self._body_function(body), *args, tol=self.tolerance, max_evals=self.max_evals,
+                      progress=self._progress_reporter(name))
+
+    def _progress_reporter(self, name):
+        callback = self.on_progress
+        if callback is None:
+            return None
+        next_report = time.monotonic() + self.PROGRESS_DELAY
+
+        def report(fraction):
+            nonlocal next_report
+            now = time.monotonic()
+            if now >= next_report:
+                next_report = now + self.PROGRESS_INTERVAL
+                callback(name, fraction)
+        return report
+
+    def _body_function(self, body):
+        """
+        Expressão de integrate/solve/deriv como função em lote: o programa
+        compilado roda uma vez sobre o vetor de pontos (namespace de
+        evaluate_batch). Se alguma função dela não aceita arrays (mean,
+        colunas de CSV...), cai de vez no laço ponto a ponto. Sempre em float.
+        """
+        code, var = body.code, body.var
+        if self._backend is None:
+            scalar = dict(self._namespace())
+        else:
+            import numeric
+            code = tuple((CONST, numeric.to_float(arg)) if op == CONST else (op, arg) for op, arg in code)
+            scalar = dict(self._ns(), ANS=self._float_last(), **self.datasets)
+            scalar.update(self._user_ns(scalar))
+            if self.profiler is not None:
+                self.profiler.wrap_namespace(scalar, self.FUNCTIONS)
+
+        def pointwise(xs):
+            out = []
+            for x in xs:
+                scalar[var] = x
+                try:
+                    y = run(code, scalar)
+                except (ArithmeticError, ValueError):
+                    y = math.nan
+                if isinstance(y, complex):
+                    if y.imag:
+                        raise ValueError("a expressão precisa dar números reais")
+                    y = y.real
+                try:
+                    out.append(float(y))
+                except TypeError:
+                    raise ValueError("a expressão precisa dar um número para cada valor da variável") from None
+            return out
+
+        if _numpy() is None:
+            return pointwise
+        vec = dict(scalar, **self._vec_namespace(), ANS=self._float_last())
+        vectorized = True
+
+        def batch(xs):
+            nonlocal vectorized
+            if vectorized:
+                vec[var] = xs
+                try:
+                    with np.errstate(all="ignore"):
+                        ys = np.asarray(run(code, vec))
+                    if ys.dtype.kind in "biuf":
+                        return np.broadcast_to(ys, xs.shape).astype(float)
+                except Exception:
+                    pass
+                vectorized = False
+            return np.array(pointwise(xs.tolist()))
+        return batch
+
+    def _compile(self, expr: str, free=(), backend=None):
+        """Tokeniza, valida e compila a expressão num programa pós-fixo (sem passar pelo cache).
+
+        `free` lista nomes extras aceitos como variáveis livres (modo lote);
+        com `backend`, os literais e as constantes dobradas ficam no tipo dele.
+        """
+        if backend is None:
+            return compile_expr(expr, self.FUNCTIONS, self.CONSTANTS, free)
+        with backend.context():
+            return compile_expr(expr, self.FUNCTIONS, self.CONSTANTS, free, number=backend.number)
+
+    def _code_key(self, expr, free=(), backend=None):
+        if backend is None:
+            key = (expr, free) if free else expr
+        else:
+            key = (expr, free, backend.key)
+        if self._names_version:
+            key = (key, self._names_version)
+        return key
+
+    def _get_code(self, expr: str, free=(), backend=None):
+        return self._cached_code(self._code_key(expr, free, backend), expr, free, backend)
+
+    def _cached_code(self, key, expr, free, backend):
+        code = self._cache.get(key)
+        if code is not None:
+            self.cache_hits += 1
+            self._cache.move_to_end(key)
+            return code
+        self.cache_misses += 1
+        code = self._compile(expr, free, backend)
+        self._cache[key] = code
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return code
+
+    def cache_info(self):
+        """Contadores do cache de expressões compiladas."""
+        total = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits, "misses": self.cache_misses,
+            "size": len(self._cache), "maxsize": self.cache_size,
+            "hit_rate": (self.cache_hits / total) if total else 0.0,
+        }
+
+    def cache_clear(self):
+        self._cache.clear()
+        self._verdicts.clear()
+        self.cache_hits = self.cache_misses = 0
+
+    def check_cost(self, code, max_digits=None, max_work=None):
+        """Checagem estática de custo do programa, antes de executar.
+
+        Estima o número de dígitos dos inteiros produzidos (potências,
+        fatoriais, combinações) sem calcular nada grande; rejeita torres de
+        potência e fatoriais explosivos com ValueError. Com vetores e
+        matrizes, soma as operações estimadas pela forma (inv, det e
+        produto de n×n: n³) até `max_work`.
+        """
+        limit = self.MAX_DIGITS if max_digits is None else max_digits
+        exact = self._backend is not None and self._backend.exact
+        budget = [self.MAX_WORK if max_work is None else max_work]
+        self._check_program(code, self._namespace(), None, limit, exact, budget)
+
+    def _check_program(self, code, ns, params, limit, exact, budget):
+        """
+        Custo de `code`; `params` (nome -> item) são os argumentos de uma função
+        do usuário; `budget` ([operações restantes]) é dividido com elas.
+        """
+        user = self.user_functions
+        stack = []   # (valor se pequeno e conhecido ou _Shape, dígitos estimados, é inteiro)
+        for op, arg in code:
+            if op == CONST or op == NAME:
+                if params and op == NAME and arg in params:
+                    item = params[arg]
+                else:
+                    item = _cost_item(arg if op == CONST else ns.get(arg))
+            elif op == UN:
+                continue
+            elif op == BIN:
+                b = stack.pop()
+                a = stack.pop()
+                if a[0].__class__ is _Shape or b[0].__class__ is _Shape:
+                    item = _cost_array_binary(arg, a, b, budget)
+                else:
+                    item = _cost_binary(arg, a, b, exact)
+            else:
+                name, argc = arg
+                args = stack[len(stack) - argc:]
+                del stack[len(stack) - argc:]
+                fn = ns.get(name) if user else None
+                if fn.__class__ is Timed:
+                    fn = fn.fn
+                if fn.__class__ is UserFunction:
+                    # f(x) = x^x: o corpo é checado com os argumentos desta chamada
+                    item = self._check_program(fn.code, fn.ns, dict(zip(fn.params, args)), limit, exact, budget)
+                elif name in _ARRAY_MAKERS or any(a[0].__class__ is _Shape for a in args):
+                    item = _cost_array_call(name, args, budget)
+                else:
+                    item = _cost_call(name, args)
+            if item[1] > limit:
+                raise CostError(COST_MESSAGE
+                                 + (f" (resultado com cerca de {item[1]:.3g} dígitos)" if item[1] < math.inf else ""))
+            stack.append(item)
+        return stack[-1] if stack else (None, 0, False)
+
+    def _checked_code(self, expr, backend, max_digits=None):
+        """
+        Programa de `expr` (via cache) já aprovado na checagem de custo. O
+        veredito fica guardado junto da chave do programa (com o backend), do
+        modo e do limite: no acerto, a conta não paga a checagem de novo.
+        """
+        key = self._code_key(expr, (), backend)
+        code = self._cached_code(key, expr, (), backend)
+        self._check_verdict(key, code, max_digits)
+        return code
+
+    def _check_verdict(self, key, code, max_digits=None):
+        limit = self.MAX_DIGITS if max_digits is None else max_digits
+        verdict = (key, self.mode, limit)
+        verdicts = self._verdicts
+        if verdict in verdicts:
+            verdicts.move_to_end(verdict)
+            return
+        self.check_cost(code, limit)
+        if self._static_cost(code):
+            verdicts[verdict] = True
+            if len(verdicts) > self.cache_size:
+                verdicts.popitem(last=False)
+
+    def _static_cost(self, code):
+        """O custo de `code` só depende do texto? (não cita ANS, dados nem nomes do usuário)"""
+        user = self.user_functions
+        for name in program_names(code):
+            if name in _STATIC_CONSTANTS:
+                continue
+            if name not in CalcEngine.FUNCTIONS or name in user:
+                return False
+        return True
+
+    def check(self, expr: str, max_digits=None):
+        """Compila (via cache) e passa pela checagem de custo, sem avaliar."""
+        self._checked_code(expr.strip(), self._backend, max_digits)
+
+    def evaluate(self, expr: str):
+        expr = expr.strip()
+        if not expr:
+            return ""
+        if self.profiler is not None:
+            return self._evaluate_profiled(expr)
+        if self._backend is not None:
+            return self._evaluate_backend(expr)
+        try:
+            code = self._checked_code(expr, None)
+            val = run(code, self._namespace())
+            self.last = val
+            return val
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(str(e))
+
+    def _evaluate_backend(self, expr):
+        """evaluate() com Decimal/Fraction: mesmo fluxo, dentro do contexto do backend."""
+        import numeric
+        backend = self._backend
+        try:
+            with backend.context():
+                code = self._checked_code(expr, backend)
+                val = run(code, self._namespace())
+            self.last = val
+            return val
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(numeric.error_text(e))
+
+    def _evaluate_profiled(self, expr):
+        """evaluate() com o perfil ligado: o mesmo fluxo, com cada fase cronometrada."""
+        prof = self.profiler
+        backend = self._backend
+        phases = {}
+        error = None
+        root = prof.begin()
+        t = root[1]
+
+        def lap(name):
+            nonlocal t
+            dt = phases[name] = prof.lap(name, t)
+            t += dt
+
+        try:
+            with backend.context() if backend is not None else contextlib.nullcontext():
+                misses = self.cache_misses
+                key = self._code_key(expr, (), backend)
+                code = self._cached_code(key, expr, (), backend)
+                lap("cache" if self.cache_misses == misses else "compile")
+                ns = self._namespace()
+                lap("namespace")
+                self._check_verdict(key, code)
+                lap("check")
+                frame = prof.phase("run")
+                try:
+                    val = run(code, ns)
+                finally:
+                    phases["run"] = prof.stop(frame)
+            self.last = val
+            return val
+        except ValueError as e:
+            error = str(e)
+            raise
+        except Exception as e:
+            if backend is None:
+                error = str(e)
+            else:
+                import numeric
+                error = numeric.error_text(e)
+            raise ValueError(error)
+        finally:
+            prof.end(root, expr, phases, error)
+
+    def preview_parser(self):
+        """IncrementalParser novo para preview(), com os literais do backend atual."""
+        backend = self._backend
+        return IncrementalParser(self.FUNCTIONS, self.CONSTANTS,
+                                 number=backend.number if backend is not None else None)
+
+    def preview(self, expr: str, parser=None):
+        """Valor parcial de `expr` enquanto é digitada, ou None se ainda não dá.
+
+        Usa o parser incremental (só a cauda alterada é reanalisada) e fecha
+        parênteses abertos: "2*(3+4" -> 14. Nunca levanta exceção, não altera
+        ANS e recusa contas que não sejam instantâneas (PREVIEW_MAX_DIGITS e,
+        em integrate/solve/deriv, PREVIEW_MAX_EVALS pontos).
+        `parser` (de preview_parser()) substitui o do motor: o serviço guarda
+        um por sessão.
+        """
+        backend = self._backend
+        if parser is None:
+            if self._incremental is None:
+                self._incremental = self.preview_parser()
+            parser = self._incremental
+        max_evals, on_progress = self.max_evals, self.on_progress
+        self.max_evals, self.on_progress = min(max_evals, self.PREVIEW_MAX_EVALS), None
+        try:
+            if backend is None:
+                code = parser.update(expr)
+                self.check_cost(code, self.PREVIEW_MAX_DIGITS, self.PREVIEW_MAX_WORK)
+                return run(code, self._namespace())
+            with backend.context():
+                code = parser.update(expr)
+                self.check_cost(code, self.PREVIEW_MAX_DIGITS, self.PREVIEW_MAX_WORK)
+                return run(code, self._namespace())
+        except Exception:
+            return None
+        finally:
+            self.max_evals, self.on_progress = max_evals, on_progress
+
+    def evaluate_batch(self, expr: str, variables=None, **kwargs):
+        """Avalia `expr` de uma vez sobre arrays de entrada.
+
+        Ex.: evaluate_batch("sin(x)^2 + ln(y)", x=xs, y=ys). As variáveis
+        (arrays NumPy ou iteráveis) são combinadas por broadcasting e o
+        resultado é um ndarray. Sem NumPy, devolve uma lista calculada ponto
+        a ponto reaproveitando o mesmo código compilado. Não altera ANS.
+        Sempre em float, qualquer que seja o backend numérico.
+        """
+        variables = dict(variables or {}, **kwargs)
+        expr = expr.strip()
+        if not expr:
+            raise ValueError("expressão vazia")
+        free = tuple(sorted(variables))
+        try:
+            code = self._get_code(expr, free)
+        except Exception as e:
+            raise ValueError(str(e))
+
+        if _numpy() is None:
+            return self._evaluate_pointwise(code, variables)
+
+        arrays = {k: np.asarray(v if hasattr(v, "__len__") else list(v), dtype=float)
+                  for k, v in variables.items()}
+        ns = dict(self._vec_namespace(), ANS=self._float_last(), **arrays)
+        try:
+            with np.errstate(all="ignore"):
+                val = run(code, ns)
+        except Exception as e:
+            raise ValueError(str(e))
+        shape = np.broadcast_shapes(*(a.shape for a in arrays.values())) if arrays else ()
+        val = np.asarray(val)
+        if val.dtype == object:
+            val = val.astype(float)
+        return np.broadcast_to(val, shape) if val.shape != shape else val
+
+    def _float_last(self):
+        if self._backend is None:
+            return self.last
+        import numeric
+        return numeric.to_float(self.last)
+
+    def _evaluate_pointwise(self, code, variables):
+        """Fallback sem NumPy: executa o programa já compilado ponto a ponto."""
+        names = list(variables)
+        columns = [list(v) for v in variables.values()]
+        if self._backend is None:
+            ns = dict(self._namespace())
+        else:
+            ns = dict(self._ns(), ANS=self._float_last(), **self.datasets)
+            ns.update(self._user_ns(ns))
+        out = []
+        for row in zip(*columns):
+            ns.update(zip(names, row))
+            try:
+                out.append(run(code, ns))
+            except (ArithmeticError, ValueError):
+                out.append(float("nan"))
+            except Exception as e:
+                raise ValueError(str(e))
+        return out
+
+
+# ======= Estimativa de custo (usada por CalcEngine.check_cost) =======
+# Nomes que não mudam de valor: o veredito de quem só cita estes pode ficar no cache
+_STATIC_CONSTANTS = frozenset({"pi", "e", "i"})
+_LOG10_E = 1 / math.log(10)
+_LOG10_2 = math.log10(2)
+
+
+def _digits(v):
+    v = abs(v)
+    return math.log10(v) + 1 if v >= 1 else 1
+
+
+def _cost_item(v):
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        return _cost_item_other(v)
+    if isinstance(v, float) and not math.isfinite(v):
+        return (None, 0, False)
+    d = _digits(v)
+    return (v if d <= 15 else None, d, isinstance(v, int))
+
+
+def _cost_item_other(v):
+    """Decimal e Fraction (backends de numeric.py); Fraction conta como exato, Decimal não cresce."""
+    if v is None or isinstance(v, bool):
+        return (None, 0, False)
+    if isinstance(v, linalg.Array):
+        return (_Shape(v.shape), 1, False)
+    if isinstance(v, stats.DataList):
+        return (_Shape((len(v),)), 1, False)
+    if hasattr(v, "adjusted"):                        # Decimal: precisão limitada pelo contexto
+        if not v.is_finite():
+            return (None, 0, False)
+        d = max(v.adjusted() + 1, 1)
+        return (float(v) if d <= 15 else None, d, False)
+    if hasattr(v, "numerator") and hasattr(v, "denominator"):
+        num, den = v.numerator, v.denominator
+        if den == 1:
+            return _cost_item(int(num))
+        d = max(_int_digits(num), _int_digits(den))
+        return (float(v) if d <= 15 else None, d, True)
+    return (None, 0, False)
+
+
+def _int_digits(n):
+    return n.bit_length() * _LOG10_2 + 1
+
+
+def _cost_binary(fn, a, b, exact=False):
+    op = fn.__name__
+    va, da, ia = a
+    vb, db, ib = b
+    if op == "pow":
+        if not (ia and ib):
+            return (None, min(309, da * max(1.0, abs(vb) if vb is not None else 10 ** db)), False)
+        if vb is not None:
+            if vb < 0:
+                return (None, 1, False)
+            d = vb * (math.log10(abs(va)) if va not in (None, 0) and abs(va) > 1 else da)
+        else:
+            d = math.inf if db > 6 else 10 ** db * da
+    elif op == "mul":
+        d = da + db
+    elif op in ("add", "sub"):
+        d = max(da, db) + 1
+    elif op == "truediv":
+        if exact:
+            return (None, max(da + db, 1), True)      # Fraction: numerador e denominador crescem
+        return (None, min(309, max(1, da - db + 1)), False)
+    else:  # floordiv, mod
+        d = da
+    if va is not None and vb is not None and d <= 15:
+        try:
+            return _cost_item(fn(va, vb))
+        except Exception:
+            pass
+    return (None, max(d, 1), ia and ib)
+
+
+def _cost_lgamma_digits(x):
+    return math.lgamma(x + 1) * _LOG10_E if x >= 0 else 0
+
+
+def _cost_call(name, args):
+    if name in ("fact", "factorial"):
+        (n, dn, _), = args
+        if n is not None:
+            if not float(n).is_integer():
+                return (None, 1, True)         # fatorial só aceita inteiros: dá erro
+            if 0 <= n <= 18:
+                return _cost_item(math.factorial(int(n)))
+            return (None, max(_cost_lgamma_digits(n), 1), True)
+        return (None, math.inf if dn > 6 else 10 ** dn * dn, True)
+    if name in ("nCr", "comb", "nPr", "perm"):
+        (n, dn, _), (r, dr, _) = args
+        if n is not None and r is not None:
+            n, r = int(n), int(r)
+            if r < 0 or n < 0 or r > n:
+                return (None, 1, True)
+            d = _cost_lgamma_digits(n) - _cost_lgamma_digits(n - r)
+            if name in ("nCr", "comb"):
+                d -= _cost_lgamma_digits(r)
+            return (None, max(d, 1), True)
+        return (None, math.inf if max(dn, dr) > 6 else 10 ** dn * dn, True)
+    if name == "dfact":
+        (n, dn, _), = args
+        if n is not None:
+            k = max(0, (int(n) + 1) // 2)        # n!! <= 2^k k!
+            return (None, max(k * _LOG10_2 + _cost_lgamma_digits(k), 1), True)
+        return (None, math.inf if dn > 6 else 10 ** dn * dn, True)
+    if name == "gamma":
+        (x, dx, ix), = args
+        if x is not None and float(x).is_integer():
+            return (None, max(_cost_lgamma_digits(x - 1), 1), True)
+        if x is None and ix:
+            return (None, math.inf if dx > 6 else 10 ** dx * dx, True)
+        return (None, 309, False)     # gamma de não inteiro: float (ou OverflowError)
+    if name == "multinomial":
+        known = [a[0] for a in args]
+        if all(v is not None for v in known):
+            return (None, max(_cost_lgamma_digits(sum(int(v) for v in known)), 1), True)
+        d = max(a[1] for a in args)
+        return (None, math.inf if d > 6 else 10 ** d * d * len(args), True)
+    if name == "pow":
+        if len(args) == 3:
+            return (None, args[2][1], True)
+        return _cost_binary(operator.pow, args[0], args[1])
+    if name == "abs":
+        v, d, i = args[0]
+        return (abs(v) if v is not None else None, d, i)
+    if name in ("floor", "ceil", "round"):
+        v, d, i = args[0]
+        return (None, d, i or len(args) == 1)
+    if name == "sqrt":
+        return (None, args[0][1] / 2 + 1, False)
+    # Demais funções devolvem float de magnitude limitada
+    return (None, min(309, max((a[1] for a in args), default=1)), False)
+
+
+# ---------- vetores e matrizes: operações pela forma ----------
+class _Shape(tuple):
+    """Forma (n,) ou (linhas, colunas) no lugar do valor de um item de custo: o resultado é vetor ou matriz."""
+    __slots__ = ()
+
+
+# Funções que criam vetores e matrizes a partir de números
+_ARRAY_MAKERS = frozenset({"identity", "list"})
+
+
+def _spend(budget, work):
+    budget[0] -= work
+    if budget[0] < 0:
+        raise CostError(f"{COST_MESSAGE} (cerca de {work:.2g} operações com matrizes)")
+
+
+def _shape_of(item):
+    return item[0] if item[0].__class__ is _Shape else None
+
+
+def _size(shape):
+    return math.prod(shape) if shape else 1
+
+
+def _side(item):
+    """Inteiro n de identity(n): o valor, se conhecido, senão o maior com esses dígitos."""
+    v, d, _ = item
+    n = abs(v) if v is not None and not isinstance(v, complex) else 10 ** min(d, 6)
+    return max(1, min(int(n), linalg.MAX_SIDE))
+
+
+def _matrix_product(sa, sb):
+    """(forma, operações) de sa × sb com ao menos uma matriz."""
+    if len(sa) == 2 and len(sb) == 2:
+        return _Shape((sa[0], sb[1])), sa[0] * sa[1] * sb[1]
+    if len(sa) == 2:
+        return _Shape((sa[0],)), _size(sa)
+    return _Shape((sb[-1],)), _size(sb)
+
+
+def _cost_array_binary(fn, a, b, budget):
+    op = fn.__name__
+    sa, sb = _shape_of(a), _shape_of(b)
+    if op == "mul" and sa and sb and (len(sa) == 2 or len(sb) == 2):
+        shape, work = _matrix_product(sa, sb)
+    elif op == "pow" and sa and len(sa) == 2 and sb is None:
+        # potência por quadrados: ~2·log2(k) produtos n×n (k < 0: mais a inversa)
+        k = abs(b[0]) if b[0] is not None and not isinstance(b[0], complex) else 10 ** min(b[1], 300)
+        shape, work = sa, sa[0] ** 3 * (2 * math.log2(max(k, 2)) + 2)
+    else:
+        shape = sa if sb is None or (sa is not None and _size(sa) >= _size(sb)) else sb
+        work = _size(shape)
+    _spend(budget, work)
+    return (shape, min(309, max(a[1], b[1])), False)
+
+
+def _cost_array_call(name, args, budget):
+    shapes = [_shape_of(a) for a in args]
+    s = shapes[0] if shapes else None
+    n = s[0] if s else 1
+    digits = min(309, max((a[1] for a in args), default=1))
+    if name == "identity":
+        n = _side(args[0])
+        shape, work = _Shape((n, n)), n * n
+    elif name == "list":
+        rows = [sh for sh in shapes if sh is not None]
+        if rows:
+            shape = _Shape((len(args), max(_size(sh) for sh in rows)))
+        else:
+            shape = _Shape((len(args),))
+        work = _size(shape)
+    elif s is None:
+        # número antes do vetor (dot(2, M)): como elemento a elemento
+        shape = max((sh for sh in shapes if sh is not None), key=_size)
+        work = _size(shape)
+    elif name in ("inv", "eigvec", "eig"):
+        shape = s if name != "eig" else _Shape((n,))
+        work = n ** 3 * (1 if name == "inv" else 10)
+    elif name in ("det", "rank"):
+        shape, work = None, n ** 3
+    elif name == "solve":
+        shape = shapes[1] if len(shapes) > 1 else None
+        work = n ** 3 + n * _size(shape)
+    elif name == "dot":
+        sb = shapes[1] if len(shapes) > 1 else None
+        if sb is not None and (len(s) == 2 or len(sb) == 2):
+            shape, work = _matrix_product(s, sb)
+        else:
+            shape, work = None, _size(s)
+    elif name == "transpose":
+        shape, work = _Shape(s[::-1] if len(s) == 2 else (n, 1)), _size(s)
+    elif name in ("trace", "norm", "cross") or name in stats.ARITY:
+        shape, work = (_Shape((3,)) if name == "cross" else None), sum(_size(sh) for sh in shapes if sh)
+    else:
+        # sin, sqrt, re, conj...: elemento a elemento, mesma forma
+        shape, work = s, _size(s)
+    _spend(budget, work)
+    return (shape, digits, False) if shape is not None else (None, 1, False)
+
+
+# ======= Avaliação em processo separado (não trava a interface) =======
+# De quanto em quanto tempo (s) o worker ocioso confere se o processo que o criou ainda existe
+WORKER_PARENT_POLL = 1.0
+
+
+def _send_progress(conn, job_id, name, fraction):
+    conn.send((job_id, None, (name, fraction)))
+
+
+def _eval_worker_main(conn, memory_mb, parent_conn=None):
+    """
+    Laço do processo worker: recebe (id, expr, modo, ANS, backend, (tolerância, orçamento), nomes)
+    e devolve (id, True/False, resultado); (id, None, (nome, fração)) é progresso de integrate/solve/deriv.
+    `nomes` é um CalcEngine.names_state() novo, ou None se não mudou desde o último.
+    `expr` também pode ser uma tupla de passos de Worksheet.plan(): o resultado
+    é {variável: valor} (worksheet.run_steps).
+
+    `parent_conn` é a ponta do host, herdada no fork: fechada logo de cara,
+    senão o recv() daqui nunca vê EOF quando o host morre. Como reforço
+    (outro processo herdou a ponta, host morto por SIGKILL antes de fechar),
+    o worker ocioso confere a cada WORKER_PARENT_POLL se o pai ainda é o
+    mesmo e sai quando não é.
+    """
+    if parent_conn is not None:
+        parent_conn.close()
+    host = os.getppid()
+    if resource is not None and memory_mb:
+        try:
+            limit = int(memory_mb) * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+    engine = CalcEngine()
+    while True:
+        try:
+            while not conn.poll(WORKER_PARENT_POLL):
+                if os.getppid() != host:
+                    return          # host morreu: ninguém vai ler o resultado
+            job_id, expr, mode, last, spec, limits, names = conn.recv()
+        except (EOFError, OSError):
+            break
+        if spec != engine.backend_spec:
+            engine.set_backend(*spec)
+        if names is not None:
+            engine.load_names(names)
+        engine.mode = mode
+        engine.last = last
+        engine.tolerance, engine.max_evals = limits
+        engine.on_progress = functools.partial(_send_progress, conn, job_id)
+        try:
+            if isinstance(expr, str):
+                result = engine.evaluate(expr)
+            else:
+                import worksheet
+                result = worksheet.run_steps(engine, expr)
+            conn.send((job_id, True, result))
+        except MemoryError:
+            conn.send((job_id, False, "memória insuficiente"))
+        except Exception as e:
+            conn.send((job_id, False, str(e)))
+
+
+class EvalWorker:
+    """
+    Executa CalcEngine.evaluate num processo separado.
+    - timeout de relógio (segundos) e limite de memória (MB, Unix)
+    - cancel() mata o processo; o próximo submit() sobe outro
+    O resultado é lido com poll(), sem bloquear o mainloop; enquanto isso,
+    `progress` guarda o último (nome, fração) de integrate/solve/deriv.
+    Variáveis, funções e dados do usuário vão junto (names em submit()) e
+    ficam no processo: só são reenviados quando mudam.
+    """
+    def __init__(self, timeout=5.0, memory_mb=512):
+        self.timeout = float(timeout)
+        self.memory_mb = memory_mb
+        self._proc = None
+        self._conn = None
+        self._job_id = 0
+        self._pending = None      # (id, instante de envio)
+        self._names_sent = None   # versão do names_state que o processo já tem
+        self.progress = None
+
+    @property
+    def busy(self):
+        return self._pending is not None
+
+    @property
+    def current_job(self):
+        return self._pending[0] if self._pending is not None else None
+
+    def _ensure_started(self):
+        if self._proc is not None and self._proc.is_alive():
+            return
+        import multiprocessing
+        parent, child = multiprocessing.Pipe()
+        self._proc = multiprocessing.Process(target=_eval_worker_main, args=(child, self.memory_mb, parent),
+                                             daemon=True)
+        self._proc.start()
+        child.close()
+        self._conn = parent
+        self._names_sent = None
+
+    def submit(self, expr, mode, last, backend=("float", None), limits=(calculus.TOL, calculus.MAX_EVALS),
+               names=None):
+        """
+        `backend` é o CalcEngine.backend_spec de quem pede (float por padrão);
+        `limits`, a (tolerância, max_evals) de integrate/solve/deriv; `names`,
+        o CalcEngine.names_state() (None: sem nomes do usuário). `expr` pode
+        ser uma tupla de passos de Worksheet.plan() (redefinir e refazer dependentes).
+        """
+        if self.busy:
+            raise RuntimeError("já existe um cálculo em andamento")
+        self._ensure_started()
+        state = names if names is not None and names[0] != self._names_sent else None
+        self._conn.send((self._job_id + 1, expr, mode, last, tuple(backend), tuple(limits), state))
+        self._job_id += 1
+        self.progress = None
+        # passos de definição mudam os nomes lá: a próxima conta manda o estado de novo
+        self._names_sent = names[0] if names is not None and isinstance(expr, str) else None
+        self._pending = (self._job_id, time.monotonic())
+        return self._job_id
+
+    def poll(self):
+        """None enquanto calcula; depois (ok, valor_ou_mensagem)."""
+        if self._pending is None:
+            return None
+        job_id, started = self._pending
+        try:
+            while self._conn.poll():
+                rid, ok, payload = self._conn.recv()
+                if ok is None:
+                    if rid == job_id:
+                        self.progress = payload
+                    continue
+                if rid == job_id:
+                    self._pending = None
+                    return ok, payload
+        except (EOFError, OSError):
+            # worker morreu (ex.: estouro de memória)
+            self.cancel()
+            return False, "o cálculo foi interrompido"
+        if time.monotonic() - started > self.timeout:
+            self.cancel()
+            return False, "tempo esgotado"
+        return None
+
+    def cancel(self):
+        self._pending = None
+        if self._proc is not None:
+            self._proc.terminate()
+            self._proc.join(timeout=1)
+            self._proc = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def shutdown(self):
+        self.cancel()
+
+
+# ======= Formatação de números =======
+def format_number(x):
+    try:
+        if isinstance(x, (int,)) or (isinstance(x, float) and x.is_integer()):
+            return str(int(round(x)))
+        if isinstance(x, complex):
+            return _format_complex(x)
+        if not isinstance(x, float):
+            import numeric
+            if isinstance(x, numeric.EXACT_TYPES):
+                # Decimal/Fraction: todos os dígitos do backend, não 12
+                text = numeric.format_exact(x)
+                return text if text is not None else format_number(int(x))
+        return f"{float(x):.12g}"
+    except ValueError:
+        # inteiro grande demais para str(): notação científica com 12 dígitos
+        if isinstance(x, int):
+            import decimal
+            return f"{decimal.Context(prec=12).create_decimal(x):.11e}"
+        return str(x)
+    except Exception:
+        return str(x)
+
+
+def _format_complex(z):
+    """3 + 4i, -2i, 1.5 - 0.5i; parte imaginária nula vira número real."""
+    re, im = z.real, z.imag
+    if im == 0:
+        return format_number(re)
+    imag = "i" if abs(im) == 1 else format_number(abs(im)) + "i"
+    if re == 0:
+        return imag if im > 0 else "-" + imag
+    return f"{format_number(re)} {'+' if im > 0 else '-'} {imag}"
+
+
+def speak_number(x):
+    """Número por extenso em pt-BR (ver verbalizer.py)."""
+    from verbalizer import speak_number as _speak   # import tardio: verbalizer importa este módulo
+    return _speak(x)
+
+
+# ======= Linha de comando =======
+def _iter_lines(paths):
+    if not paths:
+        yield from sys.stdin
+        return
+    for path in paths:
+        if path == "-":
+            yield from sys.stdin
+            continue
+        with open(path, encoding="utf-8") as f:
+            yield from f
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Avalia expressões (uma por linha) e escreve um resultado por linha.")
+    parser.add_argument("files", nargs="*", help="arquivos de entrada ('-' ou nada = stdin)")
+    parser.add_argument("--rad", action="store_true", help="trigonometria em radianos (padrão: graus)")
+    parser.add_argument("--echo", action="store_true", help="escreve 'expressão = resultado'")
+    parser.add_argument("--numbers", choices=("float", "decimal", "fraction"), default="float",
+                        help="aritmética: float (padrão), decimal ou fraction (frações exatas)")
+    parser.add_argument("--precision", type=int, default=None, help="dígitos do modo decimal (padrão 50)")
+    parser.add_argument("--data", action="append", default=[], metavar="[NOME=]ARQUIVO.csv",
+                        help="resume as colunas de um CSV para as funções estatísticas (nome padrão: dados)")
+    parser.add_argument("--matrix", action="append", default=[], metavar="[NOME=]ARQUIVO.csv",
+                        help="lê um CSV só de números como matriz (nome padrão: M)")
+    parser.add_argument("--tol", type=float, default=calculus.TOL,
+                        help=f"tolerância relativa de integrate, solve e deriv (padrão {calculus.TOL:g})")
+    parser.add_argument("--max-evals", type=int, default=calculus.MAX_EVALS,
+                        help=f"máximo de pontos avaliados por integrate/solve/deriv (padrão {calculus.MAX_EVALS})")
+    parser.add_argument("--sheet", default=":memory:", metavar="ARQUIVO.sqlite3",
+                        help="guarda as variáveis e funções (a = 3, f(x) = x^2) nesse arquivo entre execuções")
+    parser.add_argument("--profile", metavar="ARQUIVO",
+                        help="mede fases e funções; grava JSON (.json) ou o formato do cProfile (pstats) "
+                             "e escreve o resumo na saída de erros")
+    parser.add_argument("--slow-ms", type=float, default=50.0,
+                        help="com --profile, guarda as contas mais lentas que isso (padrão 50 ms)")
+    args = parser.parse_args(argv)
+
+    engine = CalcEngine()
+    if args.rad:
+        engine.mode = "RAD"
+    if args.numbers != "float":
+        engine.set_backend(args.numbers, args.precision)
+    engine.tolerance, engine.max_evals = args.tol, args.max_evals
+    if args.profile:
+        from profiler import EngineProfiler
+        engine.set_profiler(EngineProfiler(slow_ms=args.slow_ms))
+    for item in args.data:
+        name, sep, path = item.partition("=")
+        try:
+            engine.load_csv(path, name) if sep else engine.load_csv(item)
+        except (OSError, ValueError) as e:
+            parser.error(f"{item}: {e}")
+    for item in args.matrix:
+        name, sep, path = item.partition("=")
+        try:
+            engine.load_matrix(path, name) if sep else engine.load_matrix(item)
+        except (OSError, ValueError) as e:
+            parser.error(f"{item}: {e}")
+    from worksheet import Worksheet
+    sheet = Worksheet(engine, args.sheet)
+    write = sys.stdout.write
+    buf = []
+    errors = 0
+    for line in _iter_lines(args.files):
+        expr = line.strip()
+        if not expr:
+            buf.append("\n")
+            continue
+        try:
+            if "=" in expr:
+                # a = 3 escreve o valor; f(x) = ... escreve f(x); "a =" apaga e deixa a linha vazia
+                name, value, _ = sheet.execute(expr)
+                d = sheet.get(name)
+                res = "" if d is None else format_number(value) if d.params is None else d.source.partition(" =")[0]
+            else:
+                res = format_number(engine.evaluate(expr))
+        except ValueError as e:
+            res = f"erro: {e}"
+            errors += 1
+        buf.append(f"{expr} = {res}\n" if args.echo else res + "\n")
+        if len(buf) >= 512:
+            write("".join(buf))
+            buf.clear()
+    write("".join(buf))
+    sys.stdout.flush()
+    sheet.close()
+    profiler = engine.profiler
+    if profiler is not None:
+        if args.profile.endswith(".json"):
+            profiler.export_json(args.profile)
+        else:
+            profiler.dump_stats(args.profile)
+        print(profiler.report(), file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
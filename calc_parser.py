@@ -0,0 +1,536 @@
+"""
+Tokenizador, parser (shunting-yard) e avaliador pós-fixo da calculadora.
+
+Substitui o eval() do Python: a expressão vira um programa pós-fixo plano
+(tupla de instruções) que só conhece números, nomes da tabela de funções
+e os operadores aritméticos. Qualquer coisa fora dessa gramática é
+rejeitada na compilação, antes de rodar.
+
+    prog = compile_expr("sin(30) + 2^3", functions={"sin": (1, 1)}, constants={"pi"})
+    run(prog, namespace)
+
+Em integrate(x^2, x, 0, 1), solve(...) e deriv(...) (BODY_FUNCTIONS) o
+primeiro argumento não é avaliado: vira um Body (sub-programa na variável
+do segundo argumento) que a função recebe pronto para rodar em lote.
+"""
+import math
+import operator
+import re
+from bisect import bisect_right
+from os.path import commonprefix
+
+
+class ParseError(ValueError):
+    """Expressão fora da gramática da calculadora."""
+    def __init__(self, msg, pos=None):
+        super().__init__(msg if pos is None else f"{msg} (posição {pos + 1})")
+        self.pos = pos
+
+
+# ======= Tokenizador =======
+# Token: tupla (tipo, texto, início, fim)
+#   tipo  -> "num", "name", "op", "(", ")", ",", "[" ou "]"
+#   texto -> já normalizado (× -> *, ^ -> **, π -> pi, √ -> sqrt, log10 -> log)
+#   início/fim -> posições na expressão original (fim exclusivo)
+KIND, TEXT, POS, END = range(4)
+
+# Cada achado: (espaços, número, nome, operador, pontuação)
+_TOKEN_RE = re.compile(r"""
+    (\s*)(?:
+        ((?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?(?:[ij](?![A-Za-z_0-9]))?)
+      | ([A-Za-z_][A-Za-z_0-9]*)
+      | (\*\*|//|[-+*/%^×÷√π])
+      | ([(),\[\]])
+    )""", re.VERBOSE)
+
+# Sinônimos aceitos na entrada
+_OP_ALIASES = {"^": "**", "×": "*", "÷": "/"}
+_NAME_ALIASES = {"π": "pi", "√": "sqrt", "log10": "log"}
+
+
+def tokenize(expr: str, start: int = 0):
+    """Quebra `expr` em tokens a partir de `start`. Levanta ParseError em caractere inválido."""
+    tokens = []
+    append = tokens.append
+    pos = start
+    # findall faz a varredura toda em C; as posições saem da soma dos comprimentos
+    for ws, num, name, op, punct in _TOKEN_RE.findall(expr, start):
+        tpos = pos + len(ws)
+        if num:
+            pos = tpos + len(num)
+            append(("num", num, tpos, pos))
+        elif name:
+            pos = tpos + len(name)
+            append(("name", _NAME_ALIASES.get(name, name), tpos, pos))
+        elif punct:
+            pos = tpos + 1
+            append((punct, punct, tpos, pos))
+        else:
+            pos = tpos + len(op)
+            if op in _NAME_ALIASES:
+                append(("name", _NAME_ALIASES[op], tpos, pos))
+            else:
+                append(("op", _OP_ALIASES.get(op, op), tpos, pos))
+    # findall pula o que não casa; se a soma não fecha, há caractere inválido
+    if pos != len(expr) and expr[pos:].strip():
+        _raise_invalid(expr, start)
+    return tokens
+
+
+def _raise_invalid(expr, start):
+    pos = start
+    while True:
+        m = _TOKEN_RE.match(expr, pos)
+        if m is None:
+            bad = pos + len(expr[pos:]) - len(expr[pos:].lstrip())
+            raise ParseError(f"caractere inválido: {expr[bad]!r}", bad)
+        pos = m.end()
+
+
+# ======= Programa pós-fixo =======
+# Instruções: (opcode, argumento)
+CONST = 0   # empilha argumento
+NAME = 1    # empilha ns[argumento]
+BIN = 2     # desempilha b, a; empilha argumento(a, b)
+UN = 3      # aplica argumento(x) ao topo
+CALL = 4    # argumento = (nome, n): desempilha n args, empilha ns[nome](*args)
+BODY = 5    # só entre parse e fold_constants: (recuos até início, fim do 1º arg, fim do 2º arg, variável)
+
+BINARY_OPS = {
+    "+": operator.add, "-": operator.sub,
+    "*": operator.mul, "/": operator.truediv, "//": operator.floordiv, "%": operator.mod,
+    "**": operator.pow,
+}
+UNARY_OPS = {"+": operator.pos, "-": operator.neg}
+
+# operador -> (precedência, associativa à direita, entrada da pilha)
+_BINARY = {
+    "+": (1, False), "-": (1, False),
+    "*": (2, False), "/": (2, False), "//": (2, False), "%": (2, False),
+    "**": (4, True),
+}
+_BINARY = {op: (prec, right, (prec, (BIN, BINARY_OPS[op]))) for op, (prec, right) in _BINARY.items()}
+# Prefixos ficam entre */ e ** (como no Python: -2^2 = -4, 2^-1 = 0.5)
+_UNARY = {op: (3, (UN, fn)) for op, fn in UNARY_OPS.items()}
+_UNARY_SQRT = (3, (CALL, ("sqrt", 1)))   # √9 sem parênteses
+
+# Na pilha de operadores, "(" e chamadas têm precedência 0 e nunca são desempilhados por operador
+_PAREN = (0, None)
+# "[" abre uma chamada de nome _LIST_OPEN; "]" a fecha como CALL da função LIST_FUNCTION
+_LIST_OPEN = "["
+LIST_FUNCTION = "list"
+
+# Funções cujo 1º argumento é uma expressão na variável do 2º: nome -> nº de argumentos
+# dessa forma. Com outro nº (solve(A, b) de matrizes), é uma chamada comum.
+BODY_FUNCTIONS = {"integrate": 4, "solve": 4, "deriv": 3}
+# Entrada de chamada dessas funções: [0, nome, vírgulas, posição, início do 1º arg,
+#                                      fim do 1º arg, fim do 2º arg, nomes livres do 1º arg]
+_BODY_START, _BODY_END1, _BODY_END2, _BODY_NAMES = range(4, 8)
+
+# Potências dobradas em tempo de compilação: expoente máximo e tamanho máximo do
+# resultado (dígitos estimados). Acima disso a potência fica para a avaliação, depois
+# da checagem de custo: (9^999)^999 não pode travar o parser
+_FOLD_POW_LIMIT = 1024
+_FOLD_POW_DIGITS = 10_000
+
+
+class Body:
+    """Expressão de integrate/solve/deriv já compilada: `code` roda com ns[var] = valor(es)."""
+    __slots__ = ("var", "code")
+
+    def __init__(self, var, code):
+        self.var = var
+        self.code = code
+
+    def __eq__(self, other):
+        return isinstance(other, Body) and self.var == other.var and self.code == other.code
+
+    def __hash__(self):
+        return hash((self.var, self.code))
+
+    def __repr__(self):
+        return f"Body({self.var!r}, {len(self.code)} instruções)"
+
+
+def parse(tokens, functions, constants, free=(), checkpoints=None, state=None, auto_close=False,
+          number=None):
+    """Converte tokens em programa pós-fixo (lista de instruções).
+
+    `functions` mapeia nome -> (mín, máx) de argumentos; `constants` e `free`
+    são os nomes aceitos como valores. Chamadas ficam na pilha como
+    [0, nome, vírgulas, posição]; listas [a, b] são chamadas da função
+    LIST_FUNCTION (aceitas só se ela estiver em `functions`). `number` converte o texto de um literal
+    (Decimal, Fraction...); None = int ou float, como o Python.
+
+    Para o IncrementalParser: `checkpoints` (lista) recebe o estado antes de
+    cada token e ao fim dos tokens; `state` retoma de um desses estados;
+    `auto_close` fecha parênteses e chamadas que ficaram abertos.
+    """
+    if state is None:
+        out = []
+        ops = []
+        expect_operand = True
+        pending = None        # token de função aguardando "("
+        prev = None
+    else:
+        out, ops, expect_operand, pending, prev = state
+    push_out = out.append
+    push_op = ops.append
+
+    for tok in tokens:
+        if checkpoints is not None:
+            checkpoints.append((len(out), _copy_ops(ops), expect_operand, pending, prev))
+        kind = tok[0]
+        if pending is not None:
+            if kind == "(":
+                if pending[1] in BODY_FUNCTIONS:
+                    push_op([0, pending[1], 0, pending[2], len(out), None, None, ()])
+                else:
+                    push_op([0, pending[1], 0, pending[2]])
+                pending = None
+                prev = tok
+                continue
+            if pending[1] != "sqrt":
+                raise ParseError(f"função sem parênteses: {pending[1]}", pending[2])
+            push_op(_UNARY_SQRT)
+            pending = None
+
+        if expect_operand:
+            if kind == "num":
+                text = tok[1]
+                if text[-1] in "ij":
+                    push_out((CONST, complex(0, float(text[:-1]))))     # 2i: imaginário, em qualquer backend
+                elif number is None:
+                    push_out((CONST, float(text) if ("." in text or "e" in text or "E" in text) else int(text)))
+                else:
+                    push_out((CONST, number(text)))
+                expect_operand = False
+            elif kind == "name":
+                name = tok[1]
+                if name in functions:
+                    pending = tok
+                elif name in constants or name in free:
+                    push_out((NAME, name))
+                    expect_operand = False
+                else:
+                    # variável de integrate(x^2, x, ...): só nos dois primeiros argumentos
+                    body = _open_body(ops)
+                    if body is None:
+                        raise ParseError(f"nome desconhecido: {name}", tok[2])
+                    body[_BODY_NAMES] += ((name, tok[2]),)
+                    push_out((NAME, name))
+                    expect_operand = False
+            elif kind == "(":
+                push_op(_PAREN)
+            elif kind == "[":
+                if LIST_FUNCTION not in functions:
+                    raise ParseError("listas não são aceitas aqui", tok[2])
+                push_op([0, _LIST_OPEN, 0, tok[2]])
+            elif kind == "op" and tok[1] in _UNARY:
+                push_op(_UNARY[tok[1]])
+            elif kind == ")" and prev is not None and prev[0] == "(" and ops and ops[-1][0] == 0 \
+                    and ops[-1] is not _PAREN and ops[-1][1] != _LIST_OPEN:
+                _close_call(out, ops.pop(), functions, empty=True)     # f()
+                expect_operand = False
+            elif kind == "]" and prev is not None and prev[0] == "[":
+                _close_call(out, ops.pop(), functions, empty=True)     # []
+                expect_operand = False
+            else:
+                raise ParseError(f"esperado número antes de {tok[1]!r}", tok[2])
+        elif kind == "op":
+            prec, right, entry = _BINARY[tok[1]]
+            while ops:
+                tp = ops[-1][0]
+                if tp > prec or (tp == prec and not right):
+                    push_out(ops.pop()[1])
+                else:
+                    break
+            push_op(entry)
+            expect_operand = True
+        elif kind == ")":
+            while ops and ops[-1][0]:
+                push_out(ops.pop()[1])
+            if not ops:
+                raise ParseError("parêntese fechado sem abrir", tok[2])
+            top = ops.pop()
+            if top is not _PAREN:
+                if top[1] == _LIST_OPEN:
+                    raise ParseError("colchete não fechado", top[3])
+                top[2] += 1
+                _close_call(out, top, functions)
+        elif kind == "]":
+            while ops and ops[-1][0]:
+                push_out(ops.pop()[1])
+            if not ops:
+                raise ParseError("colchete fechado sem abrir", tok[2])
+            top = ops.pop()
+            if top is _PAREN or top[1] != _LIST_OPEN:
+                raise ParseError("parêntese não fechado antes de ']'", tok[2])
+            top[2] += 1
+            _close_call(out, top, functions)
+        elif kind == ",":
+            while ops and ops[-1][0]:
+                push_out(ops.pop()[1])
+            if not ops or ops[-1] is _PAREN:
+                raise ParseError("vírgula fora de chamada de função ou lista", tok[2])
+            top = ops[-1]
+            if len(top) > 4 and top[2] < 2:
+                top[_BODY_END1 + top[2]] = len(out)
+            top[2] += 1
+            expect_operand = True
+        elif kind == "(" and prev[0] == "name":
+            raise ParseError(f"{prev[1]} não é uma função", prev[2])
+        else:
+            raise ParseError(f"operador esperado antes de {tok[1]!r}", tok[2])
+        prev = tok
+
+    if checkpoints is not None:
+        checkpoints.append((len(out), _copy_ops(ops), expect_operand, pending, prev))
+    if pending is not None:
+        raise ParseError(f"função sem parênteses: {pending[1]}", pending[2])
+    if expect_operand:
+        raise ParseError("expressão incompleta", prev[3] if prev is not None else 0)
+    while ops:
+        top = ops.pop()
+        if not top[0]:
+            if not auto_close:
+                if top is _PAREN:
+                    raise ParseError("parêntese não fechado")
+                raise ParseError("colchete não fechado" if top[1] == _LIST_OPEN else "parêntese não fechado",
+                                 top[3])
+            if top is not _PAREN:
+                top[2] += 1
+                _close_call(out, top, functions)
+            continue
+        push_out(top[1])
+    return out
+
+
+def _copy_ops(ops):
+    # entradas de chamada são listas mutáveis (contam vírgulas); o resto é imutável
+    return [e[:] if e.__class__ is list else e for e in ops]
+
+
+def _open_body(ops):
+    """Chamada de BODY_FUNCTIONS mais interna ainda no 1º ou 2º argumento, ou None."""
+    for entry in reversed(ops):
+        if entry.__class__ is list and len(entry) > 4:
+            return entry if entry[2] < 2 else None
+    return None
+
+
+def _close_call(out, call, functions, empty=False):
+    name, argc, pos = call[1], call[2], call[3]
+    if name == _LIST_OPEN:
+        name = LIST_FUNCTION
+    lo, hi = functions[name]
+    if empty:
+        argc = 0
+    if not lo <= argc <= hi:
+        want = str(lo) if lo == hi else f"{lo} a {hi}"
+        raise ParseError(f"{name} espera {want} argumento(s), recebeu {argc}", pos)
+    if len(call) > 4:
+        if argc == BODY_FUNCTIONS[name]:
+            _close_body(out, call)
+            argc -= 1        # expressão e variável viram um argumento só (o Body)
+        elif call[_BODY_NAMES]:
+            unknown, where = call[_BODY_NAMES][0]
+            raise ParseError(f"nome desconhecido: {unknown}", where)
+    out.append((CALL, (name, argc)))
+
+
+def _close_body(out, call):
+    """
+    Marca os dois primeiros argumentos (expressão, variável) para virarem um
+    CONST Body em fold_constants. `out` não é reescrito aqui: o
+    IncrementalParser retoma truncando essa mesma lista.
+    """
+    name, pos = call[1], call[3]
+    start, end1, end2 = call[_BODY_START], call[_BODY_END1], call[_BODY_END2]
+    var = out[end1:end2]
+    if len(var) != 1 or var[0][0] != NAME:
+        raise ParseError(f"{name}: o 2º argumento deve ser o nome da variável", pos)
+    var = var[0][1]
+    for unknown, where in call[_BODY_NAMES]:
+        if unknown != var:
+            raise ParseError(f"nome desconhecido: {unknown}", where)
+    n = len(out)
+    out.append((BODY, (n - start, n - end1, n - end2, var)))
+
+
+def fold_constants(program):
+    """
+    Peephole: resolve operadores aplicados só a constantes em tempo de compilação.
+    Também fecha as marcas BODY: expressão e variável viram um CONST Body.
+    """
+    out = []
+    starts = []          # len(out) antes de cada instrução (para as marcas BODY)
+    for ins in program:
+        starts.append(len(out))
+        op, arg = ins
+        if op == BODY:
+            i = len(starts) - 1
+            to_start, to_end1, to_end2, var = arg
+            start, end1 = starts[i - to_start], starts[i - to_end1]
+            out[start:starts[i - to_end2]] = [(CONST, Body(var, tuple(out[start:end1])))]
+        elif op == BIN and len(out) >= 2 and out[-1][0] == CONST and out[-2][0] == CONST:
+            a, b = out[-2][1], out[-1][1]
+            if arg is operator.pow and not _small_pow(a, b):
+                out.append(ins)
+                continue
+            try:
+                val = arg(a, b)
+            except Exception:
+                out.append(ins)          # erro aparece na avaliação, como antes
+                continue
+            del out[-2:]
+            out.append((CONST, val))
+        elif op == UN and out and out[-1][0] == CONST:
+            out[-1] = (CONST, arg(out[-1][1]))
+        else:
+            out.append(ins)
+    return tuple(out)
+
+
+def _small_pow(a, b):
+    """a^b tem resultado pequeno o bastante para dobrar? (estimativa por logaritmo, sem calcular)"""
+    try:
+        if abs(b) > _FOLD_POW_LIMIT:
+            return False
+        size = abs(a)
+        return size <= 1 or abs(b) * math.log10(size) <= _FOLD_POW_DIGITS
+    except (TypeError, ValueError, OverflowError, ArithmeticError):
+        return False
+
+
+def program_names(program):
+    """Nomes e funções que o programa cita, inclusive dentro de integrate/solve/deriv (menos a variável deles)."""
+    for op, arg in program:
+        if op == NAME:
+            yield arg
+        elif op == CALL:
+            yield arg[0]
+        elif op == CONST and arg.__class__ is Body:
+            for name in program_names(arg.code):
+                if name != arg.var:
+                    yield name
+
+
+def bind_names(program, values):
+    """Programa com os nomes de `values` virando constantes, inclusive dentro de Body (menos a variável dele)."""
+    out = []
+    for ins in program:
+        op, arg = ins
+        if op == NAME and arg in values:
+            ins = (CONST, values[arg])
+        elif op == CONST and arg.__class__ is Body:
+            inner = {name: v for name, v in values.items() if name != arg.var}
+            ins = (CONST, Body(arg.var, bind_names(arg.code, inner)))
+        out.append(ins)
+    return tuple(out)
+
+
+def compile_expr(expr: str, functions, constants, free=(), number=None):
+    """Tokeniza, analisa e otimiza `expr`. Devolve o programa pós-fixo (tupla)."""
+    tokens = tokenize(expr)
+    if not tokens:
+        raise ParseError("expressão vazia")
+    return fold_constants(parse(tokens, functions, constants, free, number=number))
+
+
+# ======= Análise incremental =======
+# Um token que termina a menos disto do ponto alterado pode crescer com o
+# texto novo ("1e" + "+5" vira "1e+5"), então é refeito junto com a cauda.
+_RELEX_MARGIN = 3
+
+
+class IncrementalParser:
+    """
+    Compila o texto em edição reaproveitando o prefixo que não mudou.
+
+    Guarda os tokens e o estado do shunting-yard antes de cada token; a
+    cada update() retokeniza e reanalisa só a partir do primeiro token que
+    pode ter mudado. Digitar no fim de uma expressão longa custa o token
+    novo, não a expressão toda (fold_constants ainda percorre o programa,
+    que é linear e barato). Parênteses abertos são fechados (auto_close),
+    então "2*(3+4" já compila.
+    """
+
+    def __init__(self, functions, constants, free=(), number=None):
+        self.functions = functions
+        self.constants = constants
+        self.free = free
+        self.number = number
+        self.reset()
+
+    def reset(self):
+        self.text = ""
+        self.tokens = []
+        self._ends = []          # fim de cada token (para bisect)
+        self._checkpoints = []   # estado do parser antes do token i (e um após o último)
+        self._out = []           # saída do parser, compartilhada; truncada ao retomar
+        self.reused = 0          # tokens reaproveitados no último update
+
+    def update(self, expr, auto_close=True):
+        """Programa pós-fixo (tupla) de `expr`. Levanta ParseError como compile_expr."""
+        p = len(commonprefix((self.text, expr)))
+        k = bisect_right(self._ends, p - _RELEX_MARGIN)
+        cps = self._checkpoints
+        k = min(k, len(cps) - 1) if cps else 0
+        start = self._ends[k - 1] if k else 0
+        self.text = expr
+        self.reused = k
+        del self.tokens[k:]
+        del self._ends[k:]
+        try:
+            tail = tokenize(expr, start)
+        except ParseError:
+            del cps[k:]
+            raise
+        self.tokens += tail
+        self._ends += [t[END] for t in tail]
+        if not self.tokens:
+            del cps[:]
+            raise ParseError("expressão vazia")
+
+        if cps:
+            n_out, ops, expect, pending, prev = cps[k]
+            del cps[k:]
+        else:
+            n_out, ops, expect, pending, prev = 0, (), True, None, None
+        out = self._out
+        del out[n_out:]
+        state = (out, _copy_ops(ops), expect, pending, prev)
+        return fold_constants(parse(tail, self.functions, self.constants, self.free,
+                                    checkpoints=cps, state=state, auto_close=auto_close,
+                                    number=self.number))
+
+
+# ======= Avaliador =======
+def run(program, ns):
+    """Executa o programa pós-fixo usando `ns` para nomes e funções."""
+    if len(program) == 1 and program[0][0] != CALL:
+        op, arg = program[0]
+        return arg if op == CONST else ns[arg]
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    for op, arg in program:
+        if op == CONST:
+            push(arg)
+        elif op == NAME:
+            push(ns[arg])
+        elif op == BIN:
+            b = pop()
+            stack[-1] = arg(stack[-1], b)
+        elif op == UN:
+            stack[-1] = arg(stack[-1])
+        else:
+            name, argc = arg
+            if argc == 1:
+                stack[-1] = ns[name](stack[-1])
+            else:
+                args = stack[len(stack) - argc:]
+                del stack[len(stack) - argc:]
+                push(ns[name](*args))
+    return stack[0]
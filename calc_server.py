@@ -0,0 +1,577 @@
+"""
+Serviço local da calculadora para várias estações ao mesmo tempo.
+
+Um processo só (asyncio) atende todas as estações do laboratório: Python,
+motor de voz e vozes são carregados uma vez, e os caches (expressões
+compiladas, textos falados, clipes WAV) valem para todos.
+
+Protocolo: uma mensagem JSON por linha (UTF-8), em socket Unix ou TCP em
+127.0.0.1. Cada pedido tem "id" e "op"; a resposta repete o "id" e traz
+"ok" (e "error" quando falha).
+
+    -> {"id": 1, "op": "hello"}                      <- {"id": 1, "ok": true, "session": "9c1f..."}
+    -> {"id": 2, "op": "eval", "expr": "1/3"}        <- {"id": 2, "ok": true, "result": "0.333333333333",
+                                                         "speech": "resultado: zero vírgula ..."}
+    -> {"id": 3, "op": "clip", "text": "resultado: zero vírgula ..."}
+                                                     <- {"id": 3, "ok": true, "wav": "<base64>"}
+
+Operações:
+    hello    abre sessão ou retoma ("session": id) depois de cair a conexão
+    eval     avalia "expr" (atualiza ANS e o histórico da sessão)
+    preview  valor parcial de "expr" (parser incremental por sessão)
+    mode     "mode": "DEG" ou "RAD"
+    numbers  "name": float/decimal/fraction, "precision" opcional
+    history  últimas "limit" contas da sessão
+    speak    começa a renderizar o clipe de "text" (sem esperar)
+    clip     WAV de "text" (espera a renderização, até CLIP_TIMEOUT)
+    stats    contadores, caches e latências do serviço
+    profile  perfil dos motores (profiler.py): "on": true/false liga ou desliga,
+             "reset": true zera; devolve fases, funções e contas lentas
+             (só as contas feitas no loop; as do pool não entram)
+    bye      encerra a conexão (a sessão continua até expirar)
+
+Sessão: modo, ANS, backend numérico e histórico; fica viva SESSION_TTL s
+depois da última conexão. As contas são compiladas e checadas no próprio
+loop, com o cache compartilhado; as baratas (custo até INLINE_MAX_DIGITS)
+rodam ali mesmo. As pesadas, e as que chamam matrizes, integrate/solve/deriv
+ou estatística (POOL_FUNCTIONS, sem modelo de custo), vão para um pool de
+processos (calc_core.EvalWorker) com tempo limite: estourar o tempo mata só
+o processo daquela conta.
+
+Uso:
+    python calc_server.py --socket /tmp/calc.sock      (Unix)
+    python calc_server.py --port 8765                  (TCP, só localhost)
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import queue
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from calc_core import WORKER_FUNCTIONS, CalcEngine, CostError, EvalWorker, format_number
+from calc_parser import program_names
+from latency import LatencyRecorder
+from profiler import EngineProfiler
+from verbalizer import number_text
+
+DEFAULT_PORT = 8765
+SESSION_TTL = 3600.0
+HISTORY_SIZE = 200
+MAX_LINE = 64 * 1024
+CODE_CACHE_SIZE = 8192
+# Contas com estimativa até isto (dígitos) rodam no loop; acima, no pool
+INLINE_MAX_DIGITS = CalcEngine.PREVIEW_MAX_DIGITS
+# Decimal com mais dígitos que isto também vai para o pool (séries longas)
+INLINE_MAX_PRECISION = 200
+EVAL_TIMEOUT = 5.0
+# Funções sem estimativa de custo (inv de 1500x1500, integrate...): sempre no pool
+POOL_FUNCTIONS = WORKER_FUNCTIONS
+# Intervalo (s) entre as olhadas no processo do pool enquanto a conta roda
+POOL_POLL = 0.005
+CLIP_TIMEOUT = 10.0
+
+_BAD_JSON = json.dumps({"ok": False, "error": "json inválido"}, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+# ======= Sessões =======
+class Session:
+    """Estado de uma estação: modo, ANS, backend numérico, histórico e parser da prévia."""
+
+    def __init__(self, sid):
+        self.id = sid
+        self.mode = "DEG"
+        self.last = 0
+        self.spec = ("float", None)
+        self.history = deque(maxlen=HISTORY_SIZE)     # (expressão, resultado)
+        self.parser = None
+        self.connections = 0
+        self.touched = time.monotonic()
+
+
+# ======= Clipes de fala compartilhados =======
+def _default_clip_engine(rate):
+    """Motor pyttsx3 com a voz pt-BR (mesma escolha e cache de voz do app)."""
+    from tts_backends import pyttsx3_engine
+    return pyttsx3_engine(rate, 1.0)
+
+
+class ClipRenderer:
+    """
+    Falas renderizadas em WAV uma vez e servidas a todas as sessões.
+
+    Um único motor pyttsx3 numa thread própria (o motor não é thread-safe)
+    sintetiza em lotes: save_to_file de tudo que está na fila e um só
+    runAndWait. Os WAV ficam num LRU limitado a `max_bytes`. Sem pyttsx3
+    (ou se o motor falhar ao iniciar) `enabled` vira False e clip() dá None.
+    """
+
+    def __init__(self, loop, rate=180, max_bytes=64 * 1024 * 1024, engine_factory=None):
+        self.loop = loop
+        self.rate = int(rate)
+        self.max_bytes = int(max_bytes)
+        self.engine_factory = engine_factory or _default_clip_engine
+        self.enabled = True
+        self.error = None
+        self._clips = OrderedDict()    # chave -> bytes do WAV
+        self._bytes = 0
+        self._waiting = {}             # chave -> [futures] aguardando a renderização
+        self._queue = queue.Queue()
+        self._thread = None
+        self.stats = {"hits": 0, "misses": 0, "rendered": 0, "render_s": 0.0}
+
+    def key(self, text):
+        return hashlib.sha1(f"{self.rate}|{text}".encode("utf-8")).hexdigest()[:20]
+
+    def request(self, text):
+        """Agenda a renderização de `text` (se ainda não há clipe) e devolve a chave."""
+        key = self.key(text)
+        if not self.enabled or key in self._clips or key in self._waiting:
+            return key
+        self._waiting[key] = []
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="clip-renderer", daemon=True)
+            self._thread.start()
+        self._queue.put((key, text))
+        return key
+
+    async def clip(self, text, timeout=CLIP_TIMEOUT):
+        """Bytes do WAV de `text`, esperando a renderização; None sem voz ou se demorar demais."""
+        key = self.request(text)
+        data = self._clips.get(key)
+        if data is not None:
+            self._clips.move_to_end(key)
+            self.stats["hits"] += 1
+            return data
+        if key not in self._waiting:
+            return None
+        self.stats["misses"] += 1
+        fut = self.loop.create_future()
+        self._waiting[key].append(fut)
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _run(self):
+        try:
+            engine = self.engine_factory(self.rate)
+        except Exception as e:
+            self.loop.call_soon_threadsafe(self._fail, e)
+            return
+        folder = tempfile.mkdtemp(prefix="calc-clips-")
+        while True:
+            batch = [self._queue.get()]
+            if batch[0] is None:
+                break
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            t0 = time.perf_counter()
+            paths = {}
+            for key, text in batch:
+                paths[key] = os.path.join(folder, key + ".wav")
+                engine.save_to_file(text, paths[key])
+            try:
+                engine.runAndWait()
+            except Exception:
+                pass
+            dt = time.perf_counter() - t0
+            for key, path in paths.items():
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    os.remove(path)
+                except OSError:
+                    data = None
+                self.loop.call_soon_threadsafe(self._done, key, data, dt / len(paths))
+        shutil.rmtree(folder, ignore_errors=True)
+
+    def _done(self, key, data, seconds):
+        waiters = self._waiting.pop(key, [])
+        if data:
+            self.stats["rendered"] += 1
+            self.stats["render_s"] += seconds
+            self._clips[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._clips) > 1:
+                _, old = self._clips.popitem(last=False)
+                self._bytes -= len(old)
+        for fut in waiters:
+            if not fut.done():
+                fut.set_result(data or None)
+
+    def _fail(self, error):
+        self.enabled = False
+        self.error = error
+        for waiters in self._waiting.values():
+            for fut in waiters:
+                if not fut.done():
+                    fut.set_result(None)
+        self._waiting.clear()
+
+    def info(self):
+        return dict(self.stats, enabled=self.enabled, clips=len(self._clips), bytes=self._bytes,
+                    pending=len(self._waiting))
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+
+
+# ======= Serviço =======
+class CalcService:
+    """
+    Estado do serviço: sessões, motores por (backend, modo) com um cache de
+    código compartilhado, pool de processos e clipes. serve() abre o socket.
+    """
+
+    def __init__(self, jobs=None, memory_mb=512, timeout=EVAL_TIMEOUT, clips=True, clip_rate=180,
+                 clip_engine_factory=None, session_ttl=SESSION_TTL, profile=False, slow_ms=50.0):
+        self.jobs = jobs or os.cpu_count() or 2
+        self.memory_mb = memory_mb
+        self.timeout = float(timeout)
+        self.session_ttl = float(session_ttl)
+        self.sessions = {}
+        self._code_cache = OrderedDict()
+        self._engines = {}            # ((nome, precisão), modo) -> CalcEngine
+        self._workers = []            # EvalWorker do pool, criados no primeiro uso
+        self._idle = None             # asyncio.Queue dos livres
+        self._clips_wanted = clips
+        self._clip_rate = clip_rate
+        self._clip_engine_factory = clip_engine_factory
+        self.clips = None             # ClipRenderer, criado em serve() (precisa do loop)
+        self.latency = LatencyRecorder()
+        # um perfil só para todos os motores; ligado ou não por "profile" a qualquer momento
+        self.profiler = EngineProfiler(slow_ms=slow_ms)
+        self.profiling = bool(profile)
+        self.counts = {"connections": 0, "eval": 0, "inline": 0, "pool": 0, "errors": 0}
+        self._server = None
+        self._purge_task = None
+
+    # ---------- sessões e motores ----------
+    def _session(self, sid=None):
+        s = self.sessions.get(sid) if sid else None
+        if s is None:
+            s = Session(uuid.uuid4().hex)
+            self.sessions[s.id] = s
+        s.touched = time.monotonic()
+        return s
+
+    def _engine_for(self, s):
+        key = (s.spec, s.mode)
+        engine = self._engines.get(key)
+        if engine is None:
+            engine = CalcEngine(cache_size=CODE_CACHE_SIZE, cache=self._code_cache)
+            if s.spec[0] != "float":
+                engine.set_backend(*s.spec)
+            engine.mode = s.mode
+            if self.profiling:
+                engine.set_profiler(self.profiler)
+            self._engines[key] = engine
+        engine.last = s.last
+        return engine
+
+    async def _purge(self):
+        while True:
+            await asyncio.sleep(min(60.0, self.session_ttl))
+            limit = time.monotonic() - self.session_ttl
+            for sid in [sid for sid, s in self.sessions.items() if not s.connections and s.touched < limit]:
+                del self.sessions[sid]
+
+    # ---------- pool ----------
+    def _get_idle(self):
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            self._workers = [EvalWorker(self.timeout, self.memory_mb) for _ in range(self.jobs)]
+            for worker in self._workers:
+                self._idle.put_nowait(worker)
+        return self._idle
+
+    async def _eval_in_pool(self, expr, s):
+        """
+        Roda num processo livre do pool. Tempo esgotado ou estouro de memória
+        mata só esse processo (EvalWorker.cancel); ele volta para a fila e
+        sobe de novo na próxima conta.
+        """
+        idle = self._get_idle()
+        worker = await idle.get()
+        try:
+            worker.submit(expr, s.mode, s.last, s.spec)
+            while True:
+                result = worker.poll()
+                if result is not None:
+                    break
+                await asyncio.sleep(POOL_POLL)
+        except BaseException:
+            worker.cancel()            # conexão fechada no meio: não deixa a conta rodando
+            raise
+        finally:
+            idle.put_nowait(worker)
+        ok, payload = result
+        if not ok:
+            raise ValueError(payload)
+        return payload
+
+    def _needs_pool(self, engine, expr):
+        """Cita funções sem modelo de custo (matrizes, cálculo, estatística)?"""
+        return not POOL_FUNCTIONS.isdisjoint(program_names(engine.compile(expr)))
+
+    # ---------- operações ----------
+    async def _op_eval(self, s, msg):
+        expr = str(msg.get("expr", "")).strip()
+        if not expr:
+            raise ValueError("expressão vazia")
+        engine = self._engine_for(s)
+        try:
+            engine.check(expr, INLINE_MAX_DIGITS)
+            inline = ((s.spec[0] != "decimal" or (s.spec[1] or 0) <= INLINE_MAX_PRECISION)
+                      and not self._needs_pool(engine, expr))
+        except CostError:
+            engine.check(expr)        # pesado demais até para o pool: CostError sobe
+            inline = False
+        self.counts["eval"] += 1
+        if inline:
+            self.counts["inline"] += 1
+            val = engine.evaluate(expr)
+        else:
+            self.counts["pool"] += 1
+            val = await self._eval_in_pool(expr, s)
+        s.last = val
+        result = format_number(val)
+        s.history.append((expr, result))
+        speech = f"resultado: {number_text(result)}"
+        if self.clips is not None:
+            self.clips.request(speech)       # já começa a renderizar; o cliente pede com "clip"
+        return {"result": result, "speech": speech, "pool": not inline}
+
+    async def _op_preview(self, s, msg):
+        engine = self._engine_for(s)
+        if s.parser is None:
+            s.parser = engine.preview_parser()
+        val = engine.preview(str(msg.get("expr", "")), parser=s.parser)
+        return {"result": None if val is None else format_number(val)}
+
+    async def _op_mode(self, s, msg):
+        mode = str(msg.get("mode", "")).upper()
+        if mode not in ("DEG", "RAD"):
+            raise ValueError("modo deve ser DEG ou RAD")
+        s.mode = mode
+        return {"mode": mode}
+
+    async def _op_numbers(self, s, msg):
+        import numeric
+        name = str(msg.get("name", "float")).lower()
+        precision = msg.get("precision")
+        backend = numeric.make_backend(name, precision)      # valida nome e precisão
+        s.spec = (name, backend.precision if backend is not None else None)
+        s.last = numeric.to_float(s.last) if backend is None else backend.value(s.last)
+        s.parser = None
+        return {"numbers": s.spec[0], "precision": s.spec[1]}
+
+    async def _op_history(self, s, msg):
+        limit = max(0, int(msg.get("limit", 20)))
+        items = list(s.history)[-limit:] if limit else []
+        return {"history": [[expr, result] for expr, result in items]}
+
+    async def _op_speak(self, s, msg):
+        text = str(msg.get("text", ""))
+        if self.clips is None or not text:
+            return {"clip": False}
+        self.clips.request(text)
+        return {"clip": self.clips.enabled}
+
+    async def _op_clip(self, s, msg):
+        text = str(msg.get("text", ""))
+        data = await self.clips.clip(text) if self.clips is not None and text else None
+        if data is None:
+            raise ValueError("clipe indisponível")
+        return {"wav": base64.b64encode(data).decode("ascii")}
+
+    async def _op_stats(self, s, msg):
+        engines = list(self._engines.values())
+        hits = sum(e.cache_hits for e in engines)
+        misses = sum(e.cache_misses for e in engines)
+        return {
+            "sessions": len(self.sessions),
+            "counts": dict(self.counts),
+            "code_cache": {"size": len(self._code_cache), "hits": hits, "misses": misses,
+                           "hit_rate": hits / (hits + misses) if hits + misses else 0.0},
+            "speech_cache": number_text.cache_info()._asdict(),
+            "clips": self.clips.info() if self.clips is not None else None,
+            "latency_ms": self.latency.summary(),
+        }
+
+    async def _op_profile(self, s, msg):
+        if "on" in msg:
+            self.profiling = bool(msg["on"])
+            for engine in self._engines.values():
+                engine.set_profiler(self.profiler if self.profiling else None)
+        if msg.get("reset"):
+            self.profiler.reset()
+        return {"on": self.profiling, "profile": self.profiler.to_dict()}
+
+    _OPS = {"eval": _op_eval, "preview": _op_preview, "mode": _op_mode, "numbers": _op_numbers,
+            "history": _op_history, "speak": _op_speak, "clip": _op_clip, "stats": _op_stats,
+            "profile": _op_profile}
+
+    async def _dispatch(self, s, msg):
+        op = msg.get("op")
+        handler = self._OPS.get(op)
+        if handler is None:
+            raise ValueError(f"operação desconhecida: {op}")
+        t0 = time.perf_counter()
+        try:
+            return await handler(self, s, msg)
+        finally:
+            self.latency.add(op, time.perf_counter() - t0)
+
+    # ---------- conexões ----------
+    async def _handle(self, reader, writer):
+        self.counts["connections"] += 1
+        session = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:          # linha maior que MAX_LINE
+                    break
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                    if not isinstance(msg, dict):
+                        raise ValueError
+                except ValueError:
+                    writer.write(_BAD_JSON)
+                    await writer.drain()
+                    continue
+                op = msg.get("op")
+                if op == "hello" or session is None:
+                    if session is not None:
+                        session.connections -= 1
+                    session = self._session(msg.get("session") if op == "hello" else None)
+                    session.connections += 1
+                session.touched = time.monotonic()
+                reply = {"id": msg.get("id"), "ok": True}
+                if op == "hello":
+                    reply.update(session=session.id, mode=session.mode, numbers=session.spec[0],
+                                 precision=session.spec[1])
+                elif op != "bye":
+                    try:
+                        reply.update(await self._dispatch(session, msg))
+                    except Exception as e:
+                        self.counts["errors"] += 1
+                        reply = {"id": msg.get("id"), "ok": False, "error": str(e) or type(e).__name__}
+                writer.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+                if op == "bye":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass      # estação caiu, ou o serviço está fechando
+        finally:
+            if session is not None:
+                session.connections -= 1
+                session.touched = time.monotonic()
+            writer.close()
+
+    async def start(self, socket_path=None, port=DEFAULT_PORT):
+        """Abre o socket (Unix se `socket_path`, senão TCP em 127.0.0.1) e devolve o asyncio.Server."""
+        loop = asyncio.get_running_loop()
+        if self._clips_wanted:
+            self.clips = ClipRenderer(loop, rate=self._clip_rate, engine_factory=self._clip_engine_factory)
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)      # socket velho de uma execução anterior
+            self._server = await asyncio.start_unix_server(self._handle, path=socket_path, limit=MAX_LINE)
+        else:
+            self._server = await asyncio.start_server(self._handle, "127.0.0.1", port, limit=MAX_LINE)
+        self._purge_task = loop.create_task(self._purge())
+        return self._server
+
+    async def serve(self, socket_path=None, port=DEFAULT_PORT):
+        """
+        Atende até SIGTERM ou SIGINT e então fecha tudo (close(): socket,
+        clipes e os processos do pool), para não deixar workers órfãos.
+        Sem add_signal_handler (Windows), o Ctrl+C chega como KeyboardInterrupt.
+        """
+        server = await self.start(socket_path, port)
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        stopped = []
+
+        def stop(sig):
+            stopped.append(sig)
+            task.cancel()
+
+        handled = []
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, stop, sig)
+                handled.append(sig)
+            except (NotImplementedError, RuntimeError):
+                pass
+        try:
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            if not stopped:
+                raise
+        finally:
+            for sig in handled:
+                loop.remove_signal_handler(sig)
+            self.close()
+
+    def close(self):
+        if self._purge_task is not None:
+            self._purge_task.cancel()
+        if self._server is not None:
+            self._server.close()
+        if self.clips is not None:
+            self.clips.close()
+        for worker in self._workers:
+            worker.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço local da calculadora (várias estações, um processo).")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--socket", help="caminho do socket Unix")
+    where.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"porta TCP em 127.0.0.1 (padrão {DEFAULT_PORT})")
+    parser.add_argument("--jobs", type=int, default=None, help="processos para contas pesadas (padrão: núcleos)")
+    parser.add_argument("--timeout", type=float, default=EVAL_TIMEOUT, help="tempo máximo de uma conta (s)")
+    parser.add_argument("--no-clips", action="store_true", help="não renderiza clipes de fala")
+    parser.add_argument("--rate", type=int, default=180, help="velocidade da fala dos clipes")
+    parser.add_argument("--profile", action="store_true",
+                        help="começa com o perfil dos motores ligado (op \"profile\" liga e desliga depois)")
+    parser.add_argument("--slow-ms", type=float, default=50.0, help="contas mais lentas que isso vão para o perfil")
+    args = parser.parse_args(argv)
+
+    service = CalcService(jobs=args.jobs, timeout=args.timeout, clips=not args.no_clips, clip_rate=args.rate,
+                          profile=args.profile, slow_ms=args.slow_ms)
+    where = args.socket or f"127.0.0.1:{args.port}"
+    print(f"calc_server ouvindo em {where}", file=sys.stderr)
+    try:
+        asyncio.run(service.serve(args.socket, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""
+Avaliação em fluxo de arquivos grandes de expressões, em paralelo.
+
+Lê as expressões sob demanda (texto: uma por linha; CSV: uma coluna),
+agrupa em blocos, avalia os blocos num pool de processos e escreve os
+resultados na ordem da entrada, com o erro de cada linha. A memória fica
+limitada a `max_inflight` blocos, qualquer que seja o tamanho do arquivo.
+
+Semântica por arquivo:
+  - independente (padrão): cada linha começa com ANS = 0, blocos em paralelo
+  - sequencial: o ANS passa de uma linha para a próxima; os blocos do
+    arquivo rodam em ordem, levando (modo, ANS) de um para o outro, e
+    arquivos diferentes continuam em paralelo
+Num arquivo de texto, linhas de diretiva mudam isso:
+    #! sequencial      #! independente      #! rad      #! graus
+
+CSV: a primeira linha é cabeçalho se a célula da coluna não for uma
+expressão válida ("expr", "conta"...); --header/--no-header decidem
+quando a detecção não serve (cabeçalho "pi", ou --column pelo nome, que
+sempre pede cabeçalho).
+
+Contas baratas (custo estimado até CalcEngine.PREVIEW_MAX_DIGITS, sem
+matrizes, integrate/solve/deriv nem estatística) rodam no próprio
+processo; as outras vão para um calc_core.EvalWorker com tempo limite,
+como no app: uma linha lenta vira "erro: tempo esgotado" em vez de
+parar o arquivo.
+
+Uso:
+    python calc_stream.py notas.txt turma2.csv -o resultados.txt --jobs 4
+"""
+import csv
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from calc_core import WORKER_FUNCTIONS, CalcEngine, CostError, EvalWorker, format_number
+from calc_parser import program_names
+
+CHUNK_SIZE = 2000
+# Tempo máximo (s) de uma linha pesada no EvalWorker (o mesmo do app)
+LINE_TIMEOUT = 5.0
+# Intervalo (s) entre as olhadas no worker enquanto a linha roda
+WORKER_POLL = 0.001
+
+_engine = None   # um motor por processo worker (mantém o cache entre blocos)
+_worker = None   # EvalWorker das linhas pesadas deste processo
+
+
+def _worker_engine():
+    global _engine
+    if _engine is None:
+        _engine = CalcEngine()
+    return _engine
+
+
+def _is_light(engine, code):
+    """Cabe no próprio processo? (custo de prévia e sem funções sem modelo de custo)"""
+    try:
+        engine.check_cost(code, CalcEngine.PREVIEW_MAX_DIGITS, CalcEngine.PREVIEW_MAX_WORK)
+    except CostError:
+        return False
+    return WORKER_FUNCTIONS.isdisjoint(program_names(code))
+
+
+def _eval_in_worker(engine, expr, timeout):
+    global _worker
+    if _worker is None:
+        _worker = EvalWorker(timeout=timeout)
+    _worker.timeout = timeout
+    _worker.submit(expr, engine.mode, engine.last, engine.backend_spec)
+    while True:
+        result = _worker.poll()
+        if result is not None:
+            break
+        time.sleep(WORKER_POLL)
+    ok, payload = result
+    if not ok:
+        raise ValueError(payload)
+    engine.last = payload
+    return payload
+
+
+def eval_chunk(exprs, mode, last, sequential, timeout=LINE_TIMEOUT):
+    """Avalia um bloco. Devolve ([(resultado, erro), ...], ANS final).
+
+    Itens None (linhas em branco/comentários) voltam como (None, None).
+    Linhas pesadas rodam no EvalWorker com `timeout` segundos.
+    """
+    engine = _worker_engine()
+    engine.mode = mode
+    engine.last = last
+    out = []
+    append = out.append
+    for expr in exprs:
+        if expr is None:
+            append((None, None))
+            continue
+        if not sequential:
+            engine.last = 0
+        try:
+            code = engine.compile(expr)
+            if _is_light(engine, code):
+                value = engine.last = engine.run_code(code)
+            else:
+                value = _eval_in_worker(engine, expr, timeout)
+            append((format_number(value), None))
+        except ValueError as e:
+            append((None, str(e)))
+    return out, (engine.last if sequential else last)
+
+
+def _looks_like_expression(text):
+    try:
+        _worker_engine().compile(text)
+    except ValueError:
+        return False
+    return True
+
+
+# ======= Leitura =======
+class Source:
+    """Um arquivo de entrada, lido em blocos sob demanda."""
+
+    def __init__(self, path, column=0, sequential=False, mode="DEG", chunk_size=CHUNK_SIZE, header=None):
+        """`header` (CSV): True/False; None detecta pela primeira linha (ver _csv_chunks)."""
+        self.path = path
+        self.column = column
+        self.sequential = sequential
+        self.mode = mode
+        self.chunk_size = int(chunk_size)
+        self.is_csv = path.lower().endswith(".csv")
+        self.has_header = header
+        self.header = None
+
+    def chunks(self):
+        """Gera (modo, sequencial, exprs, linhas_originais) em blocos de até chunk_size."""
+        f = sys.stdin if self.path == "-" else open(self.path, encoding="utf-8", newline="")
+        try:
+            yield from (self._csv_chunks(f) if self.is_csv else self._text_chunks(f))
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+    def _text_chunks(self, f):
+        exprs, raw = [], []
+        for line in f:
+            text = line.strip()
+            if text.startswith("#!"):
+                new_mode, new_seq = self._directive(text[2:])
+                if (new_mode, new_seq) != (self.mode, self.sequential) and exprs:
+                    yield self.mode, self.sequential, exprs, raw
+                    exprs, raw = [], []
+                self.mode, self.sequential = new_mode, new_seq
+                exprs.append(None)
+                raw.append(text)
+            else:
+                exprs.append(text if text and not text.startswith("#") else None)
+                raw.append(text)
+            if len(exprs) >= self.chunk_size:
+                yield self.mode, self.sequential, exprs, raw
+                exprs, raw = [], []
+        if exprs:
+            yield self.mode, self.sequential, exprs, raw
+
+    def _csv_chunks(self, f):
+        """
+        Sem `header` explícito, a primeira linha é cabeçalho quando a célula
+        da coluna não é uma expressão válida; com --column pelo nome, sempre.
+        """
+        reader = csv.reader(f)
+        first = next(reader, None)
+        col = self.column
+        has_header = self.has_header
+        if has_header is None:
+            if not isinstance(col, int):
+                has_header = True
+            else:
+                cell = first[col].strip() if first is not None and col < len(first) else ""
+                has_header = bool(cell) and not _looks_like_expression(cell)
+        if has_header:
+            self.header = first
+            if self.header is not None and not isinstance(col, int):
+                col = self.header.index(col) if col in self.header else int(col)
+        elif not isinstance(col, int):
+            raise ValueError(f"{self.path}: coluna {col!r} pelo nome precisa de cabeçalho")
+        rows_iter = reader if has_header or first is None else itertools.chain((first,), reader)
+        exprs, rows = [], []
+        for row in rows_iter:
+            text = row[col].strip() if col < len(row) else ""
+            exprs.append(text or None)
+            rows.append(row)
+            if len(exprs) >= self.chunk_size:
+                yield self.mode, self.sequential, exprs, rows
+                exprs, rows = [], []
+        if exprs:
+            yield self.mode, self.sequential, exprs, rows
+
+    def _directive(self, text):
+        word = text.strip().lower()
+        mode, seq = self.mode, self.sequential
+        if word in ("rad", "radianos"):
+            mode = "RAD"
+        elif word in ("deg", "graus"):
+            mode = "DEG"
+        elif word in ("sequencial", "sequential"):
+            seq = True
+        elif word in ("independente", "independent"):
+            seq = False
+        return mode, seq
+
+
+# ======= Agendamento =======
+class _Slot:
+    """Bloco na janela de saída, na ordem da entrada."""
+    __slots__ = ("source", "mode", "sequential", "exprs", "raw", "prev", "future", "results", "last")
+
+    def __init__(self, source, mode, sequential, exprs, raw, prev):
+        self.source = source
+        self.mode = mode
+        self.sequential = sequential
+        self.exprs = exprs
+        self.raw = raw
+        self.prev = prev          # bloco anterior do mesmo arquivo (para o ANS sequencial)
+        self.future = None
+        self.results = None
+        self.last = None
+
+
+def evaluate_stream(sources, jobs=None, max_inflight=None, timeout=LINE_TIMEOUT):
+    """Gera (source, linhas_originais, resultados) bloco a bloco, na ordem da entrada.
+
+    jobs=1 avalia no próprio processo (sem pool); `timeout` vale por linha pesada.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    max_inflight = max_inflight or 2 * jobs
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+    def chunk_iter():
+        for src in sources:
+            prev = None
+            for mode, seq, exprs, raw in src.chunks():
+                slot = _Slot(src, mode, seq, exprs, raw, prev if seq else None)
+                prev = slot
+                yield slot
+
+    pending = chunk_iter()
+    window = deque()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(window) < max_inflight:
+                slot = next(pending, None)
+                if slot is None:
+                    exhausted = True
+                else:
+                    window.append(slot)
+            if not window:
+                return
+
+            for slot in window:
+                _maybe_submit(slot, pool, timeout)
+
+            head = window[0]
+            if head.results is None:
+                running = [s.future for s in window if s.future is not None and s.results is None]
+                wait(running, return_when=FIRST_COMPLETED)
+                for s in window:
+                    if s.future is not None and s.results is None and s.future.done():
+                        s.results, s.last = s.future.result()
+            while window and window[0].results is not None:
+                slot = window.popleft()
+                yield slot.source, slot.raw, slot.results
+                slot.exprs = slot.raw = slot.results = None   # solta memória; .last ainda serve ao próximo
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _maybe_submit(slot, pool, timeout):
+    if slot.future is not None or slot.results is not None:
+        return
+    if slot.sequential and slot.prev is not None:
+        if slot.prev.last is None:
+            return          # espera o ANS do bloco anterior
+        last = slot.prev.last
+    else:
+        last = 0
+    slot.prev = None
+    if pool is None:
+        slot.results, slot.last = eval_chunk(slot.exprs, slot.mode, last, slot.sequential, timeout)
+        return
+    slot.future = pool.submit(eval_chunk, slot.exprs, slot.mode, last, slot.sequential, timeout)
+
+
+# ======= Escrita =======
+def write_results(blocks, out, echo=False):
+    """Escreve os blocos de evaluate_stream. Devolve o número de linhas com erro."""
+    errors = 0
+    csv_writer = None
+    header_done = set()
+    for source, raw, results in blocks:
+        if source.is_csv:
+            if csv_writer is None:
+                csv_writer = csv.writer(out, lineterminator="\n")
+            if source.path not in header_done:
+                header_done.add(source.path)
+                if source.header is not None:
+                    csv_writer.writerow(source.header + ["resultado", "erro"])
+            for row, (res, err) in zip(raw, results):
+                csv_writer.writerow(row + [res or "", err or ""])
+                errors += err is not None
+            continue
+        lines = []
+        for text, (res, err) in zip(raw, results):
+            if err is not None:
+                errors += 1
+                res = f"erro: {err}"
+            elif res is None:
+                lines.append("\n")
+                continue
+            lines.append(f"{text} = {res}\n" if echo else res + "\n")
+        out.write("".join(lines))
+    return errors
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Avalia arquivos grandes de expressões em paralelo.")
+    parser.add_argument("files", nargs="+", help="arquivos .txt (uma expressão por linha) ou .csv ('-' = stdin)")
+    parser.add_argument("-o", "--output", help="arquivo de saída (padrão: stdout)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="processos (padrão: nº de CPUs)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="linhas por bloco")
+    parser.add_argument("--column", default="0", help="coluna do CSV com a expressão (nome ou índice)")
+    parser.add_argument("--header", action=argparse.BooleanOptionalAction, default=None,
+                        help="a primeira linha do CSV é (ou não) cabeçalho (padrão: detecta)")
+    parser.add_argument("--timeout", type=float, default=LINE_TIMEOUT, help="tempo máximo de uma linha pesada (s)")
+    parser.add_argument("--sequential", action="store_true", help="ANS encadeado linha a linha em cada arquivo")
+    parser.add_argument("--rad", action="store_true", help="trigonometria em radianos")
+    parser.add_argument("--echo", action="store_true", help="escreve 'expressão = resultado'")
+    args = parser.parse_args(argv)
+
+    column = int(args.column) if args.column.isdigit() else args.column
+    if args.header is False and not isinstance(column, int):
+        parser.error("--column pelo nome precisa de cabeçalho")
+    sources = [Source(p, column=column, sequential=args.sequential, mode="RAD" if args.rad else "DEG",
+                      chunk_size=args.chunk, header=args.header) for p in args.files]
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        errors = write_results(evaluate_stream(sources, jobs=args.jobs, timeout=args.timeout), out, echo=args.echo)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
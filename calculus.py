@@ -0,0 +1,332 @@
+"""
+Integral, raiz e derivada numéricas da calculadora: integrate, solve e deriv.
+
+O parser entrega o primeiro argumento como um calc_parser.Body e o
+CalcEngine o transforma numa função em lote f(xs) -> ys, que roda o
+programa compilado uma vez sobre um vetor de pontos (o caminho NumPy de
+evaluate_batch) em vez de uma avaliação por ponto. Os métodos foram
+escolhidos para pedir muitos pontos de cada vez:
+
+  integrate  Gauss-Kronrod 7-15 adaptativo: a cada rodada, todos os
+             subintervalos com erro acima da sua parte da tolerância são
+             divididos ao meio e avaliados num lote só; a troca de
+             variável x = a + (b - a)(3t² - 2t³) amansa singularidades
+             nas pontas (1/sqrt(x) em [0, 1])
+  solve      multisseção com troca de sinal garantida: a cada rodada, k
+             pontos igualmente espaçados mais os vizinhos da secante
+             encolhem o intervalo; raiz simples converge em poucas rodadas
+  deriv      Ridders: diferenças centrais com passos decrescentes, todas
+             num lote, e extrapolação de Richardson
+
+`tol` é relativa, com o mesmo valor como piso absoluto; `max_evals` é o
+orçamento de pontos avaliados (ValueError com o erro estimado quando
+acaba). `progress`, se dado, recebe a fração estimada do trabalho feito.
+Sem NumPy tudo funciona com listas, só mais devagar.
+
+    integrate(lambda xs: [x * x for x in xs], 0, 1)   # 0.3333333333333333
+"""
+import math
+
+# ======= NumPy opcional (lotes de pontos) =======
+np = None
+_np_checked = False
+
+
+def _numpy():
+    """Módulo numpy, ou None se não estiver instalado (os lotes viram listas)."""
+    global np, _np_checked
+    if not _np_checked:
+        _np_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+
+# Tolerância e orçamento de avaliações padrão (CalcEngine.tolerance / max_evals)
+TOL = 1e-10
+MAX_EVALS = 200_000
+
+ARITY = {"integrate": (4, 4), "deriv": (3, 3)}
+
+
+def _bound(x, name):
+    """Limite de integrate/solve (ou ponto de deriv) como float finito."""
+    try:
+        v = float(x)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: os limites precisam ser números reais") from None
+    if not math.isfinite(v):
+        raise ValueError(f"{name}: os limites precisam ser finitos")
+    return v
+
+
+def _values(f, xs):
+    """f aplicada a um lote; sempre devolve floats (ndarray com NumPy, lista sem)."""
+    if np is not None:
+        return np.asarray(f(np.asarray(xs, dtype=float)), dtype=float)
+    return [float(y) for y in f(list(xs))]
+
+
+def _floats(f, xs):
+    """f aplicada a um lote, como lista de floats do Python: para percorrer ponto a ponto
+    (aritmética e laços em escalares do NumPy custam várias vezes mais)."""
+    ys = _values(f, xs)
+    return ys.tolist() if np is not None else ys
+
+
+def _fraction_done(first, now, goal):
+    """Fração do caminho (em escala log) entre o erro inicial e o alvo."""
+    if not (first > goal > 0) or not math.isfinite(first) or not math.isfinite(now):
+        return 0.0
+    return min(1.0, max(0.0, math.log(first / max(now, goal)) / math.log(first / goal)))
+
+
+# ======= Integral: Gauss-Kronrod 7-15 adaptativo =======
+# Nós de Kronrod em [0, 1] (o resto é simétrico); os de índice ímpar são os de Gauss
+_XK = (0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+       0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+       0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+       0.207784955007898467600689403773245, 0.0)
+_WK = (0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+       0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+       0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+       0.204432940075298892414161999234649, 0.209482141084727828012999174891714)
+_WG = (0.129484966168869693270611432679082, 0.279705391489276667901467771423780,
+       0.381830050505118944950369775488975, 0.417959183673469387755102040816327)
+XGK = tuple(-x for x in _XK[:-1]) + _XK[::-1]               # 15 nós, crescentes
+WGK = _WK[:-1] + _WK[::-1]
+WG = tuple(_WG[min(i, 14 - i) // 2] if i % 2 else 0.0 for i in range(15))   # Gauss 7 nos ímpares
+
+# Subintervalo menor que isto (em t, com [a, b] levado a [0, 1]) não é mais dividido
+_MIN_WIDTH = 1e-13
+
+
+def _gk15(f, intervals):
+    """Integral de Kronrod e erro estimado (como no QUADPACK) de cada intervalo, num lote só."""
+    if np is not None:
+        iv = np.asarray(intervals, dtype=float)
+        c = (iv[:, 0] + iv[:, 1]) / 2
+        h = (iv[:, 1] - iv[:, 0]) / 2
+        y = _values(f, (c[:, None] + h[:, None] * np.asarray(XGK)).ravel()).reshape(len(iv), 15)
+        with np.errstate(all="ignore"):
+            kron = y @ np.asarray(WGK)
+            gauss = y @ np.asarray(WG)
+            asc = np.abs(y - (kron / 2)[:, None]) @ np.asarray(WGK)
+            err = np.abs((kron - gauss) * h)
+            asc = np.abs(asc * h)
+            scaled = asc * np.minimum(1.0, (200 * err / np.where(asc > 0, asc, 1)) ** 1.5)
+            err = np.where(asc > 0, scaled, err)
+            err = np.where(np.isfinite(err), err, np.inf)
+        return (kron * h).tolist(), err.tolist()
+    xs = [(lo + hi) / 2 + (hi - lo) / 2 * t for lo, hi in intervals for t in XGK]
+    ys = _values(f, xs)
+    values, errors = [], []
+    for i, (lo, hi) in enumerate(intervals):
+        y = ys[15 * i:15 * i + 15]
+        h = (hi - lo) / 2
+        kron = sum(w * v for w, v in zip(WGK, y))
+        gauss = sum(w * v for w, v in zip(WG, y))
+        asc = abs(h * sum(w * abs(v - kron / 2) for w, v in zip(WGK, y)))
+        err = abs((kron - gauss) * h)
+        if asc > 0:
+            err = asc * min(1.0, (200 * err / asc) ** 1.5)
+        values.append(kron * h)
+        errors.append(err if math.isfinite(err) else math.inf)
+    return values, errors
+
+
+def _smoothstep(f, a, b):
+    """f(x) dx em [a, b] como g(t) dt em [0, 1], com x = a + (b - a)(3t² - 2t³)."""
+    width = b - a
+    if np is not None:
+        def g(ts):
+            return _values(f, a + width * ts * ts * (3 - 2 * ts)) * (6 * width) * ts * (1 - ts)
+    else:
+        def g(ts):
+            ys = _values(f, [a + width * t * t * (3 - 2 * t) for t in ts])
+            return [y * 6 * width * t * (1 - t) for y, t in zip(ys, ts)]
+    return g
+
+
+def integrate(f, a, b, tol=TOL, max_evals=MAX_EVALS, progress=None):
+    """Integral de f em [a, b]; f recebe e devolve lotes de pontos."""
+    a, b = _bound(a, "integrate"), _bound(b, "integrate")
+    if a == b:
+        return 0.0
+    sign = 1.0
+    if a > b:
+        a, b, sign = b, a, -1.0
+    _numpy()
+    f = _smoothstep(f, a, b)                # daqui em diante, em t de [0, 1]
+    done_value = done_error = 0.0          # intervalos já aceitos
+    active = [(0.0, 1.0)]
+    evals = 0
+    first = None
+    while True:
+        values, errors = _gk15(f, active)
+        evals += 15 * len(active)
+        total = done_value + math.fsum(values)
+        error = done_error + math.fsum(errors)
+        goal = max(tol, tol * abs(total))
+        if first is None:
+            first = error
+        if not math.isfinite(total):
+            raise ValueError("integrate: a função fica infinita ou indefinida no intervalo")
+        if error <= goal:
+            return sign * total
+        if progress is not None:
+            progress(_fraction_done(first, error, goal))
+        # cada intervalo tem direito a uma parte da tolerância proporcional à largura
+        split = []
+        for (lo, hi), value, err in zip(active, values, errors):
+            if err > goal * (hi - lo) and hi - lo > _MIN_WIDTH:
+                mid = (lo + hi) / 2
+                split += ((lo, mid), (mid, hi))
+            else:
+                done_value += value
+                done_error += err
+        if not split or evals + 15 * len(split) > max_evals:
+            raise ValueError(f"integrate não convergiu em {evals} avaliações "
+                             f"(erro estimado {error:.1e}; aumente max_evals ou a tolerância)")
+        active = split
+
+
+# ======= Raiz: multisseção com troca de sinal =======
+# Pontos da varredura inicial de [a, b] e pontos igualmente espaçados por rodada
+SCAN_POINTS = 128
+SECTIONS = 16
+
+
+def _first_sign_change(xs, ys):
+    """(x, None) se algum ys é zero, (i, None) do primeiro par com troca de sinal, ou None."""
+    prev = None
+    for i, y in enumerate(ys):
+        if y == 0:
+            return xs[i], True
+        if not math.isfinite(y):
+            prev = None
+            continue
+        if prev is not None and (y > 0) != (ys[prev] > 0):
+            return prev, i
+        prev = i
+    return None
+
+
+def solve(f, a, b, tol=TOL, max_evals=MAX_EVALS, progress=None):
+    """Raiz de f em [a, b] (a primeira troca de sinal, da esquerda para a direita)."""
+    a, b = _bound(a, "solve"), _bound(b, "solve")
+    if a > b:
+        a, b = b, a
+    _numpy()
+    xs = [a + (b - a) * i / SCAN_POINTS for i in range(SCAN_POINTS + 1)]
+    ys = _floats(f, xs)
+    evals = len(xs)
+    scale = max(map(abs, filter(math.isfinite, ys)), default=0.0)
+    found = _first_sign_change(xs, ys)
+    if found is None:
+        raise ValueError("solve: a função não troca de sinal no intervalo (tente outros limites)")
+    if found[1] is True:
+        return found[0]
+    i, j = found
+    lo, hi, flo, fhi = xs[i], xs[j], ys[i], ys[j]
+    first = hi - lo
+    while True:
+        goal = max(tol, tol * max(abs(lo), abs(hi)))
+        width = hi - lo
+        if width <= goal:
+            break
+        if progress is not None:
+            progress(_fraction_done(first, width, goal))
+        # secante (falsa posição) e dois vizinhos, além da grade: raiz simples cai
+        # entre os vizinhos e o intervalo encolhe bem mais que SECTIONS vezes
+        guess = lo - flo * width / (fhi - flo)
+        step = max(width / SECTIONS ** 2, goal / 2)
+        xs = [lo + width * k / SECTIONS for k in range(1, SECTIONS)]
+        xs += [x for x in (guess - step, guess, guess + step) if lo < x < hi]
+        xs.sort()
+        if evals + len(xs) > max_evals:
+            raise ValueError(f"solve não convergiu em {evals} avaliações (intervalo ainda com {width:.1e})")
+        ys = _floats(f, xs)
+        evals += len(xs)
+        xs = [lo] + xs + [hi]
+        ys = [flo] + ys + [fhi]
+        found = _first_sign_change(xs, ys)
+        if found is None:
+            raise ValueError("solve: a função ficou indefinida perto da raiz")
+        if found[1] is True:
+            return found[0]
+        i, j = found
+        lo, hi, flo, fhi = xs[i], xs[j], ys[i], ys[j]
+    if min(abs(flo), abs(fhi)) > scale:
+        # troca de sinal sem passar por zero: polo (tan em 90°), não raiz
+        raise ValueError("solve: troca de sinal numa descontinuidade, não numa raiz")
+    return lo - flo * (hi - lo) / (fhi - flo) if fhi != flo else (lo + hi) / 2
+
+
+# ======= Derivada: Ridders =======
+# Passos h, h/1.4, h/1.4²... (todos num lote) e tamanho da tabela de Richardson
+_RIDDERS_SHRINK = 1.4
+_RIDDERS_STEPS = 10
+# Recomeços com passos menores quando os maiores caem fora do domínio ou não estabilizam;
+# erro relativo estimado que encerra as tentativas e o que é alto demais para responder
+_RIDDERS_RETRIES = 6
+_DERIV_STABLE = 1e-8
+_DERIV_GIVE_UP = 1e-4
+
+
+def _ridders(central, tol):
+    """Extrapolação de Richardson das diferenças centrais (passos caindo 1.4×): (derivada, erro)."""
+    fac2 = _RIDDERS_SHRINK ** 2
+    best, error = central[0], math.inf
+    prev = [central[0]]
+    for i in range(1, len(central)):
+        row = [central[i]]
+        fac = fac2
+        for j in range(1, i + 1):
+            row.append((row[j - 1] * fac - prev[j - 1]) / (fac - 1))
+            fac *= fac2
+            err = max(abs(row[j] - row[j - 1]), abs(row[j] - prev[j - 1]))
+            if err <= error:
+                best, error = row[j], err
+        if abs(row[i] - prev[i - 1]) >= 2 * error or error <= tol * max(1.0, abs(best)):
+            break       # a extrapolação parou de melhorar (ou já basta)
+        prev = row
+    return best, error
+
+
+def deriv(f, x0, tol=TOL, max_evals=MAX_EVALS, progress=None):
+    """
+    Derivada de f em x0 (extrapolação de Ridders sobre diferenças centrais).
+
+    Se os passos saem do domínio (ln(x) em 0.001) ou o resultado não se
+    estabiliza (1/x perto do polo), tenta de novo com passos menores:
+    primeiro 10% de |x0|, depois cada vez menores.
+    """
+    x0 = _bound(x0, "deriv")
+    _numpy()
+    n = min(_RIDDERS_STEPS, max(2, max_evals // (2 * _RIDDERS_RETRIES)))
+    h0 = 0.1 * max(1.0, abs(x0))
+    found = None                       # (erro relativo, derivada) da melhor tentativa
+    for attempt in range(_RIDDERS_RETRIES):
+        hs = [h0 / _RIDDERS_SHRINK ** i for i in range(n)]
+        ys = _floats(f, [x0 + h for h in hs] + [x0 - h for h in hs])
+        central = [(ys[i] - ys[n + i]) / (2 * hs[i]) for i in range(n)]
+        while central and not math.isfinite(central[0]):
+            del central[0]
+        if len(central) >= n // 2 and all(math.isfinite(d) for d in central):
+            best, error = _ridders(central, tol)
+            rel = error / max(1.0, abs(best))
+            if found is None or rel < found[0]:
+                found = (rel, best)
+            if rel <= _DERIV_STABLE:
+                break
+        if progress is not None:
+            progress((attempt + 1) / _RIDDERS_RETRIES)
+        near = 0.1 * abs(x0)
+        h0 = near if attempt == 0 and 0 < near < h0 else hs[-1] / _RIDDERS_SHRINK
+    if found is None or found[0] > _DERIV_GIVE_UP:
+        raise ValueError("deriv: a função não é derivável (ou não está definida) nesse ponto")
+    return found[1]
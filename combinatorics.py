@@ -0,0 +1,167 @@
+"""
+Funções combinatórias e de inteiros grandes da calculadora.
+
+Resultados exatos (int do Python) sempre que os argumentos são inteiros;
+argumentos como 5.0 contam como inteiros. Memoização limitada (LRU) para
+fatoriais e binomiais repetidos: numa prova o mesmo nCr(52, 5) aparece
+várias vezes e a expressão é reavaliada a cada tecla na prévia.
+
+Os fatoriais grandes usam math.factorial, que no CPython já faz divisão e
+conquista sobre a parte ímpar (split recursivo + deslocamento das potências
+de 2), bem mais rápido que qualquer laço em Python. Onde o módulo math não
+tem a função (comb/perm antes do 3.8), e no fatorial duplo ímpar, entra um
+produto por divisão binária, também exato.
+
+    factorial(n)      n!          (só inteiros; para não inteiros, gamma(n + 1))
+    double_factorial(n)  n!!      (n >= -1)
+    comb(n, r)        binomial    perm(n, r)  arranjos
+    multinomial(k1, k2, ...)      (k1 + k2 + ...)! / (k1! k2! ...)
+    gamma(x)          exato para inteiros positivos, float nos demais
+"""
+import math
+from functools import lru_cache
+
+# Só memoriza resultados até este tamanho de argumento (um 20000! tem ~77 mil dígitos)
+MEMO_MAX_N = 20_000
+MEMO_SIZE = 256
+# Abaixo disto o math calcula mais rápido do que a consulta ao cache
+SMALL_N = 256
+
+
+def _as_int(x, what):
+    """Inteiro exato de x (aceita 5.0); ValueError se tiver parte fracionária ou for negativo."""
+    if x.__class__ is int and x >= 0:
+        return x
+    if isinstance(x, bool):
+        x = int(x)
+    if isinstance(x, int):
+        n = x
+    else:
+        try:
+            if not float(x).is_integer():
+                raise ValueError(f"{what} só aceita inteiros")
+        except OverflowError:
+            raise ValueError(f"{what}: argumento grande demais")
+        n = int(x)
+    if n < 0:
+        raise ValueError(f"{what} não aceita negativos")
+    return n
+
+
+def _is_integral(x):
+    if isinstance(x, int):
+        return True
+    try:
+        return float(x).is_integer()
+    except (OverflowError, ValueError):
+        return False
+
+
+def _real(x, what):
+    v = float(x)
+    if not math.isfinite(v):
+        raise ValueError(f"{what}: argumento inválido")
+    return v
+
+
+def _range_product(lo, hi, step=1):
+    """lo * (lo+step) * ... até hi, por divisão binária (multiplica números de tamanho parecido)."""
+    if lo > hi:
+        return 1
+    n = (hi - lo) // step + 1
+    if n <= 8:
+        p = lo
+        for k in range(lo + step, hi + 1, step):
+            p *= k
+        return p
+    mid = lo + (n // 2) * step
+    return _range_product(lo, mid - step, step) * _range_product(mid, hi, step)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _factorial_memo(n):
+    return math.factorial(n)
+
+
+def _factorial_int(n):
+    if n < SMALL_N or n > MEMO_MAX_N:
+        return math.factorial(n)
+    return _factorial_memo(n)
+
+
+def factorial(x):
+    """n! exato; ValueError para não inteiros (5.5! é gamma(6.5), pedido explicitamente)."""
+    return _factorial_int(_as_int(x, "fatorial"))
+
+
+def double_factorial(x):
+    """n!! = n (n-2) (n-4) ... ; 0!! = (-1)!! = 1."""
+    if _is_integral(x) and int(x) == -1:
+        return 1
+    n = _as_int(x, "fatorial duplo")
+    if n % 2 == 0:
+        k = n // 2
+        return _factorial_int(k) << k                 # (2k)!! = 2^k k!
+    return _range_product(1, n, 2)     # ímpares: produto direto, sem dividir inteiros enormes
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _comb_memo(n, r):
+    if hasattr(math, "comb"):
+        return math.comb(n, r)
+    r = min(r, n - r)
+    return _range_product(n - r + 1, n) // _factorial_int(r)
+
+
+def comb(n, r):
+    """Combinações C(n, r), exato. r > n dá 0."""
+    n = _as_int(n, "combinação")
+    r = _as_int(r, "combinação")
+    if r > n:
+        return 0
+    if n < SMALL_N and hasattr(math, "comb"):
+        return math.comb(n, r)
+    if n <= MEMO_MAX_N:
+        return _comb_memo(n, r)
+    return _comb_memo.__wrapped__(n, r)
+
+
+def perm(n, r):
+    """Arranjos P(n, r) = n! / (n - r)!, exato. r > n dá 0."""
+    n = _as_int(n, "permutação")
+    r = _as_int(r, "permutação")
+    if r > n:
+        return 0
+    if hasattr(math, "perm"):
+        return math.perm(n, r)
+    return _range_product(n - r + 1, n)
+
+
+def multinomial(*ks):
+    """(k1 + ... + km)! / (k1! ... km!) como produto de binomiais (sem o fatorial gigante)."""
+    total = 0
+    result = 1
+    for k in ks:
+        k = _as_int(k, "multinomial")
+        total += k
+        result *= comb(total, k)
+    return result
+
+
+def gamma(x):
+    """Γ(x): exato (n-1)! para inteiros positivos; polo nos inteiros <= 0."""
+    if _is_integral(x):
+        n = int(x)
+        if n <= 0:
+            raise ValueError(f"gamma não é definida em {n}")
+        return _factorial_int(n - 1)
+    return math.gamma(_real(x, "gamma"))
+
+
+def cache_clear():
+    _factorial_memo.cache_clear()
+    _comb_memo.cache_clear()
+
+
+def cache_info():
+    return {"factorial": _factorial_memo.cache_info()._asdict(), "comb": _comb_memo.cache_info()._asdict()}
@@ -0,0 +1,182 @@
+"""
+Histórico de cálculos persistente (SQLite), com janela limitada em memória.
+
+O log em disco só recebe inserções (a poda opcional apaga do começo), então
+os ids são contíguos e a posição i do histórico é o id min_id + i: a lista
+virtualizada da tela pede só as linhas visíveis com range(). Abrir o
+histórico lê apenas min/max do id e as últimas `window` entradas; o tempo
+de início não depende do tamanho do arquivo.
+
+Busca:
+  - por valor: search("42") casa resultados iguais (com tolerância relativa),
+    pelo índice da coluna value
+  - por trecho da expressão ou do resultado: índice FTS5 com tokenizador
+    trigram (SQLite >= 3.34); sem FTS5, cai num LIKE (varredura)
+"""
+import math
+import os
+import sqlite3
+import time
+from collections import deque, namedtuple
+
+Entry = namedtuple("Entry", "id ts expr result value mode")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id     INTEGER PRIMARY KEY,
+    ts     REAL NOT NULL,
+    expr   TEXT NOT NULL,
+    result TEXT NOT NULL,
+    value  REAL,
+    mode   TEXT
+);
+CREATE INDEX IF NOT EXISTS history_value ON history(value);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+    expr, result, content='history', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts(rowid, expr, result) VALUES (new.id, new.expr, new.result);
+END;
+CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts(history_fts, rowid, expr, result) VALUES ('delete', old.id, old.expr, old.result);
+END;
+"""
+
+_COLUMNS = "id, ts, expr, result, value, mode"
+
+
+def default_history_path():
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "blind-calculator", "history.sqlite3")
+
+
+def _as_real(value):
+    """Valor numérico para o índice (None se não couber num float finito)."""
+    try:
+        v = float(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return v if math.isfinite(v) else None
+
+
+class HistoryStore:
+    """
+    append() grava uma conta; recent guarda as últimas `window` em memória.
+    max_rows (opcional) limita o arquivo: as mais antigas são apagadas.
+    path=":memory:" não grava nada em disco (testes e benchmarks).
+    """
+
+    def __init__(self, path=None, window=200, max_rows=None):
+        self.path = path or default_history_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.max_rows = max_rows
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        try:
+            self.db.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False    # SQLite sem FTS5/trigram: busca por LIKE
+        self.db.commit()
+
+        # min e max em subconsultas separadas: cada uma vira uma busca na ponta da árvore
+        # (juntas num SELECT só, o SQLite varre a tabela inteira)
+        lo, hi = self.db.execute("SELECT (SELECT min(id) FROM history), (SELECT max(id) FROM history)").fetchone()
+        self.min_id = lo or 1
+        self.max_id = hi or 0
+        rows = self.db.execute(f"SELECT {_COLUMNS} FROM history ORDER BY id DESC LIMIT ?",
+                               (int(window),)).fetchall()
+        self.recent = deque((Entry(*r) for r in reversed(rows)), maxlen=int(window))
+
+    def __len__(self):
+        return self.max_id - self.min_id + 1
+
+    def append(self, expr, result, value=None, mode=None):
+        """Grava uma conta e devolve a Entry."""
+        ts = time.time()
+        with self.db:
+            cur = self.db.execute("INSERT INTO history(ts, expr, result, value, mode) VALUES (?, ?, ?, ?, ?)",
+                                  (ts, expr, result, _as_real(value), mode))
+        entry = Entry(cur.lastrowid, ts, expr, result, _as_real(value), mode)
+        self.max_id = entry.id
+        self.recent.append(entry)
+        if self.max_rows and len(self) > self.max_rows:
+            self._prune()
+        return entry
+
+    def _prune(self):
+        # apaga em lotes de 10% para não podar a cada conta
+        keep_from = self.max_id - int(self.max_rows * 0.9) + 1
+        with self.db:
+            self.db.execute("DELETE FROM history WHERE id < ?", (keep_from,))
+        self.min_id = keep_from
+
+    def get(self, entry_id):
+        if self.recent and entry_id >= self.recent[0].id:
+            i = entry_id - self.recent[0].id
+            if i < len(self.recent):
+                return self.recent[i]
+        row = self.db.execute(f"SELECT {_COLUMNS} FROM history WHERE id = ?", (entry_id,)).fetchone()
+        return Entry(*row) if row else None
+
+    def at(self, index):
+        """Entrada na posição `index` (0 = mais antiga; negativo conta do fim)."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            return None
+        return self.get(self.min_id + index)
+
+    def range(self, start, count):
+        """Entradas das posições start .. start+count-1 (a lista virtualizada pede só o visível)."""
+        first = self.min_id + max(0, start)
+        last = min(self.max_id, first + count - 1)
+        if last < first:
+            return []
+        if self.recent and first >= self.recent[0].id:
+            base = self.recent[0].id
+            return list(self.recent)[first - base:last - base + 1]
+        rows = self.db.execute(f"SELECT {_COLUMNS} FROM history WHERE id BETWEEN ? AND ? ORDER BY id",
+                               (first, last)).fetchall()
+        return [Entry(*r) for r in rows]
+
+    def index_of(self, entry_id):
+        return entry_id - self.min_id
+
+    def search(self, query, limit=50):
+        """Entradas que casam `query`, da mais nova para a mais antiga.
+
+        Número: resultado igual (tolerância relativa 1e-9) ou trecho do texto.
+        Texto: trecho da expressão ou do resultado formatado.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        found = {}
+        number = _as_real(query.replace(",", "."))
+        if number is not None:
+            tol = max(abs(number) * 1e-9, 1e-12)
+            for r in self.db.execute(f"SELECT {_COLUMNS} FROM history WHERE value BETWEEN ? AND ? "
+                                     "ORDER BY id DESC LIMIT ?", (number - tol, number + tol, limit)):
+                found[r[0]] = Entry(*r)
+        if self.fts and len(query) >= 3:
+            phrase = '"' + query.replace('"', '""') + '"'
+            rows = self.db.execute(f"SELECT {', '.join('h.' + c for c in _COLUMNS.split(', '))} "
+                                   "FROM history_fts JOIN history h ON h.id = history_fts.rowid "
+                                   "WHERE history_fts MATCH ? ORDER BY h.id DESC LIMIT ?", (phrase, limit))
+        else:
+            like = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            rows = self.db.execute(f"SELECT {_COLUMNS} FROM history WHERE expr LIKE ? ESCAPE '\\' "
+                                   "OR result LIKE ? ESCAPE '\\' ORDER BY id DESC LIMIT ?", (like, like, limit))
+        for r in rows:
+            found.setdefault(r[0], Entry(*r))
+        return sorted(found.values(), key=lambda e: -e.id)[:limit]
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,280 @@
+"""
+Teclado físico (FirmwareUSB.c++) pelo protocolo serial de tokens.
+
+Cada tecla chega como um quadro de 4 bytes:
+
+    [0xA5] [seq] [id] [seq ^ id ^ 0x5A]
+
+id = linha * 7 + coluna + 1 na matriz 5x7 (LAYOUT abaixo); id 0 é o HELLO
+que o firmware manda ao ligar. O host traduz o id no mesmo token dos
+botões da tela ("sin(", "7", "="...), então uma tecla de função vira uma
+inserção e uma fala só, em vez de um evento por caractere.
+
+KeypadReader lê a porta num thread (select com timeout, nada bloqueia o
+Tk) e põe os eventos numa queue.Queue; o app esvazia a fila no mainloop.
+Sem a porta (teclado desligado) tenta reabrir a cada segundo.
+
+Para testar sem o hardware, PtyKeypad cria um pseudo-terminal que faz o
+papel do teclado:
+
+    python keypad.py --simulate          # mostra a porta e envia tokens digitados
+    CALC_KEYPAD=/dev/pts/5 python teste.py
+    python keypad.py /dev/ttyACM0        # monitor: imprime os tokens recebidos
+"""
+import os
+import queue
+import select
+import threading
+import time
+
+try:
+    import termios
+    import tty
+except ImportError:
+    termios = None   # Windows: só pela pyserial
+
+try:
+    import serial
+except ImportError:
+    serial = None    # pyserial não instalada - no POSIX basta o termios
+
+FRAME_SYNC = 0xA5
+FRAME_XOR = 0x5A
+FRAME_LEN = 4
+TOKEN_HELLO = 0
+COLS = 7
+
+# Tokens na ordem da matriz do firmware (mesmos de CalculatorApp._press)
+LAYOUT = (
+    ("7", "8", "9", "÷", "sin(", "cos(", "tan("),
+    ("4", "5", "6", "×", "asin(", "acos(", "atan("),
+    ("1", "2", "3", "-", "ln(", "log(", "exp("),
+    ("0", ".", "(", ")", "sqrt(", "^", "π"),
+    ("ANS", "⌫", "C", "=", "nCr(", "nPr(", "fact("),
+)
+TOKENS = {r * COLS + c + 1: tok for r, row in enumerate(LAYOUT) for c, tok in enumerate(row)}
+TOKEN_IDS = {tok: i for i, tok in TOKENS.items()}
+
+
+def encode_frame(seq, token_id):
+    seq &= 0xFF
+    return bytes((FRAME_SYNC, seq, token_id, seq ^ token_id ^ FRAME_XOR))
+
+
+class FrameDecoder:
+    """
+    Remonta quadros de um fluxo de bytes.
+    Checksum errado: descarta um byte e procura o próximo 0xA5.
+    stats: quadros bons, ruins, perdidos (buracos na seq) e ids desconhecidos.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._last_seq = None
+        self.stats = {"frames": 0, "bad": 0, "lost": 0, "unknown": 0, "hello": 0}
+
+    def feed(self, data):
+        """Acrescenta bytes; devolve a lista de tokens completos."""
+        buf = self._buf
+        buf += data
+        out = []
+        i = 0
+        n = len(buf)
+        while n - i >= FRAME_LEN:
+            if buf[i] != FRAME_SYNC:
+                i += 1
+                continue
+            seq, tid, chk = buf[i + 1], buf[i + 2], buf[i + 3]
+            if chk != seq ^ tid ^ FRAME_XOR:
+                self.stats["bad"] += 1
+                i += 1
+                continue
+            i += FRAME_LEN
+            self.stats["frames"] += 1
+            if tid == TOKEN_HELLO:
+                self.stats["hello"] += 1     # firmware reiniciou: seq recomeça
+            elif self._last_seq is not None:
+                self.stats["lost"] += (seq - self._last_seq - 1) & 0xFF
+            self._last_seq = seq
+            if tid == TOKEN_HELLO:
+                continue
+            token = TOKENS.get(tid)
+            if token is None:
+                self.stats["unknown"] += 1
+                continue
+            out.append(token)
+        del buf[:i]
+        return out
+
+
+# ======= Portas =======
+class _PosixPort:
+    """Porta serial (ou pty) em modo cru via termios."""
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK)
+        try:
+            tty.setraw(self.fd, termios.TCSANOW)    # TCSAFLUSH jogaria fora o HELLO já recebido
+        except termios.error:
+            pass      # não é terminal (ex.: FIFO de teste)
+
+    def read(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return b""
+        try:
+            data = os.read(self.fd, 256)
+        except BlockingIOError:
+            return b""
+        if not data:
+            raise OSError("porta fechada")
+        return data
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PySerialPort:
+    def __init__(self, path):
+        self.port = serial.Serial(path, 115200, timeout=0)
+
+    def read(self, timeout):
+        self.port.timeout = timeout
+        return self.port.read(max(1, self.port.in_waiting))
+
+    def close(self):
+        self.port.close()
+
+
+def open_port(path):
+    if termios is not None:
+        return _PosixPort(path)
+    if serial is not None:
+        return _PySerialPort(path)
+    raise RuntimeError("pyserial não instalada (pip install pyserial)")
+
+
+# ======= Leitor =======
+class KeypadReader(threading.Thread):
+    """
+    Lê o teclado num thread e entrega eventos em `events` (queue.Queue):
+      ("key", token, instante)     uma tecla (instante de time.perf_counter())
+      ("status", texto, instante)  "teclado conectado" / "teclado desconectado"
+    """
+
+    def __init__(self, path, events=None, poll_s=0.1, retry_s=1.0):
+        super().__init__(name="keypad", daemon=True)
+        self.path = path
+        self.events = events if events is not None else queue.Queue()
+        self.poll_s = poll_s
+        self.retry_s = retry_s
+        self.decoder = FrameDecoder()
+        self._halt = threading.Event()
+
+    def run(self):
+        connected = None
+        while not self._halt.is_set():
+            try:
+                port = open_port(self.path)
+            except (OSError, RuntimeError):
+                port = None
+            if port is not None:
+                if connected is not True:
+                    self._status("teclado conectado")
+                connected = True
+                try:
+                    while not self._halt.is_set():
+                        data = port.read(self.poll_s)
+                        if data:
+                            t = time.perf_counter()
+                            for token in self.decoder.feed(data):
+                                self.events.put(("key", token, t))
+                except OSError:
+                    pass      # desconectado: tenta reabrir
+                finally:
+                    port.close()
+                if self._halt.is_set():
+                    break
+            if connected is not False:
+                connected = False
+                self._status("teclado desconectado")
+            self._halt.wait(self.retry_s)
+
+    def _status(self, text):
+        self.events.put(("status", text, time.perf_counter()))
+
+    def stop(self):
+        self._halt.set()
+
+
+# ======= Teclado de mentira =======
+class PtyKeypad:
+    """Faz o papel do teclado num pseudo-terminal (POSIX); o app abre `port`."""
+
+    def __init__(self):
+        import pty
+
+        self.master, self._slave = pty.openpty()
+        tty.setraw(self._slave, termios.TCSANOW)   # sem eco nem buffer de linha antes do app abrir
+        self.port = os.ttyname(self._slave)
+        self.seq = 0
+
+    def hello(self):
+        self.seq = 0
+        os.write(self.master, encode_frame(0, TOKEN_HELLO))
+        self.seq = 1
+
+    def press(self, *tokens):
+        data = bytearray()
+        for token in tokens:
+            data += encode_frame(self.seq, TOKEN_IDS[token])
+            self.seq += 1
+        os.write(self.master, bytes(data))
+
+    def write_raw(self, data):
+        os.write(self.master, data)
+
+    def close(self):
+        os.close(self.master)
+        os.close(self._slave)
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Teclado serial da calculadora.")
+    parser.add_argument("port", nargs="?", help="porta para monitorar (ex.: /dev/ttyACM0, COM3)")
+    parser.add_argument("--simulate", action="store_true",
+                        help="cria um pty no lugar do teclado; cada linha da entrada = tokens separados por espaço")
+    args = parser.parse_args(argv)
+
+    if args.simulate:
+        kp = PtyKeypad()
+        print(f"teclado simulado em {kp.port}  (tokens: {' '.join(TOKEN_IDS)})", flush=True)
+        kp.hello()
+        try:
+            for line in sys.stdin:
+                tokens = [t for t in line.split() if t in TOKEN_IDS]
+                if tokens:
+                    kp.press(*tokens)
+        finally:
+            kp.close()
+        return 0
+
+    if not args.port:
+        parser.error("informe a porta ou --simulate")
+    reader = KeypadReader(args.port)
+    reader.start()
+    try:
+        while True:
+            kind, value, _ = reader.events.get()
+            print(value if kind == "key" else f"[{value}]", flush=True)
+    except KeyboardInterrupt:
+        reader.stop()
+        print(reader.decoder.stats)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
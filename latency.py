@@ -0,0 +1,117 @@
+"""
+Medição de latência tecla -> fala.
+
+LatencyRecorder guarda, por etapa, um histograma com faixas logarítmicas
+(em ms) e as últimas amostras brutas para percentis exatos. As etapas
+registradas pelo app e pelo TTSTk são:
+
+    key_to_queue       tecla (_key_insert/_press) -> entrada na fila do TTSTk.say
+    queue_wait         entrada na fila -> engine.say
+    key_to_dispatch    tecla -> engine.say
+    dispatch_to_audio  engine.say -> 'started-utterance'
+    key_to_audio       tecla -> início do áudio (o número que importa)
+    key_to_done        tecla -> 'finished-utterance'
+    backlog            tamanho da fila no momento de cada say (não é tempo)
+
+Tempos vêm de time.perf_counter(), em segundos; o relatório é em ms.
+"""
+import json
+import time
+from collections import deque
+
+now = time.perf_counter
+
+# Limites superiores das faixas (ms): 0,1 ms .. ~13 s, razão 1,25
+_BUCKETS_MS = [0.1 * 1.25 ** i for i in range(54)]
+
+
+class _Stage:
+    __slots__ = ("counts", "samples", "total", "n", "max")
+
+    def __init__(self, keep):
+        self.counts = [0] * (len(_BUCKETS_MS) + 1)
+        self.samples = deque(maxlen=keep)
+        self.total = 0.0
+        self.n = 0
+        self.max = 0.0
+
+    def add(self, value):
+        lo, hi = 0, len(_BUCKETS_MS)
+        while lo < hi:                     # busca binária da faixa
+            mid = (lo + hi) // 2
+            if value <= _BUCKETS_MS[mid]:
+                hi = mid
+            else:
+                lo = mid + 1
+        self.counts[lo] += 1
+        self.samples.append(value)
+        self.total += value
+        self.n += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        if not self.samples:
+            return 0.0
+        data = sorted(self.samples)
+        return data[min(len(data) - 1, int(round(q / 100 * (len(data) - 1))))]
+
+
+class LatencyRecorder:
+    """Histograma por etapa. add(etapa, segundos); sample(etapa, valor) para grandezas sem unidade."""
+
+    def __init__(self, keep=10_000):
+        self.keep = int(keep)
+        self._stages = {}
+
+    def _stage(self, name):
+        st = self._stages.get(name)
+        if st is None:
+            st = self._stages[name] = _Stage(self.keep)
+        return st
+
+    def add(self, stage, seconds):
+        self._stage(stage).add(seconds * 1000.0)
+
+    def sample(self, stage, value):
+        self._stage(stage).add(float(value))
+
+    def reset(self):
+        self._stages.clear()
+
+    def summary(self):
+        """{etapa: {count, mean, p50, p95, p99, max}} (ms, exceto backlog)."""
+        out = {}
+        for name, st in self._stages.items():
+            out[name] = {
+                "count": st.n,
+                "mean": st.total / st.n if st.n else 0.0,
+                "p50": st.percentile(50), "p95": st.percentile(95), "p99": st.percentile(99),
+                "max": st.max,
+            }
+        return out
+
+    def histogram(self):
+        """{etapa: [[limite_superior, contagem], ...]} só com as faixas não vazias."""
+        out = {}
+        for name, st in self._stages.items():
+            edges = _BUCKETS_MS + [float("inf")]
+            out[name] = [[round(edge, 3) if edge != float("inf") else None, c]
+                         for edge, c in zip(edges, st.counts) if c]
+        return out
+
+    def export_json(self, path=None):
+        data = {"unit": "ms", "summary": self.summary(), "histogram": self.histogram()}
+        text = json.dumps(data, indent=2, ensure_ascii=False)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+    def report(self):
+        """Tabela de texto com p50/p95/p99 por etapa."""
+        lines = [f"{'etapa':<18}{'n':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'máx':>10}"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:<18}{s['count']:>7}{s['p50']:>10.1f}{s['p95']:>10.1f}"
+                         f"{s['p99']:>10.1f}{s['max']:>10.1f}")
+        return "\n".join(lines)
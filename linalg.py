@@ -0,0 +1,460 @@
+"""
+Vetores, matrizes e números complexos da calculadora.
+
+[[1, 2], [3, 4]] vira uma Array (ndarray de 1 ou 2 dimensões, real ou
+complexa) e det, inv, solve, dot, eig... vão direto para numpy.linalg
+(LAPACK): resolver um sistema 500×500 leva milissegundos. Entre matrizes,
+* é o produto matricial (como nas calculadoras gráficas) e A^-1 é a
+inversa; entre vetores, os operadores agem elemento a elemento, como nas
+listas de stats.py. Vetor real que sai daqui volta a ser stats.DataList.
+
+Complexos: a constante i e literais 2i / 3.5j. As funções escalares da
+calculadora tentam o math primeiro e, com complexo, lista ou matriz,
+caem em apply() (cmath ou o ufunc do NumPy). Complexos escalares não
+precisam do NumPy; vetores complexos e matrizes precisam.
+"""
+import cmath
+import math
+from array import array
+
+from stats import DataList, SHOW_ITEMS, _is_number
+
+# ======= NumPy opcional (só vetores complexos e matrizes) =======
+np = None
+_np_checked = False
+
+
+def _numpy():
+    """Módulo numpy; ValueError com mensagem para o usuário se não estiver instalado."""
+    global np, _np_checked
+    if not _np_checked:
+        _np_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    if np is None:
+        raise ValueError("matrizes e vetores complexos precisam do numpy")
+    return np
+
+
+# Maior lado de matriz criada por identity() (5000² floats = 200 MB)
+MAX_SIDE = 5000
+# Matrizes até este tamanho aparecem inteiras na tela
+SHOW_SIDE = 6
+
+
+class Array:
+    """Vetor complexo ou matriz (ndarray de 1 ou 2 dimensões) com os operadores da calculadora."""
+    __slots__ = ("a",)
+
+    def __init__(self, a):
+        self.a = a
+
+    @property
+    def shape(self):
+        return self.a.shape
+
+    @property
+    def ndim(self):
+        return self.a.ndim
+
+    def __len__(self):
+        return len(self.a)
+
+    def __getitem__(self, i):
+        return self.a[i]
+
+    def __array__(self, dtype=None, copy=None):
+        return self.a if dtype is None else self.a.astype(dtype)
+
+    def __add__(self, o):       return _elementwise(self, o, "add")
+    def __radd__(self, o):      return _elementwise(o, self, "add")
+    def __sub__(self, o):       return _elementwise(self, o, "subtract")
+    def __rsub__(self, o):      return _elementwise(o, self, "subtract")
+    def __mul__(self, o):       return multiply(self, o)
+    def __rmul__(self, o):      return multiply(o, self)
+    def __truediv__(self, o):   return divide(self, o)
+    def __rtruediv__(self, o):  return divide(o, self)
+    def __pow__(self, o):       return power(self, o)
+    def __rpow__(self, o):      return power(o, self)
+
+    def __neg__(self):
+        return wrap(-self.a)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return wrap(np.abs(self.a))
+
+    def __eq__(self, other):
+        return isinstance(other, Array) and self.a.shape == other.a.shape and bool((self.a == other.a).all())
+
+    __hash__ = None
+
+    def __str__(self):
+        from calc_core import format_number
+        a = self.a
+        if a.ndim == 1:
+            items = [format_number(v) for v in a[:SHOW_ITEMS].tolist()]
+            if len(a) > SHOW_ITEMS:
+                return f"[{', '.join(items)}, …] ({len(a)} valores)"
+            return f"[{', '.join(items)}]"
+        rows, cols = a.shape
+        show_r, show_c = min(rows, SHOW_SIDE), min(cols, SHOW_SIDE)
+        lines = []
+        for r in a[:show_r, :show_c].tolist():
+            cells = [format_number(v) for v in r] + (["…"] if cols > show_c else [])
+            lines.append(f"[{', '.join(cells)}]")
+        if rows > show_r:
+            lines.append("…")
+        text = f"[{', '.join(lines)}]"
+        return text if rows <= SHOW_SIDE and cols <= SHOW_SIDE else f"matriz {rows}×{cols} {text}"
+
+    __repr__ = __str__
+
+
+# ======= Conversões =======
+def is_array(x):
+    return isinstance(x, (Array, DataList))
+
+
+def _as_ndarray(x):
+    """ndarray de uma Array ou DataList (sem cópia); None se x for escalar."""
+    if isinstance(x, Array):
+        return x.a
+    if isinstance(x, DataList):
+        _numpy()
+        return np.frombuffer(x.values) if len(x) else np.empty(0)
+    if np is not None and isinstance(x, np.ndarray):
+        return x
+    return None
+
+
+def _scalar(x):
+    """Número da calculadora (int, float, complex, Decimal, Fraction) como float ou complex."""
+    if isinstance(x, complex):
+        return x
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        raise ValueError(f"não é número: {x}") from None
+
+
+def as_array(x):
+    """DataList como Array (para operar com complexos); o resto volta igual."""
+    return Array(_as_ndarray(x)) if isinstance(x, DataList) else x
+
+
+def _operand(x):
+    a = _as_ndarray(x)
+    return a if a is not None else _scalar(x)
+
+
+def wrap(a):
+    """Resultado do NumPy como valor da calculadora: escalar, DataList (vetor real) ou Array."""
+    a = np.asarray(a)
+    if a.dtype.kind == "c" and not a.imag.any():
+        a = a.real
+    if a.ndim == 0:
+        v = a.item()
+        return v if isinstance(v, complex) else float(v)
+    if a.dtype.kind not in "fc":
+        a = a.astype(float)
+    if a.ndim == 1 and a.dtype.kind == "f":
+        return DataList(array("d", np.ascontiguousarray(a, dtype=float).tobytes()))
+    return Array(a)
+
+
+def _shape_text(a):
+    if np.ndim(a) == 0:
+        return "número"
+    if a.ndim == 1:
+        return f"vetor de {len(a)}"
+    return f"matriz {a.shape[0]}×{a.shape[1]}"
+
+
+def make_array(items):
+    """[a, b, ...] com algum complexo, ou [[...], [...]] com linhas do mesmo tamanho."""
+    _numpy()
+    rows = [_as_ndarray(item) for item in items]
+    if all(r is not None and r.ndim == 1 for r in rows):
+        if len({len(r) for r in rows}) != 1:
+            raise ValueError("linhas da matriz com tamanhos diferentes")
+        return wrap(np.vstack(rows))
+    if any(r is not None for r in rows):
+        raise ValueError("lista misturando números e vetores")
+    return wrap(np.array([_scalar(v) for v in items]))
+
+
+# ======= Operadores =======
+def _elementwise(x, y, ufunc):
+    a, b = _operand(x), _operand(y)
+    if np.ndim(a) and np.ndim(b) and np.shape(a) != np.shape(b):
+        raise ValueError(f"tamanhos diferentes: {_shape_text(a)} e {_shape_text(b)}")
+    with np.errstate(all="ignore"):
+        return wrap(getattr(np, ufunc)(a, b))
+
+
+def multiply(x, y):
+    """Número × qualquer coisa: elemento a elemento; com matriz: produto matricial."""
+    a, b = _operand(x), _operand(y)
+    if np.ndim(a) == 0 or np.ndim(b) == 0 or (np.ndim(a) == 1 and np.ndim(b) == 1):
+        return _elementwise(a, b, "multiply")
+    if np.shape(a)[-1] != np.shape(b)[0]:
+        raise ValueError(f"produto impossível: {_shape_text(a)} vezes {_shape_text(b)}")
+    return wrap(a @ b)
+
+
+def divide(x, y):
+    a, b = _operand(x), _operand(y)
+    if np.ndim(b) == 2:
+        raise ValueError("divisão por matriz: use inv ou solve")
+    if np.ndim(a) == 2 and np.ndim(b) == 1:
+        raise ValueError(f"divisão impossível: {_shape_text(a)} por {_shape_text(b)}")
+    return _elementwise(a, b, "true_divide")
+
+
+def power(x, y):
+    """Matriz ^ inteiro: potência matricial (A^-1 = inversa); vetores, elemento a elemento."""
+    a, b = _operand(x), _operand(y)
+    if np.ndim(a) == 2:
+        if np.ndim(b) or isinstance(b, complex) or not float(b).is_integer():
+            raise ValueError("matriz só pode ser elevada a um inteiro")
+        _square(a, "potência")
+        try:
+            return wrap(np.linalg.matrix_power(a, int(b)))
+        except np.linalg.LinAlgError:
+            raise ValueError("matriz singular (sem inversa)") from None
+    if np.ndim(b) == 2:
+        raise ValueError("expoente não pode ser matriz")
+    return _elementwise(a, b, "power")
+
+
+# ======= Funções =======
+def _matrix(x, what):
+    a = _as_ndarray(x)
+    if a is None or a.ndim != 2:
+        raise ValueError(f"{what} precisa de uma matriz")
+    return a
+
+
+def _square(a, what):
+    if a.shape[0] != a.shape[1]:
+        raise ValueError(f"{what} precisa de matriz quadrada (esta é {a.shape[0]}×{a.shape[1]})")
+    return a
+
+
+def _vector(x, what):
+    a = _as_ndarray(x)
+    if a is None or a.ndim != 1:
+        raise ValueError(f"{what} precisa de um vetor")
+    return a
+
+
+def det(m):
+    # slogdet: det de uma matriz grande passa fácil de 1e308 (inf, com aviso do NumPy)
+    sign, logabs = np.linalg.slogdet(_square(_matrix(m, "determinante"), "determinante"))
+    if logabs > 709.0:
+        raise OverflowError(f"determinante grande demais (cerca de 10 elevado a {logabs / math.log(10):.0f})")
+    return wrap(sign * np.exp(logabs))
+
+
+def inv(m):
+    a = _square(_matrix(m, "inversa"), "inversa")
+    try:
+        return wrap(np.linalg.inv(a))
+    except np.linalg.LinAlgError:
+        raise ValueError("matriz singular (sem inversa)") from None
+
+
+def solve(m, b):
+    """x tal que m·x = b (b vetor ou matriz com tantas linhas quanto m)."""
+    a = _square(_matrix(m, "solve"), "solve")
+    rhs = _as_ndarray(b)
+    if rhs is None or len(rhs) != a.shape[0]:
+        raise ValueError(f"solve: o lado direito precisa de {a.shape[0]} linhas")
+    try:
+        return wrap(np.linalg.solve(a, rhs))
+    except np.linalg.LinAlgError:
+        raise ValueError("sistema sem solução única (matriz singular)") from None
+
+
+def dot(x, y):
+    a, b = _operand(x), _operand(y)
+    if np.ndim(a) == 1 and np.ndim(b) == 1:
+        if len(a) != len(b):
+            raise ValueError(f"tamanhos diferentes: {_shape_text(a)} e {_shape_text(b)}")
+        return wrap(np.dot(a, b))
+    return multiply(a, b)
+
+
+def cross(x, y):
+    a, b = _vector(x, "produto vetorial"), _vector(y, "produto vetorial")
+    if len(a) != 3 or len(b) != 3:
+        raise ValueError("produto vetorial precisa de vetores de 3 componentes")
+    return wrap(np.cross(a, b))
+
+
+def _hermitian(a):
+    return np.allclose(a, a.conj().T)
+
+
+def eig(m):
+    """Autovalores (em ordem crescente se a matriz for simétrica)."""
+    a = _square(_matrix(m, "autovalores"), "autovalores")
+    return wrap(np.linalg.eigvalsh(a) if _hermitian(a) else np.linalg.eigvals(a))
+
+
+def eigvec(m):
+    """Autovetores nas colunas, na mesma ordem de eig()."""
+    a = _square(_matrix(m, "autovetores"), "autovetores")
+    return wrap((np.linalg.eigh(a) if _hermitian(a) else np.linalg.eig(a))[1])
+
+
+def transpose(m):
+    a = _as_ndarray(m)
+    if a is None:
+        return m
+    return wrap(a.T if a.ndim == 2 else a.reshape(-1, 1))
+
+
+def trace(m):
+    return wrap(np.trace(_square(_matrix(m, "traço"), "traço")))
+
+
+def rank(m):
+    return float(np.linalg.matrix_rank(_matrix(m, "posto")))
+
+
+def norm(x):
+    a = _as_ndarray(x)
+    return abs(x) if a is None else float(np.linalg.norm(a))
+
+
+def identity(n):
+    n = _scalar(n)
+    if isinstance(n, complex) or not n.is_integer() or not 1 <= n <= MAX_SIDE:
+        raise ValueError(f"identity espera um inteiro de 1 a {MAX_SIDE}")
+    _numpy()
+    return Array(np.eye(int(n)))
+
+
+def load_matrix(path, delimiter=None):
+    """
+    CSV inteiro (só números; cabeçalho opcional) como Array 2D. Com ";"
+    a vírgula é a decimal, como em stats.load_csv.
+    """
+    _numpy()
+    with open(path, encoding="utf-8") as f:
+        first = f.readline()
+    if delimiter is None:
+        delimiter = ";" if ";" in first else ("\t" if "\t" in first else ",")
+    comma = delimiter == ";"
+    skip = 0 if all(_is_number(s.strip(), comma) for s in first.split(delimiter)) else 1
+    try:
+        a = np.loadtxt(path, delimiter=delimiter, skiprows=skip, ndmin=2, encoding="utf-8",
+                       converters=(lambda s: float(s.replace(",", "."))) if comma else None)
+    except ValueError as e:
+        raise ValueError(f"matriz inválida: {e}") from None
+    if a.size == 0 or max(a.shape) > MAX_SIDE:
+        raise ValueError(f"matriz vazia ou com mais de {MAX_SIDE} linhas ou colunas")
+    return Array(a)
+
+
+def _part(name, scalar_fn, array_fn):
+    def fn(x):
+        a = _as_ndarray(x)
+        if a is None:
+            return scalar_fn(_scalar(x))
+        return wrap(array_fn(a))
+    fn.__name__ = name
+    return fn
+
+
+re_ = _part("re", lambda z: z.real, lambda a: a.real)
+im_ = _part("im", lambda z: z.imag, lambda a: a.imag)
+conj = _part("conj", lambda z: z.conjugate(), lambda a: a.conj())
+
+
+# ======= Funções escalares com complexos e vetores =======
+# Nome na calculadora -> (cmath, ufunc do NumPy)
+_UNARY = {
+    "sqrt": ("sqrt", "sqrt"), "exp": ("exp", "exp"), "ln": ("log", "log"), "log": ("log10", "log10"),
+    "sin": ("sin", "sin"), "cos": ("cos", "cos"), "tan": ("tan", "tan"),
+    "asin": ("asin", "arcsin"), "acos": ("acos", "arccos"), "atan": ("atan", "arctan"),
+    "floor": (None, "floor"), "ceil": (None, "ceil"),
+}
+_TRIG = {"sin", "cos", "tan"}
+_INVERSE_TRIG = {"asin", "acos", "atan"}
+
+
+def apply(name, x, deg=False, base=None):
+    """Função `name` da calculadora num complexo (cmath) ou elemento a elemento numa lista/matriz.
+
+    Chamada pelas funções do CalcEngine quando o math recusa o argumento
+    (TypeError); `deg` converte ângulos como no modo graus.
+    """
+    cname, uname = _UNARY[name]
+    a = _as_ndarray(x)
+    if a is None:
+        if not isinstance(x, complex) or cname is None:
+            raise ValueError(f"{name} não aceita {x}")
+        fn = getattr(cmath, cname)
+        if deg and name in _TRIG:
+            x = x * (math.pi / 180)
+        v = fn(x) if base is None else cmath.log(x, base)
+        return v * (180 / math.pi) if deg and name in _INVERSE_TRIG else v
+    # listas e matrizes: elemento a elemento (sqrt de matriz não é a raiz matricial)
+    with np.errstate(all="ignore"):
+        if deg and name in _TRIG:
+            a = np.radians(a)
+        v = getattr(np, uname)(a)
+        if base is not None:
+            v = np.log(a) / np.log(base)
+        if deg and name in _INVERSE_TRIG:
+            v = np.degrees(v)
+    return wrap(v)
+
+
+def lifted(real, name):
+    """`real` (math.*) para números reais; complexos, listas e matrizes vão para apply()."""
+    def fn(x):
+        try:
+            return real(x)
+        except TypeError:
+            return apply(name, x)
+    fn.__name__ = name
+    return fn
+
+
+def namespace(mode):
+    """Funções de matriz e complexos para o namespace do CalcEngine (arg depende de graus/radianos)."""
+    deg = mode == "DEG"
+
+    def arg(z):
+        a = _as_ndarray(z)
+        if a is None:
+            v = cmath.phase(_scalar(z))
+            return math.degrees(v) if deg else v
+        v = np.angle(a, deg=deg)
+        return wrap(v)
+
+    return {
+        "i": 1j,
+        "det": det, "inv": inv, "solve": solve, "dot": dot, "cross": cross,
+        "eig": eig, "eigvec": eigvec, "transpose": transpose, "trace": trace, "rank": rank,
+        "norm": norm, "identity": identity,
+        "re": re_, "im": im_, "conj": conj, "arg": arg,
+    }
+
+
+# Nome na calculadora -> (mín, máx) de argumentos
+ARITY = {
+    "det": (1, 1), "inv": (1, 1), "solve": (2, 2), "dot": (2, 2), "cross": (2, 2),
+    "eig": (1, 1), "eigvec": (1, 1), "transpose": (1, 1), "trace": (1, 1), "rank": (1, 1),
+    "norm": (1, 1), "identity": (1, 1),
+    "re": (1, 1), "im": (1, 1), "conj": (1, 1), "arg": (1, 1),
+}
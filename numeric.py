@@ -0,0 +1,495 @@
+"""
+Backends numéricos do CalcEngine: float (padrão), Decimal e Fraction.
+
+O float é o caminho de sempre e continua sem nenhuma camada a mais (o
+motor usa _backend = None). Os outros trocam só três coisas, atrás da
+mesma tabela de funções (CalcEngine.FUNCTIONS):
+
+  - como o parser converte os literais ("0.1" vira Decimal("0.1") ou Fraction(1, 10))
+  - o namespace (pi, e, sin, sqrt, ... na aritmética do backend)
+  - o contexto decimal (precisão) ativo durante a compilação e a avaliação
+
+    engine.set_backend("decimal", precision=50)   # 0.1 + 0.2 = 0.3; 1/3 com 50 dígitos
+    engine.set_backend("fraction")                # 1/3 + 1/6 = 1/2, exato
+    engine.set_backend("float")                   # volta ao caminho rápido
+
+Decimal: pi (Machin, em inteiros) e e são calculados uma vez por precisão
+(lru_cache); seno, arco tangente etc. usam séries com dígitos de guarda.
+Fraction: + - * / e potências inteiras são exatos; seno e cosseno em graus
+são exatos onde o valor é racional (0, ±1/2, ±1); o resto (raiz não
+quadrada, ln, pi...) é irracional e cai para float.
+"""
+import math
+from contextlib import nullcontext
+from decimal import Context, Decimal, DecimalException, Overflow, getcontext, localcontext
+from fractions import Fraction
+from functools import lru_cache
+
+import combinatorics
+
+BACKENDS = ("float", "decimal", "fraction")
+DEFAULT_PRECISION = 50
+MAX_PRECISION = 10_000
+# Dígitos extras nas séries (o resultado é arredondado para a precisão pedida no fim)
+_GUARD = 10
+# Maior expoente (dígitos antes da vírgula) aceito em sin/cos/tan do Decimal: a redução de
+# período pede um dígito de precisão a mais por dígito do argumento (10^20000 levava segundos)
+MAX_REDUCTION_DIGITS = 1000
+
+EXACT_TYPES = (Decimal, Fraction)
+
+
+def make_backend(name="float", precision=None):
+    """Backend pelo nome; None para "float" (o motor usa o caminho nativo)."""
+    name = (name or "float").lower()
+    if name == "float":
+        return None
+    if name == "decimal":
+        return DecimalBackend(DEFAULT_PRECISION if precision is None else precision)
+    if name == "fraction":
+        return FractionBackend()
+    raise ValueError(f"backend numérico desconhecido: {name}")
+
+
+def error_text(e):
+    """Mensagem em português para as exceções do módulo decimal (e a divisão por zero de Fraction)."""
+    if isinstance(e, ZeroDivisionError):
+        return "divisão por zero"
+    if isinstance(e, Overflow):
+        return "resultado grande demais"
+    if isinstance(e, DecimalException):
+        return "operação inválida"
+    if isinstance(e, TypeError) and "complex" in str(e):
+        return "números complexos não funcionam com decimal: use float ou frações (F6)"
+    return str(e) or type(e).__name__
+
+
+def to_float(x):
+    """Decimal/Fraction -> int (se inteiro) ou float, para voltar ao backend float."""
+    if isinstance(x, Fraction):
+        return x.numerator if x.denominator == 1 else float(x)
+    if isinstance(x, Decimal):
+        if x.is_finite() and x == x.to_integral_value():
+            return int(x)
+        return float(x)
+    return x
+
+
+# ======= Constantes por precisão =======
+def _arccot(x, unity):
+    """arccot(x) * unity em aritmética inteira (série de Gregory)."""
+    total = power = unity // x
+    x2 = x * x
+    n = 3
+    sign = -1
+    while power:
+        power //= x2
+        total += sign * (power // n)
+        sign = -sign
+        n += 2
+    return total
+
+
+@lru_cache(maxsize=32)
+def decimal_pi(prec):
+    """pi com `prec` dígitos (Machin: 16 arccot 5 - 4 arccot 239)."""
+    guard = prec + _GUARD
+    unity = 10 ** guard
+    pi = 4 * (4 * _arccot(5, unity) - _arccot(239, unity))
+    return Context(prec=prec).divide(pi, unity)
+
+
+@lru_cache(maxsize=32)
+def decimal_e(prec):
+    """e com `prec` dígitos: soma de 1/k! em ponto fixo inteiro (bem mais rápido que Decimal.exp)."""
+    unity = term = 10 ** (prec + _GUARD)
+    total = 0
+    k = 0
+    while term:
+        total += term
+        k += 1
+        term //= k
+    return Context(prec=prec).divide(total, unity)
+
+
+# ======= Funções em Decimal =======
+def _sin_series(x):
+    """Taylor do seno para |x| <= pi, na precisão do contexto atual."""
+    x2 = x * x
+    term = s = x
+    n = 1
+    while True:
+        term = -term * x2 / ((n + 1) * (n + 2))
+        n += 2
+        s2 = s + term
+        if s2 == s:
+            return s
+        s = s2
+
+
+def _cos_series(x):
+    x2 = x * x
+    term = s = Decimal(1)
+    n = 0
+    while True:
+        term = -term * x2 / ((n + 1) * (n + 2))
+        n += 2
+        s2 = s + term
+        if s2 == s:
+            return s
+        s = s2
+
+
+_TENTH = Decimal("0.1")
+_ASIN_SWITCH = Decimal("0.7")
+
+
+def _atan_series(x):
+    """Arco tangente para |x| <= 1: reduz com atan(x) = 2 atan(x / (1 + sqrt(1 + x²))) e soma a série."""
+    doublings = 0
+    while abs(x) > _TENTH:
+        x = x / (1 + (1 + x * x).sqrt())
+        doublings += 1
+    x2 = x * x
+    term = s = x
+    n = 1
+    while True:
+        term = -term * x2
+        n += 2
+        s2 = s + term / n
+        if s2 == s:
+            break
+        s = s2
+    return s * (2 ** doublings)
+
+
+def _working_context(x=None):
+    """Contexto com dígitos de guarda (e mais, se x for enorme, para a redução de período)."""
+    prec = getcontext().prec + _GUARD
+    if x is not None and x.is_finite() and x.adjusted() > 0:
+        if x.adjusted() >= MAX_REDUCTION_DIGITS:
+            raise ValueError(f"argumento grande demais (mais de {MAX_REDUCTION_DIGITS} dígitos)")
+        prec += x.adjusted()
+    return localcontext(Context(prec=prec, Emax=getcontext().Emax, Emin=getcontext().Emin))
+
+
+def _check_finite(x, what):
+    if not x.is_finite():
+        raise ValueError(f"{what}: argumento inválido")
+
+
+def _dsin_rad(x):
+    x = Decimal(x)
+    _check_finite(x, "seno")
+    with _working_context(x) as c:
+        pi = decimal_pi(c.prec)
+        x = x.remainder_near(2 * pi)
+        s = _sin_series(x)
+    return +s
+
+
+def _dcos_rad(x):
+    x = Decimal(x)
+    _check_finite(x, "cosseno")
+    with _working_context(x) as c:
+        pi = decimal_pi(c.prec)
+        x = x.remainder_near(2 * pi)
+        s = _cos_series(x)
+    return +s
+
+
+def _dsin_deg(x):
+    """Seno em graus: reduz em graus (exato) e zera os múltiplos de 180."""
+    x = Decimal(x)
+    _check_finite(x, "seno")
+    with _working_context(x) as c:
+        x = x.remainder_near(360)
+        if x % 180 == 0:
+            return Decimal(0)
+        s = _sin_series(x * decimal_pi(c.prec) / 180)
+    return +s
+
+
+def _dcos_deg(x):
+    return _dsin_deg(90 - Decimal(x))
+
+
+def _dtan(sin, cos, what):
+    def _tan(x):
+        with _working_context(Decimal(x)):
+            c = cos(x)
+            if c == 0:
+                raise ValueError(f"{what} não é definida neste ângulo")
+            t = sin(x) / c
+        return +t
+    return _tan
+
+
+def _datan_rad(x):
+    x = Decimal(x)
+    if x.is_infinite():
+        return decimal_pi(getcontext().prec) / 2 * (1 if x > 0 else -1)
+    with _working_context() as c:
+        if abs(x) > 1:
+            half_pi = decimal_pi(c.prec) / 2
+            r = (half_pi if x > 0 else -half_pi) - _atan_series(1 / x)
+        else:
+            r = _atan_series(x)
+    return +r
+
+
+def _dasin_rad(x):
+    x = Decimal(x)
+    if abs(x) > 1:
+        raise ValueError("arco seno: argumento fora de [-1, 1]")
+    with _working_context() as c:
+        if abs(x) <= _ASIN_SWITCH:
+            r = _atan_series(x / (1 - x * x).sqrt())
+        else:
+            # perto de ±1: pi/2 - atan(sqrt(1 - x²) / |x|), sem dividir por quase zero
+            r = decimal_pi(c.prec) / 2 - _atan_series((1 - x * x).sqrt() / abs(x))
+            r = r if x > 0 else -r
+    return +r
+
+
+def _dacos_rad(x):
+    x = Decimal(x)
+    if abs(x) > 1:
+        raise ValueError("arco cosseno: argumento fora de [-1, 1]")
+    with _working_context() as c:
+        r = decimal_pi(c.prec) / 2 - _dasin_rad(x)
+    return +r
+
+
+def _to_degrees(fn):
+    def _deg(x):
+        with _working_context() as c:
+            r = fn(x) * 180 / decimal_pi(c.prec)
+        return +r
+    return _deg
+
+
+def _dlog(x, b=10):
+    x = Decimal(x)
+    if b == 10:
+        return x.log10()
+    with _working_context():
+        r = x.ln() / Decimal(b).ln()
+    return +r
+
+
+def _decimal_of(r):
+    """Resultado float de uma função sem versão Decimal (gamma de não inteiro) volta como Decimal."""
+    return +Decimal(repr(r)) if isinstance(r, float) else r
+
+
+def _via_float(fn):
+    def _f(*args):
+        return _decimal_of(fn(*args))
+    return _f
+
+
+def _integral(v, error="pow com módulo só aceita inteiros"):
+    """int de um valor inteiro de qualquer backend (2, Fraction(2), Decimal("2.0")); senão ValueError."""
+    if isinstance(v, int) and not isinstance(v, bool):
+        return v
+    if isinstance(v, Fraction) and v.denominator == 1:
+        return v.numerator
+    if isinstance(v, Decimal) and v.is_finite() and v == v.to_integral_value():
+        return int(v)
+    raise ValueError(error)
+
+
+def _pow(x, y, z=None):
+    """pow dos backends decimal e fraction: com módulo, os três argumentos viram int (Decimal e Fraction não aceitam)."""
+    if z is None:
+        return pow(x, y)
+    return pow(_integral(x), _integral(y), _integral(z))
+
+
+def _round(x, ndigits=None):
+    """round com o número de casas vindo como Decimal ou Fraction (o literal 2 no backend)."""
+    if ndigits is None:
+        return round(x)
+    return round(x, _integral(ndigits, "round só aceita um número inteiro de casas"))
+
+
+class DecimalBackend:
+    """Aritmética decimal com `precision` dígitos significativos."""
+    name = "decimal"
+    exact = False
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        precision = int(precision)
+        if not 1 <= precision <= MAX_PRECISION:
+            raise ValueError(f"precisão deve ficar entre 1 e {MAX_PRECISION} dígitos")
+        self.precision = precision
+        self.key = ("decimal", precision)
+        self._context = Context(prec=precision)
+
+    def context(self):
+        return localcontext(self._context)
+
+    def number(self, text):
+        return Decimal(text)
+
+    def value(self, x):
+        """Valor vindo de fora (ANS de outro backend) no tipo do backend."""
+        if isinstance(x, float):
+            return Decimal(repr(x)) if math.isfinite(x) else Decimal(x)
+        if isinstance(x, Fraction):
+            return self._context.divide(Decimal(x.numerator), x.denominator)
+        return x
+
+    def namespace(self, mode):
+        deg = mode == "DEG"
+        pi = decimal_pi(self.precision)
+        sin = _dsin_deg if deg else _dsin_rad
+        cos = _dcos_deg if deg else _dcos_rad
+        fact = _via_float(combinatorics.factorial)
+        return {
+            "pi": pi, "e": decimal_e(self.precision), "ANS": 0,
+            "abs": abs, "floor": math.floor, "ceil": math.ceil, "round": _round,
+            "sin": sin, "cos": cos, "tan": _dtan(sin, cos, "tangente"),
+            "asin": _to_degrees(_dasin_rad) if deg else _dasin_rad,
+            "acos": _to_degrees(_dacos_rad) if deg else _dacos_rad,
+            "atan": _to_degrees(_datan_rad) if deg else _datan_rad,
+            "sqrt": lambda x: Decimal(x).sqrt(), "exp": lambda x: Decimal(x).exp(),
+            "ln": lambda x, b=None: Decimal(x).ln() if b is None else _dlog(x, b),
+            "log": _dlog,
+            "pow": _pow,
+            "fact": fact, "factorial": fact,
+            "nCr": combinatorics.comb, "comb": combinatorics.comb,
+            "nPr": combinatorics.perm, "perm": combinatorics.perm,
+            "dfact": combinatorics.double_factorial, "multinomial": combinatorics.multinomial,
+            "gamma": _via_float(combinatorics.gamma),
+            "rad": lambda x: x * pi / 180, "deg": lambda x: x * 180 / pi,
+        }
+
+
+# ======= Frações exatas =======
+# Niven: em graus racionais, o seno só é racional em 0, ±1/2 e ±1
+_SIN_DEG_EXACT = {0: Fraction(0), 30: Fraction(1, 2), 90: Fraction(1), 150: Fraction(1, 2),
+                  180: Fraction(0), 210: Fraction(-1, 2), 270: Fraction(-1), 330: Fraction(-1, 2)}
+_ASIN_DEG_EXACT = {Fraction(0): 0, Fraction(1, 2): 30, Fraction(1): 90}
+
+
+def _fsin_deg(x):
+    r = _SIN_DEG_EXACT.get(Fraction(x) % 360)
+    return r if r is not None else math.sin(math.radians(x))
+
+
+def _fcos_deg(x):
+    return _fsin_deg(90 - Fraction(x))
+
+
+def _ftan_deg(x):
+    s = _fsin_deg(x)
+    c = _fcos_deg(x)
+    if isinstance(s, Fraction) and isinstance(c, Fraction):
+        if c == 0:
+            raise ValueError("tangente não é definida neste ângulo")
+        if s == 0 or abs(s) == abs(c):
+            return s / c
+    return math.tan(math.radians(x))
+
+
+def _fasin_deg(x):
+    x = Fraction(x)
+    r = _ASIN_DEG_EXACT.get(abs(x))
+    if r is not None:
+        return Fraction(r if x >= 0 else -r)
+    return math.degrees(math.asin(x))
+
+
+def _facos_deg(x):
+    r = _fasin_deg(x)
+    return 90 - r if isinstance(r, Fraction) else math.degrees(math.acos(x))
+
+
+def _fatan_deg(x):
+    x = Fraction(x)
+    if x == 0 or abs(x) == 1:
+        return Fraction(45) * x
+    return math.degrees(math.atan(x))
+
+
+def _fsqrt(x):
+    """Raiz exata quando numerador e denominador são quadrados perfeitos; senão float."""
+    x = Fraction(x)
+    if x >= 0:
+        n, d = math.isqrt(x.numerator), math.isqrt(x.denominator)
+        if n * n == x.numerator and d * d == x.denominator:
+            return Fraction(n, d)
+    return math.sqrt(x)
+
+
+class FractionBackend:
+    """Racionais exatos (fractions.Fraction)."""
+    name = "fraction"
+    exact = True
+    precision = None
+    key = ("fraction",)
+
+    def context(self):
+        return nullcontext()
+
+    def number(self, text):
+        return Fraction(text)
+
+    def value(self, x):
+        # float continua float: é resultado inexato (raiz, seno...), não vira fração "exata"
+        if isinstance(x, Decimal):
+            return Fraction(x) if x.is_finite() else float(x)
+        return x
+
+    def namespace(self, mode):
+        deg = mode == "DEG"
+        return {
+            "pi": math.pi, "e": math.e, "ANS": 0,
+            "abs": abs, "floor": math.floor, "ceil": math.ceil, "round": _round,
+            "sin": _fsin_deg if deg else math.sin, "cos": _fcos_deg if deg else math.cos,
+            "tan": _ftan_deg if deg else math.tan,
+            "asin": _fasin_deg if deg else math.asin, "acos": _facos_deg if deg else math.acos,
+            "atan": _fatan_deg if deg else math.atan,
+            "sqrt": _fsqrt, "exp": math.exp,
+            "ln": math.log,
+            "log": lambda x, b=10: math.log(x, b),
+            "pow": _pow,
+            "fact": combinatorics.factorial, "factorial": combinatorics.factorial,
+            "nCr": combinatorics.comb, "comb": combinatorics.comb,
+            "nPr": combinatorics.perm, "perm": combinatorics.perm,
+            "dfact": combinatorics.double_factorial, "multinomial": combinatorics.multinomial,
+            "gamma": combinatorics.gamma,
+            "rad": math.radians, "deg": math.degrees,
+        }
+
+
+# ======= Formatação =======
+# Frações com mais dígitos que isto aparecem como aproximação decimal
+MAX_FRACTION_DIGITS = 40
+_NORMALIZE = Context(prec=MAX_PRECISION)
+
+
+def format_exact(x):
+    """Texto de um Decimal ("0.3", "1.5E-60") ou Fraction ("1/3"), sem arredondar para 12 dígitos.
+
+    None quando o valor é inteiro (format_number mostra como int).
+    """
+    if isinstance(x, Fraction):
+        num, den = x.numerator, x.denominator
+        if den == 1:
+            return None    # inteiro: format_number cuida
+        if len(str(den)) + len(str(abs(num))) > MAX_FRACTION_DIGITS:
+            q = Context(prec=12).divide(Decimal(num), Decimal(den))
+            return str(q.normalize(Context(prec=12)))
+        return f"{num}/{den}"
+    if not x.is_finite():
+        return "nan" if x.is_nan() else ("-inf" if x < 0 else "inf")
+    if x.is_zero():
+        return "0"
+    x = x.normalize(_NORMALIZE)
+    exp = x.as_tuple().exponent
+    if exp == 0 or (exp > 0 and x.adjusted() < 15):
+        return None
+    return str(x)
@@ -0,0 +1,230 @@
+"""
+Perfil do CalcEngine: onde vai o tempo de cada conta.
+
+Ligado com CalcEngine.set_profiler(EngineProfiler()), o motor passa a
+cronometrar cada evaluate() por fase
+
+    cache      achar o programa no cache de expressões (acerto)
+    compile    tokenizar, analisar e compilar (falta no cache)
+    namespace  montar ou atualizar o namespace (mode, ANS)
+    check      checagem de custo
+    run        a conta em si
+
+e troca cada função da tabela do motor (sin, nCr, mean, integrate, as
+funções do usuário...) no namespace por uma versão cronometrada (Timed):
+chamadas, tempo acumulado e tempo próprio (sem as funções chamadas de
+dentro, como o sin no corpo de um integrate). Contas mais lentas que
+`slow_ms` vão para um anel das últimas `keep`, com as fases de cada uma.
+
+Desligado (o padrão, profiler None) o motor não muda: o namespace é o de
+sempre e evaluate() paga um teste de atributo. Ligar e desligar refaz os
+namespaces, então vale a qualquer momento.
+
+Exporta JSON (export_json) ou o formato do cProfile (dump_stats, lido
+por pstats, snakeviz etc.); pstats.Stats(profiler) também funciona.
+Tempos de time.perf_counter(), em segundos; os relatórios são em ms.
+"""
+import json
+import marshal
+import time
+from collections import deque, namedtuple
+
+PHASES = ("cache", "compile", "namespace", "check", "run")
+
+# Chaves no formato do cProfile: (arquivo, linha, nome)
+_ROOT = ("<calc>", 0, "evaluate")
+
+# ms: duração da conta; phases: {fase: ms}; error: mensagem se falhou; at: time.time()
+SlowExpression = namedtuple("SlowExpression", "expr ms phases error at")
+
+
+class _Entry:
+    __slots__ = ("calls", "primitive", "own", "total", "max", "active", "callers")
+
+    def __init__(self):
+        self.calls = 0          # todas as chamadas
+        self.primitive = 0      # as que não estavam dentro de outra da mesma função
+        self.own = 0.0          # tempo próprio (sem as funções chamadas de dentro)
+        self.total = 0.0        # tempo acumulado, contando cada chamada primitiva
+        self.max = 0.0
+        self.active = 0         # chamadas em andamento (recursão)
+        self.callers = {}       # chave de quem chamou -> [chamadas, primitivas, próprio, acumulado]
+
+
+class Timed:
+    """Função do namespace cronometrada: `fn` original, contada sob `key` no `profiler`."""
+    __slots__ = ("fn", "key", "profiler")
+
+    def __init__(self, fn, key, profiler):
+        self.fn = fn
+        self.key = key
+        self.profiler = profiler
+
+    def __call__(self, *args):
+        frame = self.profiler.start(self.key)
+        try:
+            return self.fn(*args)
+        finally:
+            self.profiler.stop(frame)
+
+    def __repr__(self):
+        return f"Timed({self.key[2]})"
+
+
+class EngineProfiler:
+    """Fases, funções e contas lentas de um ou mais CalcEngine (o serviço divide um entre as sessões)."""
+
+    def __init__(self, slow_ms=50.0, keep=100):
+        self.slow_s = float(slow_ms) / 1000.0
+        self.slow = deque(maxlen=int(keep))
+        self.clock = time.perf_counter
+        self._entries = {}
+        self._stack = []        # [entrada, início, tempo dos filhos, chave, chave de quem chamou]
+        self.expressions = 0
+        self.errors = 0
+
+    def reset(self):
+        self._entries.clear()
+        self._stack.clear()
+        self.slow.clear()
+        self.expressions = self.errors = 0
+
+    # ---------- medição ----------
+    def start(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry()
+        entry.active += 1
+        stack = self._stack
+        frame = [entry, self.clock(), 0.0, key, stack[-1][3] if stack else None]
+        stack.append(frame)
+        return frame
+
+    def stop(self, frame):
+        """Fecha a chamada aberta por start(); devolve a duração (s)."""
+        dt = self.clock() - frame[1]
+        stack = self._stack
+        stack.pop()           # sempre o último aberto: quem chama start() fecha num finally
+        entry = frame[0]
+        entry.active -= 1
+        own = dt - frame[2]
+        primitive = entry.active == 0
+        entry.calls += 1
+        entry.own += own
+        if primitive:
+            entry.primitive += 1
+            entry.total += dt
+        if dt > entry.max:
+            entry.max = dt
+        caller = frame[4]
+        if caller is not None:
+            c = entry.callers.get(caller)
+            if c is None:
+                c = entry.callers[caller] = [0, 0, 0.0, 0.0]
+            c[0] += 1
+            c[2] += own
+            if primitive:
+                c[1] += 1
+                c[3] += dt
+        if stack:
+            stack[-1][2] += dt
+        return dt
+
+    def begin(self):
+        """Abre uma conta (evaluate); as fases ficam dentro dela."""
+        return self.start(_ROOT)
+
+    def phase(self, name):
+        """Abre a fase `name` (com funções cronometradas dentro: a de run); fecha com stop()."""
+        return self.start(("<fase>", 0, name))
+
+    def lap(self, name, t0):
+        """Fase `name` de t0 até agora, sem nada cronometrado dentro; devolve a duração (s)."""
+        frame = self.start(("<fase>", 0, name))
+        frame[1] = t0
+        return self.stop(frame)
+
+    def end(self, frame, expr, phases, error=None):
+        """Fecha a conta aberta por begin(); `phases` ({fase: s}) vai para o anel se ela foi lenta."""
+        dt = self.stop(frame)
+        self.expressions += 1
+        if error is not None:
+            self.errors += 1
+        if dt >= self.slow_s:
+            self.slow.append(SlowExpression(expr, dt * 1000.0,
+                                            {name: s * 1000.0 for name, s in phases.items()}, error, time.time()))
+        return dt
+
+    def wrap(self, name, fn):
+        return Timed(fn, ("<função>", 0, name), self)
+
+    def wrap_namespace(self, ns, names):
+        """Troca no lugar as funções de `ns` cujo nome está em `names` pela versão cronometrada."""
+        for name in names:
+            fn = ns.get(name)
+            if fn is not None and fn.__class__ is not Timed and callable(fn):
+                ns[name] = self.wrap(name, fn)
+        return ns
+
+    # ---------- relatórios ----------
+    def _kind(self, kind):
+        return {key[2]: e for key, e in self._entries.items() if key[0] == kind}
+
+    def summary(self):
+        """{"phases": {fase: {count, total, mean, max}}, "functions": {nome: {calls, total, own, mean, max}}} em ms."""
+        phases = self._kind("<fase>")
+        functions = self._kind("<função>")
+        return {
+            "expressions": self.expressions,
+            "errors": self.errors,
+            "phases": {name: _row(phases[name], count="count") for name in PHASES if name in phases},
+            "functions": {name: {**_row(e, count="calls"), "own": e.own * 1000.0}
+                          for name, e in sorted(functions.items(), key=lambda kv: -kv[1].total)},
+        }
+
+    def to_dict(self):
+        """summary() com as contas lentas: o que export_json grava."""
+        return {"unit": "ms", **self.summary(), "slow_ms": self.slow_s * 1000.0,
+                "slow": [s._asdict() for s in self.slow]}
+
+    def export_json(self, path=None):
+        text = json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+    def create_stats(self):
+        """self.stats no formato do cProfile.Profile ({chave: (cc, nc, tt, ct, quem chamou)})."""
+        self.stats = {key: (e.primitive, e.calls, e.own, e.total,
+                            {caller: tuple(c) for caller, c in e.callers.items()})
+                      for key, e in self._entries.items()}
+
+    def dump_stats(self, path):
+        """Grava no formato de cProfile.Profile.dump_stats: python -m pstats arquivo."""
+        self.create_stats()
+        with open(path, "wb") as f:
+            marshal.dump(self.stats, f)
+
+    def report(self, limit=15):
+        """Tabela de texto: fases, as `limit` funções de maior tempo acumulado e as contas lentas."""
+        s = self.summary()
+        lines = [f"{s['expressions']} contas ({s['errors']} com erro)",
+                 f"{'fase':<12}{'n':>8}{'total':>11}{'média':>10}{'máx':>10}"]
+        for name, p in s["phases"].items():
+            lines.append(f"{name:<12}{p['count']:>8}{p['total']:>11.2f}{p['mean']:>10.4f}{p['max']:>10.3f}")
+        lines.append(f"\n{'função':<12}{'chamadas':>8}{'acumulado':>11}{'próprio':>10}{'máx':>10}")
+        for name, f in list(s["functions"].items())[:limit]:
+            lines.append(f"{name:<12}{f['calls']:>8}{f['total']:>11.2f}{f['own']:>10.2f}{f['max']:>10.3f}")
+        if self.slow:
+            lines.append(f"\ncontas acima de {self.slow_s * 1000.0:g} ms (últimas {len(self.slow)}):")
+            for item in self.slow:
+                worst = max(item.phases, key=item.phases.get) if item.phases else "-"
+                lines.append(f"  {item.ms:9.2f} ms  ({worst})  {item.expr}"
+                             + (f"  erro: {item.error}" if item.error else ""))
+        return "\n".join(lines)
+
+
+def _row(e, count):
+    return {count: e.calls, "total": e.total * 1000.0,
+            "mean": e.total / e.calls * 1000.0 if e.calls else 0.0, "max": e.max * 1000.0}
@@ -0,0 +1,323 @@
+"""
+Gráfico sonoro: uma expressão em x tocada como uma varredura de tom.
+
+A curva é amostrada pelo caminho vetorizado do motor (evaluate_batch) em
+blocos pequenos; cada bloco vira um buffer PCM logo em seguida, então o
+primeiro som sai em milissegundos, sem esperar a curva inteira:
+
+  - altura do tom: y (escala logarítmica de f_lo a f_hi; o intervalo de y
+    vem de uma passada grossa, sem os 2% de cada ponta)
+  - estéreo: x vai da esquerda para a direita
+  - silêncio onde a função não tem valor real (sqrt de negativo, polo)
+  - clique agudo ao cruzar o zero, ruído curto num salto (descontinuidade)
+
+Os pontos notáveis (zeros, máximos/mínimos locais, saltos e buracos no
+domínio) saem junto com cada buffer, para serem anunciados em voz.
+
+    cache = SweepCache()
+    sweep = cache.get(engine, "x^2 - 4", -5, 5)
+    for chunk in sweep:             # SweepChunk(pcm, features, start_s)
+        toca(chunk.pcm)
+    describe(sweep.features)        # "zero em x igual a menos dois, ..."
+
+Uma varredura já gerada fica no cache (expressão, intervalo, modo, formato)
+e é tocada de novo sem recalcular; gerada pela metade, continua de onde
+parou.
+"""
+import math
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from verbalizer import number_text
+
+SweepChunk = namedtuple("SweepChunk", "pcm features start_s")
+# kind: "zero", "max", "min", "jump" (salto), "gap" (começa trecho sem valor real) e "resume" (termina)
+Feature = namedtuple("Feature", "x kind y")
+
+FEATURE_SPEECH = {"zero": "zero", "max": "máximo", "min": "mínimo", "jump": "descontinuidade",
+                  "gap": "sem valor real", "resume": "volta a ter valor"}
+
+COARSE_POINTS = 257
+JUMP_RATIO = 8.0          # salto: passo |dy| muito maior que o anterior e que o típico...
+JUMP_MIN_SPAN = 0.02      # ...e maior que esta fração da faixa de y
+FLIP_JUMP_SPAN = 0.25     # troca de sentido com passo enorme (tan no polo) também é salto
+
+
+def default_range(mode):
+    """Intervalo padrão de x: uma volta e meia para cada lado."""
+    return (-360.0, 360.0) if mode == "DEG" else (-2 * math.pi, 2 * math.pi)
+
+
+def _fmt(v):
+    return f"{v:.4g}"
+
+
+def feature_phrases(features, limit=12):
+    """Frases faladas dos pontos notáveis (os `limit` primeiros), uma por ponto."""
+    if not features:
+        return ["nenhum zero, extremo ou descontinuidade"]
+    parts = []
+    for f in features[:limit]:
+        text = f"{FEATURE_SPEECH[f.kind]} em x igual a {number_text(_fmt(f.x))}"
+        if f.kind in ("max", "min"):
+            text += f", y igual a {number_text(_fmt(f.y))}"
+        parts.append(text)
+    if len(features) > limit:
+        parts.append(f"e mais {len(features) - limit}")
+    return parts
+
+
+def describe(features, limit=12):
+    """Texto falado dos pontos notáveis."""
+    return "; ".join(feature_phrases(features, limit))
+
+
+class Sweep:
+    """
+    Varredura de `expr` em x de x0 a x1: `points` amostras tocadas em `duration` s.
+    Iterar devolve SweepChunk de `block` amostras cada; o que já foi gerado fica
+    guardado e outras iterações (replay) o reaproveitam.
+    """
+
+    def __init__(self, engine, expr, x0, x1, points=512, duration=4.0, sample_rate=22050,
+                 channels=1, block=16, f_lo=220.0, f_hi=1760.0, volume=0.5):
+        if not x1 > x0:
+            raise ValueError("intervalo de x vazio")
+        self.engine = engine
+        self.expr = expr
+        self.x0 = float(x0)
+        self.x1 = float(x1)
+        self.points = int(points)
+        self.duration = float(duration)
+        self.sample_rate = int(sample_rate)
+        self.channels = int(channels)
+        self.block = int(block)
+        self.f_lo = float(f_lo)
+        self.f_hi = float(f_hi)
+        self.volume = float(volume)
+
+        self.chunks = []
+        self.features = []
+        self.done = False
+
+        # Passada grossa: faixa de y para a altura do tom e passo típico para os saltos
+        ys = np.asarray(engine.evaluate_batch(expr, x=np.linspace(self.x0, self.x1, COARSE_POINTS)), dtype=float)
+        finite = ys[np.isfinite(ys)]
+        if finite.size == 0:
+            raise ValueError("a expressão não tem valor real nesse intervalo")
+        lo, hi = np.percentile(finite, (2, 98))
+        if hi - lo < 1e-12 * max(1.0, abs(hi)):
+            lo, hi = lo - 1.0, hi + 1.0
+        self.y_lo = float(lo)
+        self.y_hi = float(hi)
+        steps = np.abs(np.diff(ys))
+        steps = steps[np.isfinite(steps)]
+        scale = (COARSE_POINTS - 1) / (self.points - 1)      # passo grosso -> passo fino
+        self._typical = float(np.median(steps)) * scale if steps.size else 0.0
+
+        # Estado entre blocos
+        self._frame = 0                 # próximo quadro de áudio
+        self._phase = 0.0
+        self._prev = []                 # últimas duas amostras finitas (x, y)
+        self._last_dy = None
+        self._sign = 0
+        self._last_jump = None          # x da última amostra que saltou
+        self._in_gap = False
+        self._prev_level = None         # (nível, finito) da última amostra, para emendar o tom
+        self._gen = self._generate()
+
+    def __iter__(self):
+        i = 0
+        while True:
+            if i < len(self.chunks):
+                yield self.chunks[i]
+                i += 1
+            elif self.done:
+                return
+            else:
+                self._advance()
+
+    def _advance(self):
+        try:
+            chunk = next(self._gen)
+        except StopIteration:
+            self.done = True
+            return
+        self.chunks.append(chunk)
+        self.features.extend(chunk.features)
+
+    def render_all(self):
+        """Gera o que falta (ex.: para anunciar os pontos sem tocar)."""
+        while not self.done:
+            self._advance()
+        return self
+
+    def _generate(self):
+        n = self.points
+        frames_total = int(round(self.duration * self.sample_rate))
+        xs_all = np.linspace(self.x0, self.x1, n)
+        for start in range(0, n, self.block):
+            stop = min(n, start + self.block)
+            xs = xs_all[start:stop]
+            ys = np.asarray(self.engine.evaluate_batch(self.expr, x=xs), dtype=float)
+            ys = np.broadcast_to(ys, xs.shape)
+            features = self._detect(xs, ys)
+            f0 = self._frame
+            f1 = frames_total if stop == n else (stop * frames_total) // n
+            pcm = self._synth(xs_all, start, ys, f0, f1, features)
+            self._frame = f1
+            yield SweepChunk(pcm, features, f0 / self.sample_rate)
+
+    # ---------- pontos notáveis ----------
+    def _detect(self, xs, ys):
+        out = []
+        span = self.y_hi - self.y_lo
+        snap = 1e-9 * (self.x1 - self.x0)      # x quase zero é zero (ex.: 7e-15 na grade)
+        pts = self._prev               # até duas amostras finitas anteriores [(x, y), ...]
+        last_dy = self._last_dy        # passo anterior (None: desconhecido, após salto ou buraco)
+        sign = self._sign              # sentido da última subida/descida
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            if not math.isfinite(y):
+                if not self._in_gap:
+                    out.append(Feature(x, "gap", None))
+                    self._in_gap = True
+                pts = []
+                last_dy = None
+                sign = 0
+                continue
+            if self._in_gap:
+                out.append(Feature(x, "resume", y))
+                self._in_gap = False
+            if pts:
+                px, py = pts[-1]
+                dy = y - py
+                ady = abs(dy)
+                flip = sign != 0 and dy != 0.0 and (dy > 0) != (sign > 0)
+                crosses = (py < 0.0) != (y < 0.0)
+                # salto: passo bem maior que o anterior, ou troca de sentido/sinal com passo enorme
+                # (nenhuma curva contínua cruza um quarto da faixa de y entre duas amostras)
+                jump = ((last_dy is not None and ady > JUMP_RATIO * abs(last_dy) and ady > JUMP_MIN_SPAN * span)
+                        or ((flip or crosses) and ady > FLIP_JUMP_SPAN * span))
+                if jump:
+                    mid = px + (x - px) / 2
+                    mid = 0.0 if abs(mid) < snap else mid
+                    # perto de um polo o passo cresce antes do salto: uma marca só, no
+                    # ponto em que o sinal troca (onde fica o polo)
+                    if self._last_jump is not None and x - self._last_jump < 3 * (x - px):
+                        if crosses and out and out[-1].kind == "jump":
+                            out[-1] = Feature(mid, "jump", None)
+                    else:
+                        out.append(Feature(mid, "jump", None))
+                    self._last_jump = x
+                    pts = [(x, y)]
+                    last_dy = None
+                    sign = 0
+                    continue
+                if (y == 0.0 and py != 0.0) or (py != 0.0 and y != 0.0 and (py < 0.0) != (y < 0.0)):
+                    zx = x if y == 0.0 else px + (x - px) * py / (py - y)
+                    out.append(Feature(0.0 if abs(zx) < snap else zx, "zero", 0.0))
+                if flip and len(pts) == 2:
+                    out.append(self._vertex(pts[0], pts[1], (x, y), "max" if sign > 0 else "min", snap))
+                if dy != 0.0:
+                    sign = 1 if dy > 0 else -1
+                last_dy = dy
+            pts = (pts + [(x, y)])[-2:]
+        self._prev = pts
+        self._last_dy = last_dy
+        self._sign = sign
+        # o extremo é marcado entre amostras anteriores: mantém a ordem por x
+        out.sort(key=lambda f: f.x)
+        return out
+
+    @staticmethod
+    def _vertex(a, b, c, kind, snap):
+        """Extremo refinado pela parábola que passa por três amostras vizinhas."""
+        (x0, y0), (x1, y1), (x2, y2) = a, b, c
+        den = y0 - 2 * y1 + y2
+        if den == 0.0:
+            return Feature(x1, kind, y1)
+        h = (x2 - x0) / 2
+        off = 0.5 * (y0 - y2) / den            # em passos, entre -1 e 1
+        x = x1 + off * h
+        y = y1 - 0.25 * (y0 - y2) * off
+        return Feature(0.0 if abs(x) < snap else x, kind, y)
+
+    # ---------- áudio ----------
+    def _synth(self, xs_all, start, ys, f0, f1, features):
+        frames = f1 - f0
+        if frames <= 0:
+            return b""
+        sr = self.sample_rate
+        n = self.points
+        total = self.duration * sr
+        # instante (em quadros) de cada amostra da curva; interpola y e amplitude por quadro
+        t = np.arange(f0, f1, dtype=float)
+        pos = t * (n - 1) / max(1.0, total - 1)         # posição fracionária na curva
+        idx = np.arange(start, start + ys.size, dtype=float)
+        finite = np.isfinite(ys)
+        level = np.clip((np.where(finite, ys, self.y_lo) - self.y_lo) / (self.y_hi - self.y_lo), 0.0, 1.0)
+        if self._prev_level is not None:
+            idx = np.concatenate(([start - 1.0], idx))
+            level = np.concatenate(([self._prev_level[0]], level))
+            finite = np.concatenate(([self._prev_level[1]], finite))
+        self._prev_level = (float(level[-1]), bool(finite[-1]))
+        lv = np.interp(pos, idx, level)
+        amp = np.interp(pos, idx, finite.astype(float)) * self.volume
+        freq = self.f_lo * (self.f_hi / self.f_lo) ** lv
+        phase = self._phase + np.cumsum(2 * np.pi * freq / sr)
+        self._phase = float(phase[-1] % (2 * np.pi))
+        wave = np.sin(phase) * amp
+
+        # marcas: clique no zero, ruído no salto
+        span = self.x1 - self.x0
+        for f in features:
+            if f.kind not in ("zero", "jump"):
+                continue
+            at = int((f.x - self.x0) / span * (total - 1)) - f0
+            length = int(0.025 * sr)
+            if not 0 <= at < frames:
+                continue
+            k = np.arange(min(length, frames - at))
+            env = np.exp(-k / (0.005 * sr)) * 0.6
+            if f.kind == "zero":
+                mark = np.sin(2 * np.pi * 2500.0 * k / sr) * env
+            else:
+                mark = np.random.default_rng(int(at)).uniform(-1.0, 1.0, k.size) * env
+            wave[at:at + k.size] += mark
+
+        wave = np.clip(wave, -1.0, 1.0)
+        if self.channels == 2:
+            pan = (t / max(1.0, total - 1)) * (np.pi / 2)        # esquerda -> direita
+            wave = np.column_stack((wave * np.cos(pan), wave * np.sin(pan)))
+        elif self.channels > 2:
+            wave = np.repeat(wave[:, None], self.channels, axis=1)
+        return (wave * 32767).astype("<i2").tobytes()
+
+
+class SweepCache:
+    """LRU de varreduras por (expressão, intervalo, modo, ANS se usado, formato do áudio)."""
+
+    def __init__(self, maxsize=8):
+        self.maxsize = int(maxsize)
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, engine, expr, x0, x1, **options):
+        key = (expr.strip(), float(x0), float(x1), engine.mode,
+               engine.last if "ANS" in expr else None, tuple(sorted(options.items())))
+        sweep = self._items.get(key)
+        if sweep is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return sweep
+        self.misses += 1
+        sweep = Sweep(engine, expr, x0, x1, **options)
+        self._items[key] = sweep
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return sweep
+
+    def clear(self):
+        self._items.clear()
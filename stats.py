@@ -0,0 +1,712 @@
+"""
+Estatística da calculadora: listas [1, 2, 3] e conjuntos de dados em CSV.
+
+Listas literais viram DataList (array('d') com aritmética elemento a
+elemento); as funções (mean, var, median, pctl, slope...) calculam sobre
+elas de forma exata. Arquivos CSV não são carregados na memória:
+load_csv lê em blocos e passa cada bloco uma única vez por acumuladores
+de passada única, então a memória fica constante qualquer que seja o
+tamanho do arquivo:
+
+  - média e variância: Welford, com a fusão de Chan por bloco
+  - regressão e correlação: co-momentos fundidos do mesmo jeito
+  - mediana e percentis: t-digest (centroides, erro pequeno nas pontas)
+
+Com NumPy, cada bloco de texto vira um array de uma vez (np.fromstring,
+sem um float Python por valor); linhas que não são só números (cabeçalho,
+campo vazio, texto) caem num laço por linha só naquele bloco. Sem NumPy,
+tudo passa por esse laço e vai para buffers array('d').
+
+    summary = load_csv("medidas.csv", columns=["altura", "peso"])
+    altura, peso = summary.columns
+    mean(altura), median(peso), slope(altura, peso)
+"""
+import math
+import operator
+import warnings
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+
+# ======= NumPy opcional (blocos do CSV e t-digest vetorizados) =======
+np = None
+_np_checked = False
+
+
+def _numpy():
+    """Módulo numpy, ou None se não estiver instalado (tudo cai nos laços em Python)."""
+    global np, _np_checked
+    if not _np_checked:
+        _np_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+
+# Maior número de elementos de uma lista literal (checado pelo parser)
+LIST_MAX = 10_000
+# Elementos mostrados ao formatar uma lista longa
+SHOW_ITEMS = 8
+
+
+# ======= Listas =======
+class DataList:
+    """
+    Lista de números da calculadora ([1, 2, 3]): float em array('d').
+
+    Operadores agem elemento a elemento (lista com número ou duas listas do
+    mesmo tamanho), nunca repetem a lista como list * int do Python.
+    """
+    __slots__ = ("values",)
+
+    def __init__(self, values=()):
+        self.values = values if isinstance(values, array) else array("d", (float(v) for v in values))
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __getitem__(self, i):
+        return self.values[i]
+
+    def _map2(self, other, fn, swap=False):
+        if isinstance(other, DataList):
+            if len(other) != len(self):
+                raise ValueError(f"listas de tamanhos diferentes ({len(self)} e {len(other)})")
+            pairs = zip(other.values, self.values) if swap else zip(self.values, other.values)
+            return DataList(array("d", (fn(a, b) for a, b in pairs)))
+        if isinstance(other, ColumnSummary):
+            return NotImplemented
+        if isinstance(other, complex):
+            import linalg       # vetor complexo: NumPy
+            me = linalg.as_array(self)
+            fn = _COMPLEX_OPS.get(fn, fn)
+            return fn(other, me) if swap else fn(me, other)
+        try:
+            b = float(other)
+        except (TypeError, ValueError):
+            return NotImplemented
+        if swap:
+            return DataList(array("d", (fn(b, a) for a in self.values)))
+        return DataList(array("d", (fn(a, b) for a in self.values)))
+
+    def __add__(self, o):       return self._map2(o, operator.add)
+    def __radd__(self, o):      return self._map2(o, operator.add, True)
+    def __sub__(self, o):       return self._map2(o, operator.sub)
+    def __rsub__(self, o):      return self._map2(o, operator.sub, True)
+    def __mul__(self, o):       return self._map2(o, operator.mul)
+    def __rmul__(self, o):      return self._map2(o, operator.mul, True)
+    def __truediv__(self, o):   return self._map2(o, operator.truediv)
+    def __rtruediv__(self, o):  return self._map2(o, operator.truediv, True)
+    def __floordiv__(self, o):  return self._map2(o, operator.floordiv)
+    def __rfloordiv__(self, o): return self._map2(o, operator.floordiv, True)
+    def __mod__(self, o):       return self._map2(o, operator.mod)
+    def __rmod__(self, o):      return self._map2(o, operator.mod, True)
+    def __pow__(self, o):       return self._map2(o, math.pow)
+    def __rpow__(self, o):      return self._map2(o, math.pow, True)
+
+    def __neg__(self):
+        return DataList(array("d", (-a for a in self.values)))
+
+    def __abs__(self):
+        return DataList(array("d", (abs(a) for a in self.values)))
+
+    def __pos__(self):
+        return self
+
+    def __eq__(self, other):
+        return isinstance(other, DataList) and self.values == other.values
+
+    __hash__ = None
+
+    def __str__(self):
+        from calc_core import format_number
+        items = [format_number(v) for v in self.values[:SHOW_ITEMS]]
+        if len(self) > SHOW_ITEMS:
+            return f"[{', '.join(items)}, …] ({len(self)} valores)"
+        return f"[{', '.join(items)}]"
+
+    __repr__ = __str__
+
+
+# math.pow não aceita complexo (e ** devolveria complexo para base negativa em float)
+_COMPLEX_OPS = {math.pow: operator.pow}
+
+
+def make_list(*items):
+    """Lista literal [a, b, ...].
+
+    Só listas dentro ([[1, 2], [3, 4]]): as linhas de uma matriz. Listas
+    misturadas com números são concatenadas. Com algum complexo, vira
+    vetor complexo. Matrizes e complexos ficam em linalg.py (NumPy).
+    """
+    if items and all(isinstance(item, DataList) for item in items):
+        import linalg
+        return linalg.make_array(items)
+    values = array("d")
+    for item in items:
+        if isinstance(item, DataList):
+            values.extend(item.values)
+        elif isinstance(item, ColumnSummary):
+            raise ValueError(f"{item.name} é uma coluna de arquivo, não cabe numa lista")
+        elif isinstance(item, complex) or hasattr(item, "shape"):
+            import linalg
+            return linalg.make_array(items)
+        else:
+            values.append(float(item))
+    return DataList(values)
+
+
+# ======= Acumuladores de passada única =======
+class RunningStats:
+    """
+    Contagem, média, soma dos quadrados dos desvios (M2), mínimo e máximo.
+
+    push(x) é o passo de Welford; push_array(bloco) calcula as estatísticas
+    do bloco de uma vez e funde com merge() (Chan et al.), o que mantém a
+    precisão do Welford sem um passo Python por valor.
+    """
+    __slots__ = ("n", "mean", "m2", "min", "max", "total")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.total = 0.0
+
+    def push(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        self.total += x
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def push_array(self, values):
+        n = len(values)
+        if not n:
+            return
+        if np is not None and isinstance(values, np.ndarray):
+            total = float(values.sum())
+            mean = total / n
+            m2 = float(np.dot(values - mean, values - mean))
+            lo, hi = float(values.min()), float(values.max())
+        else:
+            total = math.fsum(values)
+            mean = total / n
+            m2 = math.fsum((v - mean) * (v - mean) for v in values)
+            lo, hi = min(values), max(values)
+        self.merge(n, mean, m2, lo, hi, total)
+
+    def merge(self, n, mean, m2, lo, hi, total):
+        if not n:
+            return
+        na = self.n
+        count = na + n
+        delta = mean - self.mean
+        self.mean += delta * n / count
+        self.m2 += m2 + delta * delta * na * n / count
+        self.n = count
+        self.total += total
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+
+class TDigest:
+    """
+    Resumo de quantis em memória limitada (t-digest com a escala k1).
+
+    Guarda centroides (média, peso) ordenados; cada bloco novo é ordenado
+    junto com eles e recomprimido: pontos vizinhos cujo quantil cai na
+    mesma faixa de k = compression/(2·pi)·asin(2q - 1) viram um centroide.
+    As faixas são estreitas nas pontas, então percentis extremos saem
+    quase exatos; são no máximo ~compression/2 centroides.
+    """
+    BUFFER = 4096   # push() acumula isto antes de recomprimir
+
+    def __init__(self, compression=500):
+        _numpy()
+        self.compression = float(compression)
+        self.means = []
+        self.weights = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._pending = array("d")
+
+    def push(self, x):
+        self._pending.append(x)
+        if len(self._pending) >= self.BUFFER:
+            self._flush()
+
+    def push_array(self, values):
+        if not len(values):
+            return
+        if self._pending:
+            self._flush()
+        self._compress(values)
+
+    def _flush(self):
+        pending, self._pending = self._pending, array("d")
+        if pending:
+            self._compress(np.frombuffer(pending) if np is not None else pending)
+
+    def _compress(self, values):
+        n = len(values)
+        self.count += n
+        scale = self.compression / (2 * math.pi)
+        if np is not None:
+            values = np.asarray(values, dtype=float)
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            means = np.concatenate((np.asarray(self.means, dtype=float), values))
+            weights = np.concatenate((np.asarray(self.weights, dtype=float), np.ones(n)))
+            order = np.argsort(means, kind="stable")
+            means, weights = means[order], weights[order]
+            cum = np.cumsum(weights)
+            q = (cum - weights / 2) / cum[-1]
+            k = np.floor(scale * np.arcsin(2 * q - 1))
+            starts = np.flatnonzero(np.concatenate(([True], k[1:] != k[:-1])))
+            w = np.add.reduceat(weights, starts)
+            self.means = (np.add.reduceat(means * weights, starts) / w).tolist()
+            self.weights = w.tolist()
+            return
+        self.min = min(self.min, min(values))
+        self.max = max(self.max, max(values))
+        points = sorted(list(zip(self.means, self.weights)) + [(v, 1.0) for v in values])
+        total = sum(w for _, w in points)
+        means, weights = [], []
+        cum = 0.0
+        last_k = None
+        for m, w in points:
+            q = (cum + w / 2) / total
+            cum += w
+            k = math.floor(scale * math.asin(2 * q - 1))
+            if k == last_k:
+                wt = weights[-1] + w
+                means[-1] += (m - means[-1]) * w / wt
+                weights[-1] = wt
+            else:
+                means.append(m)
+                weights.append(w)
+                last_k = k
+        self.means, self.weights = means, weights
+
+    def quantile(self, q):
+        """Valor aproximado no quantil q (0 a 1); interpola entre centros de centroides."""
+        self._flush()
+        if not self.count:
+            raise ValueError("sem dados")
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        means, weights = self.means, self.weights
+        centers = [c - w / 2 for c, w in zip(accumulate(weights), weights)]
+        t = q * self.count
+        if t <= centers[0]:
+            return _lerp(self.min, means[0], t / centers[0]) if centers[0] > 0.5 else means[0]
+        if t >= centers[-1]:
+            rest = self.count - centers[-1]
+            return _lerp(means[-1], self.max, (t - centers[-1]) / rest) if rest > 0.5 else means[-1]
+        i = bisect_left(centers, t)
+        return _lerp(means[i - 1], means[i], (t - centers[i - 1]) / (centers[i] - centers[i - 1]))
+
+
+def _lerp(a, b, f):
+    return a + (b - a) * f
+
+
+# ======= Arquivos CSV =======
+class ColumnSummary:
+    """Uma coluna de um CSV já resumida: estatísticas de passada única e t-digest."""
+
+    def __init__(self, source, index, name):
+        self.source = source
+        self.index = index          # posição entre as colunas lidas
+        self.name = name
+        self.stats = RunningStats()
+        self.digest = TDigest()
+
+    def __len__(self):
+        return self.stats.n
+
+    def __str__(self):
+        return f"<{self.name}: {self.stats.n} valores>"
+
+    __repr__ = __str__
+
+
+class CsvSummary:
+    """
+    Resumo de um CSV: uma ColumnSummary por coluna lida, mais os
+    co-momentos de cada par de colunas (regressão e correlação).
+
+    Linhas em que alguma coluna lida não é número são puladas inteiras
+    (skipped), para que todas as colunas tenham as mesmas linhas.
+    """
+
+    def __init__(self, path, names):
+        self.path = path
+        self.columns = [ColumnSummary(self, i, name) for i, name in enumerate(names)]
+        self.comoments = {(i, j): 0.0 for i in range(len(names)) for j in range(i + 1, len(names))}
+        self.rows = 0
+        self.skipped = 0
+        self.blocks = 0
+
+    def push_columns(self, cols):
+        """Um bloco: uma sequência (ndarray ou array('d')) por coluna, todas do mesmo tamanho."""
+        n = len(cols[0])
+        if not n:
+            return
+        na = self.rows
+        if self.comoments:
+            # co-momento do bloco e fusão de Chan, antes de atualizar as médias
+            means = [_mean(c) for c in cols]
+            for (i, j) in self.comoments:
+                ci = _comoment(cols[i], cols[j], means[i], means[j])
+                if na:
+                    di = means[i] - self.columns[i].stats.mean
+                    dj = means[j] - self.columns[j].stats.mean
+                    ci += di * dj * na * n / (na + n)
+                self.comoments[(i, j)] += ci
+        for col, values in zip(self.columns, cols):
+            col.stats.push_array(values)
+            col.digest.push_array(values)
+        self.rows += n
+        self.blocks += 1
+
+    def comoment(self, a, b):
+        """Soma de (x - média x)(y - média y) entre duas colunas deste arquivo."""
+        if a.index == b.index:
+            return a.stats.m2
+        return self.comoments[(min(a.index, b.index), max(a.index, b.index))]
+
+
+def _mean(values):
+    if np is not None and isinstance(values, np.ndarray):
+        return float(values.mean())
+    return math.fsum(values) / len(values)
+
+
+def _comoment(x, y, mx, my):
+    if np is not None and isinstance(x, np.ndarray):
+        return float(np.dot(x - mx, y - my))
+    return math.fsum((a - mx) * (b - my) for a, b in zip(x, y))
+
+
+CHUNK_BYTES = 1 << 20
+
+
+def load_csv(path, columns=None, delimiter=None, encoding="utf-8", chunk_bytes=CHUNK_BYTES):
+    """
+    Lê `path` em blocos de ~chunk_bytes e devolve um CsvSummary.
+
+    `columns`: nomes do cabeçalho ou números (1 = primeira coluna); None lê
+    as colunas numéricas da primeira linha de dados. `delimiter`: None detecta pela primeira linha (";" implica
+    vírgula decimal, o padrão das planilhas em português). A primeira
+    linha é cabeçalho se algum campo dela não for número.
+    """
+    _numpy()
+    with open(path, "r", encoding=encoding, newline="") as f:
+        first = f.readline()
+        while first and not first.strip():
+            first = f.readline()
+        if not first:
+            raise ValueError("arquivo vazio")
+        if delimiter is None:
+            delimiter = ";" if ";" in first else ("\t" if "\t" in first else ",")
+        decimal_comma = delimiter == ";"
+        fields = [_clean(s) for s in first.rstrip("\r\n").split(delimiter)]
+        header = not all(_is_number(s, decimal_comma) for s in fields)
+        carry = "" if header else first
+        if columns is None and header:
+            carry = f.readline()
+            while carry and not carry.strip():
+                carry = f.readline()
+            sample = [_clean(s) for s in carry.rstrip("\r\n").split(delimiter)]
+            columns = [i + 1 for i, s in enumerate(sample[:len(fields)]) if _is_number(s, decimal_comma)]
+            if not columns:
+                raise ValueError("nenhuma coluna numérica")
+        index = _resolve_columns(columns, fields if header else None, len(fields))
+        names = [fields[i] if header else f"coluna {i + 1}" for i in index]
+        summary = CsvSummary(path, names)
+        reader = _BlockParser(delimiter, decimal_comma, len(fields), index, summary)
+
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            text = carry + block
+            cut = text.rfind("\n")
+            if cut < 0:
+                carry = text
+                continue
+            carry = text[cut + 1:]
+            reader.feed(text[:cut + 1])
+        if carry.strip():
+            reader.feed(carry + "\n")
+    if not summary.rows:
+        raise ValueError("nenhuma linha numérica nas colunas pedidas")
+    return summary
+
+
+def _clean(field):
+    return field.strip().strip('"').strip()
+
+
+def _is_number(text, decimal_comma=False):
+    try:
+        float(text.replace(",", ".") if decimal_comma else text)
+        return True
+    except ValueError:
+        return False
+
+
+def _resolve_columns(columns, header, ncols):
+    if columns is None:
+        return list(range(ncols))
+    if isinstance(columns, (str, int)):
+        columns = [columns]
+    index = []
+    for c in columns:
+        if isinstance(c, int) or (isinstance(c, str) and c.isdigit()):
+            i = int(c) - 1
+        elif header is not None and c in header:
+            i = header.index(c)
+        else:
+            raise ValueError(f"coluna não encontrada: {c}")
+        if not 0 <= i < ncols:
+            raise ValueError(f"coluna fora do arquivo: {c} (o arquivo tem {ncols})")
+        index.append(i)
+    return index
+
+
+class _BlockParser:
+    """Converte um bloco de linhas completas em colunas e entrega ao CsvSummary."""
+
+    def __init__(self, delimiter, decimal_comma, ncols, index, summary):
+        self.delimiter = delimiter
+        self.decimal_comma = decimal_comma
+        self.ncols = ncols
+        self.index = index
+        self.summary = summary
+
+    def feed(self, text):
+        cols = self._fast(text) if np is not None else None
+        if cols is None:
+            cols = self._slow(text)
+        self.summary.push_columns(cols)
+
+    def _fast(self, text):
+        """Bloco todo numérico: um único np.fromstring; None se não fechar a conta."""
+        rows = text.count("\n")
+        if self.decimal_comma:
+            text = text.replace(",", ".")
+        if self.delimiter not in " \t":
+            text = text.replace(self.delimiter, " ")
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", DeprecationWarning)
+                flat = np.fromstring(text, dtype=float, sep=" ")
+        except (ValueError, DeprecationWarning):
+            return None
+        if flat.size != rows * self.ncols:
+            return None          # linha vazia, campo faltando ou a mais
+        table = flat.reshape(rows, self.ncols)[:, self.index]
+        ok = np.isfinite(table).all(axis=1)
+        if not ok.all():
+            self.summary.skipped += int(rows - ok.sum())
+            table = table[ok]
+        return [np.ascontiguousarray(table[:, k]) for k in range(len(self.index))]
+
+    def _slow(self, text):
+        """Linha a linha: pula o que não for número nas colunas pedidas."""
+        cols = [array("d") for _ in self.index]
+        delimiter, decimal_comma, index = self.delimiter, self.decimal_comma, self.index
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            if decimal_comma:
+                line = line.replace(",", ".")
+            parts = line.split(delimiter)
+            try:
+                row = [float(parts[i]) for i in index]     # float() já ignora espaços
+            except ValueError:
+                try:
+                    row = [float(_clean(parts[i])) for i in index]     # número entre aspas
+                except ValueError:
+                    self.summary.skipped += 1
+                    continue
+            except IndexError:
+                self.summary.skipped += 1
+                continue
+            if not all(map(math.isfinite, row)):
+                self.summary.skipped += 1
+                continue
+            for col, v in zip(cols, row):
+                col.append(v)
+        if np is not None:
+            return [np.frombuffer(c) if len(c) else np.empty(0) for c in cols]
+        return cols
+
+
+# ======= Funções da calculadora =======
+def _data(args, what, empty=False):
+    """Os argumentos de uma função estatística: uma lista, uma coluna ou números soltos."""
+    if len(args) == 1 and isinstance(args[0], ColumnSummary):
+        return args[0]
+    if any(isinstance(a, complex) or hasattr(a, "shape") for a in args):
+        raise ValueError(f"{what} só de listas de números reais")
+    data = args[0] if len(args) == 1 and isinstance(args[0], DataList) else make_list(*args)
+    if not len(data) and not empty:
+        raise ValueError(f"{what} de lista vazia")
+    return data
+
+
+def _sorted(data):
+    return sorted(data.values)
+
+
+def _percentile_sorted(values, p):
+    """Interpolação linear entre as posições (como PERCENTIL.INC das planilhas)."""
+    pos = (len(values) - 1) * p
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return _lerp(values[lo], values[hi], pos - lo)
+
+
+def mean(*args):
+    data = _data(args, "média")
+    if isinstance(data, ColumnSummary):
+        return data.stats.mean
+    return math.fsum(data.values) / len(data)
+
+
+def _m2(data):
+    values = data.values
+    m = math.fsum(values) / len(values)
+    return math.fsum((v - m) * (v - m) for v in values)
+
+
+def var(*args):
+    """Variância amostral (divide por n - 1)."""
+    data = _data(args, "variância")
+    n = len(data)
+    if n < 2:
+        raise ValueError("variância precisa de ao menos 2 valores")
+    return (data.stats.m2 if isinstance(data, ColumnSummary) else _m2(data)) / (n - 1)
+
+
+def pvar(*args):
+    """Variância populacional (divide por n)."""
+    data = _data(args, "variância")
+    return (data.stats.m2 if isinstance(data, ColumnSummary) else _m2(data)) / len(data)
+
+
+def stdev(*args):
+    return math.sqrt(var(*args))
+
+
+def pstdev(*args):
+    return math.sqrt(pvar(*args))
+
+
+def median(*args):
+    data = _data(args, "mediana")
+    if isinstance(data, ColumnSummary):
+        return data.digest.quantile(0.5)
+    return _percentile_sorted(_sorted(data), 0.5)
+
+
+def pctl(data, p):
+    """Percentil p (0 a 100); aproximado (t-digest) para colunas de arquivo."""
+    p = float(p)
+    if not 0 <= p <= 100:
+        raise ValueError("percentil fora de 0 a 100")
+    data = _data((data,), "percentil")
+    if isinstance(data, ColumnSummary):
+        return data.digest.quantile(p / 100)
+    return _percentile_sorted(_sorted(data), p / 100)
+
+
+def count(*args):
+    return len(_data(args, "contagem", empty=True))
+
+
+def total(*args):
+    data = _data(args, "soma", empty=True)
+    return data.stats.total if isinstance(data, ColumnSummary) else math.fsum(data.values)
+
+
+def minimum(*args):
+    data = _data(args, "mínimo")
+    return data.stats.min if isinstance(data, ColumnSummary) else min(data.values)
+
+
+def maximum(*args):
+    data = _data(args, "máximo")
+    return data.stats.max if isinstance(data, ColumnSummary) else max(data.values)
+
+
+def _pair(xs, ys):
+    """(n, média x, média y, Sxx, Syy, Sxy) de duas listas ou duas colunas do mesmo arquivo."""
+    if isinstance(xs, ColumnSummary) or isinstance(ys, ColumnSummary):
+        if not (isinstance(xs, ColumnSummary) and isinstance(ys, ColumnSummary)) or xs.source is not ys.source:
+            raise ValueError("regressão precisa de duas colunas do mesmo arquivo (ou duas listas)")
+        sx, sy = xs.stats, ys.stats
+        return sx.n, sx.mean, sy.mean, sx.m2, sy.m2, xs.source.comoment(xs, ys)
+    xs, ys = _data((xs,), "regressão"), _data((ys,), "regressão")
+    if len(xs) != len(ys):
+        raise ValueError(f"listas de tamanhos diferentes ({len(xs)} e {len(ys)})")
+    n = len(xs)
+    mx, my = math.fsum(xs.values) / n, math.fsum(ys.values) / n
+    return n, mx, my, _m2(xs), _m2(ys), _comoment(xs.values, ys.values, mx, my)
+
+
+def slope(xs, ys):
+    """Inclinação da reta de mínimos quadrados de ys em função de xs."""
+    n, mx, my, sxx, syy, sxy = _pair(xs, ys)
+    if n < 2 or sxx == 0:
+        raise ValueError("regressão precisa de ao menos 2 valores de x diferentes")
+    return sxy / sxx
+
+
+def intercept(xs, ys):
+    n, mx, my, sxx, syy, sxy = _pair(xs, ys)
+    if n < 2 or sxx == 0:
+        raise ValueError("regressão precisa de ao menos 2 valores de x diferentes")
+    return my - sxy / sxx * mx
+
+
+def corr(xs, ys):
+    """Coeficiente de correlação de Pearson."""
+    n, mx, my, sxx, syy, sxy = _pair(xs, ys)
+    if n < 2 or sxx == 0 or syy == 0:
+        raise ValueError("correlação precisa de valores que variem")
+    return sxy / math.sqrt(sxx * syy)
+
+
+# Nome na calculadora -> (mín, máx) de argumentos e a função
+FUNCTIONS = {
+    "list": ((0, LIST_MAX), make_list),
+    "mean": ((1, LIST_MAX), mean), "median": ((1, LIST_MAX), median),
+    "var": ((1, LIST_MAX), var), "pvar": ((1, LIST_MAX), pvar),
+    "stdev": ((1, LIST_MAX), stdev), "pstdev": ((1, LIST_MAX), pstdev),
+    "pctl": ((2, 2), pctl),
+    "count": ((1, LIST_MAX), count), "sum": ((1, LIST_MAX), total),
+    "min": ((1, LIST_MAX), minimum), "max": ((1, LIST_MAX), maximum),
+    "slope": ((2, 2), slope), "intercept": ((2, 2), intercept), "corr": ((2, 2), corr),
+}
+NAMESPACE = {name: fn for name, (_, fn) in FUNCTIONS.items()}
+ARITY = {name: arity for name, (arity, _) in FUNCTIONS.items()}
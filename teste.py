@@ -1,10 +1,96 @@
 import tkinter as tk
 from tkinter import ttk
-import math
-import re
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import OrderedDict, deque
+
+import linalg
+import stats
+import tts_backends
+from calc_core import COST_MESSAGE, CalcEngine, CostError, EvalWorker, format_number
+from history import HistoryStore
+from keypad import KeypadReader
+from latency import LatencyRecorder
+from profiler import EngineProfiler
+from verbalizer import FUNCTION_SPEECH, ArrayReader, Verbalizer, number_text, speak_number
+from worksheet import Worksheet
+
+# ======= TTS (fila de falas no loop do Tk) =======
+# O motor vem de tts_backends: pyttsx3, espeak, null ou "auto" (o mais rápido
+# desta máquina, gravado por bench/bench_tts.py --save). Roda no thread
+# principal, chamado pelo pump do TTSTk, ou no _AudioThread (threaded=True),
+# que também o cria em segundo plano para não atrasar a abertura da janela.
+class _AudioThread(threading.Thread):
+    """
+    Motor de voz num thread próprio (modo threaded do TTSTk).
+    O motor é criado e usado só neste thread (o SAPI5/COM exige isso), e a
+    criação não segura a janela: `ready` sinaliza quando terminou, com
+    `error` preenchido se falhou.
+    Bloqueia na fila enquanto não há fala; cada fala concluída volta ao
+    Tk pelo canal `done` (queue.Queue, seguro entre threads) como
+    (seq, início do áudio ou None, fim), instantes de time.perf_counter().
+    """
+    def __init__(self, make_engine, done):
+        super().__init__(name="tts-audio", daemon=True)
+        self.requests = queue.Queue()
+        self.done = done
+        self.interrupt = threading.Event()
+        self.ready = threading.Event()
+        self.error = None
+        self.voice_id = ""
+        self._make_engine = make_engine
+
+    def run(self):
+        try:
+            engine = self._make_engine()
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            return
+        try:
+            self.voice_id = engine.getProperty("voice") or ""
+        except Exception:
+            pass
+        self.ready.set()
+        finished = []
+        started = []
+        engine.connect("finished-utterance", lambda name, completed: finished.append(completed))
+        engine.connect("started-utterance", lambda name: started.append(time.perf_counter()))
+        try:
+            engine.startLoop(False)
+        except Exception:
+            pass
+        while True:
+            item = self.requests.get()
+            if item is None:
+                break
+            seq, text, rate = item
+            finished.clear()
+            started.clear()
+            self.interrupt.clear()
+            try:
+                engine.setProperty("rate", rate)
+                engine.say(text)
+                while not finished:
+                    if self.interrupt.is_set():
+                        engine.stop()
+                        break
+                    engine.iterate()
+                    time.sleep(0.005)
+            except Exception:
+                pass
+            self.done.put((seq, started[0] if started else None, time.perf_counter()))
+        try:
+            engine.endLoop()
+        except Exception:
+            pass
 
-# ======= TTS no thread principal (pyttsx3 + Tkinter) =======
-import pyttsx3
 
 class TTSTk:
     """
@@ -12,33 +98,92 @@ class TTSTk:
     Suporta:
       - set_rate() dinâmico
       - rate por fala (say(text, rate=?))
+      - prioridades: resultado/erro > texto > eco de tecla
+        * prioridade maior interrompe eco de tecla em andamento e descarta ecos pendentes
+        * ecos de tecla seguidos viram uma fala só ("um dois três"); os velhos são descartados
+        * fila limitada a max_queue (sai primeiro o de menor prioridade mais antigo)
+      - metrics(): tamanho da fila e tempo de espera de cada fala
+      - pump por evento: só roda enquanto há fala na fila ou em andamento;
+        say() e o fim de cada fala acordam o pump, ocioso não há timer algum
+      - threaded=True: motor num thread de áudio próprio (ver _AudioThread),
+        criado em segundo plano; até ficar pronto as falas esperam na fila (os
+        ecos de tecla se agrupam) e on_ready(callback) avisa quando terminou
+      - latency=LatencyRecorder(): carimba cada fala (fila, envio ao motor,
+        início e fim do áudio); say(..., t_key=) liga a fala à tecla que a gerou
+      - backend: motor de tts_backends ("pyttsx3", "espeak", "null" ou "auto",
+        o escolhido para esta máquina); engine_factory troca por outro
+        qualquer (ex.: motor falso do bench/bench_latency.py)
+      - metrics() mede também a criação do motor (init_ms) e o tempo do
+        envio ao motor até o áudio começar (first_audio_*) de cada fala
+      - say_stream(trechos): texto longo em pedaços; cada trecho só é pedido ao
+        gerador quando a fila dele esvazia, então a fala começa no primeiro
     """
-    def __init__(self, root, rate=180, volume=1.0, voice_hint_ptbr=True, pump_ms=15):
+    PRIO_KEY = 0      # eco de tecla
+    PRIO_TEXT = 1     # avisos e textos livres
+    PRIO_RESULT = 2   # resultados e erros
+
+    def __init__(self, root, rate=180, volume=1.0, voice_hint_ptbr=True, pump_ms=15,
+                 max_queue=32, stale_s=2.0, merge_max=12, threaded=False,
+                 engine_factory=None, latency=None, backend="pyttsx3"):
         self.root = root
-        self.engine = pyttsx3.init(driverName=None)  # no Windows escolhe SAPI5
         self.default_rate = int(rate)
         self.default_volume = float(volume)
-        self.engine.setProperty("rate", self.default_rate)
-        self.engine.setProperty("volume", self.default_volume)
-
-        if voice_hint_ptbr:
-            try:
-                for v in self.engine.getProperty("voices"):
-                    name = (v.name or "").lower()
-                    langs = "".join(getattr(v, "languages", [])).lower()
-                    if "portuguese" in name or "brazil" in name or "pt_" in langs:
-                        self.engine.setProperty("voice", v.id)
-                        break
-            except Exception:
-                pass
 
-        # Fila de (texto, rate_override or None)
-        self._queue = []
+        # Uma fila por prioridade, itens (texto, rate_override or None, instante de entrada,
+        # instantes das teclas que originaram a fala)
+        self._queues = (deque(), deque(), deque())
+        self.max_queue = int(max_queue)
+        self.stale_s = float(stale_s)
+        self.merge_max = int(merge_max)
         self._speaking = False
+        self._current_prio = None
         self._current_rate = self.default_rate
 
+        # Métricas
+        self.stats = {"spoken": 0, "merged": 0, "dropped": 0, "preempted": 0, "max_queue_len": 0}
+        self._waits = deque(maxlen=256)    # espera (s) de cada fala até ser enviada ao motor
+        self._first_audio = deque(maxlen=256)    # envio ao motor -> início do áudio (s)
+
+        self._pump_ms = pump_ms
+        self._pump_id = None
+        self._seq = 0
+        self._stream = None     # [iterador de trechos, rate, prioridade, trecho na fila] de say_stream
+
+        # Inicialização do motor (no modo threaded, em segundo plano)
+        self.ready = not threaded
+        self.init_error = None
+        self.init_s = None            # criação até o motor ficar pronto
+        self._t_created = time.perf_counter()
+        self._t_ready = 0.0
+        self._ready_callbacks = []
+
+        # Latência: teclas da fala em andamento e instante do engine.say
+        self.latency = latency
+        self._current_keys = ()
+        self._t_dispatch = None
+
+        if engine_factory is None:
+            self.backend = tts_backends.resolve(backend)
+            make_engine = tts_backends.BACKENDS[self.backend]
+        else:
+            self.backend = "custom"
+            make_engine = engine_factory
+        if threaded:
+            self.engine = None
+            self._done = queue.Queue()
+            self._audio = _AudioThread(
+                lambda: make_engine(self.default_rate, self.default_volume, voice_hint_ptbr), self._done)
+            self._audio.start()
+            self.root.after(self._pump_ms, self._poll_ready)
+            return
+
+        self._audio = None
+        self.engine = make_engine(self.default_rate, self.default_volume, voice_hint_ptbr)
+        self.init_s = time.perf_counter() - self._t_created
+
         # Callbacks
         self.engine.connect('finished-utterance', self._on_done)
+        self.engine.connect('started-utterance', self._on_start)
 
         # Inicia loop interno do engine sem bloquear
         try:
@@ -46,122 +191,640 @@ class TTSTk:
         except Exception:
             pass
 
-        self._pump_ms = pump_ms
-        self._pump()
-
-    def say(self, text: str, rate: int | None = None):
-        if not text:
+    def _poll_ready(self):
+        audio = self._audio
+        if not audio.ready.is_set():
+            self.root.after(self._pump_ms, self._poll_ready)
+            return
+        self.init_s = time.perf_counter() - self._t_created
+        self._t_ready = time.perf_counter()
+        self.init_error = audio.error
+        self.ready = audio.error is None
+        if not self.ready:
+            # sem motor: descarta o que esperava e ignora as próximas falas
+            self.stats["dropped"] += self.queue_len()
+            for q in self._queues:
+                q.clear()
+            self._stream = None
+        callbacks, self._ready_callbacks = self._ready_callbacks, []
+        for callback in callbacks:
+            callback(self.ready)
+        if self.queue_len():
+            self._wake()
+
+    def on_ready(self, callback):
+        """callback(ok) quando o motor terminar de inicializar (na hora, se já terminou)."""
+        if self.init_s is not None:
+            callback(self.ready)
+        else:
+            self._ready_callbacks.append(callback)
+
+    def say(self, text: str, rate: int | None = None, priority: int = PRIO_TEXT, t_key: float | None = None):
+        if not text or self.init_error is not None:
+            return
+        now = time.perf_counter()
+        if self._stream is not None and priority >= self._stream[2]:
+            self._drop_stream()     # fala nova substitui o resto do texto em pedaços
+        if priority > self.PRIO_KEY:
+            # ecos de tecla pendentes perderam o sentido
+            keys = self._queues[self.PRIO_KEY]
+            self.stats["dropped"] += len(keys)
+            keys.clear()
+            if self._speaking and self._current_prio == self.PRIO_KEY:
+                self._interrupt()
+        self._queues[priority].append((str(text), rate, now, () if t_key is None else (t_key,)))
+        self._trim()
+        if self.latency is not None:
+            if t_key is not None:
+                self.latency.add("key_to_queue", now - t_key)
+            self.latency.sample("backlog", self.queue_len())
+        self._wake()
+
+    def say_stream(self, chunks, rate: int | None = None, priority: int = PRIO_TEXT, prefix: str = ""):
+        """Fala os trechos de `chunks` em sequência, puxando um de cada vez (ver _feed_stream)."""
+        it = iter(chunks)
+        first = next(it, None)
+        if first is None:
+            return
+        self.say(prefix + first, rate=rate, priority=priority)
+        q = self._queues[priority]
+        self._stream = [it, rate, priority, q[-1] if q else None]
+
+    def _feed_stream(self):
+        """Põe na fila o próximo trecho de say_stream quando o anterior já saiu dela."""
+        it, rate, priority, _ = self._stream
+        if self._queues[priority]:
+            return
+        chunk = next(it, None)
+        if chunk is None:
+            self._stream = None
             return
-        self._queue.append((str(text), rate))
+        item = (chunk, rate, time.perf_counter(), ())
+        self._queues[priority].append(item)
+        self._stream[3] = item
+
+    def _drop_stream(self):
+        """Cancela o resto de say_stream, inclusive o trecho que ainda não saiu da fila."""
+        _, _, priority, item = self._stream
+        self._stream = None
+        try:
+            self._queues[priority].remove(item)
+        except ValueError:
+            pass        # já foi falado (ou descartado por _trim)
+
+    def _wake(self):
+        """Agenda o pump para já (se ainda não estiver agendado para já)."""
+        if self._pump_id is not None:
+            self.root.after_cancel(self._pump_id)
+        self._pump_id = self.root.after_idle(self._pump)
+
+    def queue_len(self):
+        return sum(len(q) for q in self._queues)
+
+    def _trim(self):
+        n = self.queue_len()
+        self.stats["max_queue_len"] = max(self.stats["max_queue_len"], n)
+        for q in self._queues:
+            while n > self.max_queue and q:
+                q.popleft()
+                n -= 1
+                self.stats["dropped"] += 1
+
+    def _interrupt(self):
+        try:
+            if self._audio is not None:
+                self._audio.interrupt.set()
+            else:
+                self.engine.stop()
+        except Exception:
+            pass
+        self._speaking = False
+        self._current_prio = None
+        self._current_keys = ()     # fala cortada não conta em key_to_done
+        self._t_dispatch = None
+        self.stats["preempted"] += 1
+
+    def _next_utterance(self):
+        """Próxima fala: (texto, rate, prioridade, teclas), já com os ecos de tecla agrupados."""
+        now = time.perf_counter()
+        for prio in (self.PRIO_RESULT, self.PRIO_TEXT):
+            q = self._queues[prio]
+            if q:
+                text, rate, t0, t_keys = q.popleft()
+                self._note_wait(now - t0)
+                return text, rate, prio, t_keys
+        keys = self._queues[self.PRIO_KEY]
+        # descarta ecos velhos (mantém sempre o último); o tempo esperando o motor
+        # inicializar não conta, as teclas digitadas nele são faladas juntas
+        while len(keys) > 1 and now - max(keys[0][2], self._t_ready) > self.stale_s:
+            keys.popleft()
+            self.stats["dropped"] += 1
+        text, rate, t0, t_keys = keys.popleft()
+        self._note_wait(now - t0)
+        parts = [text]
+        while keys and keys[0][1] == rate and len(parts) < self.merge_max:
+            item = keys.popleft()
+            parts.append(item[0])
+            t_keys += item[3]      # cada tecla agrupada mede até o áudio da fala conjunta
+            self._note_wait(now - item[2])
+            self.stats["merged"] += 1
+        return " ".join(parts), rate, self.PRIO_KEY, t_keys
+
+    def _note_wait(self, wait):
+        self._waits.append(wait)
+        if self.latency is not None:
+            self.latency.add("queue_wait", wait)
+
+    def metrics(self):
+        waits = sorted(self._waits)
+        first = sorted(self._first_audio)
+        return {
+            "queue_len": self.queue_len(),
+            "queue_by_priority": {"key": len(self._queues[0]), "text": len(self._queues[1]),
+                                  "result": len(self._queues[2])},
+            **self.stats,
+            "wait_avg_ms": (sum(waits) / len(waits) * 1000) if waits else 0.0,
+            "wait_p95_ms": waits[int(0.95 * (len(waits) - 1))] * 1000 if waits else 0.0,
+            "wait_max_ms": waits[-1] * 1000 if waits else 0.0,
+            "init_ms": self.init_s * 1000 if self.init_s is not None else None,
+            "backend": self.backend,
+            "first_audio_avg_ms": (sum(first) / len(first) * 1000) if first else 0.0,
+            "first_audio_p95_ms": first[int(0.95 * (len(first) - 1))] * 1000 if first else 0.0,
+        }
 
     def set_rate(self, rate: int):
         """Ajusta o rate padrão para próximas falas (e aplica se estiver ocioso)."""
         self.default_rate = int(rate)
         # se não está falando agora, atualiza o motor já
-        if not self._speaking:
+        if not self._speaking and self.engine is not None:
             try:
                 self.engine.setProperty("rate", self.default_rate)
             except Exception:
                 pass
 
+    def voice_id(self):
+        if self._audio is not None:
+            return self._audio.voice_id
+        try:
+            return self.engine.getProperty("voice") or ""
+        except Exception:
+            return ""
+
+    def _on_start(self, name):
+        self._mark_start(time.perf_counter())
+
+    def _mark_start(self, t):
+        if self._t_dispatch is None:
+            return
+        self._first_audio.append(t - self._t_dispatch)
+        rec = self.latency
+        if rec is None:
+            return
+        rec.add("dispatch_to_audio", t - self._t_dispatch)
+        for t_key in self._current_keys:
+            rec.add("key_to_audio", t - t_key)
+
+    def _mark_done(self, t):
+        if self.latency is not None:
+            for t_key in self._current_keys:
+                self.latency.add("key_to_done", t - t_key)
+        self._current_keys = ()
+        self._t_dispatch = None
+
     def _on_done(self, name, completed):
+        self._mark_done(time.perf_counter())
         # Ao terminar, volta o rate ao padrão
         self._speaking = False
+        self._current_prio = None
         try:
             self.engine.setProperty("rate", self.default_rate)
         except Exception:
             pass
+        if self.queue_len() or self._stream is not None:
+            self._wake()    # emenda a próxima fala sem esperar o próximo tique
+
+    def _dispatch(self):
+        self._speaking = True
+        text, rate_override, self._current_prio, t_keys = self._next_utterance()
+        self.stats["spoken"] += 1
+
+        # aplica rate específico desta fala (se houver)
+        if rate_override is not None:
+            self._current_rate = int(rate_override)
+        else:
+            self._current_rate = self.default_rate
+
+        if self._audio is not None:
+            self._seq += 1
+            self._stamp_dispatch(t_keys)
+            self._audio.requests.put((self._seq, text, self._current_rate))
+            return
 
-    def _pump(self):
         try:
-            if not self._speaking and self._queue:
-                self._speaking = True
-                text, rate_override = self._queue.pop(0)
+            self.engine.setProperty("rate", self._current_rate)
+        except Exception:
+            pass
 
-                # aplica rate específico desta fala (se houver)
-                if rate_override is not None:
-                    self._current_rate = int(rate_override)
-                else:
-                    self._current_rate = self.default_rate
+        self._stamp_dispatch(t_keys)
+        self.engine.say(text)
 
-                try:
-                    self.engine.setProperty("rate", self._current_rate)
-                except Exception:
-                    pass
+    def _stamp_dispatch(self, t_keys):
+        self._t_dispatch = t = time.perf_counter()
+        if self.latency is None:
+            return
+        self._current_keys = t_keys
+        for t_key in t_keys:
+            self.latency.add("key_to_dispatch", t - t_key)
 
-                self.engine.say(text)
+    def _pump(self):
+        self._pump_id = None
+        try:
+            if self._audio is not None:
+                # falas concluídas no thread de áudio
+                while True:
+                    try:
+                        seq, t_start, t_end = self._done.get_nowait()
+                    except queue.Empty:
+                        break
+                    if seq == self._seq:     # ignora o fim de falas já interrompidas
+                        if t_start is not None:
+                            self._mark_start(t_start)
+                        self._mark_done(t_end)
+                        self._speaking = False
+                        self._current_prio = None
+
+            if self._stream is not None:
+                self._feed_stream()
 
-            self.engine.iterate()
+            if not self._speaking and self.queue_len() and self.ready:
+                self._dispatch()
+
+            if self._speaking and self._audio is None:
+                self.engine.iterate()
         except Exception:
             self._speaking = False
 
-        self.root.after(self._pump_ms, self._pump)
+        # Ocioso (nada falando, fila vazia) ou motor ainda iniciando: não reagenda;
+        # say() e _poll_ready acordam de novo
+        if (self._speaking or (self.queue_len() and self.ready)) and self._pump_id is None:
+            self._pump_id = self.root.after(self._pump_ms, self._pump)
+
+    def shutdown(self):
+        self._stream = None
+        if self._audio is not None:
+            self._audio.interrupt.set()
+            self._audio.requests.put(None)
+        elif self.engine is not None:
+            try:
+                self.engine.stop()
+                self.engine.endLoop()     # o motor espeak encerra o worker aqui
+            except Exception:
+                pass
 
 
 # ======= Som opcional (pygame) =======
-# pygame não instalado - sons desabilitados
-pygame = None
+try:
+    import pygame
+except ImportError:
+    pygame = None  # pygame não instalado - sons e clipes desabilitados
 BEEP = None
 
+try:
+    import sonify
+except ImportError:
+    sonify = None  # numpy não instalado - sem gráfico sonoro
 
-# ======= Motor de cálculo com "eval" seguro =======
-class CalcEngine:
-    def __init__(self):
-        self.mode = "DEG"   # DEG ou RAD
-        self.last = 0       # ANS
-
-    def _ns(self):
-        import math
-        def _sin(x):   return math.sin(math.radians(x)) if self.mode == "DEG" else math.sin(x)
-        def _cos(x):   return math.cos(math.radians(x)) if self.mode == "DEG" else math.cos(x)
-        def _tan(x):   return math.tan(math.radians(x)) if self.mode == "DEG" else math.tan(x)
-        def _asin(x):  return math.degrees(math.asin(x)) if self.mode == "DEG" else math.asin(x)
-        def _acos(x):  return math.degrees(math.acos(x)) if self.mode == "DEG" else math.acos(x)
-        def _atan(x):  return math.degrees(math.atan(x)) if self.mode == "DEG" else math.atan(x)
-
-        def _fact(n):  return math.factorial(int(n))
-        def _comb(n, r):
-            n = int(n); r = int(r)
-            return math.comb(n, r) if hasattr(math, "comb") else int(_fact(n) / (_fact(r) * _fact(n - r)))
-        def _perm(n, r):
-            n = int(n); r = int(r)
-            if hasattr(math, "perm"):
-                return math.perm(n, r)
-            return int(_fact(n) // _fact(n - r))
 
-        return {
-            "pi": math.pi, "e": math.e, "ANS": self.last,
-            "abs": abs, "floor": math.floor, "ceil": math.ceil, "round": round,
-            "sin": _sin, "cos": _cos, "tan": _tan,
-            "asin": _asin, "acos": _acos, "atan": _atan,
-            "sqrt": math.sqrt, "exp": math.exp,
-            "ln": math.log,                        # ln(x)
-            "log": lambda x, b=10: math.log(x, b), # log base 10 padrão
-            "pow": pow,
-            "fact": _fact, "factorial": _fact,
-            "nCr": _comb, "comb": _comb,
-            "nPr": _perm, "perm": _perm,
-            "rad": math.radians, "deg": math.degrees
-        }
+# ======= Cache de clipes de fala das teclas =======
+def _default_cache_dir():
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "blind-calculator", "clips")
 
-    @staticmethod
-    def _preprocess(expr: str) -> str:
-        expr = expr.replace("×", "*").replace("÷", "/").replace("^", "**").replace("π", "pi")
-        expr = expr.replace("√", "sqrt")
-        expr = re.sub(r"log10\s*\(", "log(", expr)
-        return expr
 
-    def evaluate(self, expr: str):
-        expr = expr.strip()
-        if not expr:
-            return ""
-        expr = self._preprocess(expr)
+def _clip_name(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16] + ".wav"
+
+
+def _render_clips_main(voice_id, rate, texts, out_dir):
+    """
+    Processo separado: sintetiza cada texto em WAV com um motor próprio,
+    o espeak-ng se a voz é do motor espeak, senão o pyttsx3.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    index = {text: _clip_name(text) for text in texts}
+    if voice_id.startswith(tts_backends.ESPEAK_PREFIX):
+        tts_backends.render_espeak_clips(voice_id, rate, [(t, os.path.join(out_dir, n)) for t, n in index.items()])
+    else:
+        engine = tts_backends.load_pyttsx3().init()
+        if voice_id:
+            engine.setProperty("voice", voice_id)
+        engine.setProperty("rate", int(rate))
+        for text, name in index.items():
+            engine.save_to_file(text, os.path.join(out_dir, name))
+        engine.runAndWait()
+    # index.json só aparece com o conjunto completo
+    with open(os.path.join(out_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+
+
+class ClipCache:
+    """
+    Clipes WAV pré-renderizados para as falas curtas das teclas ("sete", "mais"...).
+    - um conjunto por (voz, rate), sintetizado uma vez em processo separado
+    - rate arredondado em passos de RATE_STEP para não multiplicar conjuntos
+    - reprodução pelo mixer do pygame (buffer pequeno, sons já carregados)
+    - disco: no máximo `max_sets` conjuntos (LRU); memória: `max_loaded`
+    Sem pygame (ou antes do conjunto ficar pronto) play() devolve False e a
+    fala segue pela TTS ao vivo.
+    """
+    RATE_STEP = 10
+
+    def __init__(self, root, texts, cache_dir=None, max_sets=4, max_loaded=2):
+        self.root = root
+        self.texts = sorted(set(texts))
+        self.cache_dir = cache_dir or _default_cache_dir()
+        self.max_sets = int(max_sets)
+        self.max_loaded = int(max_loaded)
+        self._loaded = OrderedDict()    # (voz, rate) -> {texto: Sound}
+        self._pending = []              # conjuntos aguardando renderização
+        self._render = None             # (chave, Process) em andamento
+        self._channel = None
+        self.enabled = pygame is not None and self._init_mixer()
+
+    def _init_mixer(self):
         try:
-            val = eval(expr, {"__builtins__": {}}, self._ns())
-            self.last = val
-            return val
-        except Exception as e:
-            raise ValueError(str(e))
+            if not pygame.mixer.get_init():
+                pygame.mixer.pre_init(frequency=22050, size=-16, channels=1, buffer=256)
+                pygame.mixer.init()
+            self._channel = pygame.mixer.Channel(0)
+            pygame.mixer.set_reserved(3)    # 1: gráfico sonoro; 2: fala do motor espeak
+            return True
+        except Exception:
+            return False
+
+    def _key(self, voice_id, rate):
+        step = self.RATE_STEP
+        return (voice_id or "", int(round(rate / step)) * step)
+
+    def _set_dir(self, key):
+        voice_id, rate = key
+        return os.path.join(self.cache_dir, f"{hashlib.sha1(voice_id.encode('utf-8')).hexdigest()[:10]}_{rate}")
+
+    def prepare(self, voice_id, rate):
+        """Garante o conjunto (voz, rate): carrega do disco ou agenda a renderização."""
+        if not self.enabled:
+            return
+        key = self._key(voice_id, rate)
+        if key in self._loaded:
+            self._loaded.move_to_end(key)
+            return
+        if self._load(key):
+            return
+        if key not in self._pending and (self._render is None or self._render[0] != key):
+            self._pending.append(key)
+        self._start_next_render()
+
+    def play(self, text, rate, voice_id=""):
+        """Toca o clipe pronto de `text`; False se ainda não houver clipe."""
+        if not self.enabled:
+            return False
+        sounds = self._loaded.get(self._key(voice_id, rate))
+        snd = sounds.get(text) if sounds else None
+        if snd is None:
+            return False
+        try:
+            self._channel.play(snd)   # corta o eco anterior: digitação rápida não acumula
+            return True
+        except Exception:
+            return False
+
+    def _load(self, key):
+        folder = self._set_dir(key)
+        index_path = os.path.join(folder, "index.json")
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            sounds = {t: pygame.mixer.Sound(os.path.join(folder, name)) for t, name in index.items()}
+        except Exception:
+            return False
+        if set(self.texts) - set(sounds):
+            return False     # conjunto antigo, sem alguma fala nova
+        os.utime(index_path)   # marca uso para a política LRU do disco
+        self._loaded[key] = sounds
+        while len(self._loaded) > self.max_loaded:
+            self._loaded.popitem(last=False)
+        return True
+
+    def _start_next_render(self):
+        if self._render is not None or not self._pending:
+            return
+        key = self._pending.pop(0)
+        folder = self._set_dir(key)
+        shutil.rmtree(folder, ignore_errors=True)
+        proc = multiprocessing.Process(target=_render_clips_main,
+                                       args=(key[0], key[1], self.texts, folder), daemon=True)
+        try:
+            proc.start()
+        except Exception:
+            return
+        self._render = (key, proc)
+        self.root.after(200, self._check_render)
+
+    def _check_render(self):
+        key, proc = self._render
+        if proc.is_alive():
+            self.root.after(200, self._check_render)
+            return
+        self._render = None
+        if self._load(key):
+            self._evict()
+        self._start_next_render()
+
+    def _evict(self):
+        """Apaga do disco os conjuntos menos usados além de max_sets."""
+        try:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                index_path = os.path.join(self.cache_dir, name, "index.json")
+                mtime = os.path.getmtime(index_path) if os.path.exists(index_path) else 0
+                entries.append((mtime, name))
+        except OSError:
+            return
+        keep = {os.path.basename(self._set_dir(k)) for k in self._loaded}
+        entries.sort(reverse=True)
+        for _, name in entries[self.max_sets:]:
+            if name not in keep:
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+
+    def stop(self):
+        if self._channel is not None:
+            try:
+                self._channel.stop()
+            except Exception:
+                pass
+
+    def shutdown(self):
+        if self._render is not None:
+            self._render[1].terminate()
+            self._render = None
+
+
+# ======= Gráfico sonoro em fluxo =======
+class SweepPlayer:
+    """
+    Toca uma sonify.Sweep num canal próprio do mixer, em fluxo: o canal
+    sempre tem o próximo buffer na fila (Channel.queue) e o seguinte só é
+    gerado quando esse começa a tocar. O som sai com o primeiro bloco; a
+    curva inteira nunca precisa estar pronta.
+    """
+    PUMP_MS = 20
+
+    def __init__(self, root):
+        self.root = root
+        self._channel = None
+        self._it = None
+        self._job = None
+        self._on_done = None
+        self.format = {"sample_rate": 22050, "channels": 1}
+        self.enabled = pygame is not None and self._init_mixer()
+
+    def _init_mixer(self):
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.pre_init(frequency=22050, size=-16, channels=1, buffer=256)
+                pygame.mixer.init()
+            freq, size, channels = pygame.mixer.get_init()
+            if size != -16:
+                return False      # os buffers são int16
+            pygame.mixer.set_reserved(3)      # canal 0: clipes das teclas; 1: gráfico; 2: espeak
+            self._channel = pygame.mixer.Channel(1)
+            self.format = {"sample_rate": freq, "channels": channels}
+            return True
+        except Exception:
+            return False
+
+    @property
+    def playing(self):
+        return self._it is not None
+
+    def play(self, sweep, on_done=None):
+        """Começa a tocar `sweep`; on_done() quando o último buffer terminar."""
+        self.stop()
+        if not self.enabled:
+            return False
+        self._it = iter(sweep)
+        self._on_done = on_done
+        chunk = next(self._it, None)
+        if chunk is None:
+            self._finish()
+            return True
+        self._channel.play(pygame.mixer.Sound(buffer=chunk.pcm))
+        self._pump()
+        return True
+
+    def _pump(self):
+        self._job = None
+        if self._it is None:
+            return
+        if self._channel.get_queue() is None:
+            chunk = next(self._it, None)
+            if chunk is None:
+                if not self._channel.get_busy():
+                    self._finish()
+                    return
+            else:
+                self._channel.queue(pygame.mixer.Sound(buffer=chunk.pcm))
+        self._job = self.root.after(self.PUMP_MS, self._pump)
+
+    def _finish(self):
+        self._it = None
+        on_done, self._on_done = self._on_done, None
+        if on_done is not None:
+            on_done()
+
+    def stop(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        self._it = None
+        self._on_done = None
+        if self._channel is not None:
+            try:
+                self._channel.stop()
+            except Exception:
+                pass
+
+
+# ======= Histórico virtualizado =======
+class HistoryView:
+    """
+    Lista do histórico que só desenha as linhas visíveis.
+    O Listbox tem `rows` linhas; a barra de rolagem é controlada à mão e
+    cada rolagem busca store.range(topo, rows). Com 1 milhão de contas na
+    base, a tela continua com `rows` itens.
+    """
+    def __init__(self, parent, store, rows=6, on_select=None):
+        self.store = store
+        self.rows = rows
+        self.top = 0
+        self.selected = None     # posição no histórico (0 = mais antiga)
+        self.on_select = on_select
+        self._shown = []
+
+        frame = ttk.Frame(parent)
+        frame.pack(fill="both", expand=True)
+        self.listbox = tk.Listbox(frame, font=("Consolas", 12), height=rows,
+                                  activestyle="none", exportselection=False)
+        self.scroll = ttk.Scrollbar(frame, orient="vertical", command=self._on_scroll)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scroll.pack(side="right", fill="y")
+        self.listbox.bind("<MouseWheel>", lambda e: self._scroll_by(-1 if e.delta > 0 else 1))
+        self.listbox.bind("<Button-4>", lambda e: self._scroll_by(-1))
+        self.listbox.bind("<Button-5>", lambda e: self._scroll_by(1))
+        self.listbox.bind("<<ListboxSelect>>", self._on_click)
+        self.scroll_to_end()
+
+    def refresh(self):
+        n = len(self.store)
+        self.top = max(0, min(self.top, n - self.rows))
+        self._shown = self.store.range(self.top, self.rows)
+        self.listbox.delete(0, tk.END)
+        for entry in self._shown:
+            self.listbox.insert(tk.END, f"{self.store.index_of(entry.id) + 1:>5}  {entry.expr} = {entry.result}")
+        if self.selected is not None and 0 <= self.selected - self.top < len(self._shown):
+            self.listbox.selection_set(self.selected - self.top)
+        if n:
+            self.scroll.set(self.top / n, min(1.0, (self.top + self.rows) / n))
+        else:
+            self.scroll.set(0.0, 1.0)
+
+    def scroll_to_end(self):
+        self.top = max(0, len(self.store) - self.rows)
+        self.refresh()
+
+    def show(self, index):
+        """Seleciona a posição `index`, rolando só se ela estiver fora da tela."""
+        self.selected = index
+        if index is not None and not self.top <= index < self.top + self.rows:
+            self.top = max(0, index - self.rows // 2)
+        self.refresh()
+
+    def _scroll_by(self, lines):
+        self.top += lines
+        self.refresh()
+        return "break"
+
+    def _on_scroll(self, action, value, unit=None):
+        if action == "moveto":
+            self.top = int(float(value) * len(self.store))
+        elif action == "scroll":
+            self.top += int(value) * (self.rows if unit == "pages" else 1)
+        self.refresh()
+
+    def _on_click(self, _):
+        sel = self.listbox.curselection()
+        if sel and sel[0] < len(self._shown) and self.on_select is not None:
+            self.on_select(self.store.index_of(self._shown[sel[0]].id))
 
 
 # ======= App Tkinter =======
@@ -174,26 +837,111 @@ class CalculatorApp:
         "asin": "arco seno", "acos": "arco cosseno", "atan": "arco tangente",
         "ln": "logaritmo natural", "log": "logaritmo", "exp": "exponencial",
         "fact": "fatorial", "nCr": "combinação", "nPr": "permuta",
-        "ANS": "resultado anterior", "C": "limpar", "⌫": "apagar",
+        "ANS": "resultado anterior", "C": "limpar", "⌫": "apagar", "π": "pi", "x": "xis",
+        "[": "abre colchetes", "]": "fecha colchetes", ",": "vírgula",
+    }
+    DIGIT_SPEECH = {
+        "0": "zero", "1": "um", "2": "dois", "3": "três", "4": "quatro",
+        "5": "cinco", "6": "seis", "7": "sete", "8": "oito", "9": "nove"
+    }
+    # F6: backends numéricos (numeric.py) -> (texto do botão, fala)
+    DECIMAL_PRECISION = 50
+    NUMBER_LABELS = {
+        "float": ("Números: float", "números em ponto flutuante"),
+        "decimal": (f"Números: decimal ({DECIMAL_PRECISION})", f"números decimais com {DECIMAL_PRECISION} dígitos"),
+        "fraction": ("Números: frações", "frações exatas"),
     }
 
-    def __init__(self, root):
+    def __init__(self, root, tts=None, build_ui=True, history=None, sheet=None):
+        """
+        tts: TTSTk já criado (o benchmark de latência injeta um com motor falso).
+        history: HistoryStore já aberto; padrão é o arquivo do usuário
+        (ou o da variável CALC_HISTORY).
+        sheet: caminho da planilha de variáveis (worksheet.py; ":memory:" não
+        grava); padrão é o arquivo do usuário (ou o da variável CALC_WORKSHEET).
+        build_ui=False: sem janela nem atalhos (root pode ser um tk.Tcl());
+        as teclas entram chamando _press()/_key_insert() direto.
+        Com a variável de ambiente CALC_LATENCY=arquivo.json, mede a latência
+        tecla -> fala e grava o histograma nesse arquivo ao fechar.
+        CALC_KEYPAD=porta liga o teclado serial (ver keypad.py).
+        CALC_PROFILE=arquivo (.json ou formato do cProfile) liga o perfil do
+        motor (profiler.py) e o grava ao fechar; as contas que vão para o
+        worker rodam em outro processo e não entram.
+        A TTS inicializa em segundo plano (a janela aparece na hora e as teclas
+        digitadas antes são faladas quando o motor fica pronto); com
+        CALC_TTS_THREAD=0 o motor é criado no thread principal, antes da janela.
+        CALC_TTS=pyttsx3|espeak|null escolhe o motor de voz (tts_backends.py);
+        o padrão, auto, usa o gravado por bench/bench_tts.py --save.
+        """
         self.root = root
-        self.root.title("Calculadora Científica Acessível")
-        self.root.geometry("560x760")
-
-        # TTS no thread principal
-        self.tts = TTSTk(root, rate=180, volume=1.0)
+        self._latency_path = os.environ.get("CALC_LATENCY")
+
+        # TTS: motor criado no thread de áudio, sem segurar a janela
+        if tts is None:
+            tts = TTSTk(root, rate=180, volume=1.0, threaded=os.environ.get("CALC_TTS_THREAD") != "0",
+                        latency=LatencyRecorder() if self._latency_path else None,
+                        backend=os.environ.get("CALC_TTS", "auto"))
+        self.tts = tts
+        self.latency = tts.latency
         self.engine = CalcEngine()
-        self.beep_enabled = tk.BooleanVar(value=True)
+        self._profile_path = os.environ.get("CALC_PROFILE")
+        if self._profile_path:
+            self.engine.set_profiler(EngineProfiler())
+        # Variáveis e funções do usuário (a = 3, f(x) = x^2 + a), salvas entre execuções
+        self.sheet = Worksheet(self.engine, sheet or os.environ.get("CALC_WORKSHEET"))
+        self.verbalizer = Verbalizer()
+        self.worker = EvalWorker(timeout=5.0, memory_mb=512)
+        self._calc_announce = None
+        self._progress_said = None    # último progresso de integrate/solve/deriv falado
+        self._data_thread = None      # Ctrl+O: leitura de CSV em andamento
+        self._reader = None           # Alt+setas: último resultado lista/matriz
+        self.beep_enabled = tk.BooleanVar(root, value=True)
 
         # Controle de velocidade
-        self.rate_var = tk.IntVar(value=180)
-        self.fast_digits_enabled = tk.BooleanVar(value=True)
-        self.fast_digits_mult = tk.DoubleVar(value=2.0)  # 2x mais rápido p/ dígitos
-
-        self._build_ui()
-        self._bind_keys()
+        self.rate_var = tk.IntVar(root, value=180)
+        self.fast_digits_enabled = tk.BooleanVar(root, value=True)
+        self.fast_digits_mult = tk.DoubleVar(root, value=2.0)  # 2x mais rápido p/ dígitos
+
+        # Clipes pré-renderizados das teclas (precisa de pygame)
+        self.clips = ClipCache(root, list(self.KEY_SPEECH.values()) + list(self.DIGIT_SPEECH.values())
+                               + ["vezes", "dividido"])
+        self._clips_job = None
+
+        # Teclado físico pelo protocolo serial (keypad.py)
+        self.keypad = None
+        self._keypad_job = None
+
+        # Gráfico sonoro (F4): varreduras em cache para repetir na hora
+        self.sweeps = sonify.SweepCache() if sonify is not None else None
+        self.sweep_player = SweepPlayer(root)
+        self._sweep = None
+
+        # Prévia do valor enquanto digita (recalcula após uma pausa)
+        self._preview_job = None
+        self._preview_value = None
+
+        # Histórico persistente; navegação pelo teclado (posição atual e busca ativa)
+        self.history = history if history is not None else HistoryStore(os.environ.get("CALC_HISTORY"))
+        self.history_view = None
+        self._hist_pos = None
+        self._hist_results = None
+
+        if build_ui:
+            self.root.title("Calculadora Científica Acessível")
+            self.root.geometry("560x760")
+            self._build_ui()
+            self._bind_keys()
+            self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        else:
+            self.expr_var = tk.StringVar(root)
+            self.res_var = tk.StringVar(root, value="Resultado: ")
+            self.preview_var = tk.StringVar(root)
+        self.expr_var.trace_add("write", self._schedule_preview)
+        self.tts.on_ready(self._on_tts_ready)
+        self.fast_digits_enabled.trace_add("write", self._schedule_prepare_clips)
+        self.fast_digits_mult.trace_add("write", self._schedule_prepare_clips)
+        if os.environ.get("CALC_KEYPAD"):
+            self.start_keypad(os.environ["CALC_KEYPAD"])
 
     # ---------- UI ----------
     def _build_ui(self):
@@ -217,14 +965,23 @@ class CalculatorApp:
         res_label = ttk.Label(main, textvariable=self.res_var, font=("Segoe UI", 16))
         res_label.pack(fill="x", pady=(0, 8))
 
+        # Prévia do valor parcial
+        self.preview_var = tk.StringVar()
+        ttk.Label(main, textvariable=self.preview_var, font=("Segoe UI", 12),
+                  foreground="#555").pack(fill="x", pady=(0, 8))
+
         # Linha de controles (modo, ler, limpar, beep)
         topbar = ttk.Frame(main)
         topbar.pack(fill="x", pady=(0, 8))
 
         self.mode_btn = ttk.Button(topbar, text="Modo: Graus", command=self.toggle_mode)
         self.mode_btn.pack(side="left")
+        self.numbers_btn = ttk.Button(topbar, text=self.NUMBER_LABELS["float"][0], command=self.cycle_backend)
+        self.numbers_btn.pack(side="left", padx=(6, 0))
 
         ttk.Button(topbar, text="Ler expressão", command=self.read_expression).pack(side="left", padx=6)
+        ttk.Button(topbar, text="Ler prévia", command=self.speak_preview).pack(side="left")
+        ttk.Button(topbar, text="Gráfico", command=self.play_graph).pack(side="left", padx=6)
         ttk.Button(topbar, text="Limpar (C)", command=lambda: self._press("C")).pack(side="left")
         ttk.Button(topbar, text="Apagar (⌫)", command=lambda: self._press("⌫")).pack(side="left", padx=6)
 
@@ -290,13 +1047,21 @@ class CalculatorApp:
         # Histórico
         hist_frame = ttk.LabelFrame(main, text="Histórico")
         hist_frame.pack(fill="both", expand=True, pady=(8, 0))
-        self.history = tk.Listbox(hist_frame, font=("Consolas", 12), height=6)
-        self.history.pack(fill="both", expand=True)
+        self.history_view = HistoryView(hist_frame, self.history, rows=6, on_select=self._hist_select)
 
         # Dicas
         tips = ttk.Label(
             main,
-            text="Atalhos: Enter=Igual | Backspace=Apagar | Esc=C | F9=Graus/Radianos",
+            text="Atalhos: Enter=Igual | Backspace=Apagar | Esc=C/cancelar | F2=Ler prévia | F9=Graus/Radianos | F6=Números (float/decimal/frações)\n"
+                 "Gráfico sonoro: F4 toca a expressão em x (Alt+X insere x; \"expr; de; até\" muda o intervalo)\n"
+                 "Histórico: Ctrl+↑/↓ navegar | Ctrl+R repetir | Ctrl+Enter usar resultado | "
+                 "Ctrl+Shift+Enter usar expressão | Ctrl+F buscar | Ctrl+G ir para nº\n"
+                 "Listas: [1, 2, 3] com mean, median, stdev, pctl(lista, 90), slope(xs, ys)... | "
+                 "Ctrl+O abre um CSV (colunas viram dados1, dados2...)\n"
+                 "Matrizes: [[1, 2], [3, 4]], det, inv, solve(A, b), eig, 3+4i | Ctrl+Shift+O abre matriz (M) | "
+                 "Alt+setas percorrem o resultado, Alt+Home volta ao início, Alt+L lê a linha\n"
+                 "Cálculo: integrate(x^2, x, 0, 1), solve(x^2 - 2, x, 0, 2), deriv(sin(x), x, 30)\n"
+                 "Variáveis: a = 3, f(t) = t^2 + a (só muda o que depende), \"a =\" apaga | F7 lê as variáveis",
             font=("Segoe UI", 10),
             foreground="#555"
         )
@@ -312,26 +1077,331 @@ class CalculatorApp:
         val = int(self.rate_var.get())
         self.rate_label.config(text=f"{val} wpm")
         self.tts.set_rate(val)
+        self._schedule_prepare_clips()
 
     def _bind_keys(self):
         self.root.bind("<Return>", lambda e: self._press("="))
         self.root.bind("<KP_Enter>", lambda e: self._press("="))
         self.root.bind("<BackSpace>", lambda e: self._press("⌫"))
-        self.root.bind("<Escape>", lambda e: self._press("C"))
+        self.root.bind("<Escape>", lambda e: self._on_escape())
         self.root.bind("<F9>", lambda e: self.toggle_mode())
+        self.root.bind("<F6>", lambda e: self.cycle_backend())
+        self.root.bind("<F2>", lambda e: self.speak_preview())
+        self.root.bind("<F4>", lambda e: self.play_graph())
+        self.root.bind("<F7>", lambda e: self.read_sheet())
+        self.root.bind("<Alt-x>", lambda e: self._press("x"))
+
+        # Histórico pelo teclado
+        self.root.bind("<Control-Up>", lambda e: self._hist_move(-1))
+        self.root.bind("<Control-Down>", lambda e: self._hist_move(1))
+        self.root.bind("<Control-Home>", lambda e: self._hist_jump(0))
+        self.root.bind("<Control-End>", lambda e: self._hist_jump(-1))
+        self.root.bind("<Control-r>", lambda e: self._hist_speak())
+        self.root.bind("<Control-Return>", lambda e: self._hist_reuse(result=True))
+        self.root.bind("<Control-Shift-Return>", lambda e: self._hist_reuse(result=False))
+        self.root.bind("<Control-f>", lambda e: self._hist_search())
+        self.root.bind("<Control-g>", lambda e: self._hist_goto())
+        self.root.bind("<Control-o>", lambda e: self.load_data())
+        self.root.bind("<Control-O>", lambda e: self.load_data(matrix=True))
+
+        # Resultado lista/matriz pelo teclado
+        self.root.bind("<Alt-Left>", lambda e: self._reader_move(0, -1))
+        self.root.bind("<Alt-Right>", lambda e: self._reader_move(0, 1))
+        self.root.bind("<Alt-Up>", lambda e: self._reader_move(-1, 0))
+        self.root.bind("<Alt-Down>", lambda e: self._reader_move(1, 0))
+        self.root.bind("<Alt-Home>", lambda e: self._reader_say(ArrayReader.home))
+        self.root.bind("<Alt-l>", lambda e: self._reader_say(ArrayReader.row))
         
 
         for ch in "0123456789.+-*/()^":
             self.root.bind(ch, self._key_insert)
+        for key in ("<bracketleft>", "<bracketright>", "<comma>"):
+            self.root.bind(key, self._key_insert)
         self.root.bind("x", lambda e: self._press("×"))
         self.root.bind("X", lambda e: self._press("×"))
 
+    # ---------- Teclado serial ----------
+    KEYPAD_POLL_MS = 10
+
+    def start_keypad(self, port):
+        """Começa a ler o teclado serial em `port` (thread próprio; eventos chegam por fila)."""
+        self.stop_keypad()
+        self.keypad = KeypadReader(port)
+        self.keypad.start()
+        self._keypad_job = self.root.after(self.KEYPAD_POLL_MS, self._poll_keypad)
+
+    def stop_keypad(self):
+        if self.keypad is not None:
+            self.keypad.stop()
+            self.keypad = None
+        if self._keypad_job is not None:
+            self.root.after_cancel(self._keypad_job)
+            self._keypad_job = None
+
+    def _poll_keypad(self):
+        self._keypad_job = None
+        events = self.keypad.events
+        while True:
+            try:
+                kind, value, t = events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "status":
+                self.tts.say(value)
+            elif value == "C":
+                self._on_escape(t)      # como o Esc do teclado HID: cancela ou limpa
+            else:
+                self._press(value, t)
+        self._keypad_job = self.root.after(self.KEYPAD_POLL_MS, self._poll_keypad)
+
+    # ---------- Prévia ----------
+    PREVIEW_DEBOUNCE_MS = 150
+
+    def _schedule_preview(self, *_):
+        # digitação rápida: só recalcula quando o usuário pausa
+        if self._preview_job is not None:
+            self.root.after_cancel(self._preview_job)
+        self._preview_job = self.root.after(self.PREVIEW_DEBOUNCE_MS, self._update_preview)
+
+    def _update_preview(self):
+        self._preview_job = None
+        expr = self.expr_var.get()
+        if not expr.strip():
+            self._preview_value = None
+            self.preview_var.set("")
+            return
+        definition = self.sheet.parse(expr)
+        if definition is not None:
+            if definition[1] is not None or not definition[2]:
+                return      # função ou "a =": sem valor para mostrar
+            expr = definition[2]
+        val = self.engine.preview(expr)
+        if val is None:
+            return      # trecho incompleto ("2+"): mantém a última prévia
+        self._preview_value = val
+        self.preview_var.set(f"≈ {self._format_number(val)}")
+
+    def speak_preview(self):
+        if self._preview_job is not None:
+            self.root.after_cancel(self._preview_job)
+            self._update_preview()      # fala o valor do texto atual, sem esperar a pausa
+        if self._preview_value is None:
+            self.tts.say("sem valor parcial")
+            return
+        self.tts.say(f"parcial: {self._speak_number(self._preview_value)}")
+
+    # ---------- Gráfico sonoro ----------
+    def _graph_request(self):
+        """(expressão, x inicial, x final) do campo: "x^2 - 4" ou "x^2 - 4; -5; 5"."""
+        parts = [p.strip() for p in self.expr_var.get().split(";")]
+        expr = parts[0]
+        if not expr:
+            raise ValueError("expressão vazia")
+        if len(parts) == 1:
+            x0, x1 = sonify.default_range(self.engine.mode)
+        elif len(parts) == 3:
+            x0, x1 = (self.engine.preview(p) for p in parts[1:])   # aceita "-2*pi"; não mexe no ANS
+            if x0 is None or x1 is None:
+                raise ValueError("intervalo inválido")
+        else:
+            raise ValueError("use expressão; início; fim")
+        return expr, float(x0), float(x1)
+
+    def play_graph(self):
+        """F4: toca a expressão do campo como varredura de tom e depois fala os pontos notáveis."""
+        if self.sweeps is None:
+            self.tts.say("gráfico sonoro indisponível: instale o numpy")
+            return "break"
+        self.sweep_player.stop()
+        try:
+            expr, x0, x1 = self._graph_request()
+            sweep = self.sweeps.get(self.engine, expr, x0, x1, **self.sweep_player.format)
+        except ValueError as e:
+            self.tts.say(f"gráfico: {e}", priority=self.tts.PRIO_RESULT)
+            return "break"
+        self._sweep = sweep
+        self.clips.stop()
+        self.res_var.set(f"Gráfico: x de {format_number(x0)} a {format_number(x1)}")
+        if not self.sweep_player.play(sweep, on_done=self._graph_done):
+            # sem pygame: só os pontos notáveis, em voz
+            self._graph_done()
+        return "break"
+
+    def _graph_done(self):
+        sweep = self._sweep.render_all()
+        self.tts.say_stream(sonify.feature_phrases(sweep.features), priority=self.tts.PRIO_RESULT,
+                            prefix="gráfico: ")
+
+    # ---------- Dados (CSV) ----------
+    def load_data(self, matrix=False):
+        """
+        Ctrl+O: resume um CSV numa thread (stats.load_csv); as colunas viram dados1, dados2...
+        Ctrl+Shift+O: lê o CSV inteiro como a matriz M (engine.load_matrix).
+        """
+        if self._data_thread is not None:
+            self.tts.say("aguarde, lendo dados")
+            return "break"
+        from tkinter import filedialog
+        path = filedialog.askopenfilename(parent=self.root, title="Abrir matriz" if matrix else "Abrir dados",
+                                          filetypes=[("CSV", "*.csv *.txt"), ("Todos", "*.*")])
+        if not path:
+            return "break"
+        self.tts.say("lendo dados")
+        box = {}
+
+        def work():
+            try:
+                if matrix:
+                    box["matrix"] = linalg.load_matrix(path)
+                else:
+                    box["summary"] = stats.load_csv(path)
+            except (OSError, ValueError) as e:
+                box["error"] = e
+        self._data_thread = threading.Thread(target=work, name="calc-csv", daemon=True)
+        self._data_thread.start()
+        self.root.after(100, self._poll_data, box)
+        return "break"
+
+    def _poll_data(self, box):
+        if self._data_thread.is_alive():
+            self.root.after(100, self._poll_data, box)
+            return
+        self._data_thread = None
+        if "error" in box:
+            self.res_var.set(f"Erro nos dados: {box['error']}")
+            self.tts.say(f"não consegui ler os dados: {box['error']}", priority=self.tts.PRIO_RESULT)
+            return
+        if "matrix" in box:
+            try:
+                m = self.engine.add_matrix("M", box["matrix"].a)
+            except ValueError as e:
+                self.tts.say(f"não consegui carregar a matriz: {e}", priority=self.tts.PRIO_RESULT)
+                return
+            self.res_var.set(f"Dados: M ({m.shape[0]}×{m.shape[1]})")
+            self._reader = ArrayReader(m)
+            self.tts.say(f"{self._reader.summary()}, carregada em M", priority=self.tts.PRIO_RESULT)
+            return
+        loaded = self.engine.add_datasets(box["summary"])
+        names = list(loaded)
+        rows = len(loaded[names[0]])
+        self.res_var.set(f"Dados: {', '.join(names)} ({format_number(rows)} linhas)")
+        where = names[0] if len(names) == 1 else f"{names[0]} a {names[-1]}"
+        self.tts.say(f"{self._speak_number(rows)} linhas carregadas em {where}", priority=self.tts.PRIO_RESULT)
+
+    # ---------- Lista/matriz do último resultado ----------
+    def _reader_move(self, dr, dc):
+        return self._reader_say(lambda r: r.move(dr, dc))
+
+    def _reader_say(self, step):
+        if self._reader is None:
+            self.tts.say("sem lista ou matriz no resultado")
+        else:
+            self.tts.say(step(self._reader), priority=self.tts.PRIO_RESULT)
+        return "break"
+
+    # ---------- Histórico ----------
+    def _hist_entry(self):
+        if self._hist_pos is None:
+            return None
+        if self._hist_results is not None:
+            return self._hist_results[self._hist_pos]
+        return self.history.at(self._hist_pos)
+
+    def _hist_set(self, pos):
+        self._hist_pos = pos
+        entry = self._hist_entry()
+        if self.history_view is not None and entry is not None:
+            self.history_view.show(self.history.index_of(entry.id))
+        self._hist_speak()
+
+    def _hist_move(self, delta):
+        """Ctrl+↑ vai para a conta anterior, Ctrl+↓ para a seguinte (na busca, entre os achados)."""
+        n = len(self._hist_results) if self._hist_results is not None else len(self.history)
+        if not n:
+            self.tts.say("histórico vazio", priority=self.tts.PRIO_RESULT)
+            return "break"
+        if self._hist_results is not None:
+            # achados vêm do mais novo para o mais antigo: ↑ avança na lista
+            pos = 0 if self._hist_pos is None else self._hist_pos - delta
+        else:
+            pos = n - 1 if self._hist_pos is None else self._hist_pos + delta
+        if not 0 <= pos < n:
+            edge = "início" if pos < 0 else "fim"
+            self.tts.say(f"{edge} da busca" if self._hist_results is not None else f"{edge} do histórico")
+            return "break"
+        self._hist_set(pos)
+        return "break"
+
+    def _hist_jump(self, pos):
+        n = len(self._hist_results) if self._hist_results is not None else len(self.history)
+        if n:
+            self._hist_set(pos % n)
+        return "break"
+
+    def _hist_select(self, index):
+        # clique na lista: sai da busca e seleciona a posição
+        self._hist_results = None
+        self._hist_set(index)
+
+    def _hist_speak(self):
+        entry = self._hist_entry()
+        if entry is None:
+            self.tts.say("nenhuma conta selecionada")
+            return "break"
+        number = self.history.index_of(entry.id) + 1
+        value = self._speak_number(entry.value) if entry.value is not None else number_text(entry.result)
+        self.tts.say(f"conta {number}: {self._friendly_expr(entry.expr)} igual a {value}",
+                     priority=self.tts.PRIO_RESULT)
+        return "break"
+
+    def _hist_reuse(self, result=True):
+        """Ctrl+Enter insere o resultado da conta selecionada; com Shift, troca pela expressão."""
+        entry = self._hist_entry()
+        if entry is None:
+            self.tts.say("nenhuma conta selecionada")
+            return "break"
+        if result:
+            self._insert_text(entry.result)
+            self.tts.say(f"inserido {number_text(entry.result)}")
+        else:
+            self.expr_var.set(entry.expr)
+            self.tts.say_stream(self.verbalizer.chunks(entry.expr), prefix="expressão: ")
+        return "break"
+
+    def _hist_search(self):
+        """Ctrl+F busca o texto do campo (trecho da expressão ou valor); campo vazio sai da busca."""
+        query = self.expr_var.get().strip()
+        if not query:
+            self._hist_results = None
+            self._hist_pos = None
+            self.tts.say("histórico completo")
+            return "break"
+        found = self.history.search(query)
+        if not found:
+            self.tts.say("nada encontrado")
+            return "break"
+        self._hist_results = found
+        self.tts.say(f"{len(found)} encontrado" + ("s" if len(found) > 1 else ""))
+        self._hist_set(0)
+        return "break"
+
+    def _hist_goto(self):
+        """Ctrl+G vai para a conta de número digitado no campo."""
+        text = self.expr_var.get().strip()
+        if not text.isdigit() or not 1 <= int(text) <= len(self.history):
+            self.tts.say("número de conta inválido")
+            return "break"
+        self._hist_results = None
+        self._hist_set(int(text) - 1)
+        return "break"
+
     # ---------- Lógica de interação ----------
     def _key_insert(self, event):
+        t_key = time.perf_counter()
         ch = event.char
         if ch:
             self._insert_text(ch)
-            self._speak_key(ch)
+            self._speak_key(ch, t_key)
 
     def _insert_text(self, text):
         self._beep()
@@ -345,16 +1415,13 @@ class CalculatorApp:
             except Exception:
                 pass
 
-    def _speak_key(self, token):
-        # Mapeia texto a falar
-        spoken = self.KEY_SPEECH.get(token, token)
+    def _speak_key(self, token, t_key=None):
+        # Mapeia texto a falar ("sin(" fala "seno")
+        spoken = self.KEY_SPEECH.get(token) or self.KEY_SPEECH.get(token.rstrip("("), token)
         rate_override = None
 
         if token.isdigit():
-            spoken = {
-                "0": "zero", "1": "um", "2": "dois", "3": "três", "4": "quatro",
-                "5": "cinco", "6": "seis", "7": "sete", "8": "oito", "9": "nove"
-            }.get(token, token)
+            spoken = self.DIGIT_SPEECH.get(token, token)
             # se modo de dígitos acelerados estiver ligado, aplica rate maior
             if self.fast_digits_enabled.get():
                 rate_override = int(self.rate_var.get() * float(self.fast_digits_mult.get()))
@@ -366,13 +1433,45 @@ class CalculatorApp:
         elif token in {"×", "÷"}:
             spoken = "vezes" if token == "×" else "dividido"
 
-        self.tts.say(spoken, rate=rate_override)
+        # Clipe pré-renderizado toca na hora; sem ele, TTS ao vivo
+        rate = rate_override if rate_override is not None else int(self.rate_var.get())
+        if self.clips.play(spoken, rate, self.tts.voice_id()):
+            if self.latency is not None and t_key is not None:
+                self.latency.add("key_to_audio", time.perf_counter() - t_key)
+            return
+        self.tts.say(spoken, rate=rate_override, priority=self.tts.PRIO_KEY, t_key=t_key)
 
-    def _press(self, token):
+    def _on_tts_ready(self, ok):
+        if not ok:
+            err = self.tts.init_error
+            self.res_var.set(f"Sem voz: {err or type(err).__name__}")
+            return
+        self._schedule_prepare_clips()    # os clipes dependem da voz escolhida
+
+    def _prepare_clips(self):
+        """(Re)agenda os conjuntos de clipes para o rate normal e o de dígitos."""
+        self._clips_job = None
+        if not self.tts.ready:
+            return      # _on_tts_ready agenda de novo
+        voice = self.tts.voice_id()
+        rate = int(self.rate_var.get())
+        self.clips.prepare(voice, rate)
+        if self.fast_digits_enabled.get():
+            self.clips.prepare(voice, int(rate * float(self.fast_digits_mult.get())))
+
+    def _schedule_prepare_clips(self, *_):
+        # espera o slider parar antes de renderizar um conjunto novo
+        if self._clips_job is not None:
+            self.root.after_cancel(self._clips_job)
+        self._clips_job = self.root.after(800, self._prepare_clips)
+
+    def _press(self, token, t_key=None):
+        if t_key is None:
+            t_key = time.perf_counter()
         self._beep()
 
         # Fala da tecla (com possível aceleração de dígitos)
-        self._speak_key(token)
+        self._speak_key(token, t_key)
 
         if token == "C":
             self.expr_var.set("")
@@ -404,53 +1503,261 @@ class CalculatorApp:
     def _evaluate(self):
         expr = self.expr_var.get()
         if not expr.strip():
-            self.tts.say("expressão vazia")
+            self.tts.say("expressão vazia", priority=self.tts.PRIO_RESULT)
+            return
+        if self.worker.busy:
+            self.tts.say("aguarde, calculando")
+            return
+        if "=" in expr:
+            self._define(expr)
             return
 
+        # Compilação, checagem de custo e a conta em si rodam no worker, para não
+        # travar o mainloop nem a fala; o veredito de custo fica no cache de lá.
+        # Colunas de CSV, matrizes e a planilha vão junto (só quando mudam).
         try:
-            val = self.engine.evaluate(expr)
-            val_str = self._format_number(val)
-            self.res_var.set(f"Resultado: {val_str}")
-            self.history.insert(tk.END, f"{expr} = {val_str}")
-            self.history.see(tk.END)
-            self.tts.say(f"resultado: {self._speak_number(val)}")
+            job = self._submit(expr)
         except Exception:
-            self.res_var.set("Erro")
-            self.tts.say("erro de cálculo")
+            # sem multiprocessing disponível: avalia no próprio processo
+            try:
+                self._show_result(expr, self.engine.evaluate(expr))
+            except Exception:
+                self.res_var.set("Erro")
+                self.tts.say("erro de cálculo", priority=self.tts.PRIO_RESULT)
+            return
 
-    def _format_number(self, x):
+        self._calc_announce = self.root.after(300, self._announce_calculating)
+        self._progress_said = None
+        self._poll_worker(expr, job)
+
+    def _submit(self, job):
+        engine = self.engine
+        return self.worker.submit(job, engine.mode, engine.last, engine.backend_spec, engine.limits,
+                                  engine.names_state())
+
+    def _announce_calculating(self):
+        self._calc_announce = None
+        self.res_var.set("Calculando…")
+        self.tts.say("calculando…")
+
+    def _announce_progress(self):
+        # integrate/solve/deriv demorados: "integral, 40 por cento" (o worker já espaça os avisos)
+        progress = self.worker.progress
+        if progress is None or progress is self._progress_said:
+            return
+        self._progress_said = progress
+        name, fraction = progress
+        percent = int(fraction * 100) // 10 * 10
+        self.res_var.set(f"Calculando… {percent}%")
+        self.tts.say(f"{FUNCTION_SPEECH.get(name, name)}, {number_text(str(percent))} por cento")
+
+    def _poll_worker(self, expr, job, definition=None):
+        if self.worker.current_job != job:
+            return      # cancelado
+        result = self.worker.poll()
+        if result is None:
+            self._announce_progress()
+            self.root.after(15, self._poll_worker, expr, job, definition)
+            return
+        self._cancel_announce()
+        ok, payload = result
+        if ok and definition is not None:
+            self._apply_definition(expr, definition, payload)
+        elif ok:
+            self.engine.last = payload
+            self._show_result(expr, payload)
+        elif payload == "tempo esgotado":
+            self.res_var.set("Erro: tempo esgotado")
+            self.tts.say("tempo esgotado", priority=self.tts.PRIO_RESULT)
+        elif payload.startswith(COST_MESSAGE):
+            self.res_var.set(f"Erro: {COST_MESSAGE}")
+            self.tts.say(COST_MESSAGE, priority=self.tts.PRIO_RESULT)
+        else:
+            self.res_var.set(f"Erro: {payload}")
+            # na planilha o erro diz qual dependente falhou ("b: divisão por zero")
+            self.tts.say("erro de cálculo" if definition is None else f"erro: {payload}",
+                         priority=self.tts.PRIO_RESULT)
+
+    def _show_result(self, expr, val):
+        val_str = self._format_number(val)
+        self.res_var.set(f"Resultado: {val_str}")
+        self.history.append(expr, val_str, val, self.engine.mode)
+        self._hist_pos = None
+        self._hist_results = None
+        if self.history_view is not None:
+            self.history_view.selected = None
+            self.history_view.scroll_to_end()
+        self.clips.stop()
+        is_list = isinstance(val, (stats.DataList, linalg.Array))
+        self._reader = ArrayReader(val) if is_list else None
+        self.tts.say(f"resultado: {self._speak_number(val)}", priority=self.tts.PRIO_RESULT)
+
+    def _define(self, expr):
+        """
+        a = 3, f(x) = x^2 + a ou "a =". A conta da definição e a dos
+        dependentes rodam no worker (timeout, Esc); a planilha só muda aqui,
+        com os valores que voltam.
+        """
+        parsed = self.sheet.parse(expr)
         try:
-            if isinstance(x, (int,)) or (isinstance(x, float) and x.is_integer()):
-                return str(int(round(x)))
-            return f"{float(x):.12g}"
+            if parsed is None or not parsed[2]:
+                self._show_definition(expr, self.sheet.execute(expr))      # apagar (ou erro de sintaxe)
+                return
+            name, params, text = parsed
+            steps = self.sheet.plan(name, text, params)
+            if all(step[1] is not None for step in steps):
+                # função sem variáveis dependentes: nada a calcular
+                self._show_definition(expr, self.sheet.define(name, text, params))
+                return
+        except Exception as e:
+            self._definition_error(e)
+            return
+        try:
+            job = self._submit(steps)
         except Exception:
-            return str(x)
+            # sem multiprocessing disponível: refaz no próprio processo
+            try:
+                self._show_definition(expr, self.sheet.define(name, text, params))
+            except Exception as e:
+                self._definition_error(e)
+            return
+        self._calc_announce = self.root.after(300, self._announce_calculating)
+        self._progress_said = None
+        self._poll_worker(expr, job, (name, params, text, self.engine.names_state()[0]))
+
+    def _apply_definition(self, expr, definition, values):
+        name, params, text, version = definition
+        if self.engine.names_state()[0] != version:
+            # a planilha mudou enquanto o worker calculava: os valores podem estar velhos
+            self.res_var.set("Erro: a planilha mudou; repita a definição")
+            self.tts.say("a planilha mudou; repita a definição", priority=self.tts.PRIO_RESULT)
+            return
+        try:
+            self._show_definition(expr, self.sheet.define(name, text, params, values))
+        except Exception as e:
+            self._definition_error(e)
+
+    def _definition_error(self, e):
+        if isinstance(e, CostError):
+            self.res_var.set(f"Erro: {COST_MESSAGE}")
+            self.tts.say(COST_MESSAGE, priority=self.tts.PRIO_RESULT)
+            return
+        self.res_var.set(f"Erro: {e}")
+        self.tts.say(f"erro: {e}", priority=self.tts.PRIO_RESULT)
+
+    def _show_definition(self, expr, update):
+        name, value, recomputed = update
+        d = self.sheet.get(name)
+        if d is None:
+            self.res_var.set(f"{name} apagada")
+            self.tts.say(f"{name} apagada", priority=self.tts.PRIO_RESULT)
+            return
+        if d.params is not None:
+            self.res_var.set(d.source)
+            self.tts.say(f"função {name} definida", priority=self.tts.PRIO_RESULT)
+            return
+        val_str = self._format_number(value)
+        self.history.append(expr, val_str, value, self.engine.mode)
+        speech = f"{name} igual a {self._speak_number(value)}"
+        shown = f"{name} = {val_str}"
+        if recomputed:
+            names = ", ".join(recomputed) if len(recomputed) <= 5 else f"{len(recomputed)} variáveis"
+            speech += f"; recalculadas: {names}"
+            shown += f" (recalculadas: {names})"
+        self.res_var.set(shown)
+        self.tts.say(speech, priority=self.tts.PRIO_RESULT)
+
+    def read_sheet(self):
+        """F7: lê as variáveis (com o valor) e as funções (com a expressão), na ordem da planilha."""
+        if not len(self.sheet):
+            self.tts.say("nenhuma variável definida")
+            return
+        values = self.engine.variables
+
+        def chunks():
+            for d in self.sheet:
+                if d.params is None:
+                    yield f"{d.name} igual a {self._speak_number(values[d.name])}; "
+                else:
+                    yield f"{d.name} de {', '.join(d.params)} igual a {self._friendly_expr(d.text)}; "
+        self.tts.say_stream(chunks(), prefix="variáveis: ")
+
+    def _cancel_announce(self):
+        if self._calc_announce is not None:
+            self.root.after_cancel(self._calc_announce)
+            self._calc_announce = None
+
+    def _on_escape(self, t_key=None):
+        # Esc cancela o cálculo em andamento ou o gráfico tocando; fora disso, limpa (C)
+        if self.sweep_player.playing:
+            self.sweep_player.stop()
+            self.tts.say("gráfico interrompido")
+            return
+        if self.worker.busy:
+            self.worker.cancel()
+            self._cancel_announce()
+            self.res_var.set("Cálculo cancelado")
+            self.tts.say("cálculo cancelado")
+            return
+        self._press("C", t_key)
+
+    def _on_close(self):
+        if self.latency is not None and self._latency_path:
+            try:
+                self.latency.export_json(self._latency_path)
+            except OSError:
+                pass
+        profiler = self.engine.profiler
+        if profiler is not None:
+            try:
+                if self._profile_path.endswith(".json"):
+                    profiler.export_json(self._profile_path)
+                else:
+                    profiler.dump_stats(self._profile_path)
+            except OSError:
+                pass
+        self.stop_keypad()
+        self.sweep_player.stop()
+        self.history.close()
+        self.sheet.close()
+        self.worker.shutdown()
+        self.clips.shutdown()
+        self.tts.shutdown()
+        self.root.destroy()
+
+    def _format_number(self, x):
+        return format_number(x)
 
     def _speak_number(self, x):
-        s = self._format_number(x)
-        return s.replace("-", "menos ")
+        return speak_number(x)
 
     def toggle_mode(self):
         self.engine.mode = "RAD" if self.engine.mode == "DEG" else "DEG"
         txt = "Modo: Radianos" if self.engine.mode == "RAD" else "Modo: Graus"
         self.mode_btn.config(text=txt)
         self.tts.say("modo radianos" if self.engine.mode == "RAD" else "modo graus")
+        self._schedule_preview()
+
+    def cycle_backend(self):
+        """F6: float -> decimal (DECIMAL_PRECISION dígitos) -> frações exatas -> float."""
+        order = list(self.NUMBER_LABELS)
+        name = order[(order.index(self.engine.backend) + 1) % len(order)]
+        self.engine.set_backend(name, self.DECIMAL_PRECISION if name == "decimal" else None)
+        label, speech = self.NUMBER_LABELS[name]
+        self.numbers_btn.config(text=label)
+        self.tts.say(speech)
+        self._schedule_preview()
 
     def read_expression(self):
         expr = self.expr_var.get().strip()
         if not expr:
-            self.tts.say("expressão vazia")
-            return
-        friendly = (expr.replace("*", " vezes ")
-                         .replace("/", " dividido ")
-                         .replace("+", " mais ")
-                         .replace("-", " menos ")
-                         .replace("^", " elevado a ")
-                         .replace("(", " abre parênteses ")
-                         .replace(")", " fecha parênteses ")
-                         .replace("pi", " pi ")
-                         .replace(".", " ponto "))
-        self.tts.say(f"expressão: {friendly}")
+            self.tts.say("expressão vazia", priority=self.tts.PRIO_RESULT)
+            return
+        # em pedaços: a fala começa antes de a expressão inteira estar montada
+        self.tts.say_stream(self.verbalizer.chunks(expr), prefix="expressão: ")
+
+    def _friendly_expr(self, expr):
+        return self.verbalizer.expression(expr)
 
 
 if __name__ == "__main__":
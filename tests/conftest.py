@@ -0,0 +1,43 @@
+"""Módulos ficam na raiz do projeto (sem pacote): os testes importam de lá."""
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest  # noqa: E402
+
+
+class FakeRoot:
+    """O mínimo do Tk que o TTSTk usa: after/after_idle/after_cancel; run() roda os agendados."""
+
+    def __init__(self):
+        self._calls = {}
+        self._next = 0
+
+    def after(self, ms, fn, *args):
+        self._next += 1
+        self._calls[self._next] = (fn, args)
+        return self._next
+
+    def after_idle(self, fn, *args):
+        return self.after(0, fn, *args)
+
+    def after_cancel(self, call_id):
+        self._calls.pop(call_id, None)
+
+    def run(self, limit=1000):
+        """Roda os callbacks (e os que eles agendarem) até a fila esvaziar."""
+        for _ in range(limit):
+            if not self._calls:
+                return
+            call_id = min(self._calls)
+            fn, args = self._calls.pop(call_id)
+            fn(*args)
+        raise AssertionError("o pump não parou")
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
@@ -0,0 +1,34 @@
+import math
+
+import pytest
+
+from calc_core import CalcEngine
+
+
+@pytest.fixture
+def engine():
+    e = CalcEngine()
+    e.mode = "RAD"
+    return e
+
+
+@pytest.mark.parametrize("expr, want", [
+    ("integrate(x^2, x, 0, 1)", 1 / 3),
+    ("integrate(exp(-x^2), x, -10, 10)", math.sqrt(math.pi)),
+    ("solve(x^2 - 2, x, 0, 2)", math.sqrt(2)),
+    ("solve(cos(x) - x, x, 0, 1)", 0.7390851332151607),
+    ("deriv(sin(x), x, 1)", math.cos(1)),
+    ("deriv(ln(x), x, 0.001)", 1000.0),
+])
+def test_calculus(engine, expr, want):
+    assert engine.evaluate(expr) == pytest.approx(want, rel=1e-9)
+
+
+@pytest.mark.parametrize("expr, message", [
+    ("solve(x^2 + 1, x, -1, 1)", "não troca de sinal"),
+    ("solve(tan(x), x, 1, 2)", "descontinuidade"),
+    ("deriv(abs(x) / x, x, 0)", "derivável"),
+])
+def test_calculus_errors(engine, expr, message):
+    with pytest.raises(ValueError, match=message):
+        engine.evaluate(expr)
@@ -0,0 +1,33 @@
+import math
+
+import pytest
+
+import combinatorics
+from calc_core import CalcEngine
+
+
+def test_factorial_exact():
+    assert combinatorics.factorial(20) == math.factorial(20)
+    assert combinatorics.factorial(5.0) == 120
+    assert combinatorics.factorial(300) == math.factorial(300)
+
+
+@pytest.mark.parametrize("x", [3.5, -1, -2.0])
+def test_factorial_rejects_non_integers(x):
+    with pytest.raises(ValueError):
+        combinatorics.factorial(x)
+
+
+def test_fact_in_engine():
+    engine = CalcEngine()
+    with pytest.raises(ValueError, match="inteiros"):
+        engine.evaluate("fact(3.5)")
+    assert engine.evaluate("gamma(4.5)") == pytest.approx(11.631728)
+
+
+def test_gamma_and_comb():
+    assert combinatorics.gamma(5) == 24
+    assert combinatorics.comb(52, 5) == 2598960
+    assert combinatorics.perm(5, 2) == 20
+    assert combinatorics.double_factorial(7) == 105
+    assert combinatorics.multinomial(2, 1, 1) == 12
@@ -0,0 +1,43 @@
+import pytest
+
+from calc_core import CalcEngine, CostError
+
+
+@pytest.fixture
+def engine():
+    return CalcEngine()
+
+
+@pytest.mark.parametrize("expr", [
+    "2^10^10",
+    "(9^999)^999",
+    "((9^999)^999)^999",
+    "fact(10^6)",
+    "nCr(10^7, 5*10^6)",
+])
+def test_rejects_heavy(engine, expr):
+    with pytest.raises(CostError):
+        engine.check(expr)
+    with pytest.raises(CostError):
+        engine.evaluate(expr)
+
+
+@pytest.mark.parametrize("expr", ["2^1000", "fact(100)", "nCr(1000, 500)"])
+def test_accepts_light(engine, expr):
+    engine.check(expr)
+
+
+def test_cost_depends_on_ans(engine):
+    engine.last = 10
+    engine.check("ANS^ANS")
+    engine.last = 10 ** 6
+    with pytest.raises(CostError):
+        engine.check("ANS^ANS")
+
+
+def test_verdict_cached_only_for_static_programs(engine):
+    engine.evaluate("2^100")
+    engine.evaluate("ANS + 1")
+    cached = {key[0] for key in engine._verdicts}
+    assert "2^100" in cached
+    assert "ANS + 1" not in cached
@@ -0,0 +1,64 @@
+import pytest
+
+from history import HistoryStore
+
+
+@pytest.fixture
+def store():
+    s = HistoryStore(path=":memory:", window=4)
+    s.append("1+1", "2", 2, "DEG")
+    s.append("sin(30)", "0,5", 0.5, "DEG")
+    s.append("sqrt(2)", "1,414213562", 2 ** 0.5, "DEG")
+    s.append("2^100", "1,2676506e+30", 2 ** 100, "DEG")
+    s.append("nome_com%", "12", 12, "RAD")
+    s.append("x1 + 1", "2", 2, "RAD")
+    yield s
+    s.close()
+
+
+def ids(entries):
+    return [e.expr for e in entries]
+
+
+def test_search_text(store):
+    assert ids(store.search("sin")) == ["sin(30)"]
+    assert ids(store.search("sqrt(")) == ["sqrt(2)"]
+    assert ids(store.search("  ")) == []
+
+
+def test_search_number_or_text(store):
+    # valor 2 ou "2" no texto (menos de 3 caracteres: busca por LIKE), do mais novo ao mais velho
+    assert ids(store.search("2")) == ["x1 + 1", "nome_com%", "2^100", "sqrt(2)", "1+1"]
+
+
+def test_search_number_tolerance(store):
+    assert ids(store.search("1.41421356237309")) == ["sqrt(2)"]
+    assert ids(store.search("0,5")) == ["sin(30)"]
+    assert "2^100" in ids(store.search(str(2 ** 100)))
+
+
+def test_search_escapes_like_wildcards(store):
+    assert ids(store.search("_c")) == ["nome_com%"]
+    assert ids(store.search("%")) == ["nome_com%"]
+
+
+def test_search_limit(store):
+    assert len(store.search("1", limit=2)) == 2
+
+
+def test_window_and_range(store):
+    assert len(store) == 6
+    assert len(store.recent) == 4
+    assert [e.expr for e in store.range(0, 3)] == ["1+1", "sin(30)", "sqrt(2)"]
+    assert store.at(-1).expr == "x1 + 1"
+    assert store.get(store.recent[0].id).expr == "sqrt(2)"
+
+
+def test_prune():
+    s = HistoryStore(path=":memory:", max_rows=10)
+    for i in range(25):
+        s.append(str(i), str(i), i)
+    assert len(s) <= 10
+    assert s.at(-1).expr == "24"
+    assert s.search("3") and all(e.expr != "3" for e in s.search("3"))
+    s.close()
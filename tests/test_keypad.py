@@ -0,0 +1,108 @@
+import os
+import queue
+
+import pytest
+
+import keypad
+from keypad import TOKEN_HELLO, TOKEN_IDS, FrameDecoder, KeypadReader, encode_frame
+
+
+def frames(*tokens, start=1):
+    return b"".join(encode_frame(start + i, TOKEN_IDS[t]) for i, t in enumerate(tokens))
+
+
+def test_decode_frames():
+    d = FrameDecoder()
+    assert d.feed(encode_frame(0, TOKEN_HELLO) + frames("7", "sin(", "=")) == ["7", "sin(", "="]
+    assert d.stats == {"frames": 4, "bad": 0, "lost": 0, "unknown": 0, "hello": 1}
+
+
+def test_split_feeds():
+    d = FrameDecoder()
+    data = frames("1", "2", "3")
+    out = []
+    for i in range(len(data)):
+        out += d.feed(data[i:i + 1])
+    assert out == ["1", "2", "3"]
+
+
+def test_bad_checksum_resyncs():
+    d = FrameDecoder()
+    good = frames("4", "5")
+    broken = bytes((keypad.FRAME_SYNC, 9, TOKEN_IDS["6"], 0))
+    assert d.feed(b"\x00\xff" + broken + good) == ["4", "5"]
+    assert d.stats["bad"] == 1
+    assert d.stats["frames"] == 2
+
+
+def test_lost_and_unknown():
+    d = FrameDecoder()
+    d.feed(encode_frame(1, TOKEN_IDS["1"]))
+    assert d.feed(encode_frame(4, TOKEN_IDS["2"])) == ["2"]
+    assert d.stats["lost"] == 2
+    assert d.feed(encode_frame(5, 200)) == []
+    assert d.stats["unknown"] == 1
+
+
+def test_seq_wraps_around():
+    d = FrameDecoder()
+    d.feed(encode_frame(255, TOKEN_IDS["1"]))
+    d.feed(encode_frame(256, TOKEN_IDS["2"]))
+    assert d.stats["lost"] == 0
+
+
+def test_hello_restarts_seq():
+    d = FrameDecoder()
+    d.feed(frames("1", "2", start=40))
+    d.feed(encode_frame(0, TOKEN_HELLO) + frames("3"))
+    assert d.stats["lost"] == 0
+    assert d.stats["hello"] == 1
+
+
+@pytest.mark.skipif(keypad.termios is None, reason="PtyKeypad precisa de POSIX")
+def test_pty_keypad_roundtrip():
+    pad = keypad.PtyKeypad()
+    port = keypad.open_port(pad.port)
+    try:
+        pad.hello()
+        pad.press("7", "×", "8", "=")
+        d = FrameDecoder()
+        tokens = []
+        for _ in range(50):
+            tokens += d.feed(port.read(0.1))
+            if len(tokens) == 4:
+                break
+        assert tokens == ["7", "×", "8", "="]
+        assert d.stats["hello"] == 1
+    finally:
+        port.close()
+        pad.close()
+
+
+@pytest.mark.skipif(keypad.termios is None, reason="PtyKeypad precisa de POSIX")
+def test_reader_thread():
+    pad = keypad.PtyKeypad()
+    events = queue.Queue()
+    reader = KeypadReader(pad.port, events, poll_s=0.02, retry_s=0.05)
+    reader.start()
+    try:
+        assert events.get(timeout=2)[:2] == ("status", "teclado conectado")
+        pad.press("ANS", "+" if "+" in TOKEN_IDS else "-", "1")
+        keys = [events.get(timeout=2)[1] for _ in range(3)]
+        assert keys == ["ANS", "-", "1"]
+    finally:
+        reader.stop()
+        reader.join(2)
+        pad.close()
+    assert not reader.is_alive()
+
+
+def test_reader_missing_port(tmp_path):
+    events = queue.Queue()
+    reader = KeypadReader(os.path.join(tmp_path, "nada"), events, poll_s=0.02, retry_s=0.05)
+    reader.start()
+    try:
+        assert events.get(timeout=2)[:2] == ("status", "teclado desconectado")
+    finally:
+        reader.stop()
+        reader.join(2)
@@ -0,0 +1,28 @@
+import pytest
+
+from calc_core import CalcEngine, CostError
+
+
+@pytest.fixture
+def engine():
+    return CalcEngine()
+
+
+def test_matrix_power_cost(engine):
+    engine.check("inv(identity(50))")
+    with pytest.raises(CostError):
+        engine.check("identity(5000)^50")
+
+
+def test_preview_limits_matrix_work(engine):
+    assert engine.preview("inv(identity(1500))") is None
+    assert engine.preview("identity(2000)*identity(2000)") is None
+    engine.check("inv(identity(1500))")      # fora da prévia passa (vai para o worker)
+    assert engine.preview("det(identity(3))") == pytest.approx(1.0)
+
+
+def test_matrix_dataset_shape(engine):
+    engine.add_matrix("M", [[1, 2], [3, 4]])
+    assert engine.preview("inv(M)") is not None
+    with pytest.raises(CostError):
+        engine.check("identity(5000) * identity(5000)")
@@ -0,0 +1,43 @@
+import time
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from calc_core import CalcEngine
+
+
+@pytest.mark.parametrize("backend", ["decimal", "fraction"])
+def test_round_and_pow_with_backend_numbers(backend):
+    engine = CalcEngine()
+    engine.set_backend(backend, precision=30)
+    assert engine.evaluate("round(1/3, 2)") == Fraction(33, 100)
+    assert engine.evaluate("pow(3, 4, 5)") == 1
+
+
+def test_decimal_precision():
+    engine = CalcEngine()
+    engine.set_backend("decimal", precision=40)
+    value = engine.evaluate("1/3")
+    assert isinstance(value, Decimal)
+    assert len(str(value)) >= 40
+
+
+@pytest.mark.parametrize("mode", ["DEG", "RAD"])
+@pytest.mark.parametrize("expr", ["sin(10^20000)", "cos(10^20000)", "tan(-10^5000)"])
+def test_decimal_trig_refuses_huge_arguments(mode, expr):
+    engine = CalcEngine()
+    engine.set_backend("decimal", precision=50)
+    engine.mode = mode
+    t0 = time.perf_counter()
+    with pytest.raises(ValueError, match="argumento grande demais"):
+        engine.evaluate(expr)
+    assert engine.preview(expr) is None
+    assert time.perf_counter() - t0 < 0.5
+
+
+def test_decimal_trig_large_argument():
+    engine = CalcEngine()
+    engine.set_backend("decimal", precision=30)
+    engine.mode = "RAD"
+    assert float(engine.evaluate("sin(10^22)")) == pytest.approx(-0.8522008497671888)
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from calc_core import CalcEngine
+from calc_parser import CALL, CONST, ParseError, compile_expr, run
+
+
+@pytest.fixture
+def engine():
+    return CalcEngine()
+
+
+@pytest.mark.parametrize("expr, expected", [
+    ("1+2*3", 7),
+    ("2^10 - 1", 1023),
+    ("-2^2", -4),
+    ("(1+2)*(3+4)/7", 3.0),
+    ("3×4÷2", 6.0),
+    ("nCr(10, 3) + nPr(5, 2)", 140),
+    ("sqrt(16)", 4.0),
+])
+def test_evaluate(engine, expr, expected):
+    assert engine.evaluate(expr) == pytest.approx(expected)
+
+
+def test_trig_mode(engine):
+    assert engine.evaluate("sin(30)") == pytest.approx(0.5)
+    engine.mode = "RAD"
+    assert engine.evaluate("sin(30)") == pytest.approx(-0.98803162)
+
+
+def test_ans(engine):
+    engine.evaluate("6*7")
+    assert engine.evaluate("ANS + 1") == 43
+
+
+@pytest.mark.parametrize("expr", [
+    "().__class__",
+    "[].__class__",
+    "sin.__globals__",
+    "__import__('os')",
+    "open(1)",
+    "lambda: 1",
+    "1 if 1 else 2",
+    "x",
+])
+def test_sandbox_rejects(engine, expr):
+    with pytest.raises(ParseError):
+        engine.compile(expr)
+    with pytest.raises(ValueError):
+        engine.evaluate(expr)
+
+
+def test_wrong_arity(engine):
+    with pytest.raises(ParseError):
+        engine.compile("sin(1, 2)")
+
+
+def test_fold_constants(engine):
+    assert engine.compile("2*3 + 4") == ((CONST, 10),)
+    assert engine.compile("sqrt(4)") == ((CONST, 4), (CALL, ("sqrt", 1)))   # chamadas não são dobradas
+
+
+def test_fold_stops_at_large_powers(engine):
+    # o resultado teria ~950 mil dígitos: fica para a avaliação, que a checagem de custo recusa
+    t0 = time.perf_counter()
+    code = engine.compile("((9^999)^999)^999")
+    assert time.perf_counter() - t0 < 0.5
+    assert len(code) > 1
+
+
+def test_run_with_namespace():
+    code = compile_expr("a*b + 1", {}, set(), free=("a", "b"))
+    assert run(code, {"a": 2, "b": 5}) == 11
@@ -0,0 +1,21 @@
+import pytest
+
+from calc_core import CalcEngine
+from calc_parser import IncrementalParser, run
+
+
+@pytest.fixture
+def engine():
+    return CalcEngine()
+
+
+def test_incremental_parser_auto_close():
+    parser = IncrementalParser(CalcEngine.FUNCTIONS, CalcEngine.CONSTANTS)
+    assert run(parser.update("2*(3+4"), CalcEngine()._namespace()) == 14
+    assert run(parser.update("2*(3+4)+1"), CalcEngine()._namespace()) == 15
+
+
+def test_preview_never_raises(engine):
+    assert engine.preview("2+") is None
+    assert engine.preview("().__class__") is None
+    assert engine.preview("2*(3+4") == 14
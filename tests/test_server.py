@@ -0,0 +1,70 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX") or not os.path.isdir("/proc"),
+                                reason="socket Unix e /proc")
+
+
+def _stat(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return fields[0], int(fields[1])
+
+
+def _alive(pid):
+    st = _stat(pid)
+    return st is not None and st[0] != "Z"
+
+
+def _children(pid):
+    return [int(n) for n in os.listdir("/proc")
+            if n.isdigit() and (st := _stat(n)) is not None and st[0] != "Z" and st[1] == pid]
+
+
+@pytest.fixture
+def server(tmp_path):
+    path = str(tmp_path / "calc.sock")
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "calc_server.py"), "--socket", path,
+                             "--no-clips", "--jobs", "2"], cwd=ROOT, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while not os.path.exists(path):
+        assert proc.poll() is None and time.monotonic() < deadline, "o servidor não subiu"
+        time.sleep(0.05)
+    yield proc, path
+    if proc.poll() is None:
+        proc.kill()
+        proc.wait()
+
+
+def _request(path, **msg):
+    with socket.socket(socket.AF_UNIX) as s:
+        s.connect(path)
+        s.sendall(json.dumps(dict(msg, id=1)).encode() + b"\n")
+        return json.loads(s.makefile().readline())
+
+
+@pytest.mark.parametrize("sig", [signal.SIGTERM, signal.SIGINT])
+def test_signal_closes_pool(server, sig):
+    proc, path = server
+    reply = _request(path, op="eval", expr="det(identity(3))")
+    assert reply["ok"] and reply["pool"]
+    workers = _children(proc.pid)
+    assert workers
+    proc.send_signal(sig)
+    assert proc.wait(timeout=10) == 0
+    deadline = time.monotonic() + 5
+    while any(map(_alive, workers)) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not any(map(_alive, workers))
@@ -0,0 +1,58 @@
+import io
+
+import pytest
+
+from calc_stream import Source, evaluate_stream, main, write_results
+
+
+def _run(tmp_path, name, text, jobs=1, timeout=5.0, **kw):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    out = io.StringIO()
+    errors = write_results(evaluate_stream([Source(str(path), **kw)], jobs=jobs, timeout=timeout), out)
+    return out.getvalue(), errors
+
+
+def test_csv_without_header_keeps_first_line(tmp_path):
+    out, errors = _run(tmp_path, "a.csv", "1+1\n2*3\nsqrt(16)\n")
+    assert out == "1+1,2,\n2*3,6,\nsqrt(16),4,\n"
+    assert errors == 0
+
+
+def test_csv_header_detected(tmp_path):
+    out, _ = _run(tmp_path, "b.csv", "expr,nome\n1+1,a\n2*3,b\n")
+    assert out.splitlines() == ["expr,nome,resultado,erro", "1+1,a,2,", "2*3,b,6,"]
+
+
+def test_csv_header_flags(tmp_path):
+    # "pi" é uma expressão válida: a detecção não acha o cabeçalho, --header resolve
+    out, _ = _run(tmp_path, "c.csv", "pi\n1+1\n", header=True)
+    assert out.splitlines() == ["pi,resultado,erro", "1+1,2,"]
+    out, errors = _run(tmp_path, "d.csv", "x\n1+1\n", header=False)
+    assert out.splitlines()[0].startswith("x,,")
+    assert errors == 1
+
+
+def test_csv_column_by_name(tmp_path):
+    out, _ = _run(tmp_path, "e.csv", "aluno,conta\nana,2^10\n", column="conta")
+    assert out.splitlines() == ["aluno,conta,resultado,erro", "ana,2^10,1024,"]
+
+
+def test_no_header_with_column_name_is_refused(tmp_path):
+    path = tmp_path / "f.csv"
+    path.write_text("conta\n1\n", encoding="utf-8")
+    with pytest.raises(SystemExit):
+        main([str(path), "--no-header", "--column", "conta"])
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_slow_line_times_out_alone(tmp_path, jobs):
+    text = "fact(3)\ninv(identity(1500))\nANS + 5\n"
+    out, errors = _run(tmp_path, "g.txt", text, jobs=jobs, timeout=0.1, sequential=True)
+    assert out.splitlines() == ["6", "erro: tempo esgotado", "11"]
+    assert errors == 1
+
+
+def test_sequential_ans_through_worker(tmp_path):
+    out, _ = _run(tmp_path, "h.txt", "#! sequencial\n2\ndet(identity(3)) + ANS\nANS * 10\n")
+    assert out.splitlines() == ["", "2", "3", "30"]
@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("tkinter")
+
+from teste import TTSTk  # noqa: E402
+
+
+@pytest.fixture
+def tts(root):
+    return TTSTk(root, backend="null")
+
+
+def spoken(tts):
+    return [text for text, _ in tts.engine.spoken]
+
+
+def test_key_echoes_merge(tts, root):
+    for key in ("um", "dois", "três"):
+        tts.say(key, priority=TTSTk.PRIO_KEY)
+    root.run()
+    assert spoken(tts) == ["um dois três"]
+    assert tts.stats["merged"] == 2
+
+
+def test_result_drops_pending_echoes(tts, root):
+    tts.say("sete", priority=TTSTk.PRIO_KEY)
+    tts.say("mais", priority=TTSTk.PRIO_KEY)
+    tts.say("resultado: quarenta e dois", priority=TTSTk.PRIO_RESULT)
+    root.run()
+    assert spoken(tts) == ["resultado: quarenta e dois"]
+    assert tts.stats["dropped"] == 2
+
+
+def test_result_preempts_echo_in_progress(tts, root):
+    tts.say("sete", priority=TTSTk.PRIO_KEY)
+    tts._dispatch()             # eco enviado ao motor, antes do iterate() que o termina
+    tts.say("erro", priority=TTSTk.PRIO_RESULT)
+    root.run()
+    assert spoken(tts)[-1] == "erro"
+    assert tts.stats["preempted"] == 1
+    assert tts.engine.stopped == 1
+
+
+def test_priority_order(tts, root):
+    tts.say("aviso", priority=TTSTk.PRIO_TEXT)
+    tts.say("resultado", priority=TTSTk.PRIO_RESULT)
+    root.run()
+    assert spoken(tts) == ["resultado", "aviso"]
+
+
+def test_null_backend_speaks(tts, root):
+    tts.say("olá")
+    tts.say("mundo", rate=220)
+    root.run()
+    assert tts.engine.spoken == [("olá", 180), ("mundo", 220)]
+    m = tts.metrics()
+    assert m["backend"] == "null"
+    assert m["spoken"] == 2
@@ -0,0 +1,67 @@
+import os
+import stat
+import subprocess
+import sys
+
+import pytest
+
+import tts_backends
+
+# espeak-ng de mentira: lê o texto até o EOF e devolve um WAV de 16 kHz com 2 bytes por caractere
+FAKE_ESPEAK = """#!{python}
+import sys
+text = sys.stdin.buffer.read()
+header = bytearray(44)
+header[24:28] = (16000).to_bytes(4, "little")
+sys.stdout.buffer.write(bytes(header) + b"\\x01\\x00" * len(text))
+"""
+
+
+@pytest.fixture
+def fake_espeak(tmp_path, monkeypatch):
+    if os.name != "posix":
+        pytest.skip("script executável só no POSIX")
+    exe = tmp_path / "espeak-ng"
+    exe.write_text(FAKE_ESPEAK.format(python=sys.executable))
+    exe.chmod(exe.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("PATH", str(tmp_path))
+    spawned = []
+    popen = subprocess.Popen
+
+    def counting_popen(args, **kw):
+        spawned.append(args)
+        return popen(args, **kw)
+
+    monkeypatch.setattr(subprocess, "Popen", counting_popen)
+    return spawned
+
+
+def test_espeak_command_reuses_spare_process(fake_espeak):
+    synth = tts_backends._EspeakCommand((), chunk_ms=20)
+    try:
+        assert synth.sample_rate == 16000
+        assert len(fake_espeak) == 2              # a fala de partida e o reserva
+        pcm = []
+        synth.speak("abc", 180, 0.0, pcm.append, lambda: False)
+        assert b"".join(pcm) == b"\x01\x00" * 3
+        assert len(fake_espeak) == 3              # usou o reserva e abriu o próximo
+        synth.speak("abc", 220, 0.5, pcm.append, lambda: False)
+        assert len(fake_espeak) == 5              # rate novo: o reserva não serve
+        assert fake_espeak[-1][2:6] == ["-s", "220", "-a", "50"]
+    finally:
+        synth.close()
+    assert synth._spare is None
+
+
+def test_null_engine_records():
+    engine = tts_backends.NullEngine(rate=150)
+    events = []
+    engine.connect("started-utterance", lambda name: events.append(("start", name)))
+    engine.connect("finished-utterance", lambda name, done: events.append(("end", name, done)))
+    engine.say("um")
+    engine.say("dois")
+    engine.iterate()
+    engine.stop()
+    assert engine.spoken == [("um", 150), ("dois", 150)]
+    assert engine.stopped == 1
+    assert events == [("start", "um"), ("end", "um", True), ("end", "dois", False)]
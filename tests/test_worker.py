@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from calc_core import EvalWorker
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# host de mentira: sobe um worker, faz uma conta, mostra o pid do worker e fica parado
+HOST = """
+import sys, time
+sys.path.insert(0, {root!r})
+from calc_core import EvalWorker
+w = EvalWorker(timeout=30)
+w.submit("1+1", "DEG", 0)
+while w.poll() is None:
+    time.sleep(0.01)
+print(w._proc.pid, flush=True)
+time.sleep(60)
+"""
+
+
+def _alive(pid):
+    """Processo existe e não é zumbi (no contêiner o init pode demorar a recolher)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+    except OSError:
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def _wait(worker):
+    while True:
+        out = worker.poll()
+        if out is not None:
+            return out
+        time.sleep(0.01)
+
+
+def test_worker_evaluates_and_restarts():
+    worker = EvalWorker(timeout=0.5)
+    try:
+        worker.submit("6*7", "DEG", 0)
+        assert _wait(worker) == (True, 42)
+        worker.submit("integrate(sin(x)^2, x, 0, 10^7)", "RAD", 0, limits=(1e-15, 10 ** 9))
+        assert _wait(worker) == (False, "tempo esgotado")
+        worker.submit("ANS + 1", "DEG", 1)
+        assert _wait(worker) == (True, 2)
+    finally:
+        worker.shutdown()
+
+
+@pytest.mark.skipif(os.name != "posix", reason="SIGKILL no host só no POSIX")
+def test_worker_exits_when_host_is_killed():
+    host = subprocess.Popen([sys.executable, "-c", HOST.format(root=ROOT)], stdout=subprocess.PIPE, text=True)
+    try:
+        pid = int(host.stdout.readline())
+        assert _alive(pid)
+    finally:
+        host.kill()
+        host.wait()
+    deadline = time.monotonic() + 5
+    while _alive(pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(pid)
@@ -0,0 +1,95 @@
+import pytest
+
+from calc_core import CalcEngine, CostError
+from worksheet import Worksheet, run_steps
+
+
+@pytest.fixture
+def sheet():
+    s = Worksheet(CalcEngine(), path=":memory:")
+    yield s
+    s.close()
+
+
+def test_define_and_recompute(sheet):
+    sheet.execute("a = 3")
+    sheet.execute("b = 2*a + 1")
+    sheet.execute("f(x) = x^2 + a")
+    assert sheet.execute("c = f(b)").value == 52
+    update = sheet.execute("a = 4")
+    assert update.recomputed == ("b", "c")
+    assert sheet.engine.variables == {"a": 4, "b": 9, "c": 85}
+
+
+def test_failed_dependent_rolls_back(sheet):
+    sheet.execute("a = 2")
+    sheet.execute("b = 1/a")
+    with pytest.raises(ValueError, match="^b:"):
+        sheet.execute("a = 0")
+    assert sheet.engine.variables == {"a": 2, "b": 0.5}
+    assert sheet.get("a").text == "2"
+
+
+def test_failed_function_redefinition_rolls_back(sheet):
+    sheet.execute("f(x) = x + 1")
+    sheet.execute("b = f(0)")
+    with pytest.raises(ValueError):
+        sheet.execute("f(x) = 1/x")
+    assert sheet.engine.user_functions["f"] == (("x",), "x + 1")
+    assert sheet.engine.evaluate("f(1)") == 2
+
+
+def test_cycles_and_reserved_names(sheet):
+    sheet.execute("a = 1")
+    sheet.execute("b = a + 1")
+    with pytest.raises(ValueError, match="circular"):
+        sheet.execute("a = b")
+    with pytest.raises(ValueError, match="reservado"):
+        sheet.execute("sin = 3")
+    with pytest.raises(ValueError, match="usada por"):
+        sheet.execute("a =")
+
+
+def test_plan_and_run_steps_match_define(sheet):
+    sheet.execute("a = 3")
+    sheet.execute("f(x) = x*a")
+    sheet.execute("b = f(2)")
+    steps = sheet.plan("a", "5")
+    assert steps == (("a", None, "5"), ("b", None, "f(2)"))
+
+    other = CalcEngine()
+    other.load_names(sheet.engine.names_state())
+    values = run_steps(other, steps)
+    assert values == {"a": 5, "b": 10}
+
+    sheet.define("a", "5", values=values)
+    assert sheet.engine.variables == {"a": 5, "b": 10}
+
+
+def test_run_steps_reports_failing_dependent(sheet):
+    sheet.execute("a = 2")
+    sheet.execute("b = 1/a")
+    with pytest.raises(ValueError, match="^b:"):
+        run_steps(CalcEngine(), (("a", None, "0"), ("b", None, "1/a")))
+
+
+def test_reload_from_disk(tmp_path):
+    path = str(tmp_path / "sheet.sqlite3")
+    s = Worksheet(CalcEngine(), path=path)
+    s.execute("a = 3")
+    s.execute("f(x) = x + a")
+    s.execute("b = f(1)")
+    s.close()
+    engine = CalcEngine()
+    s = Worksheet(engine, path=path)
+    assert engine.variables == {"a": 3, "b": 4}
+    assert engine.evaluate("f(10)") == 13
+    s.close()
+
+
+def test_user_function_body_is_checked():
+    engine = CalcEngine()
+    engine.set_function("g", ("x",), "x^x")
+    assert engine.evaluate("g(3)") == 27
+    with pytest.raises(CostError):
+        engine.check("g(10^6)")
@@ -0,0 +1,585 @@
+"""
+Motores de voz do TTSTk, trocáveis por máquina.
+
+Todos seguem o pedaço da API do pyttsx3 que o TTSTk usa (loop externo):
+connect("started-utterance" | "finished-utterance", cb), say(texto),
+iterate(), stop(), startLoop(False), endLoop() e setProperty/getProperty
+("rate", "volume", "voice"). say() e iterate() voltam na hora; o TTSTk
+chama iterate() a cada pump (ou no thread de áudio).
+
+    pyttsx3  motor nativo (SAPI5 no Windows, NSSpeech no macOS, espeak no
+             Linux) dentro do processo
+    espeak   worker espeak-ng em processo próprio, aberto uma vez e mantido
+             quente: recebe o texto pelo pipe e devolve PCM em blocos de
+             ~50 ms, tocados pelo mixer do pygame conforme chegam (o áudio
+             começa no primeiro bloco, sem esperar a frase inteira)
+    null     não toca nada; guarda (texto, rate) em `spoken` (testes)
+
+"auto" usa o motor gravado para esta máquina por bench/bench_tts.py --save
+(ou o primeiro disponível em AUTO_ORDER). No app, CALC_TTS escolhe.
+"""
+import importlib.util
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import time
+import wave
+from array import array
+from collections import deque
+
+AUTO_ORDER = ("pyttsx3", "espeak")
+
+
+def _cache_dir():
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "blind-calculator")
+
+
+def _load_json(path):
+    """Conteúdo de `path` se foi gravado nesta plataforma (None se não houver)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("platform") != sys.platform:
+        return None
+    return data
+
+
+def _save_json(path, data):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"platform": sys.platform, **data}, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass     # sem cache: a próxima execução escolhe de novo
+
+
+# ======= pyttsx3 =======
+# pyttsx3 (e o comtypes/SAPI5 por trás dele) demora para importar: só no primeiro motor,
+# que no modo threaded é criado no thread de áudio, com a janela já na tela
+pyttsx3 = None
+
+
+def load_pyttsx3():
+    global pyttsx3
+    if pyttsx3 is None:
+        import pyttsx3 as module
+        pyttsx3 = module
+    return pyttsx3
+
+
+def _voice_cache_path():
+    return os.path.join(_cache_dir(), "voice.json")
+
+
+def _load_cached_voice():
+    """Id da voz pt-BR escolhida numa execução anterior (None se não houver)."""
+    data = _load_json(_voice_cache_path())
+    return (data.get("voice") or None) if data else None
+
+
+def _save_cached_voice(voice_id):
+    _save_json(_voice_cache_path(), {"voice": voice_id})
+
+
+def _find_ptbr_voice(engine):
+    try:
+        for v in engine.getProperty("voices"):
+            name = (v.name or "").lower()
+            langs = "".join(getattr(v, "languages", [])).lower()
+            if "portuguese" in name or "brazil" in name or "pt_" in langs:
+                return v.id
+    except Exception:
+        pass
+    return None
+
+
+def pyttsx3_engine(rate, volume, voice_hint_ptbr=True):
+    """
+    Cria o motor pyttsx3 com rate/volume e, se possível, uma voz pt-BR.
+    A voz escolhida fica em disco (_voice_cache_path): nas próximas execuções
+    é aplicada direto, sem percorrer todas as vozes instaladas.
+    """
+    engine = load_pyttsx3().init(driverName=None)  # no Windows escolhe SAPI5
+    engine.setProperty("rate", int(rate))
+    engine.setProperty("volume", float(volume))
+
+    if voice_hint_ptbr:
+        cached = _load_cached_voice()
+        if cached:
+            try:
+                engine.setProperty("voice", cached)
+                if engine.getProperty("voice") == cached:
+                    return engine
+            except Exception:
+                pass      # voz desinstalada: procura outra
+        voice_id = _find_ptbr_voice(engine)
+        if voice_id:
+            engine.setProperty("voice", voice_id)
+            _save_cached_voice(voice_id)
+    return engine
+
+
+class SpeechEngine:
+    """Base dos motores próprios: propriedades, callbacks e um loop externo que não faz nada."""
+    name = ""
+
+    def __init__(self, rate, volume, voice=""):
+        self.props = {"rate": int(rate), "volume": float(volume), "voice": voice, "voices": []}
+        self._callbacks = {"started-utterance": [], "finished-utterance": []}
+
+    def connect(self, topic, cb):
+        self._callbacks[topic].append(cb)
+
+    def setProperty(self, name, value):
+        self.props[name] = value
+
+    def getProperty(self, name):
+        return self.props[name]
+
+    def startLoop(self, use_driver_loop=True):
+        pass
+
+    def endLoop(self):
+        pass
+
+    def _fire(self, topic, *args):
+        for cb in self._callbacks[topic]:
+            cb(*args)
+
+
+# ======= Worker espeak-ng =======
+ESPEAK_PREFIX = "espeak:"       # voice_id dos clipes: distingue as vozes do espeak das do pyttsx3
+_PTBR_VOICES = ("pt-br", "pt-BR", "brazil", "pt")
+
+
+def _espeak_library_path():
+    import ctypes.util
+    return ctypes.util.find_library("espeak-ng") or ctypes.util.find_library("espeak")
+
+
+def _espeak_command():
+    return shutil.which("espeak-ng") or shutil.which("espeak")
+
+
+class _EspeakLibrary:
+    """
+    libespeak-ng por ctypes, em modo síncrono: espeak_Synth chama o callback
+    com cada bloco de `chunk_ms` de PCM int16 mono; devolver 1 aborta a fala.
+    """
+    AUDIO_OUTPUT_SYNCHRONOUS = 2
+    POS_CHARACTER = 1
+    CHARS_UTF8 = 1
+    RATE, VOLUME = 1, 2
+
+    def __init__(self, voices, chunk_ms):
+        import ctypes
+        path = _espeak_library_path()
+        if path is None:
+            raise OSError("libespeak-ng não encontrada")
+        lib = ctypes.CDLL(path)
+        self.sample_rate = lib.espeak_Initialize(self.AUDIO_OUTPUT_SYNCHRONOUS, int(chunk_ms), None, 0)
+        if self.sample_rate <= 0:
+            raise OSError("espeak_Initialize falhou")
+        callback_type = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short),
+                                         ctypes.c_int, ctypes.c_void_p)
+        self._callback = callback_type(self._on_audio)     # referência viva: o C guarda só o ponteiro
+        lib.espeak_SetSynthCallback(self._callback)
+        lib.espeak_Synth.argtypes = [ctypes.c_char_p, ctypes.c_size_t, ctypes.c_uint, ctypes.c_int,
+                                     ctypes.c_uint, ctypes.c_uint, ctypes.c_void_p, ctypes.c_void_p]
+        lib.espeak_SetVoiceByName.argtypes = [ctypes.c_char_p]
+        self._lib = lib
+        self._string_at = ctypes.string_at
+        self._emit = self._cancelled = None
+        self.voice = ""
+        for name in voices:
+            if lib.espeak_SetVoiceByName(name.encode("ascii")) == 0:
+                self.voice = name
+                break
+
+    def _on_audio(self, wav, samples, events):
+        if self._cancelled():
+            return 1
+        if samples > 0:
+            self._emit(self._string_at(wav, samples * 2))
+        return 0
+
+    def speak(self, text, rate, volume, emit, cancelled):
+        self._emit, self._cancelled = emit, cancelled
+        self._lib.espeak_SetParameter(self.RATE, int(rate), 0)
+        self._lib.espeak_SetParameter(self.VOLUME, int(volume * 100), 0)
+        data = text.encode("utf-8") + b"\0"
+        self._lib.espeak_Synth(data, len(data), 0, self.POS_CHARACTER, 0, self.CHARS_UTF8, None, None)
+
+    def close(self):
+        self._lib.espeak_Terminate()
+
+
+class _EspeakCommand:
+    """
+    Sem a biblioteca: um `espeak-ng --stdout` por fala, com o texto pela
+    entrada padrão e o WAV lido do stdout em blocos, conforme sai.
+
+    Um processo só para todas as falas não dá: com --stdout o espeak-ng
+    escreve um WAV contínuo, sem marca de onde cada fala termina, e -s/-a
+    valem para o processo inteiro. Para a partida do processo não pesar na
+    fala, o da próxima já fica aberto (`_spare`, esperando o texto na
+    entrada padrão) enquanto esta é sintetizada; só rate ou volume novos
+    pagam a partida de novo.
+    """
+
+    def __init__(self, voices, chunk_ms):
+        self.exe = _espeak_command()
+        if self.exe is None:
+            raise OSError("espeak-ng não encontrado")
+        self.voice = voices[0] if voices else ""
+        self.sample_rate = 22050
+        self._chunk_ms = chunk_ms
+        self._spare = None      # (rate, volume, processo) à espera da próxima fala
+        # primeira execução: lê a taxa do cabeçalho e deixa o executável e as vozes no cache do disco
+        self.speak("a", 180, 0.0, lambda pcm: None, lambda: False)
+
+    def _spawn(self, rate, volume):
+        args = [self.exe, "--stdout", "-s", str(rate), "-a", str(volume)]
+        if self.voice:
+            args += ["-v", self.voice]
+        return subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL)
+
+    def _take(self, rate, volume):
+        """Processo para a fala: o reserva, se foi aberto com o mesmo rate e volume e ainda vive."""
+        spare, self._spare = self._spare, None
+        if spare is not None:
+            if spare[:2] == (rate, volume) and spare[2].poll() is None:
+                return spare[2]
+            _reap(spare[2])
+        return self._spawn(rate, volume)
+
+    def speak(self, text, rate, volume, emit, cancelled):
+        rate, volume = int(rate), int(volume * 100)
+        proc = self._take(rate, volume)
+        try:
+            proc.stdin.write(text.encode("utf-8"))
+            proc.stdin.close()
+            self._spare = (rate, volume, self._spawn(rate, volume))
+            header = proc.stdout.read(44)
+            if len(header) == 44:
+                self.sample_rate = int.from_bytes(header[24:28], "little")
+            block = max(2, self.sample_rate * self._chunk_ms // 1000 * 2)
+            rest = b""
+            while not cancelled():
+                data = proc.stdout.read1(block)
+                if not data:
+                    break
+                data = rest + data
+                cut = len(data) & ~1          # amostras int16 inteiras
+                rest = data[cut:]
+                if cut:
+                    emit(data[:cut])
+        finally:
+            _reap(proc)
+
+    def close(self):
+        spare, self._spare = self._spare, None
+        if spare is not None:
+            _reap(spare[2])
+
+
+def _reap(proc):
+    proc.kill()
+    proc.wait()
+    for f in (proc.stdin, proc.stdout):
+        if f is not None and not f.closed:
+            f.close()
+
+
+def _open_espeak(voices, chunk_ms):
+    try:
+        return _EspeakLibrary(voices, chunk_ms)
+    except OSError:
+        return _EspeakCommand(voices, chunk_ms)
+
+
+def _espeak_worker_main(conn, cancel, voice_hint_ptbr, chunk_ms):
+    """
+    Processo do worker: abre o espeak uma vez e atende (seq, texto, rate, volume)
+    até receber None. Responde (seq, pcm) a cada bloco e (seq, None) no fim;
+    `cancel` (multiprocessing.Value) com seq >= ao da fala a corta no próximo bloco.
+    """
+    t0 = time.perf_counter()
+    try:
+        synth = _open_espeak(_PTBR_VOICES if voice_hint_ptbr else (), chunk_ms)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", synth.sample_rate, synth.voice, time.perf_counter() - t0))
+    try:
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                break
+            if msg is None:
+                break
+            seq, text, rate, volume = msg
+            try:
+                if cancel.value < seq:
+                    synth.speak(text, rate, volume, lambda pcm: conn.send((seq, pcm)),
+                                lambda: cancel.value >= seq)
+            except (EOFError, OSError, BrokenPipeError):
+                break
+            except Exception:
+                pass      # fala que o espeak recusou termina vazia
+            conn.send((seq, None))
+    finally:
+        synth.close()
+
+
+class EspeakEngine(SpeechEngine):
+    """
+    Motor "espeak": o worker (_espeak_worker_main) sintetiza; aqui só se
+    recebe o PCM e se entrega ao canal CHANNEL do mixer do pygame, um
+    Sound tocando e outro na fila (os blocos que chegam enquanto isso são
+    juntados num só). "started-utterance" sai quando o primeiro bloco
+    começa a tocar. Se o worker morrer, a próxima fala sobe outro.
+    `startup_s` é o tempo de abrir o espeak no worker (a criação toda
+    inclui subir o processo).
+    """
+    name = "espeak"
+    CHANNEL = 2       # 0: clipes das teclas; 1: gráfico sonoro
+
+    def __init__(self, rate=180, volume=1.0, voice_hint_ptbr=True, chunk_ms=50, timeout=10.0):
+        super().__init__(rate, volume)
+        try:
+            import pygame
+        except ImportError:
+            raise RuntimeError("o motor espeak precisa do pygame para tocar o áudio") from None
+        self._pygame = pygame
+        self._voice_hint_ptbr = bool(voice_hint_ptbr)
+        self._chunk_ms = int(chunk_ms)
+        self._timeout = float(timeout)
+        self._proc = None
+        self._conn = None
+        self._cancel = None
+        self._spawn()
+        self._channel = self._open_channel()
+        self._seq = 0
+        self._pending = deque()     # (texto, rate, volume) esperando a fala atual
+        self._current = None        # [seq, texto, começou a tocar?, síntese terminou?]
+        self._chunks = deque()      # PCM recebido e ainda não entregue ao mixer
+
+    def _spawn(self):
+        parent, child = multiprocessing.Pipe()
+        self._cancel = multiprocessing.Value("i", 0, lock=False)
+        self._proc = multiprocessing.Process(
+            target=_espeak_worker_main, args=(child, self._cancel, self._voice_hint_ptbr, self._chunk_ms),
+            name="tts-espeak", daemon=True)
+        self._proc.start()
+        child.close()
+        self._conn = parent
+        msg = parent.recv() if parent.poll(self._timeout) else ("error", "o worker não respondeu")
+        if msg[0] != "ready":
+            self.close()
+            raise RuntimeError(f"espeak: {msg[1]}")
+        _, self.sample_rate, voice, self.startup_s = msg
+        self.props["voice"] = ESPEAK_PREFIX + voice
+
+    def _open_channel(self):
+        mixer = self._pygame.mixer
+        if not mixer.get_init():
+            mixer.pre_init(frequency=self.sample_rate, size=-16, channels=1, buffer=256)
+            mixer.init()
+        freq, size, channels = mixer.get_init()
+        if freq != self.sample_rate or size != -16:
+            self.close()
+            raise RuntimeError(f"espeak: o mixer está em {freq} Hz, o espeak gera {self.sample_rate} Hz")
+        self._stereo = channels == 2
+        mixer.set_reserved(self.CHANNEL + 1)
+        return mixer.Channel(self.CHANNEL)
+
+    def say(self, text):
+        self._pending.append((str(text), int(self.props["rate"]), float(self.props["volume"])))
+        if self._current is None:
+            self._start()
+
+    def _start(self):
+        text, rate, volume = self._pending.popleft()
+        if self._proc is None or not self._proc.is_alive():
+            self.close()
+            self._spawn()
+        self._seq += 1
+        self._current = [self._seq, text, False, False]
+        self._conn.send((self._seq, text, rate, volume))
+
+    def iterate(self):
+        cur = self._current
+        if cur is None:
+            return
+        try:
+            while self._conn.poll():
+                seq, pcm = self._conn.recv()
+                if seq != cur[0]:
+                    continue      # sobra de fala cortada
+                if pcm is None:
+                    cur[3] = True
+                else:
+                    self._chunks.append(pcm)
+        except (EOFError, OSError):
+            cur[3] = True         # worker morreu: termina com o que já chegou
+        channel = self._channel
+        if self._chunks:
+            if not channel.get_busy():
+                channel.play(self._sound())
+                if not cur[2]:
+                    cur[2] = True
+                    self._fire("started-utterance", cur[1])
+            elif channel.get_queue() is None:
+                channel.queue(self._sound())
+        if cur[3] and not self._chunks and not channel.get_busy():
+            self._current = None
+            self._fire("finished-utterance", cur[1], True)
+            if self._pending and self._current is None:
+                self._start()
+
+    def _sound(self):
+        pcm = b"".join(self._chunks)
+        self._chunks.clear()
+        if self._stereo:
+            mono = array("h", pcm)
+            both = array("h", bytes(len(pcm) * 2))
+            both[0::2] = mono
+            both[1::2] = mono
+            pcm = both.tobytes()
+        return self._pygame.mixer.Sound(buffer=pcm)
+
+    def stop(self):
+        self._pending.clear()
+        cur = self._current
+        if cur is None:
+            return
+        self._cancel.value = cur[0]     # o worker larga a síntese no próximo bloco
+        self._current = None
+        self._chunks.clear()
+        self._channel.stop()
+        self._fire("finished-utterance", cur[1], False)
+
+    def endLoop(self):
+        self.close()
+
+    def close(self):
+        """Encerra o worker (o próximo say() sobe outro)."""
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            self._conn.send(None)
+        except (OSError, ValueError):
+            pass
+        proc.join(1.0)
+        if proc.is_alive():
+            proc.terminate()
+        self._conn.close()
+
+
+def render_espeak_clips(voice_id, rate, items):
+    """Grava cada (texto, caminho) como WAV com a voz `voice_id` do motor espeak (clipes das teclas)."""
+    synth = _open_espeak((voice_id[len(ESPEAK_PREFIX):],), 50)
+    for text, path in items:
+        blocks = []
+        synth.speak(text, rate, 1.0, blocks.append, lambda: False)
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(synth.sample_rate)
+            f.writeframes(b"".join(blocks))
+
+
+# ======= Motor nulo =======
+class NullEngine(SpeechEngine):
+    """
+    Não toca nada: cada fala começa e termina no iterate() seguinte.
+    `spoken` guarda (texto, rate) de tudo que foi pedido e `stopped`
+    quantas falas stop() descartou (testes do TTSTk sem placa de som).
+    """
+    name = "null"
+
+    def __init__(self, rate=180, volume=1.0, voice_hint_ptbr=True):
+        super().__init__(rate, volume, "null")
+        self.spoken = []
+        self.stopped = 0
+        self._pending = deque()
+
+    def say(self, text):
+        self.spoken.append((str(text), int(self.props["rate"])))
+        self._pending.append(str(text))
+
+    def iterate(self):
+        if self._pending:
+            text = self._pending.popleft()
+            self._fire("started-utterance", text)
+            self._fire("finished-utterance", text, True)
+
+    def stop(self):
+        if self._pending:
+            self.stopped += len(self._pending)
+            text = self._pending[0]
+            self._pending.clear()
+            self._fire("finished-utterance", text, False)
+
+
+# ======= Escolha do motor =======
+# nome -> factory(rate, volume, voice_hint_ptbr), a assinatura do engine_factory do TTSTk
+BACKENDS = {"pyttsx3": pyttsx3_engine, "espeak": EspeakEngine, "null": NullEngine}
+
+
+def available(name):
+    """Se `name` tem o que precisa nesta máquina (sem criar o motor nem importar nada pesado)."""
+    if name == "null":
+        return True
+    if name == "pyttsx3":
+        return importlib.util.find_spec("pyttsx3") is not None
+    if name == "espeak":
+        return (importlib.util.find_spec("pygame") is not None
+                and (_espeak_library_path() is not None or _espeak_command() is not None))
+    return False
+
+
+def _preference_path():
+    return os.path.join(_cache_dir(), "tts.json")
+
+
+def load_preferred():
+    """Motor gravado por save_preferred nesta máquina (None se não houver)."""
+    data = _load_json(_preference_path())
+    return data.get("backend") if data else None
+
+
+def save_preferred(name, report=None):
+    """Grava `name` como o motor de "auto" nesta máquina; `report` vai junto (medidas do bench)."""
+    _save_json(_preference_path(), {"backend": name, "report": report or {}})
+
+
+def resolve(name="auto"):
+    """Nome do motor que `name` escolhe: ele mesmo ou, em "auto", o preferido/primeiro disponível."""
+    if name in (None, "", "auto"):
+        preferred = load_preferred()
+        if preferred in BACKENDS and available(preferred):
+            return preferred
+        for candidate in AUTO_ORDER:
+            if available(candidate):
+                return candidate
+        return AUTO_ORDER[0]     # nenhum: o erro aparece ao criar (TTSTk.init_error)
+    if name not in BACKENDS:
+        raise ValueError(f"motor de voz desconhecido: {name} (use {', '.join(BACKENDS)} ou auto)")
+    return name
+
+
+def create(name="auto", rate=180, volume=1.0, voice_hint_ptbr=True):
+    return BACKENDS[resolve(name)](rate, volume, voice_hint_ptbr)
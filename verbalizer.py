@@ -0,0 +1,446 @@
+"""
+Leitura em voz (pt-BR) de expressões e números.
+
+Em vez de trocar caracteres com str.replace, percorre os mesmos tokens que
+o parser usa (calc_parser.tokenize): "asin(" vira "arco seno de", o "-"
+de 1e-5 fica dentro do número e 1234.5 vira "mil duzentos e trinta e
+quatro vírgula cinco".
+
+    v = Verbalizer()
+    v.expression("sin(30) + 2^-3")   # "seno de trinta mais dois elevado a menos três"
+    for trecho in v.chunks(expr):    # expressão longa em pedaços, sob demanda
+        tts.say(trecho)
+    speak_number(-1234.5)            # "menos mil duzentos e trinta e quatro vírgula cinco"
+    speak_number(3 + 4j)             # "três mais quatro i"
+    leitor = ArrayReader(matriz)     # Alt+setas na calculadora: "linha 2, coluna 3: ..."
+
+Caches: o texto de cada número (lru_cache) e o de cada trecho da expressão
+(LRU por sequência de tokens), então reler a mesma conta, ou uma conta
+que só mudou no fim, reaproveita as partes já montadas.
+"""
+import re
+from collections import OrderedDict
+from functools import lru_cache
+
+from calc_core import format_number
+from calc_parser import KIND, TEXT, ParseError, tokenize
+from linalg import SHOW_SIDE, Array
+from stats import SHOW_ITEMS, ColumnSummary, DataList
+
+# ======= Números por extenso =======
+_UNITS = ("zero", "um", "dois", "três", "quatro", "cinco", "seis", "sete", "oito", "nove",
+          "dez", "onze", "doze", "treze", "quatorze", "quinze", "dezesseis", "dezessete",
+          "dezoito", "dezenove")
+_TENS = ("", "", "vinte", "trinta", "quarenta", "cinquenta", "sessenta", "setenta", "oitenta", "noventa")
+_HUNDREDS = ("", "cento", "duzentos", "trezentos", "quatrocentos", "quinhentos", "seiscentos",
+             "setecentos", "oitocentos", "novecentos")
+# Escala curta (pt-BR): 10^3, 10^6, 10^9 ...
+_SCALES = (("mil", "mil"), ("milhão", "milhões"), ("bilhão", "bilhões"), ("trilhão", "trilhões"),
+           ("quatrilhão", "quatrilhões"), ("quintilhão", "quintilhões"), ("sextilhão", "sextilhões"),
+           ("septilhão", "septilhões"), ("octilhão", "octilhões"), ("nonilhão", "nonilhões"),
+           ("decilhão", "decilhões"))
+# Acima disto (10^36) o número é lido em notação científica
+MAX_WORD_DIGITS = 3 * (len(_SCALES) + 1)
+
+_NUMBER_RE = re.compile(r"(\d*)(?:\.(\d*))?(?:[eE]([+-]?\d+))?$")
+
+
+def _below_1000(n):
+    if n == 100:
+        return "cem"
+    parts = []
+    if n >= 100:
+        parts.append(_HUNDREDS[n // 100])
+        n %= 100
+    if n >= 20:
+        parts.append(_TENS[n // 10])
+        n %= 10
+    if n or not parts:
+        parts.append(_UNITS[n])
+    return " e ".join(parts)
+
+
+def integer_words(n):
+    """Inteiro >= 0 por extenso: 1234 -> "mil duzentos e trinta e quatro"."""
+    if n < 1000:
+        return _below_1000(n)
+    groups = []
+    while n:
+        n, g = divmod(n, 1000)
+        groups.append(g)
+    parts = []
+    for scale in range(len(groups) - 1, -1, -1):
+        g = groups[scale]
+        if not g:
+            continue
+        if scale == 0:
+            words = _below_1000(g)
+        elif scale == 1:
+            words = "mil" if g == 1 else f"{_below_1000(g)} mil"
+        else:
+            singular, plural = _SCALES[scale - 1]
+            words = f"{_below_1000(g)} {singular if g == 1 else plural}"
+        parts.append(words)
+    # "e" antes do último grupo quando ele é < 100 ou centena redonda
+    # (mil e duzentos, um milhão e um, um milhão e cem mil)
+    last = next(g for g in groups if g)
+    if len(parts) > 1 and (last < 100 or last % 100 == 0):
+        return " ".join(parts[:-1]) + " e " + parts[-1]
+    return " ".join(parts)
+
+
+def _digits(s):
+    return " ".join(_UNITS[int(d)] for d in s)
+
+
+# Denominadores com nome próprio (2/3 = "dois terços"); os demais até mil usam "avos"
+_FRACTION_NAMES = {2: ("meio", "meios"), 3: ("terço", "terços"), 4: ("quarto", "quartos"),
+                   5: ("quinto", "quintos"), 6: ("sexto", "sextos"), 7: ("sétimo", "sétimos"),
+                   8: ("oitavo", "oitavos"), 9: ("nono", "nonos"), 10: ("décimo", "décimos"),
+                   100: ("centésimo", "centésimos"), 1000: ("milésimo", "milésimos")}
+
+
+def _fraction_text(num, den):
+    """Fração do backend exato ("2/3", "7/100") por extenso."""
+    if not (num.isdigit() and den.isdigit()):
+        return f"{num}/{den}"
+    n, d = int(num), int(den)
+    if len(num) > MAX_WORD_DIGITS or len(den) > MAX_WORD_DIGITS or d > 1000:
+        return f"{number_text(num)} sobre {number_text(den)}"
+    names = _FRACTION_NAMES.get(d)
+    if names is not None:
+        return f"{integer_words(n)} {names[n != 1]}"
+    return f"{integer_words(n)} {integer_words(d)} avos"
+
+
+@lru_cache(maxsize=4096)
+def number_text(text):
+    """Número escrito ("1234.5", "-2", "1.5e-7", ".5", "2/3", "4i") por extenso; texto estranho volta como está."""
+    if len(text) > 1 and text[-1] in "ij" and text[-2] in "0123456789.":
+        return number_text(text[:-1]) + " i"
+    sign = ""
+    if text[:1] in "+-":
+        sign = "menos " if text[0] == "-" else ""
+        text = text[1:]
+    low = text.lower()
+    if low in ("inf", "infinity"):
+        return sign + "infinito"
+    if low == "nan":
+        return "indefinido"
+    if "/" in text:
+        return sign + _fraction_text(*text.split("/", 1))
+    m = _NUMBER_RE.match(text)
+    if m is None or not (m.group(1) or m.group(2)):
+        return sign + text
+    whole, frac, exp = m.groups()
+    whole = whole.lstrip("0") or "0"
+    if len(whole) > MAX_WORD_DIGITS:
+        # inteiro enorme: 12 algarismos significativos e a potência de dez
+        mant = whole[:12].rstrip("0")
+        out = integer_words(int(mant[0]))
+        if len(mant) > 1:
+            out += " vírgula " + _digits(mant[1:])
+        return f"{sign}aproximadamente {out} vezes dez elevado a {integer_words(len(whole) - 1)}"
+    if exp and frac:
+        frac = frac.rstrip("0")    # mantissa de format_number: 1.00000000000e+5000
+    out = integer_words(int(whole))
+    if frac:
+        out += " vírgula " + _digits(frac)
+    if exp:
+        e = int(exp)
+        out += " vezes dez elevado a " + ("menos " if e < 0 else "") + integer_words(abs(e))
+    return sign + out
+
+
+def speak_number(x):
+    """Resultado como a tela mostra (format_number), por extenso."""
+    if isinstance(x, DataList):
+        return _list_text(x)
+    if isinstance(x, ColumnSummary):
+        return f"{x.name}, coluna com {integer_words(len(x))} valores"
+    if isinstance(x, Array):
+        return _array_text(x)
+    if isinstance(x, complex) and x.imag:
+        return _complex_text(x)
+    return number_text(format_number(x))
+
+
+def _value_text(v):
+    """Um elemento de lista ou matriz (real ou complexo) por extenso."""
+    if isinstance(v, complex) and v.imag:
+        return _complex_text(v)
+    return number_text(format_number(v.real if isinstance(v, complex) else v))
+
+
+def _complex_text(z):
+    """3 + 4i: "três mais quatro i"; -2i: "menos dois i"."""
+    im = abs(z.imag)
+    imag = "i" if im == 1 else number_text(format_number(im)) + " i"
+    if z.real == 0:
+        return imag if z.imag > 0 else "menos " + imag
+    return f"{number_text(format_number(z.real))} {'mais' if z.imag > 0 else 'menos'} {imag}"
+
+
+def _and_join(words):
+    return words[0] if len(words) == 1 else ", ".join(words[:-1]) + " e " + words[-1]
+
+
+def _list_text(items):
+    """Lista: "lista de três valores: um, dois e três" (só os SHOW_ITEMS primeiros)."""
+    n = len(items)
+    if not n:
+        return "lista vazia"
+    words = [_value_text(v) for v in items[:SHOW_ITEMS]]
+    head = "lista de um valor" if n == 1 else f"lista de {integer_words(n)} valores"
+    if n > SHOW_ITEMS:
+        return f"{head}, começando por: " + ", ".join(words)
+    return f"{head}: " + _and_join(words)
+
+
+def _array_text(m):
+    """
+    Matriz pequena inteira, linha por linha; grande, só o tamanho e o
+    começo da primeira linha (o resto se percorre com ArrayReader).
+    """
+    if m.ndim == 1:
+        return _list_text(m.a).replace("lista", "vetor", 1)
+    rows, cols = m.shape
+    head = f"matriz de {integer_words(rows)} por {integer_words(cols)}"
+    if rows <= SHOW_SIDE and cols <= SHOW_SIDE:
+        lines = [f"linha {integer_words(r + 1)}: " + _and_join([_value_text(v) for v in m.a[r]])
+                 for r in range(rows)]
+        return f"{head}: " + "; ".join(lines)
+    first = [_value_text(v) for v in m.a[0, :SHOW_ITEMS]]
+    return f"{head}, primeira linha começando por: " + ", ".join(first)
+
+
+class ArrayReader:
+    """
+    Percorre uma lista ou matriz célula a célula (Alt+setas na calculadora),
+    para ouvir um resultado grande sem ele ser lido inteiro.
+
+        r = ArrayReader(m)
+        r.move(0, 1)   # "linha um, coluna dois: cinco"
+        r.row()        # a linha atual inteira (até SHOW_ITEMS valores)
+    """
+
+    def __init__(self, value):
+        self.value = value
+        a = value.a if isinstance(value, Array) else value
+        # vetor é uma matriz de uma linha só
+        self._rows = a if isinstance(value, Array) and value.ndim == 2 else [a]
+        self.n_rows = len(self._rows)
+        self.n_cols = len(self._rows[0]) if self.n_rows else 0
+        self.r = self.c = 0
+
+    def summary(self):
+        return speak_number(self.value)
+
+    def _where(self):
+        if self.n_rows == 1:
+            return f"item {integer_words(self.c + 1)}"
+        return f"linha {integer_words(self.r + 1)}, coluna {integer_words(self.c + 1)}"
+
+    def current(self):
+        if not self.n_cols:
+            return "vazio"
+        return f"{self._where()}: {_value_text(self._rows[self.r][self.c])}"
+
+    def move(self, dr, dc):
+        """Anda (dr, dc) células; parado na borda, avisa "fim" antes da célula."""
+        r = min(max(self.r + dr, 0), max(self.n_rows - 1, 0))
+        c = min(max(self.c + dc, 0), max(self.n_cols - 1, 0))
+        edge = (r, c) == (self.r, self.c)
+        self.r, self.c = r, c
+        return ("fim, " if edge else "") + self.current()
+
+    def home(self):
+        self.r = self.c = 0
+        return self.current()
+
+    def row(self):
+        if not self.n_cols:
+            return "vazio"
+        words = [_value_text(v) for v in self._rows[self.r][:SHOW_ITEMS]]
+        head = "" if self.n_rows == 1 else f"linha {integer_words(self.r + 1)}: "
+        more = f", de {integer_words(self.n_cols)} valores" if self.n_cols > SHOW_ITEMS else ""
+        return head + _and_join(words) + more
+
+
+# ======= Expressões =======
+FUNCTION_SPEECH = {
+    "sin": "seno", "cos": "cosseno", "tan": "tangente",
+    "asin": "arco seno", "acos": "arco cosseno", "atan": "arco tangente",
+    "sqrt": "raiz quadrada", "exp": "exponencial",
+    "ln": "logaritmo natural", "log": "logaritmo",
+    "abs": "valor absoluto", "floor": "piso", "ceil": "teto", "round": "arredondamento",
+    "pow": "potência",
+    "fact": "fatorial", "factorial": "fatorial", "dfact": "fatorial duplo",
+    "nCr": "combinação", "comb": "combinação", "nPr": "permutação", "perm": "permutação",
+    "multinomial": "multinomial", "gamma": "gama",
+    "rad": "radianos", "deg": "graus",
+    "list": "lista", "mean": "média", "median": "mediana",
+    "var": "variância", "pvar": "variância populacional",
+    "stdev": "desvio padrão", "pstdev": "desvio padrão populacional",
+    "pctl": "percentil", "count": "contagem", "sum": "soma", "min": "mínimo", "max": "máximo",
+    "slope": "inclinação", "intercept": "intercepto", "corr": "correlação",
+    "det": "determinante", "inv": "inversa", "solve": "solução", "dot": "produto escalar",
+    "cross": "produto vetorial", "eig": "autovalores", "eigvec": "autovetores",
+    "transpose": "transposta", "trace": "traço", "rank": "posto", "norm": "norma",
+    "identity": "identidade", "re": "parte real", "im": "parte imaginária",
+    "conj": "conjugado", "arg": "argumento",
+    "integrate": "integral", "deriv": "derivada",
+}
+NAME_SPEECH = {"pi": "pi", "e": "número e", "ANS": "resultado anterior", "x": "xis", "i": "i"}
+OP_SPEECH = {
+    "+": "mais", "-": "menos", "*": "vezes", "/": "dividido por", "//": "divisão inteira por",
+    "%": "módulo", "**": "elevado a",
+    "(": "abre parênteses", ")": "fecha parênteses",
+    "[": "abre colchetes", "]": "fecha colchetes",
+}
+CHAR_SPEECH = {"=": "igual", "!": "exclamação", "&": "e comercial", "$": "cifrão", "#": "cerquilha",
+               "?": "interrogação", "@": "arroba", ";": "ponto e vírgula", ":": "dois pontos"}
+
+
+class Verbalizer:
+    """
+    Texto falado de expressões, em trechos de ~chunk_tokens tokens.
+
+    Os trechos quebram antes de um operador, de preferência fora de
+    parênteses (nunca no meio de um número), e cada trecho é gerado só quando pedido:
+    a fala começa sem esperar a expressão inteira. O texto de cada trecho
+    fica num LRU de até cache_size entradas.
+    """
+
+    def __init__(self, chunk_tokens=16, cache_size=512):
+        self.chunk_tokens = int(chunk_tokens)
+        self.cache_size = int(cache_size)
+        self._cache = OrderedDict()     # tupla de (tipo, texto) -> texto falado
+        self.stats = {"hits": 0, "misses": 0}
+
+    def expression(self, expr):
+        """Expressão inteira por extenso."""
+        return " ".join(self.chunks(expr))
+
+    def chunks(self, expr):
+        """Gera os trechos falados de `expr`, do começo para o fim."""
+        tokens = _tokens(expr)
+        n = len(tokens)
+        limit = self.chunk_tokens
+        start = 0
+        depth = 0
+        for i in range(1, n):
+            kind = tokens[i - 1][KIND]
+            depth += (kind in "([") - (kind in ")]")
+            if i - start < limit:
+                continue
+            # quebra antes de operador fora de parênteses; passando do dobro, antes de
+            # qualquer operador/vírgula e, no limite, de qualquer token que não seja "("
+            # (o nome da função e o parêntese dela ficam juntos)
+            kind = tokens[i][KIND]
+            size = i - start
+            if ((kind == "op" and depth <= 0) or (size >= 2 * limit and kind in ("op", ","))
+                    or (size >= 3 * limit and kind != "(")):
+                yield self._phrase(tuple(tokens[start:i]))
+                start = i
+        if start < n:
+            yield self._phrase(tuple(tokens[start:]))
+
+    def _phrase(self, key):
+        cache = self._cache
+        text = cache.get(key)
+        if text is not None:
+            cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return text
+        self.stats["misses"] += 1
+        text = _render(key)
+        cache[key] = text
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return text
+
+    def cache_clear(self):
+        self._cache.clear()
+
+
+def _tokens(expr):
+    """Tokens (tipo, texto) de `expr`; caractere inválido vira um token "char" em vez de erro."""
+    out = []
+    pos = 0
+    while True:
+        try:
+            out.extend((t[KIND], t[TEXT]) for t in tokenize(expr, pos))
+            return out
+        except ParseError as e:
+            if e.pos is None or e.pos < pos:
+                raise
+            out.extend((t[KIND], t[TEXT]) for t in tokenize(expr[:e.pos], pos))
+            out.append(("char", expr[e.pos]))
+            pos = e.pos + 1
+
+
+def _simple_args(key, i):
+    """
+    Se key[i:] é uma lista curta de argumentos simples fechada por ")" (30) ou (-2, 3),
+    devolve (textos dos argumentos, índice depois do ")"); senão None.
+    """
+    args = []
+    n = len(key)
+    while i < n:
+        sign = ""
+        if key[i] == ("op", "-"):
+            sign = "menos "
+            i += 1
+        if i >= n:
+            return None
+        kind, text = key[i]
+        if kind == "num":
+            args.append(sign + number_text(text))
+        elif kind == "name" and text in NAME_SPEECH:
+            args.append(sign + NAME_SPEECH[text])
+        else:
+            return None
+        i += 1
+        if i < n and key[i][KIND] == ")":
+            return args, i + 1
+        if i < n and key[i][KIND] == ",":
+            i += 1
+            continue
+        return None
+    return None
+
+
+def _render(key):
+    words = []
+    append = words.append
+    i = 0
+    n = len(key)
+    while i < n:
+        kind, text = key[i]
+        i += 1
+        if kind == "num":
+            append(number_text(text))
+        elif kind == "name":
+            if text in FUNCTION_SPEECH:
+                append(FUNCTION_SPEECH[text] + " de")
+                if i < n and key[i][KIND] == "(":
+                    simple = _simple_args(key, i + 1)
+                    if simple is not None:
+                        # sin(30): "seno de trinta", sem falar os parênteses
+                        args, i = simple
+                        append(" e ".join(args))
+                    else:
+                        append(OP_SPEECH["("])
+                        i += 1
+            else:
+                append(NAME_SPEECH.get(text, text))
+        elif kind == ",":
+            if words:
+                words[-1] += ","
+            append("e")
+        elif kind == "char":
+            append(CHAR_SPEECH.get(text, text))
+        else:
+            append(OP_SPEECH.get(text, text))
+    return " ".join(words)
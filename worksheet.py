@@ -0,0 +1,367 @@
+"""
+Planilha leve sobre o CalcEngine: variáveis e funções do usuário.
+
+    a = 3
+    b = 2*a + 1            -> 7
+    f(x) = x^2 + a
+    c = f(b)               -> 52
+    a = 4                  -> refaz só b e c
+    c =                    -> apaga c (se ninguém depender dele)
+
+Cada definição guarda o texto, o programa compilado e os nomes do usuário
+que cita. O grafo fica guardado ao contrário (nome -> quem o cita): mudar
+uma entrada percorre só os dependentes dela, em ordem topológica, e roda
+o programa já compilado de cada um, sem reanalisar texto. Mudar uma
+variável custa o número de dependentes, não o tamanho da planilha.
+
+Funções não têm valor: o corpo vai para o namespace do motor
+(CalcEngine.set_function) e lê as variáveis na hora da chamada; quem
+chama a função depende dela (e, através dela, do que ela cita). ANS entra
+pelo valor da hora da definição, sem dependência.
+
+A planilha fica num SQLite (como o histórico). Cada mudança regrava só as
+linhas mexidas; `seq` mantém uma ordem em que cada definição vem depois do
+que ela cita, então abrir é refazer as linhas nessa ordem. Valores int e
+float vão junto: abrir no modo float não recalcula nada (listas, matrizes
+e complexos são refeitos).
+"""
+import os
+import re
+import sqlite3
+from collections import namedtuple
+
+from calc_parser import program_names
+
+# nome = expressão, ou nome(parâmetros) = expressão; "nome =" apaga
+_DEFINITION_RE = re.compile(r"""
+    \s*([A-Za-z_][A-Za-z_0-9]*)\s*
+    (\(\s*((?:[A-Za-z_][A-Za-z_0-9]*(?:\s*,\s*[A-Za-z_][A-Za-z_0-9]*)*)?)\s*\)\s*)?
+    =(.*)""", re.VERBOSE | re.DOTALL)
+
+# value: None em funções e ao apagar; recomputed: variáveis refeitas, na ordem
+Update = namedtuple("Update", "name value recomputed")
+
+# params: "x,y" nas funções, NULL nas variáveis; value sem tipo declarado guarda int e float como vieram
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheet (
+    name   TEXT PRIMARY KEY,
+    params TEXT,
+    expr   TEXT NOT NULL,
+    value,
+    seq    INTEGER NOT NULL
+);
+"""
+
+
+def default_sheet_path():
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "blind-calculator", "worksheet.sqlite3")
+
+
+def _stored(value):
+    """Valor que vai para o disco: int de 64 bits ou float; o resto é recalculado ao abrir."""
+    if value.__class__ is float or (value.__class__ is int and -2 ** 63 <= value < 2 ** 63):
+        return value
+    return None
+
+
+class Definition:
+    """Uma linha da planilha; `params` é None nas variáveis e `uses` são os nomes do usuário citados."""
+    __slots__ = ("name", "params", "text", "code", "spec", "uses")
+
+    def __init__(self, name, params, text, code, spec, uses):
+        self.name = name
+        self.params = params
+        self.text = text
+        self.code = code
+        self.spec = spec          # backend_spec com que `code` foi compilado
+        self.uses = uses
+
+    @property
+    def source(self):
+        """Como o usuário escreveria: "a = 3" ou "f(x, y) = x*y"."""
+        head = self.name if self.params is None else f"{self.name}({', '.join(self.params)})"
+        return f"{head} = {self.text}"
+
+
+class Worksheet:
+    """
+    execute() roda uma linha (definição ou expressão); define() e remove()
+    mudam a planilha e devolvem um Update.
+    path=":memory:" não grava nada em disco (testes e benchmarks).
+    """
+
+    def __init__(self, engine, path=None):
+        self.engine = engine
+        self.path = path or default_sheet_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self.db.commit()
+
+        self._defs = {}       # nome -> Definition, cada uma depois das que ela cita
+        self._users = {}      # nome -> nomes que o citam
+        self._seq = 0
+        self.skipped = []     # (nome, erro) do que não carregou (ex.: cita colunas de CSV)
+        self._load()
+
+    def __len__(self):
+        return len(self._defs)
+
+    def __contains__(self, name):
+        return name in self._defs
+
+    def __iter__(self):
+        return iter(self._defs.values())
+
+    def get(self, name):
+        return self._defs.get(name)
+
+    @staticmethod
+    def parse(text):
+        """(nome, parâmetros ou None, expressão) se `text` é uma definição, senão None."""
+        m = _DEFINITION_RE.fullmatch(text)
+        if m is None:
+            return None
+        name, paren, params, expr = m.groups()
+        if paren is not None:
+            params = tuple(p.strip() for p in params.split(",")) if params.strip() else ()
+        return name, params, expr.strip()
+
+    def execute(self, text):
+        """Uma linha: "a = 3", "f(x) = x^2 + a", "a =" (apaga) ou uma expressão comum (engine.evaluate)."""
+        parsed = self.parse(text)
+        if parsed is None:
+            if "=" in text:
+                raise ValueError("definição inválida: use nome = expressão ou f(x) = expressão")
+            return Update(None, self.engine.evaluate(text), ())
+        name, params, expr = parsed
+        if not expr:
+            return self.remove(name)
+        return self.define(name, expr, params)
+
+    def define(self, name, expr, params=None, values=None):
+        """
+        name = expr (função se `params` não é None). Refaz, em ordem, só o
+        que depende de `name`; se algum dependente falhar (a = 0 com
+        b = 1/a), nada muda e o erro sobe como ValueError.
+        `values` ({variável: valor}, de run_steps() sobre plan() em outro
+        processo) dispensa as contas: só instala e grava.
+        """
+        engine = self.engine
+        expr, params, code, uses, order, old = self._prepare(name, expr, params)
+        if params is not None:
+            value = None
+        else:
+            value = engine.run_code(code) if values is None else values[name]
+        old_value = engine.variables.get(name)
+        before = {dep: engine.variables[dep] for dep in order if dep in engine.variables}
+        self._install(old, name, params, expr, value)
+        dep = None
+        try:
+            for dep in order:
+                d = self._defs[dep]
+                if d.params is None:
+                    engine.set_variable(dep, engine.run_code(self._code(d)) if values is None else values[dep])
+        except ValueError as e:
+            # desfaz: a mudança só vale se todos os dependentes ainda dão conta
+            for key, previous in before.items():
+                engine.set_variable(key, previous)
+            if old is None:
+                engine.remove_name(name)
+            elif old.params is None:
+                engine.set_variable(name, old_value)
+            else:
+                engine.set_function(name, old.params, old.text)
+            raise ValueError(f"{dep}: {e}") from None
+
+        if old is not None:
+            for used in old.uses:
+                self._users[used].discard(name)
+        for used in uses:
+            self._users.setdefault(used, set()).add(name)
+        # `name` e os dependentes (já em ordem) vão para o fim: a ordem continua refazível
+        self._defs.pop(name, None)
+        self._defs[name] = Definition(name, params, expr, code, engine.backend_spec, uses)
+        for dep in order:
+            self._defs[dep] = self._defs.pop(dep)
+        self._save([name, *order])
+        return Update(name, value, tuple(dep for dep in order if self._defs[dep].params is None))
+
+    def plan(self, name, expr, params=None):
+        """
+        Checa name = expr como define(), sem mudar nada, e devolve os passos
+        para run_steps(): ((nome, parâmetros, texto), ...), a própria
+        definição e depois as variáveis que dependem dela, em ordem.
+        """
+        expr, params, _, _, order, _ = self._prepare(name, expr, params)
+        defs = self._defs
+        return ((name, params, expr),
+                *((dep, None, defs[dep].text) for dep in order if defs[dep].params is None))
+
+    def _prepare(self, name, expr, params):
+        """Checagens de define(): (texto, parâmetros, programa, nomes citados, dependentes, definição antiga)."""
+        engine = self.engine
+        expr = expr.strip()
+        if not expr:
+            raise ValueError("expressão vazia")
+        params = None if params is None else tuple(params)
+        self._check_name(name, params)
+        code = engine.compile(expr, params or ())
+        uses = self._uses(code, params)
+        if name in uses:
+            raise ValueError(f"{name} não pode depender de si mesma")
+        order = self._dependents(name)
+        loop = uses.intersection(order)
+        if loop:
+            raise ValueError(f"definição circular: {min(loop)} já depende de {name}")
+        old = self._defs.get(name)
+        if old is not None and _arity(old.params) != _arity(params) and self._users.get(name):
+            raise ValueError(f"{name} é usada por {', '.join(sorted(self._users[name]))}: "
+                             f"mude ou apague essas definições antes")
+        return expr, params, code, uses, order, old
+
+    def remove(self, name):
+        """Apaga a variável ou função `name`, se nenhuma outra definição a usa."""
+        d = self._defs.get(name)
+        if d is None:
+            raise ValueError(f"nome desconhecido: {name}")
+        users = self._users.get(name)
+        if users:
+            raise ValueError(f"{name} é usada por {', '.join(sorted(users))}")
+        for used in d.uses:
+            self._users[used].discard(name)
+        self._users.pop(name, None)
+        del self._defs[name]
+        self.engine.remove_name(name)
+        with self.db:
+            self.db.execute("DELETE FROM sheet WHERE name = ?", (name,))
+        return Update(name, None, ())
+
+    def close(self):
+        self.db.close()
+
+    # ---------- grafo ----------
+    def _check_name(self, name, params):
+        engine = self.engine
+        builtin = type(engine)
+        if name in builtin.FUNCTIONS or name in builtin.CONSTANTS or name in engine.datasets:
+            raise ValueError(f"nome reservado: {name}")
+        if params is None:
+            return
+        if len(set(params)) != len(params):
+            raise ValueError(f"parâmetro repetido em {name}")
+        for p in params:
+            if p == name or p in engine.FUNCTIONS or p in builtin.CONSTANTS:
+                raise ValueError(f"nome reservado para parâmetro: {p}")
+
+    def _uses(self, code, params):
+        engine = self.engine
+        local = params or ()
+        return frozenset(n for n in program_names(code)
+                         if n not in local and (n in engine.variables or n in engine.user_functions))
+
+    def _dependents(self, name):
+        """Quem depende de `name`, direta ou indiretamente, em ordem de recálculo (DFS em pós-ordem)."""
+        users = self._users
+        order = []
+        seen = {name}
+        stack = [(name, iter(users.get(name, ())))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if child not in seen:
+                    seen.add(child)
+                    stack.append((child, iter(users.get(child, ()))))
+                    break
+            else:
+                stack.pop()
+                order.append(node)
+        order.pop()           # o próprio `name`, último da pós-ordem
+        order.reverse()
+        return order
+
+    def _install(self, old, name, params, expr, value):
+        """Põe a definição nova no motor; variável virando função (ou o contrário) sai antes."""
+        engine = self.engine
+        if old is not None and (old.params is None) != (params is None):
+            engine.remove_name(name)
+        if params is None:
+            engine.set_variable(name, value)
+        else:
+            engine.set_function(name, params, expr)
+
+    def _code(self, d):
+        """Programa de `d` no backend atual (recompilado só quando o backend muda)."""
+        spec = self.engine.backend_spec
+        if d.spec != spec:
+            d.code = self.engine.compile(d.text, d.params or ())
+            d.spec = spec
+        return d.code
+
+    # ---------- disco ----------
+    def _save(self, names):
+        variables = self.engine.variables
+        rows = []
+        for name in names:
+            d = self._defs[name]
+            self._seq += 1
+            params = None if d.params is None else ",".join(d.params)
+            rows.append((name, params, d.text, _stored(variables.get(name)), self._seq))
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO sheet(name, params, expr, value, seq) "
+                                "VALUES (?, ?, ?, ?, ?)", rows)
+
+    def _load(self):
+        engine = self.engine
+        reuse = engine.backend == "float"
+        for name, params, expr, value, seq in self.db.execute(
+                "SELECT name, params, expr, value, seq FROM sheet ORDER BY seq"):
+            self._seq = seq
+            if params is not None:
+                params = tuple(params.split(",")) if params else ()
+            try:
+                self._check_name(name, params)
+                code = engine.compile(expr, params or ())
+                if params is None and (value is None or not reuse):
+                    value = engine.run_code(code)
+            except ValueError as e:
+                self.skipped.append((name, str(e)))
+                continue
+            d = Definition(name, params, expr, code, engine.backend_spec, self._uses(code, params))
+            if params is None:
+                engine.set_variable(name, value)
+            else:
+                engine.set_function(name, params, expr)
+            for used in d.uses:
+                self._users.setdefault(used, set()).add(name)
+            self._defs[name] = d
+
+
+def run_steps(engine, steps):
+    """
+    Roda os passos de Worksheet.plan() em `engine` e devolve {variável: valor}.
+    É a parte demorada de define(), separada para o EvalWorker (timeout,
+    limite de memória e Esc); o motor fica com os nomes novos.
+    """
+    values = {}
+    name = steps[0][0]
+    try:
+        for name, params, text in steps:
+            if params is None:
+                values[name] = engine.run_code(engine.compile(text))
+                engine.set_variable(name, values[name])
+            else:
+                engine.set_function(name, params, text)
+    except ValueError as e:
+        if name == steps[0][0]:
+            raise
+        raise ValueError(f"{name}: {e}") from None
+    return values
+
+
+def _arity(params):
+    return None if params is None else len(params)